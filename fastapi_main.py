@@ -1,8 +1,9 @@
 import uvicorn
 import json
+import asyncio
 import logging
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Awaitable
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Query, HTTPException, Request
@@ -12,10 +13,14 @@ from pydantic import BaseModel
 
 # 导入 SSE GTPlanner API
 from gtplanner.agent.api.agent_api import SSEGTPlanner
+from gtplanner.agent.persistence.server_session_store import get_server_session_store
 
 # 导入索引管理器
 from gtplanner.agent.utils.startup_init import initialize_application
 
+# 导入请求追踪记录器
+from gtplanner.utils.request_tracing import get_span_recorder
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -38,6 +43,9 @@ async def lifespan(app: FastAPI):
             if "prefab_index" in result["components"]:
                 index_info = result["components"]["prefab_index"]
                 logger.info(f"📦 预制件索引已就绪: {index_info.get('index_name', 'N/A')}")
+            catalog_info = result["components"].get("prefab_catalog", {})
+            if catalog_info.get("loaded"):
+                logger.info(f"📦 本地预制件目录已加载: {catalog_info['prefabs']} 个预制件")
         else:
             logger.error("❌ 应用初始化失败")
             for error in result["errors"]:
@@ -70,6 +78,11 @@ app = FastAPI(
 - 细节级别：auto（默认）、low（快速）、high（高精度）
 
 详见 /api/chat/agent 接口文档。
+
+## 服务端会话模式
+先调用 /api/chat/session/create 创建会话，之后 /api/chat/session 只需发送 session_id 和本轮新消息，
+对话历史由服务端保存和重建，请求体大小不随对话轮数增长。未创建的 session_id 返回 404，
+同一会话的并发请求依次处理。
     """,
     version="1.0.0",
     lifespan=lifespan
@@ -131,6 +144,33 @@ class AgentContextRequest(BaseModel):
     buffer_events: bool = False
     heartbeat_interval: float = 30.0
 
+class SessionChatRequest(BaseModel):
+    """
+    服务端会话模式请求模型
+
+    只包含会话ID和本轮新消息，对话历史由服务端维护：
+    {"session_id": "...", "message": {"content": "继续完善数据库设计"}, "language": "zh"}
+
+    message.content 同样支持多模态列表（文本+图片）。
+    """
+    session_id: str
+    message: Dict[str, Any]
+    language: Optional[str] = None
+
+    # SSE 配置选项
+    include_metadata: bool = False
+    buffer_events: bool = False
+    heartbeat_interval: float = 30.0
+
+class SessionCreateRequest(BaseModel):
+    """
+    服务端会话创建请求模型
+
+    session_id 为空时由服务端生成；指定的 session_id 已存在时返回 409。
+    """
+    session_id: Optional[str] = None
+    title: Optional[str] = None
+
 # 健康检查端点（增强版）
 @app.get("/health")
 async def health_check():
@@ -148,10 +188,159 @@ async def api_status():
     """获取详细的 API 状态信息"""
     return sse_api.get_api_status()
 
+@app.get("/api/traces")
+async def list_traces(
+    session_id: Optional[str] = Query(None, description="只返回该会话的请求"),
+    limit: int = Query(50, ge=1, le=500, description="最多返回的条数")
+):
+    """列出最近请求的追踪摘要（最新的在前）"""
+    return {"traces": get_span_recorder().list_traces(session_id=session_id, limit=limit)}
+
+@app.get("/api/traces/{trace_id}")
+async def get_trace_waterfall(trace_id: str):
+    """
+    获取单个请求的耗时瀑布图
+
+    trace_id 可从 conversation_end 事件或请求结果中获得。返回按开始时间排序的 span 列表，
+    包含相对请求开始的偏移（offset_ms）、耗时（duration_ms）和嵌套深度（depth），
+    覆盖 ReAct 轮次、LLM 调用、工具调用以及子流程的每个节点。
+    """
+    waterfall = get_span_recorder().get_waterfall(trace_id)
+    if waterfall is None:
+        raise HTTPException(status_code=404, detail=f"Trace not found: {trace_id}")
+    return waterfall
+
 # 测试页面端点已移除
 
 # 普通聊天API已移除，只保留SSE Agent API
 
+def _parse_message_content(message: Dict[str, Any]) -> Dict[str, Any]:
+    """解析消息内容，支持多模态格式（content 是 JSON 字符串时解析成数组）"""
+    content = message.get("content")
+    if isinstance(content, str) and content.strip().startswith('['):
+        try:
+            parsed = json.loads(content)
+            if isinstance(parsed, list):
+                message["content"] = parsed
+                logger.debug(f"Parsed multimodal content: {len(parsed)} parts")
+        except json.JSONDecodeError:
+            # 解析失败，保持原字符串
+            pass
+    return message
+
+
+def _sse_streaming_response(
+    session_id: str,
+    start_data: Dict[str, Any],
+    run_request: Callable[[Callable[[str], Awaitable[None]]], Awaitable[Dict[str, Any]]]
+) -> StreamingResponse:
+    """
+    构建 SSE 流式响应
+
+    Args:
+        session_id: 会话ID
+        start_data: conversation_start 事件的 data 字段
+        run_request: 处理函数，接收 SSE 数据写入函数，返回处理结果摘要
+    """
+
+    async def generate_sse_stream():
+        """生成 SSE 数据流"""
+        try:
+            # 发送对话开始事件（使用标准的 conversation_start 事件类型）
+            conversation_start_event = {
+                "event_type": "conversation_start",
+                "timestamp": datetime.now().isoformat(),
+                "session_id": session_id,
+                "data": start_data
+            }
+            yield f"event: conversation_start\ndata: {json.dumps(conversation_start_event, ensure_ascii=False)}\n\n"
+
+            # 创建一个队列来收集 SSE 数据
+            sse_queue = asyncio.Queue()
+            processing_complete = False
+
+            async def queue_sse_data(data: str):
+                """将 SSE 数据放入队列"""
+                await sse_queue.put(data)
+
+            # 启动处理任务
+            async def process_request():
+                nonlocal processing_complete
+                try:
+                    result = await run_request(queue_sse_data)
+
+                    # 发送对话结束事件（使用标准的 conversation_end 事件类型）
+                    conversation_end_event = {
+                        "event_type": "conversation_end",
+                        "timestamp": datetime.now().isoformat(),
+                        "session_id": result.get('session_id'),
+                        "data": result
+                    }
+                    await sse_queue.put(f"event: conversation_end\ndata: {json.dumps(conversation_end_event, ensure_ascii=False)}\n\n")
+
+                    logger.info(f"SSE stream completed successfully for session: {result.get('session_id', 'unknown')}")
+
+                except Exception as e:
+                    logger.error(f"SSE processing error: {e}", exc_info=True)
+                    # 发送错误事件
+                    error_event = {
+                        "error": str(e),
+                        "error_type": type(e).__name__,
+                        "timestamp": datetime.now().isoformat()
+                    }
+                    await sse_queue.put(f"event: error\ndata: {json.dumps(error_event, ensure_ascii=False)}\n\n")
+                finally:
+                    processing_complete = True
+                    await sse_queue.put(None)  # 结束标记
+
+            # 启动处理任务
+            task = asyncio.create_task(process_request())
+
+            # 从队列中读取并发送数据
+            heartbeat_counter = 0
+            while True:
+                try:
+                    # 等待数据，使用较短超时以快速检测处理完成
+                    data = await asyncio.wait_for(sse_queue.get(), timeout=0.1)
+                    if data is None:  # 结束标记
+                        break
+                    yield data
+                except asyncio.TimeoutError:
+                    # 检查是否处理完成
+                    if processing_complete:
+                        break
+                    # 每100次超时发送一次心跳（每10秒）
+                    heartbeat_counter += 1
+                    if heartbeat_counter >= 100:
+                        heartbeat = f"event: heartbeat\ndata: {{\"timestamp\": \"{datetime.now().isoformat()}\"}}\n\n"
+                        yield heartbeat
+                        heartbeat_counter = 0
+
+            # 确保任务完成
+            if not task.done():
+                await task
+
+        except Exception as e:
+            logger.error(f"SSE stream error: {e}", exc_info=True)
+            # 发送错误事件
+            error_event = {
+                "error": str(e),
+                "error_type": type(e).__name__,
+                "timestamp": datetime.now().isoformat()
+            }
+            yield f"event: error\ndata: {json.dumps(error_event, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        generate_sse_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",  # 禁用 Nginx 缓冲
+        }
+    )
+
+
 @app.post("/api/chat/agent")
 async def chat_agent_stream(request: AgentContextRequest):
     """SSE 流式聊天端点 - GTPlanner Agent"""
@@ -165,153 +354,106 @@ async def chat_agent_stream(request: AgentContextRequest):
 
         logger.info(f"Starting SSE stream for session: {request.session_id}, messages: {len(request.dialogue_history)}")
 
-        # 解析多模态消息内容（如果 content 是 JSON 字符串，解析成数组）
-        def parse_message_content(message: Dict[str, Any]) -> Dict[str, Any]:
-            """解析消息内容，支持多模态格式"""
-            content = message.get("content")
-            if isinstance(content, str) and content.strip().startswith('['):
-                try:
-                    parsed = json.loads(content)
-                    if isinstance(parsed, list):
-                        message["content"] = parsed
-                        logger.debug(f"Parsed multimodal content: {len(parsed)} parts")
-                except json.JSONDecodeError:
-                    # 解析失败，保持原字符串
-                    pass
-            return message
-        
         # 处理 dialogue_history 中的所有消息
-        parsed_history = [parse_message_content(msg.copy()) for msg in request.dialogue_history]
+        parsed_history = [_parse_message_content(msg.copy()) for msg in request.dialogue_history]
         request.dialogue_history = parsed_history
 
-        async def generate_sse_stream():
-            """生成 SSE 数据流"""
-            try:
-                # 发送对话开始事件（使用标准的 conversation_start 事件类型）
-                conversation_start_event = {
-                    "event_type": "conversation_start",
-                    "timestamp": datetime.now().isoformat(),
-                    "session_id": request.session_id,
-                    "data": {
-                        "user_input": request.dialogue_history[-1].get("content", "") if request.dialogue_history else "",
-                        "dialogue_history_length": len(request.dialogue_history),
-                        "config": {
-                            "include_metadata": request.include_metadata,
-                            "buffer_events": request.buffer_events,
-                            "heartbeat_interval": request.heartbeat_interval
-                        }
-                    }
-                }
-                yield f"event: conversation_start\ndata: {json.dumps(conversation_start_event, ensure_ascii=False)}\n\n"
-
-                # 创建一个队列来收集 SSE 数据
-                import asyncio
-                sse_queue = asyncio.Queue()
-                processing_complete = False
-
-                async def queue_sse_data(data: str):
-                    """将 SSE 数据放入队列"""
-                    await sse_queue.put(data)
-
-                # 启动处理任务
-                async def process_request():
-                    nonlocal processing_complete
-                    try:
-                        # 构建 AgentContext 数据（移除冗余的 user_input）
-                        agent_context = {
-                            "session_id": request.session_id,
-                            "dialogue_history": request.dialogue_history,
-                            "tool_execution_results": request.tool_execution_results,
-                            "session_metadata": request.session_metadata,
-                            "last_updated": request.last_updated,
-                            "is_compressed": request.is_compressed
-                        }
-
-                        language = request.session_metadata.get('language', 'zh')
-
-                        result = await sse_api.process_request_stream(
-                            agent_context=agent_context,
-                            language=language,  # 作为独立参数传递语言选择
-                            response_writer=queue_sse_data,
-                            include_metadata=request.include_metadata,
-                            buffer_events=request.buffer_events,
-                            heartbeat_interval=request.heartbeat_interval
-                        )
-
-                        # 发送对话结束事件（使用标准的 conversation_end 事件类型）
-                        conversation_end_event = {
-                            "event_type": "conversation_end",
-                            "timestamp": datetime.now().isoformat(),
-                            "session_id": result.get('session_id'),
-                            "data": result
-                        }
-                        await sse_queue.put(f"event: conversation_end\ndata: {json.dumps(conversation_end_event, ensure_ascii=False)}\n\n")
-
-                        logger.info(f"SSE stream completed successfully for session: {result.get('session_id', 'unknown')}")
-
-                    except Exception as e:
-                        logger.error(f"SSE processing error: {e}", exc_info=True)
-                        # 发送错误事件
-                        error_event = {
-                            "error": str(e),
-                            "error_type": type(e).__name__,
-                            "timestamp": datetime.now().isoformat()
-                        }
-                        await sse_queue.put(f"event: error\ndata: {json.dumps(error_event, ensure_ascii=False)}\n\n")
-                    finally:
-                        processing_complete = True
-                        await sse_queue.put(None)  # 结束标记
-
-                # 启动处理任务
-                task = asyncio.create_task(process_request())
-
-                # 从队列中读取并发送数据
-                heartbeat_counter = 0
-                while True:
-                    try:
-                        # 等待数据，使用较短超时以快速检测处理完成
-                        data = await asyncio.wait_for(sse_queue.get(), timeout=0.1)
-                        if data is None:  # 结束标记
-                            break
-                        yield data
-                    except asyncio.TimeoutError:
-                        # 检查是否处理完成
-                        if processing_complete:
-                            break
-                        # 每100次超时发送一次心跳（每10秒）
-                        heartbeat_counter += 1
-                        if heartbeat_counter >= 100:
-                            heartbeat = f"event: heartbeat\ndata: {{\"timestamp\": \"{datetime.now().isoformat()}\"}}\n\n"
-                            yield heartbeat
-                            heartbeat_counter = 0
-
-                # 确保任务完成
-                if not task.done():
-                    await task
-
-            except Exception as e:
-                logger.error(f"SSE stream error: {e}", exc_info=True)
-                # 发送错误事件
-                error_event = {
-                    "error": str(e),
-                    "error_type": type(e).__name__,
-                    "timestamp": datetime.now().isoformat()
-                }
-                yield f"event: error\ndata: {json.dumps(error_event, ensure_ascii=False)}\n\n"
-
-        return StreamingResponse(
-            generate_sse_stream(),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no",  # 禁用 Nginx 缓冲
+        async def run_request(response_writer):
+            # 构建 AgentContext 数据（移除冗余的 user_input）
+            agent_context = {
+                "session_id": request.session_id,
+                "dialogue_history": request.dialogue_history,
+                "tool_execution_results": request.tool_execution_results,
+                "session_metadata": request.session_metadata,
+                "last_updated": request.last_updated,
+                "is_compressed": request.is_compressed
             }
+
+            language = request.session_metadata.get('language', 'zh')
+
+            return await sse_api.process_request_stream(
+                agent_context=agent_context,
+                language=language,  # 作为独立参数传递语言选择
+                response_writer=response_writer,
+                include_metadata=request.include_metadata,
+                buffer_events=request.buffer_events,
+                heartbeat_interval=request.heartbeat_interval
+            )
+
+        return _sse_streaming_response(
+            request.session_id,
+            {
+                "user_input": request.dialogue_history[-1].get("content", "") if request.dialogue_history else "",
+                "dialogue_history_length": len(request.dialogue_history),
+                "config": {
+                    "include_metadata": request.include_metadata,
+                    "buffer_events": request.buffer_events,
+                    "heartbeat_interval": request.heartbeat_interval
+                }
+            },
+            run_request
         )
 
     except Exception as e:
         logger.error(f"Chat agent stream error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/chat/session/create")
+async def create_chat_session(request: SessionCreateRequest):
+    """创建服务端会话，返回会话ID（之后通过 /api/chat/session 发送消息）"""
+    session_id = (request.session_id or "").strip() or None
+    try:
+        session_id = await get_server_session_store().create_session(session_id, request.title)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    logger.info(f"Created server session: {session_id}")
+    return {"session_id": session_id}
+
+@app.post("/api/chat/session")
+async def chat_session_stream(request: SessionChatRequest):
+    """
+    SSE 流式聊天端点 - 服务端会话模式
+
+    客户端只发送 session_id 和本轮新消息，对话历史和工具执行结果由服务端保存并重建，
+    请求体大小不随对话增长。事件流与 /api/chat/agent 相同。
+    """
+    if not request.session_id.strip():
+        raise HTTPException(status_code=400, detail="session_id is required")
+
+    if not request.message.get("content"):
+        raise HTTPException(status_code=400, detail="message.content cannot be empty")
+
+    if not await get_server_session_store().session_exists(request.session_id):
+        raise HTTPException(status_code=404, detail=f"Session not found: {request.session_id}")
+
+    logger.info(f"Starting server-session SSE stream for session: {request.session_id}")
+
+    message = _parse_message_content(dict(request.message))
+
+    async def run_request(response_writer):
+        return await sse_api.process_session_request_stream(
+            session_id=request.session_id,
+            message=message,
+            response_writer=response_writer,
+            language=request.language or 'zh',
+            include_metadata=request.include_metadata,
+            buffer_events=request.buffer_events,
+            heartbeat_interval=request.heartbeat_interval
+        )
+
+    return _sse_streaming_response(
+        request.session_id,
+        {
+            "user_input": message["content"],
+            "config": {
+                "include_metadata": request.include_metadata,
+                "buffer_events": request.buffer_events,
+                "heartbeat_interval": request.heartbeat_interval
+            }
+        },
+        run_request
+    )
+
 if __name__ == "__main__":
     uvicorn.run("fastapi_main:app", host="0.0.0.0", port=11211, reload=True)
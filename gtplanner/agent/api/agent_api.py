@@ -8,6 +8,7 @@ GTPlanner SSE API
 3. 支持类型安全的流式响应（StreamEventType/StreamCallbackType）
 4. 移除会话管理功能，专注于单次请求处理
 5. 优雅的错误处理和资源清理
+6. 可选的服务端会话模式：客户端只发送会话ID和新消息（process_session_request_stream）
 
 使用方式:
     ```python
@@ -40,6 +41,11 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from gtplanner.agent.stateless_planner import StatelessGTPlanner
 from gtplanner.agent.context_types import AgentContext, Message, MessageRole
 from gtplanner.agent.streaming import StreamingSession, streaming_manager
+from gtplanner.agent.function_calling.tool_cache import get_tool_result_cache
+from gtplanner.agent.nodes.node_prefab_recommend import get_prefab_recommend_node
+from gtplanner.agent.utils.web_cache import get_web_cache_status
+from gtplanner.agent.persistence.server_session_store import ServerSessionStore, get_server_session_store
+from gtplanner.utils.openai_client import get_openai_client
 
 # 导入SSE处理器
 from gtplanner.agent.streaming.sse_handler import SSEStreamHandler
@@ -218,6 +224,7 @@ class SSEGTPlanner:
                 "new_messages_count": len(result.new_messages) if result.new_messages else 0,
                 "tool_execution_results_updates": result.tool_execution_results_updates if hasattr(result, 'tool_execution_results_updates') else {},
                 "error": result.error if not result.success else None,
+                "trace_id": result.metadata.get("trace_id"),
                 "metadata": {
                     "include_metadata": self.include_metadata,
                     "buffer_events": self.buffer_events,
@@ -277,6 +284,94 @@ class SSEGTPlanner:
             
             logger.debug("请求处理完成，资源已清理")
     
+    async def process_session_request_stream(
+        self,
+        session_id: str,
+        message: Dict[str, Any],
+        response_writer: Callable[[str], Awaitable[None]],
+        language: Optional[str] = None,
+        session_store: Optional[ServerSessionStore] = None,
+        **config_options
+    ) -> Dict[str, Any]:
+        """
+        服务端会话模式：客户端只发送会话ID和本轮新消息，上下文由服务端重建并在处理成功后保存
+
+        Args:
+            session_id: 会话ID（需先通过 ServerSessionStore.create_session 创建）
+            message: 本轮用户消息，包含content（文本或多模态列表），可选timestamp、metadata
+            response_writer: SSE数据写入函数
+            language: 语言选择，支持 'zh', 'en', 'ja', 'es', 'fr'（可选）
+            session_store: 服务端会话存储，默认使用全局单例
+            **config_options: 额外的配置选项
+
+        Returns:
+            处理结果摘要
+        """
+        store = session_store or get_server_session_store()
+        original_config = self._apply_config_options(config_options)
+
+        try:
+            if not session_id or not isinstance(session_id, str):
+                raise ValueError("session_id 必须是非空字符串")
+            user_message = store.parse_message(message)
+
+            # 同一会话的请求串行执行：读取上下文、处理和保存期间持有会话锁
+            async with store.session_lock(session_id):
+                context = await store.load_context(session_id)
+
+                logger.info(f"开始处理服务端会话请求，会话ID: {session_id}, 历史消息数: {len(context.dialogue_history)}")
+
+                streaming_session = self._create_sse_streaming_session(session_id, response_writer)
+                self.current_streaming_session = streaming_session
+                await streaming_session.start()
+
+                result = await self.planner.process(user_message.content, context, streaming_session, language=language)
+
+                saved = False
+                if result.success:
+                    saved = await store.save_result(session_id, user_message, result)
+                    if not saved:
+                        logger.error(f"保存服务端会话失败: {session_id}")
+                else:
+                    logger.error(f"请求处理失败: {result.error}")
+
+                return {
+                    "success": result.success,
+                    "session_id": session_id,
+                    "user_input": user_message.content,
+                    "new_messages_count": len(result.new_messages) if result.new_messages else 0,
+                    "tool_execution_results_updates": result.tool_execution_results_updates,
+                    "error": result.error if not result.success else None,
+                    "trace_id": result.metadata.get("trace_id"),
+                    "session_saved": saved,
+                    "metadata": {
+                        "include_metadata": self.include_metadata,
+                        "buffer_events": self.buffer_events,
+                        "heartbeat_interval": self.heartbeat_interval,
+                        "context_compressed": context.is_compressed,
+                        "dialogue_history_length": len(context.dialogue_history),
+                        "tool_updates_count": len(result.tool_execution_results_updates)
+                    } if self.include_metadata else {}
+                }
+
+        except Exception as e:
+            logger.error(f"处理服务端会话请求时发生异常: {e}", exc_info=self.verbose)
+
+            if self.sse_handler:
+                await self.sse_handler.handle_error(e, session_id or "unknown")
+
+            return {
+                "success": False,
+                "session_id": session_id or "unknown",
+                "user_input": "",
+                "error": str(e),
+                "error_type": "ValidationError" if isinstance(e, ValueError) else type(e).__name__
+            }
+
+        finally:
+            self._restore_config_options(original_config)
+            await self._cleanup_streaming_session()
+
     def _apply_config_options(self, config_options: Dict[str, Any]) -> Dict[str, Any]:
         """
         应用配置选项并返回原始配置
@@ -376,7 +471,11 @@ class SSEGTPlanner:
                 "verbose": self.verbose
             },
             "active_session": self.current_streaming_session is not None,
-            "session_id": getattr(self.current_streaming_session, 'session_id', None)
+            "session_id": getattr(self.current_streaming_session, 'session_id', None),
+            "tool_cache": get_tool_result_cache().get_stats(),
+            "llm_usage": get_openai_client().get_stats(),
+            "prefab_llm_filter": get_prefab_recommend_node().get_llm_filter_stats(),
+            "web_cache": get_web_cache_status()
         }
     
     # 便捷配置方法
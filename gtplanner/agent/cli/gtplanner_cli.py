@@ -33,6 +33,7 @@ from gtplanner.agent.streaming import StreamingSession, CLIStreamHandler, stream
 
 # 导入新的SQLite会话管理
 from gtplanner.agent.persistence.sqlite_session_manager import SQLiteSessionManager
+from gtplanner.agent.persistence.async_session_manager import get_async_session_manager
 
 # 导入CLI多语言文本管理器
 from gtplanner.agent.cli.cli_text_manager import CLITextManager
@@ -86,8 +87,9 @@ class ModernGTPlannerCLI:
         # GTPlanner 实例
         self.planner = StatelessGTPlanner()
 
-        # 会话管理器
+        # 会话管理器（数据库读写通过异步门面在后台线程执行，不阻塞事件循环）
         self.session_manager = SQLiteSessionManager()
+        self.session_store = get_async_session_manager(self.session_manager)
         
         # 流式响应组件
         self.current_streaming_session: Optional[StreamingSession] = None
@@ -159,10 +161,10 @@ class ModernGTPlannerCLI:
         
         return streaming_session
     
-    def _build_agent_context(self) -> Optional[AgentContext]:
+    async def _build_agent_context(self) -> Optional[AgentContext]:
         """构建AgentContext（使用SQLiteSessionManager）"""
-        # 直接使用SQLiteSessionManager的build_agent_context方法
-        return self.session_manager.build_agent_context()
+        # 直接使用SQLiteSessionManager的build_agent_context方法（在读线程中执行）
+        return await self.session_store.build_agent_context()
     
     def show_welcome(self):
         """显示欢迎信息"""
@@ -348,12 +350,12 @@ I want to build an online education platform
         
         # 确保有当前会话
         if not self.session_manager.current_session_id:
-            session_id = self.session_manager.create_new_session()
+            session_id = await self.session_store.create_new_session()
             self.console.print(self.text_manager.get_text("create_new_session", session_id=session_id))
 
         try:
             # 构建AgentContext（不包含当前用户输入，避免重复保存）
-            context = self._build_agent_context()
+            context = await self._build_agent_context()
             if not context:
                 self.console.print(self.text_manager.get_text("context_build_failed"))
                 return True
@@ -373,8 +375,8 @@ I want to build an online education platform
 
             # 处理结果
             if result.success:
-                # 保存结果到数据库
-                update_success = self.session_manager.update_from_agent_result(result, user_input=user_input)
+                # 保存结果到数据库（单个事务，在写线程中执行）
+                update_success = await self.session_store.update_from_agent_result(result, user_input=user_input)
 
                 if not update_success:
                     self.console.print(self.text_manager.get_text("database_save_warning"))
@@ -429,11 +431,11 @@ I want to build an online education platform
             return False
 
         elif cmd == "sessions":
-            self._show_sessions()
+            await self._show_sessions()
 
         elif cmd == "new":
             title = " ".join(args) if args else None
-            session_id = self.session_manager.create_new_session(title)
+            session_id = await self.session_store.create_new_session(title)
             self.console.print(self.text_manager.get_text("create_new_session", session_id=session_id))
 
         elif cmd == "load":
@@ -441,7 +443,7 @@ I want to build an online education platform
                 self.console.print(self.text_manager.get_text("specify_session_id"))
             else:
                 partial_id = args[0]
-                success, loaded_id, matches = self.session_manager.load_session_by_partial_id(partial_id)
+                success, loaded_id, matches = await self.session_store.load_session_by_partial_id(partial_id)
 
                 if success:
                     self.console.print(self.text_manager.get_text("session_loaded", session_id=loaded_id))
@@ -449,7 +451,7 @@ I want to build an online education platform
                     # 找到多个匹配，显示选择界面
                     selected_session = self._show_session_selection(matches, partial_id)
                     if selected_session:
-                        if self.session_manager.load_session(selected_session["session_id"]):
+                        if await self.session_store.load_session(selected_session["session_id"]):
                             self.console.print(self.text_manager.get_text("session_loaded", session_id=selected_session['session_id']))
                         else:
                             self.console.print(self.text_manager.get_text("session_load_failed", session_id=selected_session['session_id']))
@@ -457,7 +459,7 @@ I want to build an online education platform
                     self.console.print(self.text_manager.get_text("no_session_found", partial_id=partial_id))
 
         elif cmd == "current":
-            self._show_current_session()
+            await self._show_current_session()
 
         elif cmd == "config":
             self._show_config()
@@ -552,9 +554,9 @@ I want to build an online education platform
                 self.console.print("\n❌ [yellow]已取消选择[/yellow]")
                 return None
 
-    def _show_sessions(self):
+    async def _show_sessions(self):
         """显示会话列表"""
-        sessions = self.session_manager.list_sessions()
+        sessions = await self.session_store.list_sessions()
 
         if not sessions:
             self.console.print("📭 [yellow]暂无会话[/yellow]")
@@ -581,19 +583,19 @@ I want to build an online education platform
 
         self.console.print(table)
 
-    def _show_current_session(self):
+    async def _show_current_session(self):
         """显示当前会话信息"""
         if not self.session_manager.current_session_id:
             self.console.print("❌ [red]当前无活跃会话[/red]")
             return
 
-        session = self.session_manager.get_current_session()
+        session = await self.session_store.get_current_session()
         if not session:
             self.console.print("❌ [red]无法获取当前会话信息[/red]")
             return
 
         # 获取统计信息
-        stats = self.session_manager.get_session_statistics()
+        stats = await self.session_store.get_session_statistics()
 
         info_text = f"""
 ## 📋 当前会话信息
@@ -717,7 +719,7 @@ I want to build an online education platform
         await self._preload_tool_index()
 
         # 创建新会话
-        session_id = self.session_manager.create_new_session("单次需求")
+        session_id = await self.session_store.create_new_session("单次需求")
         self.console.print(self.text_manager.get_text("create_new_session", session_id=session_id))
 
         # 处理需求
@@ -751,7 +753,7 @@ async def main():
 
     # 如果指定了加载会话
     if args.load:
-        if cli.session_manager.load_session(args.load):
+        if await cli.session_store.load_session(args.load):
             cli.console.print(cli.text_manager.get_text("session_loaded", session_id=args.load))
         else:
             cli.console.print(cli.text_manager.get_text("session_load_failed", session_id=args.load))
@@ -770,6 +772,9 @@ async def main():
         temp_text_manager = CLITextManager(args.language)
         console.print(temp_text_manager.get_text("cli_run_exception", error=str(e)))
         return 1
+    finally:
+        # 等待尚未完成的历史写入
+        await cli.session_store.close()
 
     return 0
 
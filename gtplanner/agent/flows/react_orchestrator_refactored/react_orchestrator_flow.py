@@ -8,11 +8,13 @@ ReAct Orchestrator Flow
 from typing import Dict, Any
 from pocketflow import AsyncFlow
 from pocketflow_tracing import trace_flow
+from gtplanner.utils.request_tracing import traced_flow
 
 from .react_orchestrator_node import ReActOrchestratorNode
 
 
 @trace_flow(flow_name="ReActOrchestratorFlow")
+@traced_flow(flow_name="ReActOrchestratorFlow")
 class TracedReActOrchestratorFlow(AsyncFlow):
     """带有tracing的ReAct主控制器流程"""
 
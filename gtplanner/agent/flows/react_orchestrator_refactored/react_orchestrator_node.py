@@ -27,6 +27,7 @@ from .constants import (
 from gtplanner.agent.prompts import get_prompt, PromptTypes
 
 from .tool_executor import ToolExecutor
+from gtplanner.utils.request_tracing import trace_span
 
 
 
@@ -317,39 +318,43 @@ class ReActOrchestratorNode(AsyncNode):
             }
 
         try:
-            # 步骤1: 调用LLM并处理流式响应
-            assistant_message_content, assistant_tool_calls = await self._call_llm_with_streaming(
-                messages, shared, streaming_session, streaming_callbacks
-            )
-
-            # 步骤2: 现在工具调用转换在源头进行，直接使用结果
-            # assistant_message_content 已经是过滤后的显示内容
-            # assistant_tool_calls 已经包含了从content标签转换的工具调用
-
-            # 步骤3: 保存assistant消息到shared字典（使用清理后的内容）
-            self._add_assistant_message(shared, assistant_message_content, assistant_tool_calls)
-
-            # 步骤4: 处理工具调用或返回最终结果
-            if assistant_tool_calls:
-                # 将assistant消息添加到历史（使用清理后的内容）
-                assistant_message = {
-                    "role": "assistant",
-                    "content": assistant_message_content,
-                    "tool_calls": assistant_tool_calls
-                }
-                messages.append(assistant_message)
-
-                # 步骤5: 执行工具调用
-                tool_execution_results = await self._execute_tools_with_callbacks(
-                    assistant_tool_calls, shared, streaming_session, streaming_callbacks
+            # 步骤1-5 记录为一个 ReAct 轮次 span；递归调用放在 span 之外，各轮次在瀑布图中并列显示
+            with trace_span("react.cycle", kind="cycle", depth=recursion_depth) as cycle_span:
+                # 步骤1: 调用LLM并处理流式响应
+                assistant_message_content, assistant_tool_calls = await self._call_llm_with_streaming(
+                    messages, shared, streaming_session, streaming_callbacks
                 )
+                cycle_span.set_attribute("tool_calls", [tc["function"]["name"] for tc in assistant_tool_calls])
+
+                # 步骤2: 现在工具调用转换在源头进行，直接使用结果
+                # assistant_message_content 已经是过滤后的显示内容
+                # assistant_tool_calls 已经包含了从content标签转换的工具调用
+
+                # 步骤3: 保存assistant消息到shared字典（使用清理后的内容）
+                self._add_assistant_message(shared, assistant_message_content, assistant_tool_calls)
+
+                # 步骤4: 有工具调用时执行工具
+                if assistant_tool_calls:
+                    # 将assistant消息添加到历史（使用清理后的内容）
+                    assistant_message = {
+                        "role": "assistant",
+                        "content": assistant_message_content,
+                        "tool_calls": assistant_tool_calls
+                    }
+                    messages.append(assistant_message)
+
+                    # 执行工具调用
+                    tool_execution_results = await self._execute_tools_with_callbacks(
+                        assistant_tool_calls, shared, streaming_session, streaming_callbacks
+                    )
 
-                # 步骤6: 将工具结果添加到消息历史
-                self._add_tool_results_to_messages(
-                    messages, assistant_tool_calls, tool_execution_results, shared
-                )
+                    # 步骤5: 将工具结果添加到消息历史
+                    self._add_tool_results_to_messages(
+                        messages, assistant_tool_calls, tool_execution_results, shared
+                    )
 
-                # 步骤6: 递归调用处理后续响应
+            # 步骤6: 递归处理后续响应或返回最终结果
+            if assistant_tool_calls:
                 return await self._unified_function_calling_cycle(
                     messages, shared, streaming_session, streaming_callbacks,
                     recursion_depth + 1, max_recursion_depth
@@ -390,6 +395,34 @@ class ReActOrchestratorNode(AsyncNode):
                 "execution_mode": "recursion_error"
             }
 
+    def _build_system_prompt(
+        self,
+        language: Optional[str],
+        generated_documents: List[Dict[str, Any]]
+    ) -> str:
+        """
+        组装系统提示词：预编译的静态前缀 + 会话相关的动态后缀
+
+        静态前缀在各次调用间逐字节一致，动态内容只追加在末尾，
+        以便模型服务端的提示词前缀缓存可以命中。
+        """
+        system_prompt = get_prompt(
+            PromptTypes.System.ORCHESTRATOR_FUNCTION_CALLING,
+            language=language
+        )
+
+        # 动态添加可查看文档列表到系统提示词
+        available_docs = [doc.get("filename") for doc in generated_documents if doc.get("filename")]
+        if available_docs:
+            docs_list = "\n".join([f"- {filename}" for filename in available_docs])
+            system_prompt += get_prompt(
+                PromptTypes.Common.GENERATED_DOCUMENTS_CONTEXT,
+                language=language,
+                docs_list=docs_list
+            )
+
+        return system_prompt
+
     async def _call_llm_with_streaming(
         self,
         messages: List[Dict[str, Any]],
@@ -410,23 +443,7 @@ class ReActOrchestratorNode(AsyncNode):
 
             # 获取语言设置和系统提示词
             language = shared.get("language")  # 从shared字典获取语言选择
-            system_prompt = get_prompt(
-                PromptTypes.System.ORCHESTRATOR_FUNCTION_CALLING,
-                language=language
-            )
-
-            # 动态添加可查看文档列表到系统提示词
-            generated_documents = shared.get("generated_documents", [])
-            if generated_documents:
-                available_docs = [doc.get("filename") for doc in generated_documents if doc.get("filename")]
-                if available_docs:
-                    docs_list = "\n".join([f"- {filename}" for filename in available_docs])
-                    if language == "zh":
-                        context_info = f"\n\n# 当前会话上下文\n\n## 已生成的文档\n当前会话中已生成以下文档，可使用 `view_document` 工具查看：\n{docs_list}\n"
-                    else:
-                        context_info = f"\n\n# Current Session Context\n\n## Generated Documents\nThe following documents have been generated in this session and can be viewed using the `view_document` tool:\n{docs_list}\n"
-                    system_prompt += context_info
-
+            system_prompt = self._build_system_prompt(language, shared.get("generated_documents", []))
 
             # 使用流式API（启用工具调用标签过滤）
             stream = self.openai_client.chat_completion_stream(
@@ -478,6 +495,17 @@ class ReActOrchestratorNode(AsyncNode):
                                 if tool_call_delta.function.arguments:
                                     current_tool_calls[index]["function"]["arguments"] += tool_call_delta.function.arguments
 
+                                    # 实时推送参数增量，长参数（如 design）生成期间客户端也能看到进度
+                                    if StreamCallbackType.ON_TOOL_ARGUMENTS_DELTA in streaming_callbacks:
+                                        await streaming_callbacks[StreamCallbackType.ON_TOOL_ARGUMENTS_DELTA](
+                                            streaming_session,
+                                            tool_name=current_tool_calls[index]["function"]["name"],
+                                            delta=tool_call_delta.function.arguments,
+                                            call_id=current_tool_calls[index]["id"] or None,
+                                            index=index,
+                                            arguments_length=len(current_tool_calls[index]["function"]["arguments"])
+                                        )
+
             # 构建工具调用列表
             assistant_tool_calls = [tool_call for tool_call in current_tool_calls.values() if tool_call["id"]]
 
@@ -11,6 +11,7 @@ from typing import Dict, List, Any
 from gtplanner.agent.function_calling import execute_agent_tool, validate_tool_arguments
 from gtplanner.agent.streaming.stream_types import StreamEventBuilder, ToolCallStatus
 from gtplanner.agent.streaming.stream_interface import StreamingSession
+from gtplanner.utils.request_tracing import trace_span
 
 
 class ToolExecutor:
@@ -132,7 +133,11 @@ class ToolExecutor:
             )
 
             start_time = time.time()
-            tool_result = await execute_agent_tool(tool_name, arguments, shared)
+            with trace_span(f"tool.{tool_name}", kind="tool", call_id=call_id) as span:
+                tool_result = await execute_agent_tool(tool_name, arguments, shared)
+                cache_hit = bool(tool_result.get("cache_hit", False))
+                span.set_attribute("success", tool_result.get("success", False))
+                span.set_attribute("cache_hit", cache_hit)
             execution_time = time.time() - start_time
 
             # 流式响应：发送工具完成事件
@@ -143,7 +148,8 @@ class ToolExecutor:
                 progress_message=f"{tool_name}工具执行完成" if tool_result.get("success", False) else f"{tool_name}工具执行失败",
                 result=tool_result,
                 execution_time=execution_time,
-                error_message=tool_result.get("error") if not tool_result.get("success", False) else None
+                error_message=tool_result.get("error") if not tool_result.get("success", False) else None,
+                cache_hit=cache_hit
             )
             await streaming_session.emit_event(
                 StreamEventBuilder.tool_call_end(streaming_session.session_id, tool_status)
@@ -155,7 +161,8 @@ class ToolExecutor:
                 "result": tool_result,
                 "call_id": call_id,
                 "success": tool_result.get("success", False),
-                "execution_time": execution_time
+                "execution_time": execution_time,
+                "cache_hit": cache_hit
             }
 
         except Exception as e:
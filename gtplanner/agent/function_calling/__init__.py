@@ -14,6 +14,11 @@ from .agent_tools import (
     call_research,
     call_design
 )
+from .tool_cache import (
+    ToolCachePolicy,
+    ToolResultCache,
+    get_tool_result_cache
+)
 
 __all__ = [
     "get_agent_function_definitions",
@@ -23,5 +28,8 @@ __all__ = [
     "call_prefab_recommend",
     "call_search_prefabs",
     "call_research",
-    "call_design"
+    "call_design",
+    "ToolCachePolicy",
+    "ToolResultCache",
+    "get_tool_result_cache"
 ]
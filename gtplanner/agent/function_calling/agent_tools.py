@@ -6,11 +6,13 @@ Agent Function Calling工具包装器
 """
 
 
+import asyncio
 from typing import Dict, List, Any, Optional
 
 # 导入现有的子Agent流程
-from gtplanner.agent.subflows.short_planning.flows.short_planning_flow import ShortPlanningFlow
-from gtplanner.agent.subflows.research.flows.research_flow import ResearchFlow
+from gtplanner.agent.subflows.short_planning.flows.short_planning_flow import short_planning_flow_pool
+from gtplanner.agent.subflows.research.flows.research_flow import research_flow_pool
+from gtplanner.agent.function_calling.tool_cache import get_tool_result_cache
 # DesignFlow 在 _execute_design 中动态导入
 
 
@@ -21,13 +23,10 @@ def get_agent_function_definitions() -> List[Dict[str, Any]]:
     Returns:
         OpenAI Function Calling格式的工具定义列表
     """
-    # 检查JINA_API_KEY是否可用
-    from gtplanner.utils.config_manager import get_jina_api_key
-    import os
+    # 检查调研数据源是否可用（Jina 需要 JINA_API_KEY，本地语料需要配置语料路径）
+    from gtplanner.agent.utils.research_providers import get_research_unavailable_reason
 
-    jina_api_key = get_jina_api_key() or os.getenv("JINA_API_KEY")
-    # 确保API密钥不为空且不是占位符
-    has_jina_api_key = bool(jina_api_key and jina_api_key.strip() and not jina_api_key.startswith("@format"))
+    research_available = get_research_unavailable_reason() is None
 
     # 基础工具定义
     tools = [
@@ -89,8 +88,8 @@ def get_agent_function_definitions() -> List[Dict[str, Any]]:
         },
     ]
 
-    # 如果有JINA_API_KEY，添加research工具
-    if has_jina_api_key:
+    # 如果调研数据源可用，添加research工具
+    if research_available:
         research_tool = {
             "type": "function",
             "function": {
@@ -251,7 +250,7 @@ def get_agent_function_definitions() -> List[Dict[str, Any]]:
         "type": "function",
         "function": {
             "name": "search_prefabs",
-            "description": "在本地预制件库中搜索。这是一个降级工具，当向量服务不可用时使用。提供基于关键词、标签、作者的模糊搜索功能。**建议优先使用 prefab_recommend（如果向量服务可用），该工具提供更精准的语义匹配。**",
+            "description": "在本地预制件库中搜索。这是一个降级工具，当向量服务不可用时使用。提供基于关键词（按相关度排序，支持中英文多词查询）、标签、作者的搜索功能。**建议优先使用 prefab_recommend（如果向量服务可用），该工具提供更精准的语义匹配。**",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -306,6 +305,12 @@ def get_agent_function_definitions() -> List[Dict[str, Any]]:
                         "type": "boolean",
                         "description": "是否使用大模型进行二次筛选，默认true",
                         "default": True
+                    },
+                    "min_score": {
+                        "type": "number",
+                        "description": "最小相似度阈值（可选，不指定时按检索后端使用默认阈值）",
+                        "minimum": 0,
+                        "maximum": 1
                     }
                 },
                 "required": ["query"]
@@ -490,19 +495,40 @@ def get_agent_function_definitions() -> List[Dict[str, Any]]:
 async def execute_agent_tool(tool_name: str, arguments: Dict[str, Any], shared: Dict[str, Any] = None) -> Dict[str, Any]:
     """
     执行Agent工具
-    
+
+    幂等工具的成功结果会写入进程级共享缓存（见 tool_cache.py），
+    相同参数的后续调用直接返回缓存结果，并带有 "cache_hit": True 标记。
+
     Args:
         tool_name: 工具名称
         arguments: 工具参数
-        
+
     Returns:
         工具执行结果
     """
-    try:
-        # 确保 shared 字典存在
-        if shared is None:
-            shared = {}
+    # 确保 shared 字典存在
+    if shared is None:
+        shared = {}
+
+    cache = get_tool_result_cache()
+    cache_key = cache.make_key(tool_name, arguments, shared)
+    if cache_key is not None:
+        cached_result = cache.get(tool_name, cache_key)
+        if cached_result is not None:
+            cached_result["cache_hit"] = True
+            return cached_result
+
+    result = await _dispatch_agent_tool(tool_name, arguments, shared)
+
+    if cache_key is not None:
+        cache.put(tool_name, cache_key, result)
+
+    return result
 
+
+async def _dispatch_agent_tool(tool_name: str, arguments: Dict[str, Any], shared: Dict[str, Any]) -> Dict[str, Any]:
+    """根据工具名称分发执行"""
+    try:
         if tool_name == "short_planning":
             return await _execute_short_planning(arguments, shared)
         elif tool_name == "search_prefabs":
@@ -581,9 +607,9 @@ async def _execute_short_planning(arguments: Dict[str, Any], shared: Dict[str, A
             "streaming_session": shared.get("streaming_session") if shared else None  # 确保 SSE 支持
         }
 
-        # 执行规划流程
-        flow = ShortPlanningFlow()
-        result = await flow.run_async(flow_shared)
+        # 执行规划流程（从对象池借用已构建的流程）
+        async with short_planning_flow_pool.acquire() as flow:
+            result = await flow.run_async(flow_shared)
 
         # 检查流程是否成功完成（返回"planning_complete"表示成功）
         if result == "planning_complete":
@@ -613,18 +639,23 @@ async def _execute_short_planning(arguments: Dict[str, Any], shared: Dict[str, A
 
 async def _execute_research(arguments: Dict[str, Any], shared: Dict[str, Any] = None) -> Dict[str, Any]:
     """执行技术调研 - 使用ResearchFlow"""
-    # 检查JINA_API_KEY环境变量
-    from gtplanner.utils.config_manager import get_jina_api_key
-    import os
+    # 检查调研数据源是否可用
+    from gtplanner.agent.utils.research_providers import get_research_unavailable_reason
 
-    jina_api_key = get_jina_api_key() or os.getenv("JINA_API_KEY")
-    # 确保API密钥不为空且不是占位符
-    if not jina_api_key or not jina_api_key.strip() or jina_api_key.startswith("@format"):
+    disabled_reason = get_research_unavailable_reason()
+    if disabled_reason == "missing_jina_api_key":
         return {
             "success": False,
             "error": "❌ Research工具未启用：缺少JINA_API_KEY环境变量。请设置JINA_API_KEY后重试。",
             "tool_name": "research",
-            "disabled_reason": "missing_jina_api_key"
+            "disabled_reason": disabled_reason
+        }
+    if disabled_reason:
+        return {
+            "success": False,
+            "error": "❌ Research工具未启用：本地调研语料未配置或无法加载。请检查 GTPLANNER_RESEARCH_CORPUS_PATH。",
+            "tool_name": "research",
+            "disabled_reason": disabled_reason
         }
 
     keywords = arguments.get("keywords", [])
@@ -657,9 +688,9 @@ async def _execute_research(arguments: Dict[str, Any], shared: Dict[str, Any] =
         shared["focus_areas"] = focus_areas
         shared["project_context"] = project_context
 
-        # 直接使用shared字典执行流程，确保状态传递
-        flow = ResearchFlow()
-        success = await flow.run_async(shared)
+        # 直接使用shared字典执行流程，确保状态传递（从对象池借用已构建的流程）
+        async with research_flow_pool.acquire() as flow:
+            success = await flow.run_async(shared)
 
         if success:
             # 从shared字典中获取结果（PocketFlow已经直接修改了shared）
@@ -738,14 +769,14 @@ async def _execute_design(arguments: Dict[str, Any], shared: Dict[str, Any] = No
             "streaming_session": shared.get("streaming_session") if shared else None  # 🔑 关键：传递 streaming_session
         }
         
-        # 使用新的统一 DesignFlow
-        from gtplanner.agent.subflows.design.flows.design_flow import DesignFlow
-        flow = DesignFlow()
-        
+        # 使用新的统一 DesignFlow（从对象池借用已构建的流程）
+        from gtplanner.agent.subflows.design.flows.design_flow import design_flow_pool
+
         print("🎨 生成设计文档...")
-        
+
         # 执行流程
-        result = await flow.run_async(flow_shared)
+        async with design_flow_pool.acquire() as flow:
+            result = await flow.run_async(flow_shared)
         
         # 从流程 shared 中获取结果
         agent_design_document = flow_shared.get("agent_design_document", "")
@@ -1069,6 +1100,9 @@ async def _execute_search_prefabs(arguments: Dict[str, Any], shared: Dict[str, A
         
         # 获取搜索器实例
         searcher = get_local_prefab_searcher()
+        if searcher.prefabs_cache is None:
+            # 启动预热未完成时在线程中首次加载，避免阻塞事件循环
+            await asyncio.to_thread(searcher.reload)
         
         # 执行搜索
         results = searcher.search(
@@ -1117,23 +1151,12 @@ async def _execute_prefab_recommend(arguments: Dict[str, Any], shared: Dict[str,
         }
     
     try:
-        # 1. 检查向量服务是否可用
-        from gtplanner.utils.config_manager import get_vector_service_config
-        import requests
-        
-        vector_config = get_vector_service_config()
-        vector_service_url = vector_config.get("base_url")
-        
-        # 检查向量服务健康状态
-        vector_service_available = False
-        if vector_service_url:
-            try:
-                response = requests.get(f"{vector_service_url}/health", timeout=5)
-                vector_service_available = response.status_code == 200
-            except:
-                pass
-        
-        if not vector_service_available:
+        # 1. 检查向量服务是否可用（复用全局节点及其带缓存的健康检查）
+        from gtplanner.agent.nodes.node_prefab_recommend import get_prefab_recommend_node
+        recommend_node = get_prefab_recommend_node()
+
+        # 健康检查过期时会同步请求向量服务，放到线程中执行，不阻塞事件循环
+        if not await asyncio.to_thread(lambda: recommend_node.vector_service_available):
             return {
                 "success": False,
                 "error": "Vector service is not available. Please use 'search_prefabs' tool as a fallback.",
@@ -1146,9 +1169,6 @@ async def _execute_prefab_recommend(arguments: Dict[str, Any], shared: Dict[str,
         index_name = vector_config.get("prefabs_index_name", "document_gtplanner_prefabs")
 
         # 3. 执行预制件推荐
-        from gtplanner.agent.nodes.node_prefab_recommend import NodePrefabRecommend
-        recommend_node = NodePrefabRecommend()
-        
         # 准备参数
         if shared is None:
             shared = {}
@@ -1156,8 +1176,12 @@ async def _execute_prefab_recommend(arguments: Dict[str, Any], shared: Dict[str,
         shared["query"] = query
         shared["top_k"] = top_k
         shared["index_name"] = index_name
-        shared["min_score"] = 0.1
         shared["use_llm_filter"] = use_llm_filter
+        # 只在调用方指定时覆盖阈值，否则由节点按检索后端（远程/本地）取默认值
+        if arguments.get("min_score") is not None:
+            shared["min_score"] = arguments["min_score"]
+        else:
+            shared.pop("min_score", None)
         
         # 执行推荐节点流程
         prep_result = await recommend_node.prep_async(shared)
@@ -1271,7 +1295,8 @@ async def call_research(keywords: List[str], focus_areas: List[str], project_con
 async def call_prefab_recommend(
     query: str,
     top_k: int = 5,
-    use_llm_filter: bool = True
+    use_llm_filter: bool = True,
+    min_score: Optional[float] = None
 ) -> Dict[str, Any]:
     """便捷的预制件推荐调用（向量检索）
     
@@ -1279,12 +1304,15 @@ async def call_prefab_recommend(
         query: 查询文本，描述需要的预制件功能
         top_k: 返回的推荐预制件数量，默认5
         use_llm_filter: 是否使用LLM进行二次筛选，默认True
+        min_score: 最小相似度阈值（可选，默认按检索后端取值）
     """
     arguments = {
         "query": query,
         "top_k": top_k,
         "use_llm_filter": use_llm_filter
     }
+    if min_score is not None:
+        arguments["min_score"] = min_score
     return await execute_agent_tool("prefab_recommend", arguments)
 
 
@@ -1417,17 +1445,9 @@ async def _execute_list_prefab_functions(arguments: Dict[str, Any], shared: Dict
                 "tool_name": "list_prefab_functions"
             }
 
-        # 构建请求 URL
-        url = f"{gateway_url}/v1/public/prefabs/{prefab_id}/functions"
-        params = {}
-        if version:
-            params["version"] = version
-
-        # 发起 HTTP 请求
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            functions = response.json()
+        # 通过共享的网关客户端查询（指定版本的元数据带缓存，latest 按 ETag 重新验证）
+        from gtplanner.agent.utils.prefab_gateway_client import get_prefab_gateway_client
+        functions = await get_prefab_gateway_client().list_functions(prefab_id, version)
 
         execution_time = time.time() - start_time
 
@@ -1546,17 +1566,9 @@ async def _execute_get_function_details(arguments: Dict[str, Any], shared: Dict[
                 "tool_name": "get_function_details"
             }
 
-        # 构建请求 URL
-        url = f"{gateway_url}/v1/public/prefabs/{prefab_id}/functions/{function_name}"
-        params = {}
-        if version:
-            params["version"] = version
-
-        # 发起 HTTP 请求
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            function_details = response.json()
+        # 通过共享的网关客户端查询（指定版本的元数据带缓存，latest 按 ETag 重新验证）
+        from gtplanner.agent.utils.prefab_gateway_client import get_prefab_gateway_client
+        function_details = await get_prefab_gateway_client().get_function(prefab_id, function_name, version)
 
         execution_time = time.time() - start_time
 
@@ -0,0 +1,275 @@
+"""
+工具结果缓存
+
+为幂等工具（search_prefabs、list_prefab_functions、get_function_details、research 等）
+提供进程级共享缓存，跨请求、跨会话复用相同参数的执行结果，避免重复的网络往返和 LLM 扇出。
+
+每个工具通过 ToolCachePolicy 声明缓存策略：
+- idempotent: 是否幂等（只有幂等工具才会被缓存）
+- ttl: 缓存有效期（秒）
+- key_fields: 参与缓存键计算的参数字段
+- shared_key_fields: 参与缓存键计算的 shared 字段（如 language）
+- key_defaults: 参数缺省值（省略参数与显式传入默认值命中同一条目）
+- scope: 返回当前数据版本的函数（如预制件目录版本），版本变化后旧条目不再命中，随 LRU/TTL 淘汰
+- should_cache: 判断成功结果是否值得缓存的函数（如不缓存空推荐）
+- bypass: 判断本次调用是否跳过缓存的函数（如未指定版本的网关元数据由网关客户端按 latest 重新验证）
+"""
+
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class ToolCachePolicy:
+    """工具缓存策略"""
+    idempotent: bool = False
+    ttl: float = 300.0
+    key_fields: Tuple[str, ...] = ()
+    shared_key_fields: Tuple[str, ...] = ()
+    key_defaults: Tuple[Tuple[str, Any], ...] = ()
+    scope: Optional[Callable[[], str]] = None
+    should_cache: Optional[Callable[[Dict[str, Any]], bool]] = None
+    bypass: Optional[Callable[[Dict[str, Any]], bool]] = None
+
+
+def _prefab_catalog_version() -> str:
+    """预制件推荐所依据的目录版本（延迟导入，避免加载本模块时初始化推荐节点）"""
+    from gtplanner.agent.nodes.node_prefab_recommend import get_prefab_recommend_node
+
+    return get_prefab_recommend_node().catalog_version()
+
+
+def _has_recommendations(result: Dict[str, Any]) -> bool:
+    """空推荐多半来自大模型筛选失败等临时问题，不缓存"""
+    return bool(result.get("result", {}).get("recommended_prefabs"))
+
+
+def _unpinned_version(arguments: Dict[str, Any]) -> bool:
+    """未指定版本或为 latest 时不缓存，交给网关客户端在 latest_ttl 后重新验证"""
+    version = str(arguments.get("version") or "").strip().lower()
+    return version in ("", "latest")
+
+
+# 默认缓存策略（未列出的工具不缓存）
+DEFAULT_TOOL_CACHE_POLICIES: Dict[str, ToolCachePolicy] = {
+    "search_prefabs": ToolCachePolicy(
+        idempotent=True,
+        ttl=300.0,
+        key_fields=("query", "tags", "author", "limit")
+    ),
+    "list_prefab_functions": ToolCachePolicy(
+        idempotent=True,
+        ttl=600.0,
+        key_fields=("prefab_id", "version"),
+        bypass=_unpinned_version
+    ),
+    "get_function_details": ToolCachePolicy(
+        idempotent=True,
+        ttl=600.0,
+        key_fields=("prefab_id", "function_name", "version"),
+        bypass=_unpinned_version
+    ),
+    "prefab_recommend": ToolCachePolicy(
+        idempotent=True,
+        ttl=1800.0,
+        key_fields=("query", "top_k", "use_llm_filter", "min_score"),
+        shared_key_fields=("language",),
+        key_defaults=(("top_k", 5), ("use_llm_filter", True)),
+        scope=_prefab_catalog_version,
+        should_cache=_has_recommendations
+    ),
+    "research": ToolCachePolicy(
+        idempotent=True,
+        ttl=3600.0,
+        key_fields=("keywords", "focus_areas", "project_context"),
+        shared_key_fields=("language",)
+    ),
+}
+
+
+def _normalize_value(value: Any) -> Any:
+    """规范化参数值，使语义相同的参数得到相同的缓存键"""
+    if isinstance(value, str):
+        return " ".join(value.split()).lower()
+    if isinstance(value, (list, tuple)):
+        return [_normalize_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _normalize_value(v) for k, v in value.items()}
+    return value
+
+
+class ToolResultCache:
+    """
+    线程安全的工具结果缓存（TTL + LRU）
+
+    只缓存执行成功的结果，命中时返回深拷贝，调用方修改结果不会污染缓存。
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        policies: Optional[Dict[str, ToolCachePolicy]] = None,
+        enabled: bool = True
+    ):
+        self.max_entries = max_entries
+        self.policies: Dict[str, ToolCachePolicy] = dict(policies or DEFAULT_TOOL_CACHE_POLICIES)
+        self.enabled = enabled
+
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def get_policy(self, tool_name: str) -> Optional[ToolCachePolicy]:
+        """获取工具的缓存策略，非幂等工具返回 None"""
+        policy = self.policies.get(tool_name)
+        if policy is None or not policy.idempotent:
+            return None
+        return policy
+
+    def set_policy(self, tool_name: str, policy: ToolCachePolicy) -> None:
+        """设置（或覆盖）工具的缓存策略"""
+        with self._lock:
+            self.policies[tool_name] = policy
+
+    def make_key(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        shared: Optional[Dict[str, Any]] = None
+    ) -> Optional[str]:
+        """根据策略计算缓存键，不可缓存时返回 None"""
+        policy = self.get_policy(tool_name)
+        if policy is None or (policy.bypass is not None and policy.bypass(arguments)):
+            return None
+
+        defaults = dict(policy.key_defaults)
+        key_data = {
+            field: _normalize_value(arguments.get(field, defaults.get(field)))
+            for field in policy.key_fields
+        }
+        if policy.shared_key_fields:
+            shared = shared or {}
+            key_data["__shared__"] = {field: shared.get(field) for field in policy.shared_key_fields}
+        if policy.scope is not None:
+            try:
+                key_data["__scope__"] = policy.scope()
+            except Exception:
+                return None
+
+        try:
+            serialized = json.dumps(key_data, sort_keys=True, ensure_ascii=False, default=str)
+        except (TypeError, ValueError):
+            return None
+        return f"{tool_name}:{serialized}"
+
+    def get(self, tool_name: str, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存，过期或不存在时返回 None"""
+        if not self.enabled:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats.setdefault(tool_name, {"hits": 0, "misses": 0})
+            entry = self._entries.get(key)
+            if entry is None:
+                stats["misses"] += 1
+                return None
+
+            expires_at, result = entry
+            if expires_at <= now:
+                del self._entries[key]
+                stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            stats["hits"] += 1
+
+        return copy.deepcopy(result)
+
+    def put(self, tool_name: str, key: str, result: Dict[str, Any]) -> None:
+        """写入缓存（只缓存成功的结果）"""
+        if not self.enabled or not result.get("success"):
+            return
+
+        policy = self.get_policy(tool_name)
+        if policy is None or (policy.should_cache is not None and not policy.should_cache(result)):
+            return
+
+        expires_at = time.monotonic() + policy.ttl
+        stored = copy.deepcopy(result)
+
+        with self._lock:
+            self._entries[key] = (expires_at, stored)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tool_name: Optional[str] = None) -> int:
+        """清除缓存，指定工具名时只清除该工具的条目，返回清除的条目数"""
+        with self._lock:
+            if tool_name is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+
+            prefix = f"{tool_name}:"
+            keys = [k for k in self._entries if k.startswith(prefix)]
+            for k in keys:
+                del self._entries[k]
+            return len(keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息（命中率等）"""
+        with self._lock:
+            per_tool = {}
+            total_hits = 0
+            total_misses = 0
+            for tool_name, stats in self._stats.items():
+                hits, misses = stats["hits"], stats["misses"]
+                total_hits += hits
+                total_misses += misses
+                lookups = hits + misses
+                per_tool[tool_name] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": hits / lookups if lookups else 0.0
+                }
+
+            total_lookups = total_hits + total_misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": total_hits,
+                "misses": total_misses,
+                "hit_rate": total_hits / total_lookups if total_lookups else 0.0,
+                "tools": per_tool
+            }
+
+    def reset_stats(self) -> None:
+        """重置统计信息"""
+        with self._lock:
+            self._stats.clear()
+
+
+# 全局单例
+_tool_result_cache_instance = None
+
+
+def get_tool_result_cache() -> ToolResultCache:
+    """获取全局单例的工具结果缓存"""
+    global _tool_result_cache_instance
+    if _tool_result_cache_instance is None:
+        from gtplanner.utils.config_manager import get_tool_cache_config
+
+        config = get_tool_cache_config()
+        _tool_result_cache_instance = ToolResultCache(
+            max_entries=config.get("max_entries", 512),
+            enabled=config.get("enabled", True)
+        )
+    return _tool_result_cache_instance
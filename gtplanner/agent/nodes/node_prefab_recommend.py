@@ -1,18 +1,30 @@
 """
 预制件推荐节点 (Node_Prefab_Recommend)
 
-基于向量服务进行预制件推荐。
-如果向量服务不可用，节点会返回错误，agent 可以选择使用 search_prefabs 工具作为降级方案。
+基于向量检索进行预制件推荐，检索后端由 vector_service.backend 配置：
+- remote: 外部向量服务
+- local: 进程内的本地向量索引（见 prefab_vector_index，完全离线）
+- auto: 向量服务可用时使用向量服务，否则使用本地向量索引
+
+如果没有可用的后端，节点会返回错误，agent 可以选择使用 search_prefabs 工具作为降级方案。
+
+启用大模型筛选时，如果向量分数已经足够明确（前 top_k 个候选的最低分达到 llm_filter_skip_score，
+或第 top_k 名领先第 top_k+1 名至少 llm_filter_skip_gap），直接按向量排序返回，跳过大模型调用；
+本地哈希嵌入的余弦分数与向量服务的分数尺度不同，本地后端使用 local_llm_filter_skip_score / local_llm_filter_skip_gap；
+需要大模型时只发送精简的候选卡片（名称、标签、截断后的描述）。跳过率和节省的延迟见 get_llm_filter_stats()。
 """
 
+import threading
 import time
 import requests
 import asyncio
 import json
 from typing import Dict, List, Any, Optional
 from pocketflow import AsyncNode
-from gtplanner.utils.openai_client import OpenAIClient
+from gtplanner.utils.openai_client import get_openai_client
 from gtplanner.utils.config_manager import get_vector_service_config
+from gtplanner.agent.utils.local_prefab_searcher import DEFAULT_PREFABS_PATH
+from gtplanner.agent.utils.prefab_vector_index import LocalVectorIndexLoader
 from gtplanner.agent.streaming import (
     emit_processing_status,
     emit_error
@@ -22,8 +34,55 @@ from gtplanner.agent.streaming import (
 from gtplanner.agent.prompts import get_prompt, PromptTypes
 
 
+# 向量服务健康检查结果缓存：{base_url: (检查时间, 是否可用)}
+VECTOR_SERVICE_HEALTH_TTL = 30.0
+_vector_service_health_cache: Dict[str, tuple] = {}
+
+
+def check_vector_service_health(base_url: Optional[str], force: bool = False) -> bool:
+    """
+    检查向量服务是否可用（结果缓存 VECTOR_SERVICE_HEALTH_TTL 秒）
+
+    Args:
+        base_url: 向量服务地址
+        force: 是否忽略缓存强制检查
+
+    Returns:
+        向量服务是否可用
+    """
+    if not base_url:
+        return False
+
+    now = time.monotonic()
+    cached = _vector_service_health_cache.get(base_url)
+    if not force and cached and now - cached[0] < VECTOR_SERVICE_HEALTH_TTL:
+        return cached[1]
+
+    try:
+        response = requests.get(f"{base_url}/health", timeout=5)
+        available = response.status_code == 200
+    except Exception:
+        available = False
+
+    _vector_service_health_cache[base_url] = (now, available)
+    return available
+
+
+def peek_vector_service_health(base_url: Optional[str]) -> Optional[bool]:
+    """
+    最近一次健康检查的结果（不发起网络请求，不考虑是否过期）
+
+    Returns:
+        向量服务是否可用；未配置地址时返回 False，尚未检查过时返回 None
+    """
+    if not base_url:
+        return False
+    cached = _vector_service_health_cache.get(base_url)
+    return cached[1] if cached else None
+
+
 class NodePrefabRecommend(AsyncNode):
-    """预制件推荐节点（基于向量服务）"""
+    """预制件推荐节点（基于向量服务或本地向量索引）"""
     
     def __init__(self, max_retries: int = 3, wait: float = 2.0):
         """
@@ -43,32 +102,66 @@ class NodePrefabRecommend(AsyncNode):
         # 从配置文件读取索引相关参数
         self.index_name = vector_config.get("prefabs_index_name", "document_gtplanner_prefabs")
         self.vector_field = vector_config.get("vector_field", "combined_text")
+
+        # 检索后端与本地向量索引
+        self.backend = vector_config.get("backend", "auto")
+        self.local_index = LocalVectorIndexLoader(DEFAULT_PREFABS_PATH, vector_config.get("local_index_path"))
+        self.local_min_score = vector_config.get("local_min_score", 0.15)
+        self.local_nprobe = vector_config.get("local_nprobe") or None
         
         # 推荐配置
         self.default_top_k = 5
         self.min_score_threshold = 0.4  # 最小相似度阈值（提高到0.4以过滤不相关结果）
         self.use_llm_filter = True  # 是否使用大模型筛选
         self.llm_candidate_count = 10  # 传给大模型的候选数量
+        self.llm_filter_skip_score = vector_config.get("llm_filter_skip_score", 0.75)
+        self.llm_filter_skip_gap = vector_config.get("llm_filter_skip_gap", 0.15)
+        self.local_llm_filter_skip_score = vector_config.get("local_llm_filter_skip_score", 0.45)
+        self.local_llm_filter_skip_gap = vector_config.get("local_llm_filter_skip_gap", 0.08)
+        self.llm_card_chars = vector_config.get("llm_filter_card_chars", 200)
+
+        # 大模型筛选统计（进程内累计）
+        self._filter_stats_lock = threading.Lock()
+        self._filter_stats = {"calls": 0, "skipped": 0, "llm_calls": 0, "llm_time_ms": 0.0}
         
-        # 初始化OpenAI客户端
-        self.openai_client = OpenAIClient()
-        
-        # 检查向量服务可用性
-        self.vector_service_available = self._check_vector_service()
-        
-        if not self.vector_service_available:
-            print("⚠️ 向量服务不可用，prefab_recommend 节点将无法工作")
-            print("💡 提示：可以使用 search_prefabs 工具作为降级方案")
-    
+        # 使用全局共享的OpenAI客户端
+        self.openai_client = get_openai_client()
+
+    @property
+    def vector_service_available(self) -> bool:
+        """是否有可用的向量检索后端（健康检查结果带 TTL 缓存，节点可长期复用）"""
+        return self._resolve_backend() is not None
+
     def _check_vector_service(self) -> bool:
         """检查向量服务是否可用"""
-        if not self.vector_service_url:
-            return False
+        return check_vector_service_health(self.vector_service_url)
+
+    def _resolve_backend(self) -> Optional[str]:
+        """确定本次检索使用的后端：remote / local，没有可用后端时返回None"""
+        if self.backend != "local" and self._check_vector_service():
+            return "remote"
+        if self.backend != "remote" and self.local_index.available():
+            return "local"
+        return None
+
+    def catalog_version(self) -> str:
+        """
+        推荐结果依据的目录版本（用于推荐结果缓存失效）
+
+        由配置的检索后端、索引名和目录文件的修改时间与大小组成；auto 模式下附带最近一次健康检查
+        的结果。计算缓存键时在事件循环中调用，只读本地状态，不做健康检查等网络请求。
+        """
         try:
-            response = requests.get(f"{self.vector_service_url}/health", timeout=5)
-            return response.status_code == 200
-        except Exception:
-            return False
+            stat = self.local_index.catalog_path.stat()
+            catalog = f"{stat.st_mtime_ns}-{stat.st_size}"
+        except OSError:
+            catalog = "missing"
+
+        backend = self.backend
+        if backend == "auto":
+            healthy = peek_vector_service_health(self.vector_service_url)
+            backend = f"auto-{'unknown' if healthy is None else 'remote' if healthy else 'local'}"
+        return f"{backend}:{self.index_name}:{catalog}"
     
     async def prep_async(self, shared) -> Dict[str, Any]:
         """
@@ -85,7 +178,7 @@ class NodePrefabRecommend(AsyncNode):
             query = shared.get("query", "")
             top_k = shared.get("top_k", self.default_top_k)
             index_name = shared.get("index_name", self.index_name)
-            min_score = shared.get("min_score", self.min_score_threshold)
+            min_score = shared.get("min_score")  # 未指定时按检索后端取默认阈值
             use_llm_filter = shared.get("use_llm_filter", self.use_llm_filter)
             language = shared.get("language")
             
@@ -147,41 +240,69 @@ class NodePrefabRecommend(AsyncNode):
         if not query:
             raise ValueError("Empty query for prefab recommendation")
         
-        if not self.vector_service_available:
+        backend = await asyncio.to_thread(self._resolve_backend)  # 健康检查过期时会同步请求向量服务
+        if backend is None:
             raise RuntimeError(
                 "Vector service is not available. "
                 "Please use 'search_prefabs' tool as a fallback."
             )
+        # 两个后端的分数尺度不同，阈值按后端选取
+        if backend == "remote":
+            default_min_score = self.min_score_threshold
+            skip_score, skip_gap = self.llm_filter_skip_score, self.llm_filter_skip_gap
+        else:
+            default_min_score = self.local_min_score
+            skip_score, skip_gap = self.local_llm_filter_skip_score, self.local_llm_filter_skip_gap
+        if min_score is None:
+            min_score = default_min_score
         
         try:
             start_time = time.time()
             
-            # 调用向量服务进行检索（获取更多候选）
+            # 向量检索（获取更多候选）
             search_top_k = max(top_k, self.llm_candidate_count) if use_llm_filter else top_k
             shared_for_events = {"streaming_session": prep_res.get("streaming_session")}
-            search_results = await self._search_prefabs_vector(query, index_name, search_top_k, shared_for_events)
+            if backend == "remote":
+                search_results = await self._search_prefabs_vector(query, index_name, search_top_k, shared_for_events)
+            else:
+                search_results = await self._search_prefabs_local(query, search_top_k, shared_for_events)
             
             # 过滤和处理结果
             filtered_results = self._filter_results(search_results, min_score=min_score)
             processed_results = self._process_results(filtered_results)
             
-            # 使用大模型筛选（如果启用）
+            # 使用大模型筛选（如果启用，且向量分数不足以直接决定结果）
+            filter_info = {"decision": "disabled"}
             if use_llm_filter and len(processed_results) > 1:
-                try:
-                    llm_selected_results = await self._llm_filter_prefabs(
-                        query, processed_results, top_k, language, shared_for_events
-                    )
-                    processed_results = llm_selected_results
+                skip_reason = self._llm_filter_skip_reason(processed_results, top_k, skip_score, skip_gap)
+                if skip_reason:
+                    filter_info = {"decision": f"skipped_{skip_reason}",
+                                   "saved_ms": self._record_llm_filter(skipped=True)}
+                    processed_results = processed_results[:top_k]
                     await emit_processing_status(
-                        shared_for_events, 
-                        f"✅ 大模型筛选完成，返回 {len(processed_results)} 个预制件"
-                    )
-                except Exception as e:
-                    await emit_error(
-                        shared_for_events, 
-                        f"⚠️ 大模型筛选失败，使用原始排序: {str(e)}"
+                        shared_for_events,
+                        f"✅ 向量分数已足够明确（{skip_reason}），跳过大模型筛选"
                     )
-                    processed_results = processed_results[:top_k]
+                else:
+                    llm_start = time.perf_counter()
+                    try:
+                        llm_selected_results = await self._llm_filter_prefabs(
+                            query, processed_results, top_k, language, shared_for_events
+                        )
+                        processed_results = llm_selected_results
+                        await emit_processing_status(
+                            shared_for_events, 
+                            f"✅ 大模型筛选完成，返回 {len(processed_results)} 个预制件"
+                        )
+                    except Exception as e:
+                        await emit_error(
+                            shared_for_events, 
+                            f"⚠️ 大模型筛选失败，使用原始排序: {str(e)}"
+                        )
+                        processed_results = processed_results[:top_k]
+                    llm_ms = (time.perf_counter() - llm_start) * 1000
+                    self._record_llm_filter(skipped=False, llm_ms=llm_ms)
+                    filter_info = {"decision": "llm", "latency_ms": round(llm_ms)}
             else:
                 processed_results = processed_results[:top_k]
             
@@ -193,11 +314,13 @@ class NodePrefabRecommend(AsyncNode):
                 "search_time": round(search_time * 1000),  # 转换为毫秒
                 "query_used": query,
                 "original_query": prep_res["original_query"],
-                "search_mode": "vector_rag",
+                "search_mode": "vector_rag" if backend == "remote" else "local_vector",
                 "search_metadata": {
+                    "backend": backend,
                     "index_name": index_name,
                     "top_k": top_k,
-                    "min_score": min_score
+                    "min_score": min_score,
+                    "llm_filter": filter_info
                 }
             }
             
@@ -382,6 +505,22 @@ class NodePrefabRecommend(AsyncNode):
             print(f"❌ {error_msg}")
             raise RuntimeError(error_msg)
     
+    async def _search_prefabs_local(
+        self,
+        query: str,
+        top_k: int,
+        shared: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """在本地向量索引中检索预制件（返回与向量服务相同的结果格式）"""
+        # 首次加载或目录更新后需要构建索引，放到线程中避免阻塞事件循环
+        index = await asyncio.to_thread(self.local_index.get)
+        result = await asyncio.to_thread(index.search_documents, query, top_k, self.local_nprobe)
+        await emit_processing_status(
+            shared,
+            f"✅ 本地向量索引检索到 {result['total']} 个相关预制件"
+        )
+        return result
+
     def _filter_results(
         self, 
         search_results: Dict[str, Any],
@@ -439,6 +578,68 @@ class NodePrefabRecommend(AsyncNode):
         
         return processed
     
+    def _llm_filter_skip_reason(
+        self,
+        prefabs: List[Dict[str, Any]],
+        top_k: int,
+        skip_score: float,
+        skip_gap: float
+    ) -> Optional[str]:
+        """
+        判断向量分数是否已足够明确，可以跳过大模型筛选
+
+        Args:
+            prefabs: 按分数降序排列的候选预制件
+            top_k: 需要返回的数量
+            skip_score: 高分阈值（按检索后端选取）
+            skip_gap: 分差阈值（按检索后端选取）
+
+        Returns:
+            跳过原因 "score"（前 top_k 个都达到高分阈值）或 "gap"（第 top_k 名与下一名分差足够大），
+            需要大模型筛选时返回 None；阈值为0表示不启用对应规则
+        """
+        if top_k <= 0:
+            return None
+        selected = prefabs[:top_k]
+        kth_score = selected[-1]["score"]
+        if skip_score and kth_score >= skip_score:
+            return "score"
+        if skip_gap and len(prefabs) > top_k:
+            if kth_score - prefabs[top_k]["score"] >= skip_gap:
+                return "gap"
+        return None
+
+    def _record_llm_filter(self, skipped: bool, llm_ms: float = 0.0) -> Optional[int]:
+        """记录一次筛选决策；跳过时返回按平均大模型耗时估算的节省毫秒数"""
+        with self._filter_stats_lock:
+            stats = self._filter_stats
+            stats["calls"] += 1
+            if not skipped:
+                stats["llm_calls"] += 1
+                stats["llm_time_ms"] += llm_ms
+                return None
+            stats["skipped"] += 1
+            return round(stats["llm_time_ms"] / stats["llm_calls"]) if stats["llm_calls"] else None
+
+    def get_llm_filter_stats(self) -> Dict[str, Any]:
+        """获取大模型筛选统计：跳过率、平均大模型耗时和估算节省的总延迟"""
+        with self._filter_stats_lock:
+            stats = dict(self._filter_stats)
+        avg_llm_ms = stats["llm_time_ms"] / stats["llm_calls"] if stats["llm_calls"] else 0.0
+        return {
+            "calls": stats["calls"],
+            "skipped": stats["skipped"],
+            "llm_calls": stats["llm_calls"],
+            "skip_rate": stats["skipped"] / stats["calls"] if stats["calls"] else 0.0,
+            "avg_llm_latency_ms": round(avg_llm_ms),
+            "latency_saved_ms": round(avg_llm_ms * stats["skipped"])
+        }
+
+    def reset_llm_filter_stats(self) -> None:
+        """重置大模型筛选统计"""
+        with self._filter_stats_lock:
+            self._filter_stats = {"calls": 0, "skipped": 0, "llm_calls": 0, "llm_time_ms": 0.0}
+
     async def _llm_filter_prefabs(
         self, 
         query: str, 
@@ -501,31 +702,35 @@ class NodePrefabRecommend(AsyncNode):
         language: str
     ) -> str:
         """构建大模型筛选的提示词"""
-        # 构建预制件信息列表
-        prefabs_info = []
-        for i, prefab in enumerate(prefabs):
-            prefab_info = {
-                "index": i,
-                "id": prefab["id"],
-                "type": prefab["type"],
-                "name": prefab["summary"],
-                "description": prefab["description"][:500] + "..." if len(prefab["description"]) > 500 else prefab["description"],
-                "tags": prefab.get("tags", "")
-            }
-            prefabs_info.append(prefab_info)
+        # 构建精简的候选卡片（每行一个，只保留筛选所需字段）
+        cards = [
+            json.dumps(self._build_candidate_card(i, prefab), ensure_ascii=False, separators=(",", ":"))
+            for i, prefab in enumerate(prefabs)
+        ]
         
         # 使用多语言模板系统获取提示词
         prompt = get_prompt(
             PromptTypes.Agent.PREFAB_RECOMMENDATION,
             language=language,
             query=query,
-            prefabs_info=json.dumps(prefabs_info, ensure_ascii=False, indent=2),
+            prefabs_info="\n".join(cards),
             top_k=top_k,
             prefabs_count=len(prefabs)-1
         )
         
         return prompt
     
+    def _build_candidate_card(self, index: int, prefab: Dict[str, Any]) -> Dict[str, Any]:
+        """构建单个候选卡片（描述按 llm_card_chars 截断）"""
+        description = " ".join((prefab.get("description") or "").split())
+        if len(description) > self.llm_card_chars:
+            description = description[:self.llm_card_chars].rstrip() + "…"
+        card = {"index": index, "id": prefab["id"], "name": prefab.get("summary", "")}
+        if prefab.get("tags"):
+            card["tags"] = prefab["tags"]
+        card["description"] = description
+        return card
+
     async def _parse_llm_filter_response(
         self, 
         response: Dict[str, Any], 
@@ -580,3 +785,14 @@ class NodePrefabRecommend(AsyncNode):
             await emit_error(shared, f"❌ 解析大模型响应失败: {str(e)}")
             return []
 
+
+# 全局单例：节点不保存运行期状态，所有调用复用同一个实例
+_prefab_recommend_node_instance = None
+
+
+def get_prefab_recommend_node() -> NodePrefabRecommend:
+    """获取全局单例的预制件推荐节点"""
+    global _prefab_recommend_node_instance
+    if _prefab_recommend_node_instance is None:
+        _prefab_recommend_node_instance = NodePrefabRecommend()
+    return _prefab_recommend_node_instance
@@ -12,10 +12,11 @@
 - 结果格式标准化
 """
 
+import asyncio
 import time
 from typing import Dict, List, Any, Optional
 from pocketflow import AsyncNode
-from ..utils.search import JinaSearchClient
+from ..utils.research_providers import SearchProvider, get_search_provider
 from gtplanner.agent.streaming import (
     emit_processing_status,
     emit_error
@@ -36,14 +37,8 @@ class NodeSearch(AsyncNode):
         super().__init__(max_retries=max_retries, wait=wait)
         self.name = "NodeSearch"
         
-        # 初始化搜索客户端
-        try:
-            self.search_client = JinaSearchClient()
-            self.search_available = True
-        except ValueError:
-            self.search_client = None
-            self.search_available = False
-            # 注意：初始化阶段无法发送流式事件，这里保留日志或移除
+        # 搜索数据源在执行时按配置获取（Jina 或本地语料，均为全局共享实例），
+        # 节点被对象池复用时也能使用最新配置
 
         # 搜索配置
         self.default_max_results = 10
@@ -116,15 +111,19 @@ class NodeSearch(AsyncNode):
         
         try:
             start_time = time.time()
+            search_provider = self._get_search_provider()
             
             # 执行搜索
             all_results = []
             
-            for keyword in search_keywords:
+            for i, keyword in enumerate(search_keywords):
                 try:
-                    if self.search_available and self.search_client:
-                        # 使用真实搜索API - 异步调用
-                        results = await self.search_client.search_simple(keyword, count=max_results)
+                    if search_provider:
+                        # 避免请求过于频繁（只在连续搜索多个关键词时等待）
+                        if i > 0 and search_provider.request_interval:
+                            await asyncio.sleep(search_provider.request_interval)
+
+                        results = await search_provider.search_simple(keyword, count=max_results)
 
                         # 转换为标准格式
                         formatted_results = []
@@ -146,9 +145,6 @@ class NodeSearch(AsyncNode):
                             await emit_error_from_prep(prep_res, f"⚠️ 搜索API不可用，跳过关键词: {keyword}")
                         continue
 
-                    # 避免请求过于频繁
-                    time.sleep(0.5)
-
                 except Exception as e:
                     # 单个关键词搜索失败不影响其他关键词
                     streaming_session = prep_res.get("streaming_session")
@@ -233,6 +229,13 @@ class NodeSearch(AsyncNode):
 
 
     
+    def _get_search_provider(self) -> Optional[SearchProvider]:
+        """获取搜索数据源，未配置时返回 None"""
+        try:
+            return get_search_provider()
+        except ValueError:
+            return None
+
     def _extract_keywords_from_shared_state(self, shared) -> List[str]:
         """从共享状态中提取搜索关键词"""
         # 直接从shared字典获取搜索关键词
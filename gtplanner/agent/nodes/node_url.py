@@ -16,7 +16,7 @@ import time
 from typing import Dict, List, Any, Optional
 from urllib.parse import urlparse
 from pocketflow import AsyncNode
-from ..utils.URL_to_Markdown import JinaWebClient
+from ..utils.research_providers import FetchProvider, get_fetch_provider
 from gtplanner.agent.streaming import (
     emit_processing_status,
     emit_error
@@ -37,14 +37,7 @@ class NodeURL(AsyncNode):
         super().__init__(max_retries=max_retries, wait=wait)
         self.name = "NodeURL"
 
-        # 初始化Jina Web客户端
-        try:
-            self.web_client = JinaWebClient()
-            self.client_available = True
-        except ValueError:
-            self.web_client = None
-            self.client_available = False
-            # 注意：初始化阶段无法发送流式事件
+        # 网页内容数据源在执行时按配置获取（Jina 或本地语料，均为全局共享实例）
 
         # 配置
         self.max_content_length = 10000  # 默认最大内容长度
@@ -110,9 +103,9 @@ class NodeURL(AsyncNode):
         try:
             start_time = time.time()
 
-            if self.client_available and self.web_client:
-                # 使用Jina Web API - 异步调用
-                page_info = await self.web_client.get_page_info(url)
+            fetch_provider = self._get_fetch_provider()
+            if fetch_provider:
+                page_info = await fetch_provider.get_page_info(url)
 
                 # 处理内容长度限制
                 content = page_info.get("content", "")
@@ -202,6 +195,13 @@ class NodeURL(AsyncNode):
             })
             return "error"
 
+    def _get_fetch_provider(self) -> Optional[FetchProvider]:
+        """获取网页内容数据源，未配置时返回 None"""
+        try:
+            return get_fetch_provider()
+        except ValueError:
+            return None
+
     def _create_error_result(self, error_message: str, url: str = "", extraction_type: str = "full") -> Dict[str, Any]:
         """创建标准错误结果字典"""
         return {
@@ -0,0 +1,171 @@
+"""
+异步会话管理器
+
+SQLiteSessionManager 和 DatabaseDAO 的方法都是同步的，直接在 async 代码中调用会在磁盘 I/O
+和 fsync 期间阻塞事件循环，导致流式输出卡顿。本模块提供等待式（awaitable）的门面：
+
+- 写操作提交到专用写线程（单线程执行器，自带任务队列），按提交顺序串行执行
+- 读操作提交到读线程池，线程数与连接池的读连接数一致
+- 一次 AgentResult 的全部写入由 update_from_agent_result 合并为一个事务
+
+用法:
+    store = get_async_session_manager(session_manager)
+    context = await store.build_agent_context()
+    await store.update_from_agent_result(result, user_input=user_input)
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from .sqlite_session_manager import SQLiteSessionManager
+from ..context_types import AgentContext
+
+T = TypeVar("T")
+
+
+class AsyncSessionManager:
+    """SQLiteSessionManager 的异步门面"""
+
+    def __init__(self, session_manager: SQLiteSessionManager):
+        """
+        初始化异步会话管理器
+
+        Args:
+            session_manager: 被包装的同步会话管理器
+        """
+        self.session_manager = session_manager
+        self.dao = session_manager.dao
+
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gtplanner-db-writer")
+        self._readers = ThreadPoolExecutor(
+            max_workers=self.dao.pool.max_readers,
+            thread_name_prefix="gtplanner-db-reader"
+        )
+        self._closed = False
+
+    @property
+    def current_session_id(self) -> Optional[str]:
+        """当前会话ID"""
+        return self.session_manager.current_session_id
+
+    async def run_read(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """在读线程池中执行同步读操作"""
+        return await self._submit(self._readers, func, *args, **kwargs)
+
+    async def run_write(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """在专用写线程中执行同步写操作"""
+        return await self._submit(self._writer, func, *args, **kwargs)
+
+    async def _submit(self, executor: ThreadPoolExecutor, func: Callable[..., T],
+                      *args: Any, **kwargs: Any) -> T:
+        if self._closed:
+            raise RuntimeError("异步会话管理器已关闭")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+    # ==================== 会话管理 ====================
+
+    async def create_new_session(self, title: Optional[str] = None,
+                                 project_stage: str = "requirements",
+                                 session_id: Optional[str] = None) -> str:
+        """创建新会话"""
+        return await self.run_write(self.session_manager.create_new_session, title, project_stage, session_id)
+
+    async def load_session(self, session_id: str) -> bool:
+        """加载指定会话"""
+        return await self.run_read(self.session_manager.load_session, session_id)
+
+    async def load_session_by_partial_id(self, partial_id: str) -> Tuple[bool, Optional[str], List[Dict[str, Any]]]:
+        """根据部分会话ID加载会话"""
+        return await self.run_read(self.session_manager.load_session_by_partial_id, partial_id)
+
+    async def get_current_session(self) -> Optional[Dict[str, Any]]:
+        """获取当前会话信息"""
+        return await self.run_read(self.session_manager.get_current_session)
+
+    async def list_sessions(self, limit: int = 50, include_archived: bool = False,
+                            after: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+        """列出会话（after为上一页最后一个会话的cursor字段）"""
+        return await self.run_read(self.session_manager.list_sessions, limit, include_archived, after)
+
+    async def update_session_title(self, title: str, session_id: Optional[str] = None) -> bool:
+        """更新会话标题"""
+        return await self.run_write(self.session_manager.update_session_title, title, session_id)
+
+    async def archive_session(self, session_id: Optional[str] = None) -> bool:
+        """归档会话"""
+        return await self.run_write(self.session_manager.archive_session, session_id)
+
+    async def delete_session(self, session_id: Optional[str] = None) -> bool:
+        """删除会话（软删除）"""
+        return await self.run_write(self.session_manager.delete_session, session_id)
+
+    # ==================== 消息管理 ====================
+
+    async def add_user_message(self, content: str, metadata: Optional[Dict[str, Any]] = None,
+                               session_id: Optional[str] = None) -> Optional[str]:
+        """添加用户消息"""
+        return await self.run_write(self.session_manager.add_user_message, content, metadata, session_id)
+
+    async def get_messages(self, limit: Optional[int] = None,
+                           session_id: Optional[str] = None,
+                           after: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+        """获取会话消息（after为上一页最后一条消息的cursor字段）"""
+        return await self.run_read(self.session_manager.get_messages, limit, session_id, after)
+
+    async def build_agent_context(self, session_id: Optional[str] = None) -> Optional[AgentContext]:
+        """构建AgentContext对象"""
+        return await self.run_read(self.session_manager.build_agent_context, session_id)
+
+    async def update_from_agent_result(self, agent_result, user_input: Optional[str] = None,
+                                       session_id: Optional[str] = None) -> bool:
+        """保存一次处理结果（用户消息、新消息和工具执行结果在同一个事务中写入）"""
+        return await self.run_write(
+            self.session_manager.update_from_agent_result, agent_result, user_input, session_id
+        )
+
+    # ==================== 搜索和统计 ====================
+
+    async def search_sessions(self, keyword: str, limit: int = 20,
+                              after: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+        """搜索会话"""
+        return await self.run_read(self.session_manager.search_sessions, keyword, limit, after)
+
+    async def get_session_statistics(self, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """获取会话统计信息"""
+        return await self.run_read(self.session_manager.get_session_statistics, session_id)
+
+    async def get_global_statistics(self) -> Dict[str, Any]:
+        """获取全局统计信息"""
+        return await self.run_read(self.session_manager.get_global_statistics)
+
+    async def close(self) -> None:
+        """等待已提交的写操作完成后关闭线程"""
+        if self._closed:
+            return
+        self._closed = True
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._shutdown)
+
+    def _shutdown(self) -> None:
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+
+
+def get_async_session_manager(session_manager: SQLiteSessionManager) -> AsyncSessionManager:
+    """
+    获取同步会话管理器对应的异步门面（同一个会话管理器只创建一次）
+
+    Args:
+        session_manager: 同步会话管理器
+
+    Returns:
+        异步会话管理器
+    """
+    facade = getattr(session_manager, "_async_facade", None)
+    if facade is None or facade._closed:
+        facade = AsyncSessionManager(session_manager)
+        session_manager._async_facade = facade
+    return facade
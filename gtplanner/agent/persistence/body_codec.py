@@ -0,0 +1,111 @@
+"""
+消息正文压缩编解码
+
+设计文档、调研结果、预制件列表等工具结果JSON体积较大，原样存储会让数据库文件和页缓存迅速膨胀。
+超过阈值的正文在写入前压缩为BLOB，并在codec列中记录编码方式（NULL表示未压缩），
+读取时由DatabaseDAO透明解码，调用方始终拿到字符串。
+
+支持的编码：
+- zlib：标准库自带，默认使用
+- zstd：需要安装可选依赖 zstandard，压缩率和速度都更好
+
+全文索引和LIKE搜索需要在SQL中读取解码后的正文，因此提供 register_sql_functions()
+在连接上注册 gtplanner_decode(value, codec) 函数。
+"""
+
+import sqlite3
+import zlib
+from typing import Optional, Tuple, Union
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+CODEC_ZLIB = "zlib"
+CODEC_ZSTD = "zstd"
+
+# 在SQL中使用的解码函数名
+SQL_DECODE_FUNCTION = "gtplanner_decode"
+
+
+def resolve_codec(codec: Optional[str]) -> Optional[str]:
+    """
+    解析配置的编码方式
+
+    Args:
+        codec: 配置值（zlib / zstd / 空字符串或none表示关闭压缩）
+
+    Returns:
+        实际使用的编码，zstandard未安装时zstd回退为zlib，关闭压缩时返回None
+    """
+    codec = (codec or "").strip().lower()
+    if codec in ("", "none", "off"):
+        return None
+    if codec == CODEC_ZSTD and not ZSTD_AVAILABLE:
+        print("⚠️ 未安装zstandard，消息正文压缩回退为zlib")
+        return CODEC_ZLIB
+    if codec not in (CODEC_ZLIB, CODEC_ZSTD):
+        raise ValueError(f"不支持的压缩编码: {codec}")
+    return codec
+
+
+def encode_body(text: str, codec: Optional[str], threshold: int,
+                level: int = 6) -> Tuple[Union[str, bytes], Optional[str]]:
+    """
+    按阈值压缩正文
+
+    Args:
+        text: 原始正文
+        codec: 编码方式（已经过resolve_codec），None表示不压缩
+        threshold: 压缩阈值（UTF-8字节数），小于阈值的正文原样存储
+        level: 压缩级别
+
+    Returns:
+        (存储值, 编码)：未压缩时返回原字符串和None
+    """
+    if codec is None or text is None:
+        return text, None
+
+    raw = text.encode("utf-8")
+    if len(raw) < threshold:
+        return text, None
+
+    if codec == CODEC_ZSTD:
+        compressed = zstandard.ZstdCompressor(level=level).compress(raw)
+    else:
+        compressed = zlib.compress(raw, level)
+
+    # 压缩后没有变小（例如已压缩过的内容）就原样存储
+    if len(compressed) >= len(raw):
+        return text, None
+    return compressed, codec
+
+
+def decode_body(value: Union[str, bytes, None], codec: Optional[str]) -> Optional[str]:
+    """
+    解码正文
+
+    Args:
+        value: 存储值
+        codec: 编码方式，None表示未压缩
+
+    Returns:
+        原始正文
+    """
+    if codec is None or value is None:
+        return value
+
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(value).decode("utf-8")
+    if codec == CODEC_ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("数据库中存在zstd压缩的正文，请安装zstandard后再读取")
+        return zstandard.ZstdDecompressor().decompress(value).decode("utf-8")
+    raise ValueError(f"不支持的压缩编码: {codec}")
+
+
+def register_sql_functions(conn: sqlite3.Connection) -> None:
+    """在连接上注册 gtplanner_decode(value, codec) SQL函数"""
+    conn.create_function(SQL_DECODE_FUNCTION, 2, decode_body, deterministic=True)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+压缩整理GTPlanner数据库
+
+按当前压缩设置重新编码历史消息正文，合并全文索引并执行VACUUM，
+适合在开启正文压缩后对已有数据库执行一次。
+
+用法:
+    python -m gtplanner.agent.persistence.compact_database [数据库路径] [--no-recompress]
+"""
+
+import argparse
+import sys
+
+from gtplanner.agent.persistence.database_dao import DatabaseDAO
+from gtplanner.agent.persistence.connection_pool import close_connection_pools
+
+
+def _format_bytes(size: int) -> str:
+    """格式化字节数"""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def _print_storage(label: str, storage: dict) -> None:
+    """打印存储统计"""
+    print(f"\n📦 {label}:")
+    print(f"  📁 文件大小: {_format_bytes(storage['file_bytes'])}（WAL {_format_bytes(storage['wal_bytes'])}）")
+    print(f"  🗑️  空闲页: {_format_bytes(storage['free_bytes'])}")
+    for table in ("messages", "compressed_context_messages"):
+        for codec, item in storage[table].items():
+            print(f"  📄 {table}[{codec}]: {item['rows']} 行, {_format_bytes(item['bytes'])}")
+
+
+def main():
+    """整理数据库并显示前后对比"""
+    parser = argparse.ArgumentParser(description="压缩整理GTPlanner对话历史数据库")
+    parser.add_argument("db_path", nargs="?", default="gtplanner_conversations.db", help="数据库文件路径")
+    parser.add_argument("--no-recompress", action="store_true", help="只执行VACUUM，不重新编码历史正文")
+    args = parser.parse_args()
+
+    print("🗜️ 压缩整理GTPlanner对话历史数据库")
+    print("=" * 60)
+    print(f"数据库路径: {args.db_path}")
+    print("=" * 60)
+
+    try:
+        result = DatabaseDAO(args.db_path).compact(recompress=not args.no_recompress)
+    finally:
+        close_connection_pools()
+
+    _print_storage("整理前", result["before"])
+    _print_storage("整理后", result["after"])
+    print(f"\n✅ 重新压缩 {result['recompressed_rows']} 行")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
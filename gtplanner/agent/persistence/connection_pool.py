@@ -0,0 +1,212 @@
+"""
+SQLite连接池
+
+为DatabaseDAO提供长连接复用，避免每次操作都重新打开数据库、重复设置PRAGMA。
+
+- 一个写连接：所有写事务串行使用，由锁保护（SQLite同一时刻只允许一个写者）
+- N个读连接：按需创建，用完归还；WAL模式下读不阻塞写、写不阻塞读
+- 连接建立时一次性设置 journal_mode=WAL、synchronous=NORMAL、缓存和mmap大小，
+  并开启语句缓存（cached_statements），重复执行的SQL无需重新编译
+
+同一个数据库文件在进程内只维护一个连接池，通过 get_connection_pool(db_path) 获取。
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .body_codec import register_sql_functions
+
+
+class SQLiteConnectionPool:
+    """SQLite连接池（一写多读）"""
+
+    def __init__(self, db_path: str, readers: int = 4, cache_size_kb: int = 8192,
+                 mmap_size_mb: int = 64, cached_statements: int = 256,
+                 busy_timeout_ms: int = 5000):
+        """
+        初始化连接池
+
+        Args:
+            db_path: 数据库文件路径
+            readers: 最多创建的读连接数量
+            cache_size_kb: 每个连接的页缓存大小（KiB）
+            mmap_size_mb: 内存映射大小（MiB），0 表示不使用mmap
+            cached_statements: 每个连接缓存的预编译语句数量
+            busy_timeout_ms: 等待数据库锁的超时时间（毫秒）
+        """
+        self.db_path = db_path
+        self.max_readers = max(1, readers)
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size_mb = mmap_size_mb
+        self.cached_statements = cached_statements
+        self.busy_timeout_ms = busy_timeout_ms
+
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.RLock()
+        self._writer_depth = 0
+
+        self._idle_readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all_readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+
+        self._closed = False
+        self._stats = {"connections_opened": 0, "reads": 0, "writes": 0, "reader_waits": 0}
+
+    def _connect(self, read_only: bool) -> sqlite3.Connection:
+        """创建连接并设置PRAGMA"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.row_factory = sqlite3.Row  # 使结果可以按列名访问
+        register_sql_functions(conn)  # 全文索引和搜索需要解码压缩的正文
+
+        if not read_only:
+            # journal_mode 是持久化到数据库文件的，只需写连接设置一次
+            conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.execute("PRAGMA foreign_keys = ON;")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)};")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)};")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size_mb) * 1024 * 1024};")
+        conn.execute("PRAGMA temp_store = MEMORY;")
+        if read_only:
+            conn.execute("PRAGMA query_only = ON;")
+
+        self._stats["connections_opened"] += 1
+        return conn
+
+    def _ensure_open(self) -> None:
+        if self._closed:
+            raise sqlite3.ProgrammingError(f"连接池已关闭: {self.db_path}")
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """
+        借用写连接并开启事务
+
+        正常退出时提交，异常时回滚。同一线程内嵌套调用会复用外层事务，
+        只在最外层提交或回滚。
+        """
+        with self._writer_lock:
+            self._ensure_open()
+            if self._writer is None:
+                self._writer = self._connect(read_only=False)
+            conn = self._writer
+
+            self._writer_depth += 1
+            try:
+                yield conn
+                if self._writer_depth == 1:
+                    conn.commit()
+            except BaseException:
+                if self._writer_depth == 1:
+                    conn.rollback()
+                raise
+            finally:
+                self._writer_depth -= 1
+                self._stats["writes"] += 1
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """借用只读连接，所有读连接都在使用中时等待归还"""
+        self._ensure_open()
+        conn = self._checkout_reader()
+        try:
+            yield conn
+        finally:
+            if self._closed:
+                conn.close()
+            else:
+                self._idle_readers.put(conn)
+
+    def _checkout_reader(self) -> sqlite3.Connection:
+        try:
+            conn = self._idle_readers.get_nowait()
+        except queue.Empty:
+            with self._readers_lock:
+                if len(self._all_readers) < self.max_readers:
+                    conn = self._connect(read_only=True)
+                    self._all_readers.append(conn)
+                    self._stats["reads"] += 1
+                    return conn
+            self._stats["reader_waits"] += 1
+            conn = self._idle_readers.get()
+
+        self._stats["reads"] += 1
+        return conn
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取连接池统计信息"""
+        return {
+            "db_path": self.db_path,
+            "max_readers": self.max_readers,
+            "open_readers": len(self._all_readers),
+            "idle_readers": self._idle_readers.qsize(),
+            "writer_open": self._writer is not None,
+            **self._stats
+        }
+
+    def close(self) -> None:
+        """关闭所有连接（正在使用的读连接会在归还时关闭）"""
+        with self._writer_lock:
+            self._closed = True
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+        while True:
+            try:
+                self._idle_readers.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._readers_lock:
+            self._all_readers.clear()
+
+
+# 进程内按数据库文件共享的连接池
+_pools: Dict[str, SQLiteConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(db_path: str) -> SQLiteConnectionPool:
+    """
+    获取数据库文件对应的连接池（不存在时按配置创建）
+
+    Args:
+        db_path: 数据库文件路径
+
+    Returns:
+        该数据库文件共享的连接池
+    """
+    key = str(Path(db_path).resolve())
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            from gtplanner.utils.config_manager import get_database_config
+
+            config = get_database_config()
+            pool = SQLiteConnectionPool(
+                db_path,
+                readers=config.get("pool_readers", 4),
+                cache_size_kb=config.get("cache_size_kb", 8192),
+                mmap_size_mb=config.get("mmap_size_mb", 64),
+                cached_statements=config.get("cached_statements", 256),
+                busy_timeout_ms=config.get("busy_timeout_ms", 5000)
+            )
+            _pools[key] = pool
+        return pool
+
+
+def close_connection_pools() -> None:
+    """关闭所有连接池（进程退出或测试清理时调用）"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
@@ -42,8 +42,9 @@ def main():
         print("  📄 sessions: 会话元数据（会话ID、标题、阶段、压缩状态等）")
         print("  💬 messages: 完整对话记录（永不删除，支持消息链追踪）")
         print("  🗜️  compressed_context: 压缩上下文（智能压缩后的对话摘要）")
+        print("  🧾 compressed_context_messages: 压缩上下文消息（按序号追加，每条消息一行）")
         print("  🔧 tool_executions: 工具执行记录（Function Calling详情）")
-        print("  🔍 search_index: 搜索索引（全文搜索优化）")
+        print("  🔍 messages_fts / sessions_fts: FTS5全文索引（trigram分词，支持中文检索）")
         print("  ⚙️  database_metadata: 数据库元数据（版本、配置等）")
         
         print("\n🔍 关键特性:")
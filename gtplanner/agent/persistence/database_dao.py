@@ -5,20 +5,27 @@
 支持CRUD操作、事务管理、会话恢复和对话搜索。
 """
 
-import sqlite3
+import os
 import json
 import uuid
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Sequence, Tuple, Iterator, Union
 from pathlib import Path
 from contextlib import contextmanager
 
-from .database_schema import initialize_database
+from .database_schema import initialize_database, migrate_database
+from .connection_pool import get_connection_pool
+from .body_codec import encode_body, decode_body, resolve_codec, SQL_DECODE_FUNCTION
 
 
 class DatabaseDAO:
     """数据库操作层"""
     
+    # 全文检索的最短关键词长度（trigram分词器按3字符切分）
+    FTS_MIN_KEYWORD_LENGTH = 3
+    # 会话标题命中相对消息内容命中的bm25权重
+    FTS_TITLE_WEIGHT = 2.0
+    
     def __init__(self, db_path: str = "gtplanner_conversations.db"):
         """
         初始化DAO
@@ -26,41 +33,64 @@ class DatabaseDAO:
         Args:
             db_path: 数据库文件路径
         """
+        from gtplanner.utils.config_manager import get_database_config
+
         self.db_path = db_path
         self._ensure_database_initialized()
+        self.pool = get_connection_pool(db_path)
+        self._fts_enabled: Optional[bool] = None
+
+        # 消息正文压缩设置（读取时按行内的codec解码，与当前设置无关）
+        config = get_database_config()
+        self.compression_codec = resolve_codec(config.get("compression_codec", "zlib"))
+        self.compression_threshold = config.get("compression_threshold_bytes", 2048)
+        self.compression_level = config.get("compression_level", 6)
     
     def _ensure_database_initialized(self):
         """确保数据库已初始化"""
         if not Path(self.db_path).exists():
             print(f"🔧 初始化新数据库: {self.db_path}")
             initialize_database(self.db_path)
+        else:
+            migrate_database(self.db_path)
+    
+    def _encode_body(self, text: str):
+        """按配置压缩超过阈值的正文，返回(存储值, 编码)"""
+        return encode_body(text, self.compression_codec, self.compression_threshold, self.compression_level)
+
+    def _index_compressed_bodies(self, conn, bodies: List[Tuple[str, str]]) -> None:
+        """
+        把压缩正文的明文写入消息全文索引（与消息写入在同一事务中）
+
+        全文索引触发器只索引未压缩的正文，压缩正文由这里补充索引。
+
+        Args:
+            conn: 写连接
+            bodies: (明文正文, 消息ID) 列表
+        """
+        if bodies and self._has_fts_index():
+            conn.executemany("""
+                INSERT INTO messages_fts (rowid, content)
+                SELECT rowid, ? FROM messages WHERE message_id = ?
+            """, bodies)
     
     @contextmanager
     def get_connection(self):
-        """获取数据库连接的上下文管理器"""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("PRAGMA foreign_keys = ON;")
-        conn.row_factory = sqlite3.Row  # 使结果可以按列名访问
-        try:
+        """获取只读数据库连接的上下文管理器（从连接池借用，用完归还）"""
+        with self.pool.reader() as conn:
             yield conn
-        finally:
-            conn.close()
     
     @contextmanager
     def transaction(self):
-        """事务上下文管理器"""
-        with self.get_connection() as conn:
-            try:
-                yield conn
-                conn.commit()
-            except Exception:
-                conn.rollback()
-                raise
+        """事务上下文管理器（使用连接池的写连接，正常退出提交，异常回滚）"""
+        with self.pool.writer() as conn:
+            yield conn
     
     # ==================== 会话管理 ====================
     
     def create_session(self, title: str, project_stage: str = "requirements", 
-                      metadata: Optional[Dict[str, Any]] = None) -> str:
+                      metadata: Optional[Dict[str, Any]] = None,
+                      session_id: Optional[str] = None) -> str:
         """
         创建新会话
         
@@ -68,11 +98,12 @@ class DatabaseDAO:
             title: 会话标题
             project_stage: 项目阶段
             metadata: 元数据
+            session_id: 指定会话ID（例如由API客户端生成），为None时自动生成
             
         Returns:
             会话ID
         """
-        session_id = str(uuid.uuid4())
+        session_id = session_id or str(uuid.uuid4())
         metadata_json = json.dumps(metadata) if metadata else None
         
         with self.transaction() as conn:
@@ -89,13 +120,13 @@ class DatabaseDAO:
                     context_id, session_id, compression_version,
                     original_message_count, compressed_message_count,
                     original_token_count, compressed_token_count, compression_ratio,
-                    compressed_messages, summary, key_decisions, tool_execution_results
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    summary, key_decisions, tool_execution_results
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 context_id, session_id, 1,
                 0, 0,  # 初始消息数量为0
                 0, 0, 1.0,  # 初始token数量为0，压缩比为1.0
-                json.dumps([]), "新会话，暂无内容",
+                "新会话，暂无内容",
                 json.dumps([]), json.dumps({})
             ))
 
@@ -133,25 +164,43 @@ class DatabaseDAO:
             }
     
     def list_sessions(self, limit: int = 50, offset: int = 0,
-                     status: str = "active") -> List[Dict[str, Any]]:
+                     status: Union[str, Sequence[str]] = "active",
+                     after: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
         """
-        列出会话
+        列出会话（按 updated_at, session_id 倒序）
 
         Args:
             limit: 限制数量
-            offset: 偏移量
-            status: 会话状态
+            offset: 偏移量（深翻页请使用after）
+            status: 会话状态，或多个状态组成的序列
+            after: 翻页游标，传入上一页最后一条结果的cursor字段（keyset分页）
 
         Returns:
             会话列表
         """
+        statuses = [status] if isinstance(status, str) else list(status)
+        if len(statuses) == 1:
+            # 走 (status, updated_at, session_id) 索引，排序和游标比较都在索引内完成
+            sql = "SELECT * FROM sessions WHERE status = ?"
+        else:
+            # 多个状态时status只作为过滤条件（+号阻止使用状态索引），
+            # 按 (updated_at, session_id) 索引顺序扫描，避免临时B树排序
+            placeholders = ", ".join("?" for _ in statuses)
+            sql = f"SELECT * FROM sessions WHERE +status IN ({placeholders})"
+        params: List[Any] = list(statuses)
+
+        if after:
+            sql += " AND (updated_at, session_id) < (?, ?)"
+            params.extend(after)
+
+        sql += " ORDER BY updated_at DESC, session_id DESC LIMIT ?"
+        params.append(limit)
+        if offset:
+            sql += " OFFSET ?"
+            params.append(offset)
+
         with self.get_connection() as conn:
-            cursor = conn.execute("""
-                SELECT * FROM sessions
-                WHERE status = ?
-                ORDER BY updated_at DESC
-                LIMIT ? OFFSET ?
-            """, (status, limit, offset))
+            cursor = conn.execute(sql, params)
 
             sessions = []
             for row in cursor.fetchall():
@@ -164,7 +213,8 @@ class DatabaseDAO:
                     "total_messages": row["total_messages"],
                     "total_tokens": row["total_tokens"],
                     "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
-                    "status": row["status"]
+                    "status": row["status"],
+                    "cursor": [row["updated_at"], row["session_id"]]
                 })
 
             return sessions
@@ -291,29 +341,78 @@ class DatabaseDAO:
         message_id = str(uuid.uuid4())
         metadata_json = json.dumps(metadata) if metadata else None
         tool_calls_json = json.dumps(tool_calls) if tool_calls else None
+        stored_content, content_codec = self._encode_body(content)
 
         with self.transaction() as conn:
             conn.execute("""
                 INSERT INTO messages (
-                    message_id, session_id, role, content, token_count,
+                    message_id, session_id, role, content, content_codec, token_count,
                     metadata, tool_calls, tool_call_id, parent_message_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (message_id, session_id, role, content, token_count,
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (message_id, session_id, role, stored_content, content_codec, token_count,
                   metadata_json, tool_calls_json, tool_call_id, parent_message_id))
+            if content_codec is not None:
+                self._index_compressed_bodies(conn, [(content, message_id)])
 
-            # 更新会话的token计数
-            if token_count:
-                conn.execute("""
-                    UPDATE sessions
-                    SET total_tokens = total_tokens + ?
-                    WHERE session_id = ?
-                """, (token_count, session_id))
+            # 更新会话的消息数和token计数
+            conn.execute("""
+                UPDATE sessions
+                SET total_messages = total_messages + 1,
+                    total_tokens = total_tokens + ?
+                WHERE session_id = ?
+            """, (token_count or 0, session_id))
 
         return message_id
+
+    def add_messages(self, session_id: str, messages: List[Dict[str, Any]]) -> List[str]:
+        """
+        批量添加消息（executemany一次插入，会话消息数和token计数只更新一次）
+
+        Args:
+            session_id: 会话ID
+            messages: 消息列表，每项可包含role、content、metadata、tool_calls、
+                tool_call_id、parent_message_id、token_count，字段含义与add_message相同
+
+        Returns:
+            消息ID列表（与输入顺序一致）
+        """
+        message_ids = [str(uuid.uuid4()) for _ in messages]
+        rows = [
+            (
+                message_id, session_id, msg["role"], *self._encode_body(msg["content"]), msg.get("token_count"),
+                json.dumps(msg["metadata"]) if msg.get("metadata") else None,
+                json.dumps(msg["tool_calls"]) if msg.get("tool_calls") else None,
+                msg.get("tool_call_id"), msg.get("parent_message_id")
+            )
+            for message_id, msg in zip(message_ids, messages)
+        ]
+        total_tokens = sum(msg.get("token_count") or 0 for msg in messages)
+
+        with self.transaction() as conn:
+            conn.executemany("""
+                INSERT INTO messages (
+                    message_id, session_id, role, content, content_codec, token_count,
+                    metadata, tool_calls, tool_call_id, parent_message_id
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            self._index_compressed_bodies(conn, [
+                (msg["content"], row[0]) for msg, row in zip(messages, rows) if row[4] is not None
+            ])
+
+            # 更新会话的消息数和token计数（整批只更新一次）
+            conn.execute("""
+                UPDATE sessions
+                SET total_messages = total_messages + ?,
+                    total_tokens = total_tokens + ?
+                WHERE session_id = ?
+            """, (len(messages), total_tokens, session_id))
+
+        return message_ids
     
     def get_messages(self, session_id: str, limit: Optional[int] = None,
                     role_filter: Optional[str] = None,
-                    include_compressed: bool = True) -> List[Dict[str, Any]]:
+                    include_compressed: bool = True,
+                    after: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
         """
         获取会话消息
         
@@ -322,12 +421,17 @@ class DatabaseDAO:
             limit: 限制数量
             role_filter: 角色过滤
             include_compressed: 是否包含压缩消息
+            after: 翻页游标，传入上一页最后一条消息的cursor字段（keyset分页）
             
         Returns:
             消息列表
         """
-        sql = "SELECT * FROM messages WHERE session_id = ?"
-        params = [session_id]
+        sql = "SELECT rowid AS row_id, * FROM messages WHERE session_id = ?"
+        params: List[Any] = [session_id]
+
+        if after:
+            sql += " AND (timestamp, rowid) > (?, ?)"
+            params.extend(after)
         
         if role_filter:
             sql += " AND role = ?"
@@ -336,7 +440,7 @@ class DatabaseDAO:
         if not include_compressed:
             sql += " AND is_compressed = FALSE"
         
-        sql += " ORDER BY timestamp ASC"
+        sql += " ORDER BY timestamp ASC, rowid ASC"  # 同一秒内按插入顺序
         
         if limit:
             sql += " LIMIT ?"
@@ -351,12 +455,13 @@ class DatabaseDAO:
                     "message_id": row["message_id"],
                     "session_id": row["session_id"],
                     "role": row["role"],
-                    "content": row["content"],
+                    "content": decode_body(row["content"], row["content_codec"]),
                     "timestamp": row["timestamp"],
                     "token_count": row["token_count"],
                     "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
                     "tool_calls": json.loads(row["tool_calls"]) if row["tool_calls"] else [],
-                    "parent_message_id": row["parent_message_id"]
+                    "parent_message_id": row["parent_message_id"],
+                    "cursor": [row["timestamp"], row["row_id"]]
                 })
             
             return messages
@@ -376,7 +481,7 @@ class DatabaseDAO:
             cursor = conn.execute("""
                 SELECT * FROM messages
                 WHERE session_id = ?
-                ORDER BY timestamp DESC
+                ORDER BY timestamp DESC, rowid DESC
                 LIMIT ?
             """, (session_id, count))
 
@@ -386,7 +491,7 @@ class DatabaseDAO:
                     "message_id": row["message_id"],
                     "session_id": row["session_id"],
                     "role": row["role"],
-                    "content": row["content"],
+                    "content": decode_body(row["content"], row["content_codec"]),
                     "timestamp": row["timestamp"],
                     "token_count": row["token_count"],
                     "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
@@ -426,54 +531,55 @@ class DatabaseDAO:
         compressed_token_count = len(summary.split())  # 简单估算
         compression_ratio = compressed_token_count / max(original_token_count, 1)
 
-        # 获取当前压缩版本
-        with self.get_connection() as conn:
-            cursor = conn.execute("""
-                SELECT COALESCE(MAX(compression_version), 0) + 1 as next_version
-                FROM compressed_context WHERE session_id = ?
-            """, (session_id,))
-            compression_version = cursor.fetchone()[0]
-
-        compressed_messages_json = json.dumps(compressed_messages)
         key_decisions_json = json.dumps(key_decisions) if key_decisions else None
         tool_execution_results_json = json.dumps(tool_execution_results) if tool_execution_results else None
 
         with self.transaction() as conn:
-            # 将之前的压缩上下文设为非活跃
+            # 将之前的压缩上下文设为非活跃（先写入以开启写事务，持有写锁后再读取版本号，
+            # 并发的压缩不会拿到相同的版本）
             conn.execute("""
                 UPDATE compressed_context
                 SET is_active = FALSE
                 WHERE session_id = ? AND is_active = TRUE
             """, (session_id,))
 
+            # 获取下一个压缩版本
+            compression_version = conn.execute("""
+                SELECT COALESCE(MAX(compression_version), 0) + 1 as next_version
+                FROM compressed_context WHERE session_id = ?
+            """, (session_id,)).fetchone()[0]
+
             # 插入新的压缩上下文
             conn.execute("""
                 INSERT INTO compressed_context (
                     context_id, session_id, compression_version,
                     original_message_count, compressed_message_count,
                     original_token_count, compressed_token_count, compression_ratio,
-                    compressed_messages, summary, key_decisions, tool_execution_results
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    summary, key_decisions, tool_execution_results
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (context_id, session_id, compression_version,
                   original_message_count, compressed_message_count,
                   original_token_count, compressed_token_count, compression_ratio,
-                  compressed_messages_json, summary, key_decisions_json, tool_execution_results_json))
+                  summary, key_decisions_json, tool_execution_results_json))
+            self._insert_compressed_context_messages(conn, context_id, compressed_messages)
 
-            # 更新会话的压缩状态
+            # 更新会话时间（是否已压缩由 compression_version > 1 判断，sessions 表没有单独的压缩状态列）
             conn.execute("""
                 UPDATE sessions
-                SET is_compressed = TRUE, last_compression_at = CURRENT_TIMESTAMP
+                SET updated_at = CURRENT_TIMESTAMP
                 WHERE session_id = ?
             """, (session_id,))
 
         return context_id
 
-    def get_active_compressed_context(self, session_id: str) -> Optional[Dict[str, Any]]:
+    def get_active_compressed_context(self, session_id: str,
+                                      include_messages: bool = True) -> Optional[Dict[str, Any]]:
         """
         获取活跃的压缩上下文
 
         Args:
             session_id: 会话ID
+            include_messages: 是否加载消息列表；只需要计数等统计信息时传False，避免读取全部消息
 
         Returns:
             压缩上下文信息或None
@@ -490,6 +596,11 @@ class DatabaseDAO:
             if not row:
                 return None
 
+            compressed_messages = (
+                list(self._iter_compressed_context_messages(conn, row["context_id"]))
+                if include_messages else []
+            )
+
             return {
                 "context_id": row["context_id"],
                 "session_id": row["session_id"],
@@ -500,7 +611,7 @@ class DatabaseDAO:
                 "original_token_count": row["original_token_count"],
                 "compressed_token_count": row["compressed_token_count"],
                 "compression_ratio": row["compression_ratio"],
-                "compressed_messages": json.loads(row["compressed_messages"]),
+                "compressed_messages": compressed_messages,
                 "summary": row["summary"],
                 "key_decisions": json.loads(row["key_decisions"]) if row["key_decisions"] else [],
                 "tool_execution_results": json.loads(row["tool_execution_results"]) if row["tool_execution_results"] else {},
@@ -537,7 +648,7 @@ class DatabaseDAO:
                     "compressed_token_count": row["compressed_token_count"],
                     "compression_ratio": row["compression_ratio"],
                     "compressed_data": {
-                        "messages": json.loads(row["compressed_messages"]),
+                        "messages": list(self._iter_compressed_context_messages(conn, row["context_id"])),
                         "summary": row["summary"],
                         "key_decisions": json.loads(row["key_decisions"]) if row["key_decisions"] else []
                     },
@@ -587,15 +698,88 @@ class DatabaseDAO:
                     context_id, session_id, compression_version,
                     original_message_count, compressed_message_count,
                     original_token_count, compressed_token_count, compression_ratio,
-                    compressed_messages, summary, key_decisions, tool_execution_results
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    summary, key_decisions, tool_execution_results
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 context_id, session_id, version,
                 original_count, compressed_count,
                 0, 0, compression_ratio,  # token counts暂时设为0
-                json.dumps(messages), summary, json.dumps(key_decisions),
+                summary, json.dumps(key_decisions),
                 json.dumps(metadata) if metadata else None
             ))
+            self._insert_compressed_context_messages(conn, context_id, messages)
+
+        return context_id
+
+    def fold_compressed_context(self, session_id: str, base_context_id: str, keep_from_ordinal: int,
+                                head_messages: List[Dict[str, Any]], summary: str,
+                                key_decisions: List[Any]) -> Optional[str]:
+        """
+        增量压缩检查点：用新的摘要消息替换基础上下文中序号小于keep_from_ordinal的消息
+
+        基础上下文中序号不小于keep_from_ordinal的消息（保留的最近消息，以及压缩期间新追加的消息）
+        在同一事务内原样复制到新版本，压缩与前台追加消息并发时不会丢消息。
+
+        Args:
+            session_id: 会话ID
+            base_context_id: 压缩开始时读取的活跃上下文ID
+            keep_from_ordinal: 从该序号起的消息原样保留
+            head_messages: 新的摘要消息（放在新上下文开头）
+            summary: 更新后的对话摘要
+            key_decisions: 更新后的关键决策
+
+        Returns:
+            新的压缩上下文ID；基础上下文已不是活跃版本（被其他压缩任务替换）时返回None
+        """
+        context_id = str(uuid.uuid4())
+        head_tokens = sum(msg.get("token_count") or 0 for msg in head_messages)
+
+        with self.transaction() as conn:
+            base = conn.execute("""
+                SELECT * FROM compressed_context
+                WHERE context_id = ? AND session_id = ? AND is_active = TRUE
+            """, (base_context_id, session_id)).fetchone()
+            if base is None:
+                return None
+
+            kept = conn.execute("""
+                SELECT COUNT(*), COALESCE(SUM(token_count), 0) FROM compressed_context_messages
+                WHERE context_id = ? AND ordinal >= ?
+            """, (base_context_id, keep_from_ordinal)).fetchone()
+            compressed_count = len(head_messages) + kept[0]
+            compressed_tokens = head_tokens + kept[1]
+
+            conn.execute("""
+                UPDATE compressed_context SET is_active = FALSE
+                WHERE session_id = ? AND is_active = TRUE
+            """, (session_id,))
+
+            conn.execute("""
+                INSERT INTO compressed_context (
+                    context_id, session_id, compression_version,
+                    original_message_count, compressed_message_count,
+                    original_token_count, compressed_token_count, compression_ratio,
+                    summary, key_decisions, tool_execution_results
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                context_id, session_id, base["compression_version"] + 1,
+                base["original_message_count"], compressed_count,
+                base["original_token_count"], compressed_tokens,
+                compressed_count / base["original_message_count"] if base["original_message_count"] else 1.0,
+                summary, json.dumps(key_decisions, ensure_ascii=False),
+                base["tool_execution_results"]
+            ))
+
+            self._insert_compressed_context_messages(conn, context_id, head_messages)
+            # 保留的消息直接在SQL中复制（不解码、不重新序列化）
+            conn.execute("""
+                INSERT INTO compressed_context_messages (
+                    context_id, ordinal, message_id, role, token_count, message, codec
+                )
+                SELECT ?, ordinal - ? + ?, message_id, role, token_count, message, codec
+                FROM compressed_context_messages
+                WHERE context_id = ? AND ordinal >= ?
+            """, (context_id, keep_from_ordinal, len(head_messages), base_context_id, keep_from_ordinal))
 
         return context_id
 
@@ -632,15 +816,120 @@ class DatabaseDAO:
             ValueError: 如果找不到压缩上下文记录（数据不一致）
         """
         # 获取活跃的压缩上下文
-        compressed_context = self.get_active_compressed_context(session_id)
+        compressed_context = self.get_active_compressed_context(session_id, include_messages=False)
 
         if not compressed_context:
             # 这是异常情况，说明数据不一致
             print(f"⚠️ 警告：会话 {session_id} 缺少压缩上下文记录，数据可能不一致")
             raise ValueError(f"会话 {session_id} 缺少压缩上下文记录，请检查会话创建流程")
 
-        # 直接从压缩上下文中解析消息
-        return compressed_context.get("compressed_messages", [])
+        # 按序号读取压缩上下文中的消息
+        return list(self.iter_compressed_context_messages(compressed_context["context_id"]))
+
+    def iter_compressed_context_messages(self, context_id: str) -> Iterator[Dict[str, Any]]:
+        """
+        按序号逐条读取压缩上下文中的消息
+
+        Args:
+            context_id: 压缩上下文ID
+
+        Yields:
+            OpenAI标准格式的消息字典
+        """
+        with self.get_connection() as conn:
+            yield from self._iter_compressed_context_messages(conn, context_id)
+
+    @staticmethod
+    def _iter_compressed_context_messages(conn, context_id: str) -> Iterator[Dict[str, Any]]:
+        """使用已借用的连接按序号读取压缩上下文消息"""
+        cursor = conn.execute("""
+            SELECT message, codec FROM compressed_context_messages
+            WHERE context_id = ?
+            ORDER BY ordinal ASC
+        """, (context_id,))
+
+        for row in cursor:
+            yield json.loads(decode_body(row["message"], row["codec"]))
+
+    def append_compressed_context_message(self, session_id: str, message: Dict[str, Any],
+                                          token_count: int = 0) -> str:
+        """
+        向活跃的压缩上下文追加一条消息（只插入一行并增量更新计数，不重写已有消息）
+
+        Args:
+            session_id: 会话ID
+            message: OpenAI标准格式的消息字典
+            token_count: 消息的token数量
+
+        Returns:
+            压缩上下文ID
+
+        Raises:
+            ValueError: 如果找不到压缩上下文记录（数据不一致）
+        """
+        return self.append_compressed_context_messages(session_id, [{**message, "token_count": token_count}])
+
+    def append_compressed_context_messages(self, session_id: str, messages: List[Dict[str, Any]]) -> str:
+        """
+        向活跃的压缩上下文批量追加消息，计数只更新一次
+
+        Args:
+            session_id: 会话ID
+            messages: OpenAI标准格式的消息字典列表（token_count字段用于累加计数）
+
+        Returns:
+            压缩上下文ID
+
+        Raises:
+            ValueError: 如果找不到压缩上下文记录（数据不一致）
+        """
+        token_count = sum(msg.get("token_count") or 0 for msg in messages)
+
+        with self.transaction() as conn:
+            row = conn.execute("""
+                SELECT context_id FROM compressed_context
+                WHERE session_id = ? AND is_active = TRUE
+                ORDER BY compression_version DESC
+                LIMIT 1
+            """, (session_id,)).fetchone()
+
+            if not row:
+                # 这是异常情况，压缩上下文应该在会话创建时就存在
+                print(f"⚠️ 警告：会话 {session_id} 缺少压缩上下文记录")
+                raise ValueError(f"会话 {session_id} 缺少压缩上下文记录，请检查会话创建流程")
+
+            context_id = row["context_id"]
+            next_ordinal = conn.execute("""
+                SELECT COALESCE(MAX(ordinal) + 1, 0) FROM compressed_context_messages
+                WHERE context_id = ?
+            """, (context_id,)).fetchone()[0]
+
+            self._insert_compressed_context_messages(conn, context_id, messages, start_ordinal=next_ordinal)
+
+            conn.execute("""
+                UPDATE compressed_context
+                SET compressed_message_count = compressed_message_count + ?,
+                    compressed_token_count = compressed_token_count + ?,
+                    original_message_count = original_message_count + ?,
+                    original_token_count = original_token_count + ?
+                WHERE context_id = ?
+            """, (len(messages), token_count, len(messages), token_count, context_id))
+
+        return context_id
+
+    def _insert_compressed_context_messages(self, conn, context_id: str,
+                                            messages: List[Dict[str, Any]],
+                                            start_ordinal: int = 0) -> None:
+        """批量写入压缩上下文消息（需在写事务内调用）"""
+        conn.executemany("""
+            INSERT INTO compressed_context_messages (
+                context_id, ordinal, message_id, role, token_count, message, codec
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (context_id, start_ordinal + i, msg.get("message_id"), msg.get("role", "user"),
+             msg.get("token_count") or 0, *self._encode_body(json.dumps(msg)))
+            for i, msg in enumerate(messages)
+        ])
 
 
 
@@ -652,44 +941,210 @@ class DatabaseDAO:
 
     # ==================== 搜索功能 ====================
 
-    def search_sessions_by_keyword(self, keyword: str, limit: int = 20) -> List[Dict[str, Any]]:
+    def _has_fts_index(self) -> bool:
+        """数据库中是否已建立全文索引（SQLite不支持FTS5时不会创建）"""
+        if self._fts_enabled is None:
+            with self.get_connection() as conn:
+                row = conn.execute("""
+                    SELECT COUNT(*) FROM sqlite_master
+                    WHERE type = 'table' AND name IN ('messages_fts', 'sessions_fts')
+                """).fetchone()
+                self._fts_enabled = row[0] == 2
+        return self._fts_enabled
+
+    def _use_fts(self, keyword: str) -> bool:
+        """trigram分词器至少需要3个字符，更短的关键词回退为LIKE扫描"""
+        return len(keyword) >= self.FTS_MIN_KEYWORD_LENGTH and self._has_fts_index()
+
+    @staticmethod
+    def _fts_phrase(keyword: str) -> str:
+        """把关键词转为FTS5短语查询，避免关键词中的运算符被解析"""
+        return '"' + keyword.replace('"', '""') + '"'
+
+    @staticmethod
+    def _session_row_to_dict(row) -> Dict[str, Any]:
+        return {
+            "session_id": row["session_id"],
+            "title": row["title"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "project_stage": row["project_stage"],
+            "total_messages": row["total_messages"],
+            "total_tokens": row["total_tokens"],
+            "is_compressed": bool(row["is_compressed"]) if "is_compressed" in row.keys() else False,
+            "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
+            "status": row["status"]
+        }
+
+    def search_sessions_by_keyword(self, keyword: str, limit: int = 20,
+                                   after: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
         """
-        按关键词搜索会话
+        按关键词搜索会话（匹配标题和消息内容）
+
+        有全文索引时按bm25相关度排序（标题命中权重更高），并返回命中片段；
+        否则回退为LIKE扫描，按更新时间排序。
 
         Args:
             keyword: 关键词
             limit: 结果限制
+            after: 翻页游标，传入上一页最后一条结果的cursor字段（keyset分页）
 
         Returns:
-            匹配的会话列表
+            匹配的会话列表，每项包含rank、snippet和cursor
         """
+        if not self._use_fts(keyword):
+            return self._search_sessions_by_like(keyword, limit, after)
+
+        phrase = self._fts_phrase(keyword)
+        keyset_clause = "WHERE (best.rank, s.session_id) > (?, ?)" if after else ""
+
+        sql = f"""
+            WITH hits AS (
+                SELECT m.session_id AS session_id,
+                       bm25(messages_fts) AS rank,
+                       snippet(messages_fts, 0, '[', ']', '…', 32) AS snippet
+                FROM messages_fts
+                JOIN messages m ON m.rowid = messages_fts.rowid
+                WHERE messages_fts MATCH ?
+                UNION ALL
+                SELECT s.session_id,
+                       bm25(sessions_fts) * ?,
+                       snippet(sessions_fts, 0, '[', ']', '…', 32)
+                FROM sessions_fts
+                JOIN sessions s ON s.rowid = sessions_fts.rowid
+                WHERE sessions_fts MATCH ?
+            ),
+            best AS (
+                -- MIN()聚合时，裸列snippet取自rank最小（最相关）的那一行
+                SELECT session_id, MIN(rank) AS rank, snippet
+                FROM hits
+                GROUP BY session_id
+            )
+            SELECT s.*, best.rank AS rank, best.snippet AS snippet
+            FROM best
+            JOIN sessions s ON s.session_id = best.session_id
+            {keyset_clause}
+            ORDER BY best.rank ASC, s.session_id ASC
+            LIMIT ?
+        """
+        params: List[Any] = [phrase, self.FTS_TITLE_WEIGHT, phrase]
+        if after:
+            params.extend(after)
+        params.append(limit)
+
         with self.get_connection() as conn:
-            cursor = conn.execute("""
+            sessions = []
+            for row in conn.execute(sql, params).fetchall():
+                session = self._session_row_to_dict(row)
+                session.update({
+                    "rank": row["rank"],
+                    "snippet": row["snippet"],
+                    "cursor": [row["rank"], row["session_id"]]
+                })
+                sessions.append(session)
+
+            return sessions
+
+    def _search_sessions_by_like(self, keyword: str, limit: int,
+                                 after: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+        """LIKE扫描搜索（无全文索引或关键词过短时使用）"""
+        keyset_clause = "AND (s.updated_at, s.session_id) < (?, ?)" if after else ""
+        params: List[Any] = [f"%{keyword}%", f"%{keyword}%"]
+        if after:
+            params.extend(after)
+        params.append(limit)
+
+        with self.get_connection() as conn:
+            cursor = conn.execute(f"""
                 SELECT DISTINCT s.*
                 FROM sessions s
                 LEFT JOIN messages m ON m.session_id = s.session_id
-                WHERE s.title LIKE ? OR m.content LIKE ?
-                ORDER BY s.updated_at DESC
+                WHERE (s.title LIKE ? OR {SQL_DECODE_FUNCTION}(m.content, m.content_codec) LIKE ?)
+                {keyset_clause}
+                ORDER BY s.updated_at DESC, s.session_id DESC
                 LIMIT ?
-            """, (f"%{keyword}%", f"%{keyword}%", limit))
+            """, params)
 
             sessions = []
             for row in cursor.fetchall():
-                sessions.append({
-                    "session_id": row["session_id"],
-                    "title": row["title"],
-                    "created_at": row["created_at"],
-                    "updated_at": row["updated_at"],
-                    "project_stage": row["project_stage"],
-                    "total_messages": row["total_messages"],
-                    "total_tokens": row["total_tokens"],
-                    "is_compressed": bool(row["is_compressed"]),
-                    "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
-                    "status": row["status"]
+                session = self._session_row_to_dict(row)
+                session.update({
+                    "rank": None,
+                    "snippet": None,
+                    "cursor": [row["updated_at"], row["session_id"]]
                 })
+                sessions.append(session)
 
             return sessions
 
+    def search_messages(self, keyword: str, limit: int = 20,
+                        session_id: Optional[str] = None,
+                        after: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+        """
+        按关键词搜索消息
+
+        Args:
+            keyword: 关键词
+            limit: 结果限制
+            session_id: 只在指定会话内搜索
+            after: 翻页游标，传入上一页最后一条结果的cursor字段（keyset分页）
+
+        Returns:
+            匹配的消息列表，每项包含rank、snippet和cursor
+        """
+        params: List[Any] = []
+        if self._use_fts(keyword):
+            where = ["messages_fts MATCH ?"]
+            params.append(self._fts_phrase(keyword))
+            if session_id:
+                where.append("m.session_id = ?")
+                params.append(session_id)
+            if after:
+                where.append("(bm25(messages_fts), m.rowid) > (?, ?)")
+                params.extend(after)
+            sql = f"""
+                SELECT m.rowid AS row_id, m.message_id, m.session_id, m.role, m.timestamp,
+                       bm25(messages_fts) AS rank,
+                       snippet(messages_fts, 0, '[', ']', '…', 32) AS snippet
+                FROM messages_fts
+                JOIN messages m ON m.rowid = messages_fts.rowid
+                WHERE {' AND '.join(where)}
+                ORDER BY rank ASC, m.rowid ASC
+                LIMIT ?
+            """
+        else:
+            where = [f"{SQL_DECODE_FUNCTION}(m.content, m.content_codec) LIKE ?"]
+            params.append(f"%{keyword}%")
+            if session_id:
+                where.append("m.session_id = ?")
+                params.append(session_id)
+            if after:
+                where.append("m.rowid < ?")
+                params.append(after[-1])
+            sql = f"""
+                SELECT m.rowid AS row_id, m.message_id, m.session_id, m.role, m.timestamp,
+                       NULL AS rank, NULL AS snippet
+                FROM messages m
+                WHERE {' AND '.join(where)}
+                ORDER BY m.rowid DESC
+                LIMIT ?
+            """
+        params.append(limit)
+
+        with self.get_connection() as conn:
+            return [
+                {
+                    "message_id": row["message_id"],
+                    "session_id": row["session_id"],
+                    "role": row["role"],
+                    "timestamp": row["timestamp"],
+                    "rank": row["rank"],
+                    "snippet": row["snippet"],
+                    "cursor": [row["rank"], row["row_id"]] if row["rank"] is not None else [row["row_id"]]
+                }
+                for row in conn.execute(sql, params).fetchall()
+            ]
+
     # ==================== 统计功能 ====================
 
     def get_session_statistics(self, session_id: str) -> Dict[str, Any]:
@@ -746,4 +1201,102 @@ class DatabaseDAO:
 
             # 简化统计：删除复杂的工具统计
 
+            stats["storage"] = self._get_storage_statistics(conn)
+
             return stats
+
+    def _get_storage_statistics(self, conn) -> Dict[str, Any]:
+        """统计数据库文件大小和正文压缩情况"""
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        wal_path = Path(f"{self.db_path}-wal")
+
+        storage = {
+            "database_bytes": page_count * page_size,
+            "free_bytes": freelist_count * page_size,
+            "file_bytes": os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0,
+            "wal_bytes": wal_path.stat().st_size if wal_path.exists() else 0,
+            "compression_codec": self.compression_codec,
+            "compression_threshold_bytes": self.compression_threshold,
+        }
+
+        # 按编码统计行数和存储字节数（codec为NULL表示未压缩）
+        for table, body, codec_column in (("messages", "content", "content_codec"),
+                                          ("compressed_context_messages", "message", "codec")):
+            cursor = conn.execute(f"""
+                SELECT {codec_column} AS codec, COUNT(*) AS row_count,
+                       COALESCE(SUM(length(CAST({body} AS BLOB))), 0) AS stored_bytes
+                FROM {table}
+                GROUP BY {codec_column}
+            """)
+            storage[table] = {
+                (row["codec"] or "none"): {"rows": row["row_count"], "bytes": row["stored_bytes"]}
+                for row in cursor
+            }
+
+        return storage
+
+    def compact(self, recompress: bool = True) -> Dict[str, Any]:
+        """
+        压缩整理数据库（一次性维护操作）
+
+        1. 按当前压缩设置重新编码超过阈值但未压缩的历史正文
+        2. 按解码后的正文重建消息全文索引（清除在DAO之外删除或改写压缩消息留下的失效条目，
+           例如删除会话时级联删除的消息），并合并全文索引段
+        3. VACUUM回收空闲页并截断WAL
+
+        Args:
+            recompress: 是否重新编码历史正文
+
+        Returns:
+            整理前后的存储统计
+        """
+        with self.get_connection() as conn:
+            before = self._get_storage_statistics(conn)
+
+        has_fts = self._has_fts_index()
+        recompressed = 0
+        with self.transaction() as conn:
+            if recompress and self.compression_codec is not None:
+                for table, key_columns, body, codec_column in (
+                    ("messages", ("message_id",), "content", "content_codec"),
+                    ("compressed_context_messages", ("context_id", "ordinal"), "message", "codec"),
+                ):
+                    key_sql = ", ".join(key_columns)
+                    rows = conn.execute(f"""
+                        SELECT {key_sql}, {body} AS body FROM {table}
+                        WHERE {codec_column} IS NULL
+                          AND length(CAST({body} AS BLOB)) >= ?
+                    """, (self.compression_threshold,)).fetchall()
+
+                    updates = []
+                    for row in rows:
+                        value, codec = self._encode_body(row["body"])
+                        if codec is not None:
+                            updates.append((value, codec, *(row[k] for k in key_columns)))
+
+                    where_sql = " AND ".join(f"{k} = ?" for k in key_columns)
+                    conn.executemany(f"""
+                        UPDATE {table} SET {body} = ?, {codec_column} = ?
+                        WHERE {where_sql}
+                    """, updates)
+                    recompressed += len(updates)
+
+            if has_fts:
+                # 外部内容表是解码后的 messages_text 视图，连接池的连接已注册解码函数；
+                # 重建同时为上面重新压缩的正文建立索引
+                conn.execute("INSERT INTO messages_fts(messages_fts) VALUES('rebuild')")
+                conn.execute("INSERT INTO messages_fts(messages_fts) VALUES('optimize')")
+                conn.execute("INSERT INTO sessions_fts(sessions_fts) VALUES('optimize')")
+
+        # VACUUM不能在事务内执行，先提交写连接上可能存在的隐式事务
+        with self.transaction() as conn:
+            conn.commit()
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        with self.get_connection() as conn:
+            after = self._get_storage_statistics(conn)
+
+        return {"recompressed_rows": recompressed, "before": before, "after": after}
@@ -5,17 +5,20 @@ SQLite数据库架构设计
 支持完整历史记录、增量存储、智能压缩和高效检索。
 """
 
+import json
 import sqlite3
 from pathlib import Path
 from typing import Optional
 from datetime import datetime
 
+from .body_codec import register_sql_functions
+
 
 class DatabaseSchema:
     """数据库架构管理器"""
     
     # 数据库版本，用于迁移管理
-    CURRENT_VERSION = 1
+    CURRENT_VERSION = 7
     
     @staticmethod
     def get_create_tables_sql() -> dict:
@@ -29,7 +32,7 @@ class DatabaseSchema:
                     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, -- 会话创建时间
                     updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, -- 最后更新时间（触发器自动更新）
                     project_stage TEXT NOT NULL DEFAULT 'requirements',    -- 项目阶段（保留用于兼容性）
-                    total_messages INTEGER NOT NULL DEFAULT 0,             -- 消息总数（触发器自动维护）
+                    total_messages INTEGER NOT NULL DEFAULT 0,             -- 消息总数（写入时由DAO累加，删除时触发器维护）
                     total_tokens INTEGER NOT NULL DEFAULT 0,               -- token总数（用于成本统计）
                     metadata TEXT NULL,                                     -- JSON格式的扩展元数据（用户偏好、配置等）
                     status TEXT NOT NULL DEFAULT 'active'                  -- 会话状态：active, archived, deleted
@@ -42,7 +45,8 @@ class DatabaseSchema:
                     message_id TEXT PRIMARY KEY,                           -- 消息唯一标识符（UUID）
                     session_id TEXT NOT NULL,                              -- 所属会话ID
                     role TEXT NOT NULL,                                     -- 消息角色：user, assistant, system, tool（完全符合OpenAI标准）
-                    content TEXT NOT NULL,                                  -- 消息内容（完整保存）
+                    content TEXT NOT NULL,                                  -- 消息内容（完整保存；超过阈值时为压缩后的BLOB）
+                    content_codec TEXT NULL,                                -- 正文压缩编码：NULL（未压缩）、zlib、zstd
                     timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, -- 消息时间戳
                     token_count INTEGER NULL,                               -- 消息的token数量（用于统计）
                     metadata TEXT NULL,                                     -- JSON格式的消息元数据（模型参数、温度等）
@@ -66,7 +70,7 @@ class DatabaseSchema:
                     original_token_count INTEGER NOT NULL,                 -- 原始token数量
                     compressed_token_count INTEGER NOT NULL,               -- 压缩后token数量
                     compression_ratio REAL NOT NULL,                       -- 压缩比率（compressed/original）
-                    compressed_messages TEXT NOT NULL,                     -- JSON格式的OpenAI标准消息列表：[{"role":"user","content":"..."},{"role":"assistant","tool_calls":[...]},{"role":"tool","tool_call_id":"...","content":"..."}]
+                    compressed_messages TEXT NOT NULL DEFAULT '[]',        -- 已弃用（v2起消息存放在compressed_context_messages表），保留列用于兼容旧版本
                     summary TEXT NOT NULL,                                  -- LLM生成的对话摘要
                     key_decisions TEXT NULL,                                -- JSON格式的关键决策和里程碑
                     tool_execution_results TEXT NULL,                       -- JSON格式的工具执行结果集合（pocketflow框架内部数据传递专用）
@@ -74,11 +78,22 @@ class DatabaseSchema:
                     FOREIGN KEY (session_id) REFERENCES sessions (session_id) ON DELETE CASCADE
                 );
             """,
-            
 
-            
+            "compressed_context_messages": """
+                -- 压缩上下文消息表：每条OpenAI标准格式消息一行，按序号追加，避免每次追加都重写整个JSON数组
+                CREATE TABLE IF NOT EXISTS compressed_context_messages (
+                    context_id TEXT NOT NULL,                              -- 所属压缩上下文ID
+                    ordinal INTEGER NOT NULL,                              -- 消息在上下文中的序号（从0开始递增）
+                    message_id TEXT NULL,                                  -- 消息ID（压缩生成的消息可能为合成ID）
+                    role TEXT NOT NULL,                                    -- 消息角色：user, assistant, system, tool
+                    token_count INTEGER NOT NULL DEFAULT 0,                -- 消息的token数量
+                    message TEXT NOT NULL,                                 -- JSON格式的完整消息：{"role":"assistant","content":"...","tool_calls":[...]}（超过阈值时为压缩后的BLOB）
+                    codec TEXT NULL,                                       -- message列的压缩编码：NULL（未压缩）、zlib、zstd
+                    PRIMARY KEY (context_id, ordinal),
+                    FOREIGN KEY (context_id) REFERENCES compressed_context (context_id) ON DELETE CASCADE
+                ) WITHOUT ROWID;
+            """,
 
-            
             "database_metadata": """
                 -- 数据库元数据表：存储数据库版本、配置等系统信息
                 CREATE TABLE IF NOT EXISTS database_metadata (
@@ -95,22 +110,21 @@ class DatabaseSchema:
         return {
             # sessions表索引 - 优化会话列表查询和过滤
             "idx_sessions_created_at": "CREATE INDEX IF NOT EXISTS idx_sessions_created_at ON sessions (created_at DESC);",  # 按创建时间排序
-            "idx_sessions_updated_at": "CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions (updated_at DESC);",  # 按更新时间排序（最常用）
+            "idx_sessions_updated": "CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated_at DESC, session_id DESC);",  # 跨状态的会话列表keyset分页
             "idx_sessions_stage": "CREATE INDEX IF NOT EXISTS idx_sessions_stage ON sessions (project_stage);",              # 按项目阶段过滤
-            "idx_sessions_status": "CREATE INDEX IF NOT EXISTS idx_sessions_status ON sessions (status);",                   # 按状态过滤（active/archived）
+            "idx_sessions_status_updated": "CREATE INDEX IF NOT EXISTS idx_sessions_status_updated ON sessions (status, updated_at DESC, session_id DESC);",  # 按状态列出会话的keyset分页（最常用）
 
             # messages表索引 - 优化消息查询和对话历史加载
-            "idx_messages_session_id": "CREATE INDEX IF NOT EXISTS idx_messages_session_id ON messages (session_id);",                        # 按会话查询消息
             "idx_messages_timestamp": "CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages (timestamp DESC);",                      # 全局时间排序
             "idx_messages_role": "CREATE INDEX IF NOT EXISTS idx_messages_role ON messages (role);",                                          # 按角色过滤（user/assistant/system/tool）
-            "idx_messages_session_timestamp": "CREATE INDEX IF NOT EXISTS idx_messages_session_timestamp ON messages (session_id, timestamp DESC);", # 会话内时间排序（最重要）
+            "idx_messages_session_order": "CREATE INDEX IF NOT EXISTS idx_messages_session_order ON messages (session_id, timestamp);",        # 会话内按(timestamp, rowid)排序和keyset分页（最重要）
+            "idx_messages_session_stats": "CREATE INDEX IF NOT EXISTS idx_messages_session_stats ON messages (session_id, role, token_count, timestamp);",  # 会话统计的覆盖索引
             "idx_messages_parent": "CREATE INDEX IF NOT EXISTS idx_messages_parent ON messages (parent_message_id);",                         # 消息链追踪
             "idx_messages_tool_call_id": "CREATE INDEX IF NOT EXISTS idx_messages_tool_call_id ON messages (tool_call_id);",                 # 工具调用ID索引（用于关联tool消息）
             
             # compressed_context表索引
-            "idx_compressed_context_session": "CREATE INDEX IF NOT EXISTS idx_compressed_context_session ON compressed_context (session_id);",
             "idx_compressed_context_version": "CREATE INDEX IF NOT EXISTS idx_compressed_context_version ON compressed_context (session_id, compression_version DESC);",
-            "idx_compressed_context_active": "CREATE INDEX IF NOT EXISTS idx_compressed_context_active ON compressed_context (session_id, is_active);",
+            "idx_compressed_context_active": "CREATE INDEX IF NOT EXISTS idx_compressed_context_active ON compressed_context (session_id, is_active, compression_version DESC);",  # 每次追加消息都要查找活跃版本
             
 
 
@@ -130,19 +144,8 @@ class DatabaseSchema:
                 END;
             """,
             
-            # 自动更新sessions表的消息计数
-            "sessions_message_count_insert": """
-                CREATE TRIGGER IF NOT EXISTS sessions_message_count_insert
-                AFTER INSERT ON messages
-                FOR EACH ROW
-                BEGIN
-                    UPDATE sessions 
-                    SET total_messages = total_messages + 1,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE session_id = NEW.session_id;
-                END;
-            """,
-            
+            # 删除消息时更新sessions表的消息计数
+            # （写入时由DAO按批次累加，不使用逐行触发器，批量写入只更新一次会话）
             "sessions_message_count_delete": """
                 CREATE TRIGGER IF NOT EXISTS sessions_message_count_delete
                 AFTER DELETE ON messages
@@ -157,6 +160,105 @@ class DatabaseSchema:
         }
 
 
+    @staticmethod
+    def get_create_fts_sql() -> dict:
+        """
+        获取全文索引（FTS5）的创建SQL语句
+
+        使用外部内容表（content=...），索引只保存分词结果，正文仍在原表中；
+        trigram分词器按3字符滑动切分，不依赖空格分词，可以直接检索中日韩文本。
+        消息正文可能被压缩，片段和重建索引基于 messages_text 视图中解码后的正文，
+        读取片段或重建索引的连接需要先调用 register_sql_functions() 注册解码函数。
+
+        同步触发器只索引未压缩的正文，不调用解码函数，没有注册该函数的连接（如sqlite3命令行）
+        也可以写入messages表；压缩正文由DatabaseDAO在同一事务中写入解码后的内容。
+        触发器无法删除压缩正文的索引条目（需要解码后的原文），在DAO之外删除或改写压缩消息
+        （包括删除会话时的级联删除）会留下失效条目：搜索通过JOIN messages过滤掉它们，
+        DatabaseDAO.compact() 重建全文索引时清除。
+        """
+        return {
+            "messages_text": """
+                -- 解码后的消息正文视图（全文索引的外部内容表）
+                CREATE VIEW IF NOT EXISTS messages_text AS
+                SELECT rowid AS message_rowid, gtplanner_decode(content, content_codec) AS content
+                FROM messages;
+            """,
+            "messages_fts": """
+                -- 消息全文索引：索引解码后的messages.content
+                CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                    content, content='messages_text', content_rowid='message_rowid', tokenize='trigram'
+                );
+            """,
+            "sessions_fts": """
+                -- 会话标题全文索引：索引sessions.title
+                CREATE VIRTUAL TABLE IF NOT EXISTS sessions_fts USING fts5(
+                    title, content='sessions', content_rowid='rowid', tokenize='trigram'
+                );
+            """,
+
+            # 触发器：保持全文索引与原表同步
+            "messages_fts_insert": """
+                CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages
+                WHEN NEW.content_codec IS NULL BEGIN
+                    INSERT INTO messages_fts (rowid, content) VALUES (NEW.rowid, NEW.content);
+                END;
+            """,
+            "messages_fts_delete": """
+                CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages
+                WHEN OLD.content_codec IS NULL BEGIN
+                    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', OLD.rowid, OLD.content);
+                END;
+            """,
+            "messages_fts_update": """
+                CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content, content_codec ON messages BEGIN
+                    INSERT INTO messages_fts (messages_fts, rowid, content)
+                    SELECT 'delete', OLD.rowid, OLD.content WHERE OLD.content_codec IS NULL;
+                    INSERT INTO messages_fts (rowid, content)
+                    SELECT NEW.rowid, NEW.content WHERE NEW.content_codec IS NULL;
+                END;
+            """,
+            "sessions_fts_insert": """
+                CREATE TRIGGER IF NOT EXISTS sessions_fts_insert AFTER INSERT ON sessions BEGIN
+                    INSERT INTO sessions_fts (rowid, title) VALUES (NEW.rowid, NEW.title);
+                END;
+            """,
+            "sessions_fts_delete": """
+                CREATE TRIGGER IF NOT EXISTS sessions_fts_delete AFTER DELETE ON sessions BEGIN
+                    INSERT INTO sessions_fts (sessions_fts, rowid, title) VALUES ('delete', OLD.rowid, OLD.title);
+                END;
+            """,
+            "sessions_fts_update": """
+                CREATE TRIGGER IF NOT EXISTS sessions_fts_update AFTER UPDATE OF title ON sessions BEGIN
+                    INSERT INTO sessions_fts (sessions_fts, rowid, title) VALUES ('delete', OLD.rowid, OLD.title);
+                    INSERT INTO sessions_fts (rowid, title) VALUES (NEW.rowid, NEW.title);
+                END;
+            """
+        }
+
+
+def fts5_available(conn: sqlite3.Connection) -> bool:
+    """检查SQLite是否编译了FTS5及trigram分词器（SQLite 3.34+）"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp._fts5_probe USING fts5(x, tokenize='trigram')")
+        conn.execute("DROP TABLE IF EXISTS temp._fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _create_fts_index(conn: sqlite3.Connection) -> bool:
+    """创建全文索引及同步触发器，并从已有数据重建索引；FTS5不可用时跳过"""
+    if not fts5_available(conn):
+        print("⚠️ 当前SQLite不支持FTS5 trigram分词器，搜索将回退为LIKE扫描")
+        return False
+
+    for sql in DatabaseSchema.get_create_fts_sql().values():
+        conn.execute(sql)
+    conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO sessions_fts (sessions_fts) VALUES ('rebuild')")
+    return True
+
+
 def initialize_database(db_path: str) -> bool:
     """
     初始化数据库，创建所有表、索引和触发器
@@ -172,6 +274,8 @@ def initialize_database(db_path: str) -> bool:
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
         
         with sqlite3.connect(db_path) as conn:
+            register_sql_functions(conn)
+
             # 启用外键约束
             conn.execute("PRAGMA foreign_keys = ON;")
             
@@ -196,6 +300,10 @@ def initialize_database(db_path: str) -> bool:
                 conn.execute(sql)
                 print(f"✅ 创建触发器: {trigger_name}")
             
+            # 创建全文索引
+            if _create_fts_index(conn):
+                print("✅ 创建全文索引: messages_fts, sessions_fts")
+            
             # 插入数据库版本信息
             conn.execute(
                 "INSERT OR REPLACE INTO database_metadata (key, value) VALUES (?, ?)",
@@ -211,6 +319,167 @@ def initialize_database(db_path: str) -> bool:
         return False
 
 
+def _migrate_v1_to_v2(conn: sqlite3.Connection) -> None:
+    """v1 -> v2：把compressed_context.compressed_messages中的JSON数组拆分到compressed_context_messages表"""
+    conn.execute(DatabaseSchema.get_create_tables_sql()["compressed_context_messages"])
+
+    rows = conn.execute("""
+        SELECT context_id, compressed_messages FROM compressed_context
+        WHERE compressed_messages IS NOT NULL AND compressed_messages != '[]'
+    """).fetchall()
+
+    for context_id, compressed_messages in rows:
+        try:
+            messages = json.loads(compressed_messages) or []
+        except (TypeError, ValueError):
+            print(f"⚠️ 压缩上下文 {context_id} 的消息无法解析，已跳过")
+            continue
+
+        conn.executemany("""
+            INSERT OR REPLACE INTO compressed_context_messages (
+                context_id, ordinal, message_id, role, token_count, message
+            ) VALUES (?, ?, ?, ?, ?, ?)
+        """, [
+            (context_id, ordinal, msg.get("message_id"), msg.get("role", "user"),
+             msg.get("token_count") or 0, json.dumps(msg))
+            for ordinal, msg in enumerate(messages)
+        ])
+        conn.execute("""
+            UPDATE compressed_context
+            SET compressed_messages = '[]', compressed_message_count = ?
+            WHERE context_id = ?
+        """, (len(messages), context_id))
+
+
+def _add_column_if_missing(conn: sqlite3.Connection, table: str, column: str, definition: str) -> None:
+    """列不存在时添加（迁移可能从更早的版本连续执行，表可能已按当前架构创建）"""
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _migrate_v2_to_v3(conn: sqlite3.Connection) -> None:
+    """v2 -> v3：创建会话标题和消息内容的FTS5全文索引"""
+    # 当前的消息全文索引基于解码视图，依赖v4引入的content_codec列
+    _add_column_if_missing(conn, "messages", "content_codec", "TEXT NULL")
+    _create_fts_index(conn)
+
+
+def _migrate_v3_to_v4(conn: sqlite3.Connection) -> None:
+    """v3 -> v4：增加正文压缩编码列，消息全文索引改为基于解码后的正文视图"""
+    _add_column_if_missing(conn, "messages", "content_codec", "TEXT NULL")
+    _add_column_if_missing(conn, "compressed_context_messages", "codec", "TEXT NULL")
+
+    objects = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE name IN ('messages_fts', 'messages_text')"
+    )}
+    if "messages_fts" in objects and "messages_text" not in objects:
+        # v3的全文索引直接以messages表为外部内容，压缩后的正文无法索引，需要重建
+        for op in ("insert", "delete", "update"):
+            conn.execute(f"DROP TRIGGER IF EXISTS messages_fts_{op}")
+        conn.execute("DROP TABLE messages_fts")
+        _create_fts_index(conn)
+
+
+# v5中被替换的索引（前缀重复或列顺序不适合keyset分页）
+_SUPERSEDED_INDEXES = (
+    "idx_sessions_updated_at",
+    "idx_sessions_status",
+    "idx_messages_session_id",
+    "idx_messages_session_timestamp",
+    "idx_compressed_context_session",
+    "idx_compressed_context_active",
+)
+
+
+def _migrate_v4_to_v5(conn: sqlite3.Connection) -> None:
+    """v4 -> v5：按实际查询形状重建索引，支持会话列表和消息的keyset分页"""
+    for index_name in _SUPERSEDED_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+    for sql in DatabaseSchema.get_create_indexes_sql().values():
+        conn.execute(sql)
+    conn.execute("ANALYZE")
+
+
+def _migrate_v5_to_v6(conn: sqlite3.Connection) -> None:
+    """v5 -> v6：删除逐行累加消息计数的触发器（改由DAO按批次更新），并按消息表校正计数"""
+    conn.execute("DROP TRIGGER IF EXISTS sessions_message_count_insert")
+    conn.execute("""
+        UPDATE sessions
+        SET total_messages = (SELECT COUNT(*) FROM messages WHERE messages.session_id = sessions.session_id)
+    """)
+
+
+def _migrate_v6_to_v7(conn: sqlite3.Connection) -> None:
+    """v6 -> v7：消息全文索引触发器改为只索引未压缩正文，不再依赖应用注册的解码函数"""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'").fetchone():
+        return
+    for op in ("insert", "delete", "update"):
+        conn.execute(f"DROP TRIGGER IF EXISTS messages_fts_{op}")
+    fts_sql = DatabaseSchema.get_create_fts_sql()
+    for op in ("insert", "delete", "update"):
+        conn.execute(fts_sql[f"messages_fts_{op}"])
+
+
+# 迁移函数：key为迁移前的版本号
+MIGRATIONS = {
+    1: _migrate_v1_to_v2,
+    2: _migrate_v2_to_v3,
+    3: _migrate_v3_to_v4,
+    4: _migrate_v4_to_v5,
+    5: _migrate_v5_to_v6,
+    6: _migrate_v6_to_v7,
+}
+
+
+def migrate_database(db_path: str) -> int:
+    """
+    将已有数据库迁移到当前架构版本
+
+    每个版本的迁移（含DDL）在一个显式的 BEGIN IMMEDIATE 事务中完成，失败时回滚，不会留下半迁移的数据。
+    版本号在持有写锁后读取，多个进程同时启动时同一步迁移只会执行一次。
+
+    Args:
+        db_path: 数据库文件路径
+
+    Returns:
+        迁移后的架构版本号
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        # 关闭sqlite3模块的隐式事务管理，由下面的 BEGIN/COMMIT 控制事务边界
+        conn.isolation_level = None
+        register_sql_functions(conn)
+        conn.execute("PRAGMA foreign_keys = ON;")
+
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT value FROM database_metadata WHERE key = 'schema_version'"
+                ).fetchone()
+                version = int(row[0]) if row else 1
+                if version >= DatabaseSchema.CURRENT_VERSION:
+                    conn.execute("COMMIT")
+                    break
+
+                MIGRATIONS[version](conn)
+                version += 1
+                conn.execute(
+                    "INSERT OR REPLACE INTO database_metadata (key, value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)",
+                    ("schema_version", str(version))
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            print(f"✅ 数据库已迁移到版本 {version}: {db_path}")
+    finally:
+        conn.close()
+
+    return version
+
+
 def get_database_info(db_path: str) -> dict:
     """
     获取数据库信息
@@ -232,7 +501,7 @@ def get_database_info(db_path: str) -> dict:
             
             # 获取表统计信息
             tables_info = {}
-            tables = ["sessions", "messages", "compressed_context"]
+            tables = ["sessions", "messages", "compressed_context", "compressed_context_messages"]
             
             for table in tables:
                 cursor.execute(f"SELECT COUNT(*) FROM {table}")
@@ -0,0 +1,278 @@
+"""
+服务端会话存储
+
+默认的 /api/chat/agent 接口要求客户端每轮都回传完整的 dialogue_history 和 tool_execution_results，
+请求体大小和解析耗时随对话增长。服务端会话模式下客户端只发送 session_id 和本轮新消息，
+服务端从内存缓存（LRU + TTL）或 SQLite 持久化层重建 AgentContext：
+
+- 缓存命中：直接复用上一轮结束时的上下文，不读数据库
+- 缓存未命中：通过 AsyncSessionManager 从 compressed_context 重建（与CLI共用同一份数据）
+- 会话不存在：抛出 SessionNotFoundError（接口返回404），会话需先通过 create_session 显式创建
+
+处理成功后，本轮用户消息和新消息在一个事务中写入数据库，并追加到缓存的上下文中。
+同一会话的请求通过 session_lock() 串行执行（读取上下文 → 处理 → 保存），
+并发的第二个请求会等待前一轮保存后再读取上下文，不会基于过期的历史处理或覆盖前一轮的结果。
+
+存储后端可替换：任何提供 build_agent_context / create_new_session / update_from_agent_result
+三个异步方法的对象都可以作为 backend 传入（默认为 SQLite 会话管理器的异步门面）。
+"""
+
+import asyncio
+import json
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from .async_session_manager import get_async_session_manager
+from .sqlite_session_manager import SQLiteSessionManager
+from ..context_types import AgentContext, AgentResult, Message, MessageRole
+
+
+class SessionNotFoundError(LookupError):
+    """会话不存在（服务端会话需先通过创建接口创建）"""
+
+
+class ServerSessionStore:
+    """服务端会话存储（内存缓存 + 持久化后端）"""
+
+    def __init__(self, backend=None, max_sessions: int = 256, ttl: float = 1800.0):
+        """
+        初始化服务端会话存储
+
+        Args:
+            backend: 异步存储后端，默认使用SQLite会话管理器的异步门面
+            max_sessions: 内存中最多缓存的会话数
+            ttl: 缓存的上下文有效期（秒）
+        """
+        self.backend = backend or get_async_session_manager(SQLiteSessionManager())
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+
+        self._contexts: "OrderedDict[str, Tuple[float, AgentContext]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._stats = {"hits": 0, "misses": 0, "created": 0, "saved": 0}
+
+    # ==================== 缓存 ====================
+
+    def _get_cached(self, session_id: str) -> Optional[AgentContext]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._contexts.get(session_id)
+            if entry is None:
+                return None
+            expires_at, context = entry
+            if expires_at <= now:
+                del self._contexts[session_id]
+                return None
+            self._contexts.move_to_end(session_id)
+            return context
+
+    def _put_cached(self, session_id: str, context: AgentContext) -> None:
+        with self._lock:
+            self._contexts[session_id] = (time.monotonic() + self.ttl, context)
+            self._contexts.move_to_end(session_id)
+            while len(self._contexts) > self.max_sessions:
+                self._contexts.popitem(last=False)
+
+    def invalidate(self, session_id: Optional[str] = None) -> None:
+        """清除缓存的上下文（下次请求从存储重建），不指定会话时清除全部"""
+        with self._lock:
+            if session_id is None:
+                self._contexts.clear()
+            else:
+                self._contexts.pop(session_id, None)
+
+    def session_lock(self, session_id: str) -> asyncio.Lock:
+        """
+        获取会话的处理锁
+
+        调用方在读取上下文、处理和保存结果期间持有该锁，同一会话的请求依次执行。
+        没有请求持有或等待时锁会被回收。
+        """
+        with self._lock:
+            lock = self._session_locks.get(session_id)
+            if lock is None:
+                lock = asyncio.Lock()
+                self._session_locks[session_id] = lock
+            return lock
+
+    # ==================== 读写 ====================
+
+    @staticmethod
+    def parse_message(message: Dict[str, Any]) -> Message:
+        """
+        解析客户端发送的新消息
+
+        Args:
+            message: 消息字典，至少包含content，role默认为user，timestamp默认为当前时间
+
+        Returns:
+            Message实例
+
+        Raises:
+            ValueError: 消息格式不正确
+        """
+        if not isinstance(message, dict) or not message.get("content"):
+            raise ValueError("message.content 不能为空")
+
+        role = message.get("role", MessageRole.USER.value)
+        if role != MessageRole.USER.value:
+            raise ValueError("服务端会话模式下新消息必须是用户消息")
+
+        return Message(
+            role=MessageRole.USER,
+            content=_parse_multimodal_content(message["content"]),
+            timestamp=message.get("timestamp") or datetime.now().isoformat(),
+            metadata=message.get("metadata")
+        )
+
+    async def _get_context(self, session_id: str) -> Optional[AgentContext]:
+        """从缓存或存储获取会话上下文，会话不存在时返回None"""
+        context = self._get_cached(session_id)
+        if context is not None:
+            self._stats["hits"] += 1
+            return context
+
+        self._stats["misses"] += 1
+        context = await self.backend.build_agent_context(session_id)
+        if context is None:
+            return None
+        for message in context.dialogue_history:
+            message.content = _parse_multimodal_content(message.content)
+        self._put_cached(session_id, context)
+        return context
+
+    async def session_exists(self, session_id: str) -> bool:
+        """会话是否存在（存在时上下文会被缓存，随后的 load_context 不再读数据库）"""
+        return await self._get_context(session_id) is not None
+
+    async def create_session(self, session_id: Optional[str] = None, title: Optional[str] = None) -> str:
+        """
+        创建服务端会话
+
+        Args:
+            session_id: 客户端指定的会话ID，为None时自动生成
+            title: 会话标题，为None时自动生成
+
+        Returns:
+            会话ID
+
+        Raises:
+            ValueError: 指定的会话ID已存在
+        """
+        if session_id and await self.session_exists(session_id):
+            raise ValueError(f"会话已存在: {session_id}")
+
+        session_id = await self.backend.create_new_session(title, "requirements", session_id)
+        self._stats["created"] += 1
+        return session_id
+
+    async def load_context(self, session_id: str) -> AgentContext:
+        """
+        获取会话的上下文（不含本轮新消息）
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            AgentContext实例。返回的是副本，调用方可以自由修改
+
+        Raises:
+            SessionNotFoundError: 会话不存在
+        """
+        context = await self._get_context(session_id)
+        if context is None:
+            raise SessionNotFoundError(f"会话不存在: {session_id}")
+
+        # 列表浅拷贝：本轮处理失败时缓存不受影响
+        return AgentContext(
+            session_id=context.session_id,
+            dialogue_history=list(context.dialogue_history),
+            tool_execution_results=dict(context.tool_execution_results),
+            session_metadata=context.session_metadata,
+            last_updated=context.last_updated,
+            is_compressed=context.is_compressed
+        )
+
+    async def save_result(self, session_id: str, user_message: Message,
+                          agent_result: AgentResult) -> bool:
+        """
+        保存本轮结果（用户消息和新消息在一个事务中写入），并更新缓存的上下文
+
+        Args:
+            session_id: 会话ID
+            user_message: 本轮用户消息
+            agent_result: 处理结果
+
+        Returns:
+            是否保存成功
+        """
+        content = user_message.content
+        if not isinstance(content, str):
+            content = json.dumps(content, ensure_ascii=False)
+
+        saved = await self.backend.update_from_agent_result(agent_result, content, session_id)
+        if not saved:
+            self.invalidate(session_id)
+            return False
+        self._stats["saved"] += 1
+
+        context = self._get_cached(session_id)
+        if context is not None:
+            # 与 update_from_agent_result 写入的消息保持一致（跳过system消息和缺少tool_call_id的tool消息）
+            context.dialogue_history.append(user_message)
+            context.dialogue_history.extend(
+                message for message in agent_result.new_messages
+                if message.role in (MessageRole.USER, MessageRole.ASSISTANT)
+                or (message.role == MessageRole.TOOL and message.tool_call_id and message.tool_call_id.strip())
+            )
+            context.tool_execution_results.update(agent_result.tool_execution_results_updates or {})
+            context.last_updated = datetime.now().isoformat()
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            cached_sessions = len(self._contexts)
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "cached_sessions": cached_sessions,
+            "max_sessions": self.max_sessions,
+            "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+            **self._stats
+        }
+
+
+def _parse_multimodal_content(content: Any) -> Any:
+    """多模态内容在数据库中以JSON字符串保存，读取时还原为列表"""
+    if isinstance(content, str) and content.startswith('[{'):
+        try:
+            parsed = json.loads(content)
+            if isinstance(parsed, list):
+                return parsed
+        except json.JSONDecodeError:
+            pass
+    return content
+
+
+# 全局单例
+_server_session_store_instance = None
+
+
+def get_server_session_store() -> ServerSessionStore:
+    """获取全局单例的服务端会话存储"""
+    global _server_session_store_instance
+    if _server_session_store_instance is None:
+        from gtplanner.utils.config_manager import get_server_session_config
+
+        config = get_server_session_config()
+        _server_session_store_instance = ServerSessionStore(
+            backend=get_async_session_manager(SQLiteSessionManager(config.get("db_path", "gtplanner_conversations.db"))),
+            max_sessions=config.get("cache_max_sessions", 256),
+            ttl=config.get("cache_ttl_seconds", 1800)
+        )
+    return _server_session_store_instance
@@ -6,19 +6,25 @@
 2. 每次对话后自动检查并异步压缩
 3. 不阻塞对话流程，用户无感知
 4. 与SQLiteSessionManager原生集成
+
+增量（滚动）压缩：活跃压缩上下文开头的摘要消息就是上一次压缩的检查点，
+每次只把检查点之后新增的消息并入摘要，LLM输入规模只取决于摘要长度和阈值，不随历史增长。
+多个工作协程共享任务队列，同一会话同一时刻只会被一个工作协程压缩；
+工作协程只按会话ID读写数据库，不修改会话管理器的前台状态。
 """
 
 import asyncio
 import json
 import time
-import uuid
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 
 from gtplanner.agent.context_types import Message, MessageRole
 from gtplanner.utils.openai_client import OpenAIClient
+from gtplanner.utils.token_counter import count_message_tokens
+from .async_session_manager import get_async_session_manager
 
 
 class CompressionLevel(Enum):
@@ -39,6 +45,7 @@ class CompressionConfig:
     # 压缩设置
     enable_compression: bool = True  # 启用压缩
     default_level: CompressionLevel = CompressionLevel.MEDIUM
+    worker_count: int = 2            # 压缩工作协程数量（不同会话可并行压缩）
 
 
 class SmartCompressor:
@@ -51,8 +58,10 @@ class SmartCompressor:
         
         # 异步任务队列
         self.compression_queue = asyncio.Queue()
-        self.worker_task: Optional[asyncio.Task] = None
+        self.worker_tasks: List[asyncio.Task] = []
         self.is_running = False
+        # 已调度或正在压缩的会话，避免同一会话重复入队或被并发压缩
+        self._scheduled_sessions: Set[str] = set()
     
     async def start(self):
         """启动压缩服务"""
@@ -60,8 +69,11 @@ class SmartCompressor:
             return
         
         self.is_running = True
-        self.worker_task = asyncio.create_task(self._compression_worker())
-        print("🗜️ 智能压缩服务已启动")
+        self.worker_tasks = [
+            asyncio.create_task(self._compression_worker())
+            for _ in range(max(1, self.config.worker_count))
+        ]
+        print(f"🗜️ 智能压缩服务已启动（{len(self.worker_tasks)} 个工作协程）")
     
     async def stop(self):
         """停止压缩服务"""
@@ -70,12 +82,14 @@ class SmartCompressor:
         
         self.is_running = False
         
-        if self.worker_task:
-            self.worker_task.cancel()
+        for worker_task in self.worker_tasks:
+            worker_task.cancel()
+        for worker_task in self.worker_tasks:
             try:
-                await self.worker_task
+                await worker_task
             except asyncio.CancelledError:
                 pass
+        self.worker_tasks = []
         
         print("🗜️ 智能压缩服务已停止")
     
@@ -94,7 +108,9 @@ class SmartCompressor:
         
         try:
             # 从compressed_context表获取token统计信息
-            compressed_context = self.session_manager.dao.get_active_compressed_context(session_id)
+            compressed_context = self.session_manager.dao.get_active_compressed_context(
+                session_id, include_messages=False
+            )
 
             if not compressed_context:
                 # 这是异常情况，说明数据不一致
@@ -120,13 +136,22 @@ class SmartCompressor:
         Args:
             session_id: 会话ID
         """
-        if self.should_compress(session_id):
+        if session_id in self._scheduled_sessions:
+            return
+
+        # 阈值检查需要读数据库，在读线程中执行
+        store = get_async_session_manager(self.session_manager)
+        if await store.run_read(self.should_compress, session_id):
             # 异步调度压缩任务
             await self._schedule_compression(session_id)
     
     async def _schedule_compression(self, session_id: str):
         """调度压缩任务"""
+        if session_id in self._scheduled_sessions:
+            return
+
         try:
+            self._scheduled_sessions.add(session_id)
             task = {
                 'session_id': session_id,
                 'scheduled_at': datetime.now()
@@ -136,6 +161,7 @@ class SmartCompressor:
             print(f"📋 已调度压缩任务: {session_id}")
             
         except Exception as e:
+            self._scheduled_sessions.discard(session_id)
             print(f"⚠️ 调度压缩失败: {e}")
     
     async def _compression_worker(self):
@@ -147,101 +173,115 @@ class SmartCompressor:
                     self.compression_queue.get(),
                     timeout=1.0
                 )
+            except asyncio.TimeoutError:
+                continue
 
-                # 执行压缩
+            try:
+                # 执行压缩（单个会话失败不影响工作协程继续处理其他会话）
                 await self._execute_compression(task)
-
+            except Exception as e:
+                print(f"⚠️ 压缩失败: {task['session_id']}: {e}")
+            finally:
+                self._scheduled_sessions.discard(task['session_id'])
                 # 标记任务完成
                 self.compression_queue.task_done()
-
-            except asyncio.TimeoutError:
-                continue
     
     async def _execute_compression(self, task: Dict[str, Any]):
         """执行压缩"""
         session_id = task['session_id']
         start_time = time.time()
+        store = get_async_session_manager(self.session_manager)
 
-        # 保存当前会话
-        original_session = self.session_manager.current_session_id
-
-        # 加载目标会话
-        if not self.session_manager.load_session(session_id):
+        # 检查目标会话（直接按会话ID读取，不切换会话管理器的当前会话）
+        session = await store.run_read(self.session_manager.dao.get_session, session_id)
+        if not session or session["status"] != "active":
             raise Exception(f"无法加载会话进行压缩: {session_id}")
 
-        # 获取消息
-        messages = self.session_manager.get_messages()
-
-        if len(messages) <= self.config.preserve_recent_count:
-            print(f"⚠️ 消息数量不足，跳过压缩: {session_id}")
+        # 读取活跃压缩上下文（开头的摘要消息 + 上次检查点之后追加的消息）
+        context = await store.run_read(self.session_manager.dao.get_active_compressed_context, session_id)
+        if not context:
+            raise Exception(f"会话缺少压缩上下文记录: {session_id}")
+
+        messages = context["compressed_messages"]
+        head_count = self._count_summary_messages(messages)
+        keep_from = max(head_count, len(messages) - self.config.preserve_recent_count)
+        # 保留部分不能以tool消息开头，否则与发起调用的assistant消息分离
+        while head_count < keep_from < len(messages) and messages[keep_from]['role'] == 'tool':
+            keep_from -= 1
+        new_messages = messages[head_count:keep_from]
+
+        if not new_messages:
+            print(f"⚠️ 检查点之后没有可压缩的消息，跳过压缩: {session_id}")
             return
 
-        # 执行压缩
-        compressed_data = await self._compress_messages(messages)
-
-        # 保存压缩结果
-        await self._save_compression_result(session_id, compressed_data)
+        # 执行压缩：只把新增消息并入已有摘要
+        compressed_data = await self._compress_messages(
+            messages[:head_count], new_messages,
+            summary=context["summary"], key_decisions=context["key_decisions"]
+        )
 
-        # 恢复原会话
-        if original_session:
-            self.session_manager.load_session(original_session)
+        # 保存压缩结果（保留的最近消息和压缩期间追加的消息在同一事务中转入新版本）
+        context_id = await self._save_compression_result(session_id, context["context_id"], keep_from, compressed_data)
+        if context_id is None:
+            print(f"⚠️ 会话在压缩期间已被替换，丢弃本次压缩结果: {session_id}")
+            return
 
         execution_time = time.time() - start_time
 
         print(f"✅ 压缩完成: {session_id}")
-        print(f"   原始消息: {len(messages)}, 压缩后: {len(compressed_data.get('messages', []))}")
+        print(f"   并入消息: {len(new_messages)}, 摘要消息: {head_count} -> {len(compressed_data['messages'])}")
         print(f"   耗时: {execution_time:.1f}s")
+
+    @staticmethod
+    def _count_summary_messages(messages: List[Dict[str, Any]]) -> int:
+        """统计上下文开头由压缩生成的摘要消息数量（即上一次压缩的检查点位置）"""
+        count = 0
+        for msg in messages:
+            if not (msg.get('metadata') or {}).get('compressed'):
+                break
+            count += 1
+        return count
     
     def _estimate_tokens(self, messages: List[Dict[str, Any]]) -> int:
-        """估算token数量"""
-        total = 0
-        for msg in messages:
-            content = msg.get('content', '')
-            # 简单估算：中文1字符≈1token，英文1词≈1token
-            chinese_chars = len([c for c in content if '\u4e00' <= c <= '\u9fff'])
-            english_words = len(content.replace('，', ' ').replace('。', ' ').split())
-            total += chinese_chars + english_words
-        return total
+        """估算token数量（优先使用写入时保存的token_count）"""
+        return sum(
+            msg['token_count'] if msg.get('token_count') is not None else count_message_tokens(msg)
+            for msg in messages
+        )
     
-    async def _compress_messages(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """压缩消息 - 生成结构化的压缩消息列表"""
-        # 保留最近的消息
-        recent_messages = messages[-self.config.preserve_recent_count:]
-
-        # 需要压缩的消息
-        messages_to_compress = messages[:-self.config.preserve_recent_count]
-
-        if not messages_to_compress:
-            return {
-                'messages': messages,
-                'summary': '无需压缩',
-                'key_decisions': [],
-                'compression_method': 'no_compression'
+    async def _compress_messages(self, summary_messages: List[Dict[str, Any]],
+                                 new_messages: List[Dict[str, Any]],
+                                 summary: str = '',
+                                 key_decisions: Optional[List[Any]] = None) -> Dict[str, Any]:
+        """将新增消息并入已有摘要 - 生成新的结构化摘要消息列表"""
+        previous = None
+        if summary_messages:
+            previous = {
+                'compressed_messages': summary_messages,
+                'summary': summary,
+                'key_decisions': key_decisions or []
             }
 
         # 使用LLM进行智能压缩，生成结构化结果
-        compression_result = await self._llm_intelligent_compress(messages_to_compress)
-
-        # 构建最终的压缩消息列表
-        compressed_messages = []
-
-        # 添加压缩后的结构化消息
-        compressed_messages.extend(compression_result.get('compressed_messages', []))
-
-        # 添加最近的完整消息
-        compressed_messages.extend(recent_messages)
+        compression_result = await self._llm_intelligent_compress(new_messages, previous)
 
         return {
-            'messages': compressed_messages,
+            'messages': compression_result.get('compressed_messages', []),
             'summary': compression_result.get('summary', ''),
             'key_decisions': compression_result.get('key_decisions', []),
-            'compression_method': 'llm_intelligent',
-            'original_count': len(messages),
-            'compressed_count': len(compressed_messages)
+            'compression_method': 'llm_incremental',
+            'folded_count': len(new_messages)
         }
     
-    async def _llm_intelligent_compress(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """使用LLM进行智能压缩，生成结构化结果"""
+    async def _llm_intelligent_compress(self, messages: List[Dict[str, Any]],
+                                        previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        使用LLM进行智能压缩，生成结构化结果
+
+        Args:
+            messages: 需要压缩的新增消息
+            previous: 上一次的压缩结果（compressed_messages、summary、key_decisions），为None表示首次压缩
+        """
         # 格式化消息
         formatted = self._format_messages(messages)
 
@@ -273,7 +313,17 @@ class SmartCompressor:
     "key_decisions": ["重要决策1", "重要决策2"]
 }"""
 
-        prompt = f"请对以下对话历史进行智能压缩：\n\n{formatted}"
+        if previous:
+            prompt = (
+                "以下是此前对话的压缩结果（已涵盖更早的全部内容）：\n\n"
+                f"{self._format_messages(previous['compressed_messages'])}\n\n"
+                f"摘要：{previous.get('summary', '')}\n"
+                f"关键决策：{json.dumps(previous.get('key_decisions', []), ensure_ascii=False)}\n\n"
+                "请将下面新增的对话并入上述压缩结果，返回更新后的完整压缩结果：\n\n"
+                f"{formatted}"
+            )
+        else:
+            prompt = f"请对以下对话历史进行智能压缩：\n\n{formatted}"
 
         response = await self.openai_client.chat_completion(
             messages=[{"role": "user", "content": prompt}],
@@ -295,11 +345,12 @@ class SmartCompressor:
 
             # 由代码自动添加的字段
             msg['timestamp'] = datetime.now().isoformat()
-            msg['token_count'] = len(msg.get('content', '')) // 2
+            msg['token_count'] = count_message_tokens(msg)
 
-            # 确保metadata存在
-            if 'metadata' not in msg:
+            # 确保metadata存在，并标记为摘要消息（下一次压缩的检查点）
+            if not isinstance(msg.get('metadata'), dict):
                 msg['metadata'] = {}
+            msg['metadata']['compressed'] = True
 
         return {
             'compressed_messages': compressed_messages,
@@ -319,32 +370,26 @@ class SmartCompressor:
 
         return "\n".join(formatted)
     
-    async def _save_compression_result(self, session_id: str, compressed_data: Dict[str, Any]):
-        """保存压缩结果"""
-        # 获取现有压缩版本
-        existing = self.session_manager.dao.get_compressed_contexts(session_id)
-        next_version = len(existing) + 1
-
-        # 计算压缩比
-        original_count = compressed_data.get('original_count', 0)
-        compressed_count = compressed_data.get('compressed_count', 0)
-        compression_ratio = compressed_count / original_count if original_count > 0 else 0
-
-        # 保存到数据库
-        self.session_manager.dao.save_compressed_context(
+    async def _save_compression_result(self, session_id: str, base_context_id: str,
+                                       keep_from_ordinal: int,
+                                       compressed_data: Dict[str, Any]) -> Optional[str]:
+        """保存压缩结果，基础上下文已被替换时返回None"""
+        store = get_async_session_manager(self.session_manager)
+
+        # 保存到数据库（在写线程中执行）
+        context_id = await store.run_write(
+            self.session_manager.dao.fold_compressed_context,
             session_id=session_id,
-            compressed_data=compressed_data,
-            version=next_version,
-            compression_ratio=compression_ratio,
-            metadata={
-                'compression_id': str(uuid.uuid4()),
-                'level': self.config.default_level.value,
-                'algorithm': 'smart_llm_v2',
-                'created_at': datetime.now().isoformat()
-            }
+            base_context_id=base_context_id,
+            keep_from_ordinal=keep_from_ordinal,
+            head_messages=compressed_data['messages'],
+            summary=compressed_data['summary'],
+            key_decisions=compressed_data['key_decisions']
         )
 
-        print(f"💾 压缩结果已保存: {session_id} v{next_version}")
+        if context_id:
+            print(f"💾 压缩结果已保存: {session_id}")
+        return context_id
 
 
 # 全局压缩器实例
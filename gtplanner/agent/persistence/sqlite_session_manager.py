@@ -11,6 +11,7 @@ from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 
+from gtplanner.utils.token_counter import count_message_tokens
 from .database_dao import DatabaseDAO
 from ..context_types import AgentContext, Message, MessageRole
 
@@ -41,13 +42,15 @@ class SQLiteSessionManager:
     # ==================== 会话管理 ====================
     
     def create_new_session(self, title: Optional[str] = None, 
-                          project_stage: str = "requirements") -> str:
+                          project_stage: str = "requirements",
+                          session_id: Optional[str] = None) -> str:
         """
         创建新会话
         
         Args:
             title: 会话标题，如果为None则自动生成
             project_stage: 项目阶段
+            session_id: 指定会话ID，如果为None则自动生成
             
         Returns:
             新会话的ID
@@ -63,7 +66,8 @@ class SQLiteSessionManager:
             metadata={
                 "created_by": "sqlite_session_manager",
                 "version": "1.0"
-            }
+            },
+            session_id=session_id
         )
         
         # 设置为当前会话
@@ -152,24 +156,21 @@ class SQLiteSessionManager:
         
         return session
     
-    def list_sessions(self, limit: int = 50, include_archived: bool = False) -> List[Dict[str, Any]]:
+    def list_sessions(self, limit: int = 50, include_archived: bool = False,
+                      after: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
         """
-        列出会话
+        列出会话（按更新时间倒序）
         
         Args:
             limit: 限制数量
             include_archived: 是否包含已归档的会话
+            after: 翻页游标，传入上一页最后一个会话的cursor字段
             
         Returns:
             会话列表
         """
-        if include_archived:
-            # 获取活跃和已归档的会话
-            active_sessions = self.dao.list_sessions(limit=limit//2, status="active")
-            archived_sessions = self.dao.list_sessions(limit=limit//2, status="archived")
-            return active_sessions + archived_sessions
-        else:
-            return self.dao.list_sessions(limit=limit, status="active")
+        status = ("active", "archived") if include_archived else "active"
+        return self.dao.list_sessions(limit=limit, status=status, after=after)
     
     def update_session_title(self, title: str, session_id: Optional[str] = None) -> bool:
         """
@@ -282,38 +283,11 @@ class SQLiteSessionManager:
         Returns:
             消息ID或None（如果失败）
         """
-        target_session_id = session_id or self.current_session_id
-        if not target_session_id:
-            return None
-        
-        # 估算token数量（改进的估算方法）
-        # 中文字符按1个token计算，英文单词按1个token计算，标点符号等按0.5计算
-        chinese_chars = len([c for c in content if '\u4e00' <= c <= '\u9fff'])
-        english_words = len(content.replace('，', ' ').replace('。', ' ').split())
-        other_chars = len(content) - chinese_chars - sum(len(word) for word in content.split())
-        token_count = chinese_chars + english_words + max(1, other_chars // 2)
-        
-        # 同时写入messages表和compressed_context表
-        message_id = self.dao.add_message(
-            session_id=target_session_id,
-            role="user",
-            content=content,
-            metadata=metadata,
-            token_count=int(token_count)
+        message_ids = self.add_messages(
+            [{"role": "user", "content": content, "metadata": metadata}],
+            session_id=session_id
         )
-
-        if message_id:
-            # 更新compressed_context表
-            self._update_compressed_context_with_new_message(
-                target_session_id, message_id, "user", content,
-                int(token_count), metadata
-            )
-
-        # 清除会话缓存以更新统计信息
-        if target_session_id in self._session_cache:
-            del self._session_cache[target_session_id]
-
-        return message_id
+        return message_ids[0] if message_ids else None
 
     def add_tool_message(self, content: str, tool_call_id: str,
                         metadata: Optional[Dict[str, Any]] = None,
@@ -332,36 +306,17 @@ class SQLiteSessionManager:
         Returns:
             消息ID或None（如果失败）
         """
-        target_session_id = session_id or self.current_session_id
-        if not target_session_id:
-            return None
-
-        # 估算token数量（工具结果通常是JSON格式）
-        token_count = max(1, len(content) // 4)  # 简单估算
-
-        # 保存到messages表
-        message_id = self.dao.add_message(
-            session_id=target_session_id,
-            role="tool",
-            content=content,
-            metadata=metadata,
-            tool_call_id=tool_call_id,
-            parent_message_id=parent_message_id,
-            token_count=int(token_count)
+        message_ids = self.add_messages(
+            [{
+                "role": "tool",
+                "content": content,
+                "metadata": metadata,
+                "tool_call_id": tool_call_id,
+                "parent_message_id": parent_message_id
+            }],
+            session_id=session_id
         )
-
-        if message_id:
-            # 更新compressed_context表
-            self._update_compressed_context_with_new_message(
-                target_session_id, message_id, "tool", content,
-                int(token_count), metadata, tool_call_id=tool_call_id
-            )
-
-        # 清除会话缓存以更新统计信息
-        if target_session_id in self._session_cache:
-            del self._session_cache[target_session_id]
-
-        return message_id
+        return message_ids[0] if message_ids else None
 
     def add_assistant_message(self, content: str,
                             metadata: Optional[Dict[str, Any]] = None,
@@ -381,109 +336,73 @@ class SQLiteSessionManager:
         Returns:
             消息ID或None（如果失败）
         """
-        target_session_id = session_id or self.current_session_id
-        if not target_session_id:
-            return None
-        
-        # 估算token数量（改进的估算方法）
-        chinese_chars = len([c for c in content if '\u4e00' <= c <= '\u9fff'])
-        english_words = len(content.replace('，', ' ').replace('。', ' ').split())
-        other_chars = len(content) - chinese_chars - sum(len(word) for word in content.split())
-        token_count = chinese_chars + english_words + max(1, other_chars // 2)
-        
-        # 同时写入messages表和compressed_context表
-        message_id = self.dao.add_message(
-            session_id=target_session_id,
-            role="assistant",
-            content=content,
-            metadata=metadata,
-            tool_calls=tool_calls,
-            parent_message_id=parent_message_id,
-            token_count=int(token_count)
+        message_ids = self.add_messages(
+            [{
+                "role": "assistant",
+                "content": content,
+                "metadata": metadata,
+                "tool_calls": tool_calls,
+                "parent_message_id": parent_message_id
+            }],
+            session_id=session_id
         )
+        return message_ids[0] if message_ids else None
 
-        if message_id:
-            # 更新compressed_context表
-            self._update_compressed_context_with_new_message(
-                target_session_id, message_id, "assistant", content,
-                int(token_count), metadata, tool_calls
-            )
-
-        # 清除会话缓存以更新统计信息
-        if target_session_id in self._session_cache:
-            del self._session_cache[target_session_id]
-
-        return message_id
-
-    def _update_compressed_context_with_new_message(self, session_id: str, message_id: str,
-                                                   role: str, content: str, token_count: int,
-                                                   metadata: Optional[Dict[str, Any]] = None,
-                                                   tool_calls: Optional[List[Dict[str, Any]]] = None,
-                                                   tool_call_id: Optional[str] = None):
+    def add_messages(self, messages: List[Dict[str, Any]],
+                     session_id: Optional[str] = None) -> List[str]:
         """
-        更新compressed_context表，添加新消息
+        批量添加消息：同时写入messages表和compressed_context表，只提交一次事务
 
         Args:
-            session_id: 会话ID
-            message_id: 消息ID
-            role: 消息角色
-            content: 消息内容
-            token_count: token数量
-            metadata: 元数据
-            tool_calls: 工具调用
+            messages: 消息列表，每项包含role、content，可选metadata、tool_calls
+                （assistant消息）、tool_call_id（tool消息）、parent_message_id
+            session_id: 会话ID，如果为None则使用当前会话
+
+        Returns:
+            消息ID列表（与输入顺序一致），没有目标会话时返回空列表
         """
-        # 获取当前活跃的压缩上下文
-        current_context = self.dao.get_active_compressed_context(session_id)
+        target_session_id = session_id or self.current_session_id
+        if not target_session_id or not messages:
+            return []
+
+        rows = [
+            {**msg, "token_count": count_message_tokens(msg)}
+            for msg in messages
+        ]
 
-        # 构建新消息对象（OpenAI API标准格式）
-        new_message = {
+        with self.dao.transaction():
+            message_ids = self.dao.add_messages(target_session_id, rows)
+
+            # 更新compressed_context表
+            self.dao.append_compressed_context_messages(target_session_id, [
+                self._build_context_message(message_id, row)
+                for message_id, row in zip(message_ids, rows)
+            ])
+
+        # 清除会话缓存以更新统计信息
+        self._session_cache.pop(target_session_id, None)
+
+        return message_ids
+
+    @staticmethod
+    def _build_context_message(message_id: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        """构建写入compressed_context的消息对象（OpenAI API标准格式）"""
+        message = {
             "message_id": message_id,
-            "role": role,
-            "content": content,
+            "role": row["role"],
+            "content": row["content"],
             "timestamp": datetime.now().isoformat(),
-            "token_count": token_count,
-            "metadata": metadata or {}
+            "token_count": row["token_count"],
+            "metadata": row.get("metadata") or {}
         }
 
         # 根据消息类型添加特定字段
-        if role == "assistant" and tool_calls:
-            new_message["tool_calls"] = tool_calls
-        elif role == "tool" and tool_call_id:
-            new_message["tool_call_id"] = tool_call_id
-
-        if current_context:
-            # 更新现有压缩上下文
-            compressed_messages = current_context.get("compressed_messages", [])
-            compressed_messages.append(new_message)
-
-            # 更新统计信息
-            new_compressed_token_count = current_context["compressed_token_count"] + token_count
-            new_compressed_message_count = current_context["compressed_message_count"] + 1
-            new_original_token_count = current_context["original_token_count"] + token_count
-            new_original_message_count = current_context["original_message_count"] + 1
-
-            # 更新数据库记录
-            with self.dao.transaction() as conn:
-                conn.execute("""
-                    UPDATE compressed_context
-                    SET compressed_messages = ?,
-                        compressed_message_count = ?,
-                        compressed_token_count = ?,
-                        original_message_count = ?,
-                        original_token_count = ?
-                    WHERE context_id = ?
-                """, (
-                    json.dumps(compressed_messages),
-                    new_compressed_message_count,
-                    new_compressed_token_count,
-                    new_original_message_count,
-                    new_original_token_count,
-                    current_context["context_id"]
-                ))
-        else:
-            # 这是异常情况，压缩上下文应该在会话创建时就存在
-            print(f"⚠️ 警告：会话 {session_id} 缺少压缩上下文记录")
-            raise ValueError(f"会话 {session_id} 缺少压缩上下文记录，请检查会话创建流程")
+        if row["role"] == "assistant" and row.get("tool_calls"):
+            message["tool_calls"] = row["tool_calls"]
+        elif row["role"] == "tool" and row.get("tool_call_id"):
+            message["tool_call_id"] = row["tool_call_id"]
+
+        return message
 
     def _update_compressed_context_tool_results(self, session_id: str,
                                               tool_execution_updates: Dict[str, Any]):
@@ -495,7 +414,7 @@ class SQLiteSessionManager:
             tool_execution_updates: 工具执行结果更新（recommended_prefabs, short_planning等）
         """
 
-        current_context = self.dao.get_active_compressed_context(session_id)
+        current_context = self.dao.get_active_compressed_context(session_id, include_messages=False)
         if not current_context:
             print(f"⚠️ 警告：会话 {session_id} 缺少压缩上下文记录")
             return
@@ -522,13 +441,15 @@ class SQLiteSessionManager:
             ))
 
     def get_messages(self, limit: Optional[int] = None,
-                    session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+                    session_id: Optional[str] = None,
+                    after: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
         """
         获取会话消息
         
         Args:
             limit: 限制数量
             session_id: 会话ID，如果为None则使用当前会话
+            after: 翻页游标，传入上一页最后一条消息的cursor字段
             
         Returns:
             消息列表
@@ -537,7 +458,7 @@ class SQLiteSessionManager:
         if not target_session_id:
             return []
         
-        return self.dao.get_messages(target_session_id, limit=limit)
+        return self.dao.get_messages(target_session_id, limit=limit, after=after)
     
     def get_recent_messages(self, count: int = 10, 
                           session_id: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -637,45 +558,48 @@ class SQLiteSessionManager:
             return False
 
         try:
+            # 本次结果的所有消息批量写入，与工具执行结果更新合并为一个事务：一次提交，失败时整体回滚
+            batch = []
+
             # 如果提供了用户输入，先保存用户消息
             if user_input:
-                self.add_user_message(
-                    content=user_input,
-                    session_id=target_session_id
-                )
+                batch.append({"role": "user", "content": user_input})
 
             # 保存新的消息（支持OpenAI API标准格式）
             for message in agent_result.new_messages:
                 if message.role.value == "assistant":
-                    self.add_assistant_message(
-                        content=message.content,
-                        metadata=message.metadata,
-                        tool_calls=message.tool_calls if message.tool_calls else None,
-                        session_id=target_session_id
-                    )
+                    batch.append({
+                        "role": "assistant",
+                        "content": message.content,
+                        "metadata": message.metadata,
+                        "tool_calls": message.tool_calls if message.tool_calls else None
+                    })
                 elif message.role.value == "tool":
                     # 确保tool_call_id不为空，否则跳过这条消息
                     if message.tool_call_id and message.tool_call_id.strip():
-                        self.add_tool_message(
-                            content=message.content,
-                            tool_call_id=message.tool_call_id,
-                            metadata=message.metadata,
-                            session_id=target_session_id
-                        )
+                        batch.append({
+                            "role": "tool",
+                            "content": message.content,
+                            "metadata": message.metadata,
+                            "tool_call_id": message.tool_call_id
+                        })
                     else:
                         print(f"⚠️ 跳过无效的tool消息：tool_call_id为空")
                 elif message.role.value == "user":
-                    self.add_user_message(
-                        content=message.content,
-                        metadata=message.metadata,
-                        session_id=target_session_id
+                    batch.append({
+                        "role": "user",
+                        "content": message.content,
+                        "metadata": message.metadata
+                    })
+
+            with self.dao.transaction():
+                self.add_messages(batch, session_id=target_session_id)
+
+                # 更新工具执行结果到compressed_context表（如果有变化）
+                if hasattr(agent_result, 'tool_execution_results_updates') and agent_result.tool_execution_results_updates:
+                    self._update_compressed_context_tool_results(
+                        target_session_id, agent_result.tool_execution_results_updates
                     )
-
-            # 更新工具执行结果到compressed_context表（如果有变化）
-            if hasattr(agent_result, 'tool_execution_results_updates') and agent_result.tool_execution_results_updates:
-                self._update_compressed_context_tool_results(
-                    target_session_id, agent_result.tool_execution_results_updates
-                )
             return True
 
         except Exception as e:
@@ -684,18 +608,20 @@ class SQLiteSessionManager:
 
     # ==================== 搜索和统计 ====================
 
-    def search_sessions(self, keyword: str, limit: int = 20) -> List[Dict[str, Any]]:
+    def search_sessions(self, keyword: str, limit: int = 20,
+                        after: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
         """
         搜索会话
 
         Args:
             keyword: 搜索关键词
             limit: 结果限制
+            after: 翻页游标（上一页最后一条结果的cursor字段）
 
         Returns:
-            匹配的会话列表
+            匹配的会话列表（按相关度排序，包含命中片段snippet）
         """
-        return self.dao.search_sessions_by_keyword(keyword, limit=limit)
+        return self.dao.search_sessions_by_keyword(keyword, limit=limit, after=after)
 
     def get_session_statistics(self, session_id: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -749,7 +675,7 @@ class SQLiteSessionManager:
         message_data = self.dao.get_compressed_context_messages(target_session_id)
 
         # 获取活跃的压缩上下文（包含项目状态等信息）
-        compressed_context = self.dao.get_active_compressed_context(target_session_id)
+        compressed_context = self.dao.get_active_compressed_context(target_session_id, include_messages=False)
         if not compressed_context:
             print(f"⚠️ 警告：会话 {target_session_id} 缺少压缩上下文记录")
             return None
@@ -789,18 +715,20 @@ class SQLiteSessionManager:
 
     # ==================== 搜索和统计 ====================
 
-    def search_sessions(self, keyword: str, limit: int = 20) -> List[Dict[str, Any]]:
+    def search_sessions(self, keyword: str, limit: int = 20,
+                        after: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
         """
         搜索会话
 
         Args:
             keyword: 搜索关键词
             limit: 结果限制
+            after: 翻页游标（上一页最后一条结果的cursor字段）
 
         Returns:
-            匹配的会话列表
+            匹配的会话列表（按相关度排序，包含命中片段snippet）
         """
-        return self.dao.search_sessions_by_keyword(keyword, limit=limit)
+        return self.dao.search_sessions_by_keyword(keyword, limit=limit, after=after)
 
     def get_session_statistics(self, session_id: Optional[str] = None) -> Dict[str, Any]:
         """
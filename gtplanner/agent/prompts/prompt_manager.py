@@ -3,11 +3,15 @@
 
 提供统一的多语言提示词加载、缓存和管理功能。
 集成现有的language_detection.py，实现动态语言切换。
+
+全局管理器创建时会把所有提示词类型 × 所有支持语言预编译为只读映射，
+之后每次获取同一模板返回的都是同一个字符串对象，保证系统提示词的静态前缀
+在各次调用间逐字节一致，便于模型服务端的提示词前缀缓存命中。
 """
 
 import importlib
-from typing import Dict, Optional, Any, Union
-from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Any, Tuple, Union
 
 from gtplanner.utils.language_detection import LanguageDetector, SupportedLanguage
 from .prompt_types import PromptTypeRegistry
@@ -18,7 +22,8 @@ class PromptManager:
     
     def __init__(self):
         self.language_detector = LanguageDetector()
-        self._template_cache: Dict[str, Dict[str, str]] = {}
+        self._template_cache: Dict[Tuple[str, str], str] = {}
+        self._compiled: Mapping[Tuple[str, str], str] = MappingProxyType({})
         self._default_language = SupportedLanguage.CHINESE
     
     def get_prompt(self,
@@ -78,13 +83,17 @@ class PromptManager:
         # 3. 使用默认语言
         return self._default_language
     
-    @lru_cache(maxsize=128)
     def _get_template(self, prompt_type: Any, language: SupportedLanguage) -> str:
-        """获取提示词模板（带缓存）"""
+        """获取提示词模板（优先使用预编译结果，其次使用懒加载缓存）"""
         # 转换为字符串键
         type_key = str(prompt_type.value) if hasattr(prompt_type, 'value') else str(prompt_type)
-        cache_key = f"{type_key}_{language.value}"
-        
+        cache_key = (type_key, language.value)
+
+        # 检查预编译结果
+        compiled = self._compiled.get(cache_key)
+        if compiled is not None:
+            return compiled
+
         # 检查缓存
         if cache_key in self._template_cache:
             return self._template_cache[cache_key]
@@ -146,9 +155,31 @@ class PromptManager:
         self._default_language = language
     
     def clear_cache(self):
-        """清空模板缓存"""
+        """清空模板缓存（包括预编译结果）"""
         self._template_cache.clear()
-        self._get_template.cache_clear()
+        self._compiled = MappingProxyType({})
+
+    def compile_all(self) -> int:
+        """
+        预编译所有提示词类型在所有支持语言下的模板
+
+        结果保存为只读映射，之后的获取不再经过模块导入和方法查找。
+        加载失败的组合会被跳过，获取时按原有懒加载逻辑处理（并报告错误）。
+
+        Returns:
+            预编译的模板数量
+        """
+        compiled: Dict[Tuple[str, str], str] = {}
+        for prompt_types in PromptTypeRegistry.get_all_prompt_types().values():
+            for prompt_type in prompt_types:
+                for language in SupportedLanguage:
+                    try:
+                        compiled[(prompt_type.value, language.value)] = self._load_template(prompt_type, language)
+                    except ValueError:
+                        continue
+
+        self._compiled = MappingProxyType(compiled)
+        return len(compiled)
     
     def preload_templates(self, prompt_types: list, languages: list):
         """预加载指定的模板"""
@@ -168,6 +199,7 @@ def get_prompt_manager() -> PromptManager:
     global _prompt_manager_instance
     if _prompt_manager_instance is None:
         _prompt_manager_instance = PromptManager()
+        _prompt_manager_instance.compile_all()
     return _prompt_manager_instance
 
 
@@ -75,6 +75,9 @@ class CommonPromptType(Enum):
     TOOL_BASED_PLANNING_PLACEHOLDER = "tool_based_planning_placeholder"
     DEFAULT_PROJECT_TITLE = "default_project_title"
 
+    # 会话上下文文本片段
+    GENERATED_DOCUMENTS_CONTEXT = "generated_documents_context"
+
 
 class PromptTypeRegistry:
     """提示词类型注册表"""
@@ -141,7 +144,7 @@ class PromptTypeRegistry:
                 "no_tools_placeholder", "no_research_placeholder", "bullet_point",
                 "unknown_tool", "tool_format", "research_summary_prefix", "key_findings_prefix",
                 "no_requirements_placeholder", "no_planning_placeholder", "tool_based_planning_placeholder",
-                "default_project_title"
+                "default_project_title", "generated_documents_context"
             ]:
                 return "common.text_fragments"
         
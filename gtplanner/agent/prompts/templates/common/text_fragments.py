@@ -87,6 +87,11 @@ class CommonTextFragmentsTemplates:
     def get_default_project_title_zh() -> str:
         """中文版本的默认项目标题"""
         return "AI Agent项目"
+
+    @staticmethod
+    def get_generated_documents_context_zh() -> str:
+        """中文版本的会话上下文（已生成文档列表）"""
+        return "\n\n# 当前会话上下文\n\n## 已生成的文档\n当前会话中已生成以下文档，可使用 `view_document` 工具查看：\n{docs_list}\n"
     
     # ==================== 英文版本 ====================
     @staticmethod
@@ -168,6 +173,11 @@ class CommonTextFragmentsTemplates:
     def get_default_project_title_en() -> str:
         """English version of default project title"""
         return "AI Agent Project"
+
+    @staticmethod
+    def get_generated_documents_context_en() -> str:
+        """English version of session context (generated documents list)"""
+        return "\n\n# Current Session Context\n\n## Generated Documents\nThe following documents have been generated in this session and can be viewed using the `view_document` tool:\n{docs_list}\n"
     
     # ==================== 日文版本 ====================
     @staticmethod
@@ -249,6 +259,11 @@ class CommonTextFragmentsTemplates:
     def get_default_project_title_ja() -> str:
         """日本語版のデフォルトプロジェクトタイトル"""
         return "AIエージェントプロジェクト"
+
+    @staticmethod
+    def get_generated_documents_context_ja() -> str:
+        """日本語版のセッションコンテキスト（生成済みドキュメント一覧）"""
+        return "\n\n# 現在のセッションコンテキスト\n\n## 生成済みドキュメント\nこのセッションでは以下のドキュメントが生成されており、`view_document` ツールで確認できます：\n{docs_list}\n"
     
     # ==================== 西班牙文版本 ====================
     @staticmethod
@@ -331,6 +346,11 @@ class CommonTextFragmentsTemplates:
         """Versión en español del título de proyecto por defecto"""
         return "Proyecto de Agente IA"
 
+    @staticmethod
+    def get_generated_documents_context_es() -> str:
+        """Versión en español del contexto de sesión (documentos generados)"""
+        return "\n\n# Contexto de la Sesión Actual\n\n## Documentos Generados\nEn esta sesión se han generado los siguientes documentos, que se pueden consultar con la herramienta `view_document`:\n{docs_list}\n"
+
     @staticmethod
     def get_no_requirements_placeholder_es() -> str:
         """Versión en español del marcador de posición sin requisitos"""
@@ -421,3 +441,8 @@ class CommonTextFragmentsTemplates:
     def get_default_project_title_fr() -> str:
         """Version française du titre de projet par défaut"""
         return "Projet d'Agent IA"
+
+    @staticmethod
+    def get_generated_documents_context_fr() -> str:
+        """Version française du contexte de session (documents générés)"""
+        return "\n\n# Contexte de la Session Actuelle\n\n## Documents Générés\nLes documents suivants ont été générés dans cette session et peuvent être consultés avec l'outil `view_document` :\n{docs_list}\n"
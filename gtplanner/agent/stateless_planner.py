@@ -18,8 +18,11 @@ from typing import Optional
 from .context_types import AgentContext, AgentResult
 from .pocketflow_factory import PocketFlowSharedFactory
 from .flows.react_orchestrator_refactored.react_orchestrator_flow import ReActOrchestratorFlow
-from .streaming.stream_types import StreamEventBuilder, AssistantMessageChunk, ToolCallStatus, StreamCallbackType
+from .streaming.stream_types import (
+    StreamEventBuilder, AssistantMessageChunk, ToolCallArgumentsDelta, ToolCallStatus, StreamCallbackType
+)
 from .streaming.stream_interface import StreamingSession
+from gtplanner.utils.request_tracing import trace_span, get_current_trace_id
 
 
 class StatelessGTPlanner:
@@ -56,8 +59,28 @@ class StatelessGTPlanner:
             language: 语言选择，支持 'zh', 'en', 'ja', 'es', 'fr'（可选）
 
         Returns:
-            处理结果对象
+            处理结果对象（metadata["trace_id"] 为本次请求的追踪ID）
         """
+        with trace_span(
+            "StatelessGTPlanner.process",
+            kind="request",
+            session_id=context.session_id,
+            language=language
+        ) as span:
+            result = await self._process(user_input, context, streaming_session, language)
+            span.set_attribute("success", result.success)
+
+        result.metadata["trace_id"] = span.trace_id
+        return result
+
+    async def _process(
+        self,
+        user_input: str,
+        context: AgentContext,
+        streaming_session: StreamingSession,
+        language: Optional[str] = None
+    ) -> AgentResult:
+        """处理用户请求的实际逻辑（在请求级 span 内执行）"""
         start_time = asyncio.get_event_loop().time()
         
         try:
@@ -81,6 +104,7 @@ class StatelessGTPlanner:
                 StreamCallbackType.ON_LLM_START: self._on_llm_start,
                 StreamCallbackType.ON_LLM_CHUNK: self._on_llm_chunk,
                 StreamCallbackType.ON_LLM_END: self._on_llm_end,
+                StreamCallbackType.ON_TOOL_ARGUMENTS_DELTA: self._on_tool_arguments_delta,
                 StreamCallbackType.ON_TOOL_START: self._on_tool_start,
                 StreamCallbackType.ON_TOOL_PROGRESS: self._on_tool_progress,
                 StreamCallbackType.ON_TOOL_END: self._on_tool_end
@@ -108,7 +132,8 @@ class StatelessGTPlanner:
                     {
                         "success": result.success,
                         "execution_time": result.execution_time,
-                        "new_messages_count": len(result.new_messages)
+                        "new_messages_count": len(result.new_messages),
+                        "trace_id": get_current_trace_id()
                     },
                     tool_execution_results_updates=result.tool_execution_results_updates
                 )
@@ -191,6 +216,29 @@ class StatelessGTPlanner:
             )
         )
 
+    @staticmethod
+    async def _on_tool_arguments_delta(
+        session: StreamingSession,
+        tool_name: str,
+        delta: str,
+        call_id: Optional[str] = None,
+        index: int = 0,
+        arguments_length: int = 0,
+        **kwargs
+    ) -> None:
+        """工具参数增量回调"""
+        arguments_delta = ToolCallArgumentsDelta(
+            tool_name=tool_name,
+            delta=delta,
+            call_id=call_id,
+            index=index,
+            arguments_length=arguments_length
+        )
+
+        await session.emit_event(
+            StreamEventBuilder.tool_call_arguments_delta(session.session_id, arguments_delta)
+        )
+
     @staticmethod
     async def _on_tool_start(
         session: StreamingSession,
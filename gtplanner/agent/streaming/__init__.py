@@ -10,6 +10,7 @@ from .stream_types import (
     StreamCallbackType,
     StreamEventBuilder,
     AssistantMessageChunk,
+    ToolCallArgumentsDelta,
     ToolCallStatus,
     DesignDocument,
     StreamEventIterator,
@@ -51,6 +52,7 @@ __all__ = [
     "StreamCallbackType",
     "StreamEventBuilder",
     "AssistantMessageChunk",
+    "ToolCallArgumentsDelta",
     "ToolCallStatus",
     "DesignDocument",
     "StreamEventIterator",
@@ -27,6 +27,7 @@ class CLIStreamHandler(StreamHandler):
         self.current_message = ""
         self.is_message_active = False
         self.active_tools: Dict[str, Dict[str, Any]] = {}
+        self.generating_tool_arguments: Dict[str, int] = {}  # 工具调用序号 -> 已显示进度的参数长度
         self._closed = False
 
     async def handle_event(self, event: StreamEvent) -> None:
@@ -47,6 +48,9 @@ class CLIStreamHandler(StreamHandler):
             elif event.event_type == StreamEventType.ASSISTANT_MESSAGE_END:
                 await self._handle_message_end(event)
 
+            elif event.event_type == StreamEventType.TOOL_CALL_ARGUMENTS_DELTA:
+                await self._handle_tool_arguments_delta(event)
+
             elif event.event_type == StreamEventType.TOOL_CALL_START:
                 await self._handle_tool_start(event)
 
@@ -111,6 +115,20 @@ class CLIStreamHandler(StreamHandler):
 
             self.current_message = ""
 
+    async def _handle_tool_arguments_delta(self, event: StreamEvent) -> None:
+        """处理工具调用参数增量事件（每生成约 200 个字符显示一个进度点）"""
+        tool_name = event.data.get("tool_name") or "unknown"
+        call_key = str(event.data.get("index", 0))
+        arguments_length = event.data.get("arguments_length", 0)
+
+        if call_key not in self.generating_tool_arguments:
+            print(f"\n✍️  正在生成{tool_name}工具参数", end="", flush=True)
+            self.generating_tool_arguments[call_key] = 0
+
+        if arguments_length - self.generating_tool_arguments[call_key] >= 200:
+            print(".", end="", flush=True)
+            self.generating_tool_arguments[call_key] = arguments_length
+
     async def _handle_tool_start(self, event: StreamEvent) -> None:
         """处理工具调用开始事件"""
         tool_name = event.data.get("tool_name", "unknown")
@@ -120,6 +138,10 @@ class CLIStreamHandler(StreamHandler):
         if self.is_message_active:
             print()
 
+        if self.generating_tool_arguments:
+            print()
+            self.generating_tool_arguments.clear()
+
         print(f"\n🔧 {progress_message}")
 
         # 记录活跃工具
@@ -144,7 +166,8 @@ class CLIStreamHandler(StreamHandler):
         error_message = event.data.get("error_message")
 
         if status == "completed":
-            print(f"   ✅ {tool_name}工具执行完成 (耗时: {execution_time:.2f}s)")
+            cache_note = "，命中缓存" if event.data.get("cache_hit") else ""
+            print(f"   ✅ {tool_name}工具执行完成 (耗时: {execution_time:.2f}s{cache_note})")
         elif status == "failed":
             print(f"   ❌ {tool_name}工具执行失败: {error_message}")
 
@@ -293,6 +316,7 @@ class CLIStreamHandler(StreamHandler):
             print("\n⚠️  消息显示被中断")
 
         self.active_tools.clear()
+        self.generating_tool_arguments.clear()
         self.current_message = ""
         self.is_message_active = False
 
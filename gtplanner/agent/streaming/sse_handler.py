@@ -108,6 +108,9 @@ class SSEStreamHandler(StreamHandler):
             elif event.event_type == StreamEventType.ASSISTANT_MESSAGE_END:
                 await self._handle_message_end(event)
 
+            elif event.event_type == StreamEventType.TOOL_CALL_ARGUMENTS_DELTA:
+                await self._handle_tool_arguments_delta(event)
+
             elif event.event_type == StreamEventType.TOOL_CALL_START:
                 await self._handle_tool_start(event)
 
@@ -189,9 +192,25 @@ class SSEStreamHandler(StreamHandler):
             self._is_message_active = False
             self._message_buffer = ""
 
+    async def _handle_tool_arguments_delta(self, event: StreamEvent) -> None:
+        """处理工具调用参数增量事件"""
+        if not event.data.get("delta"):
+            return
+
+        if self.buffer_events:
+            # 与消息片段一样缓冲，参数生成期间事件量较大
+            self._event_buffer.append(event)
+            if len(self._event_buffer) >= 5:
+                await self._flush_buffer()
+        else:
+            await self._write_sse_event(event)
+
     async def _handle_tool_start(self, event: StreamEvent) -> None:
         """处理工具调用开始事件"""
         tool_name = event.data.get("tool_name", "unknown")
+
+        # 刷新缓冲的参数增量事件，保证事件顺序
+        await self._flush_buffer()
         
         # 记录活跃工具
         self.active_tools[tool_name] = {
@@ -20,6 +20,7 @@ class StreamEventType(Enum):
     ASSISTANT_MESSAGE_END = "assistant_message_end"
 
     # 工具调用相关事件
+    TOOL_CALL_ARGUMENTS_DELTA = "tool_call_arguments_delta"  # LLM 生成工具参数的增量片段
     TOOL_CALL_START = "tool_call_start"
     TOOL_CALL_PROGRESS = "tool_call_progress"
     TOOL_CALL_END = "tool_call_end"
@@ -43,6 +44,7 @@ class StreamCallbackType(Enum):
     ON_LLM_END = "on_llm_end"
 
     # 工具调用相关回调
+    ON_TOOL_ARGUMENTS_DELTA = "on_tool_arguments_delta"
     ON_TOOL_START = "on_tool_start"
     ON_TOOL_PROGRESS = "on_tool_progress"
     ON_TOOL_END = "on_tool_end"
@@ -108,6 +110,25 @@ class AssistantMessageChunk:
         }
 
 
+@dataclass
+class ToolCallArgumentsDelta:
+    """工具调用参数增量片段（LLM 流式生成工具参数时产生）"""
+    tool_name: str
+    delta: str
+    call_id: Optional[str] = None
+    index: int = 0  # 工具调用在本轮回复中的序号
+    arguments_length: int = 0  # 目前已生成的参数总长度（字符数）
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "tool_name": self.tool_name,
+            "delta": self.delta,
+            "call_id": self.call_id,
+            "index": self.index,
+            "arguments_length": self.arguments_length
+        }
+
+
 @dataclass
 class ToolCallStatus:
     """工具调用状态"""
@@ -119,6 +140,7 @@ class ToolCallStatus:
     result: Optional[Dict[str, Any]] = None
     execution_time: Optional[float] = None
     error_message: Optional[str] = None
+    cache_hit: bool = False  # 结果是否来自工具结果缓存
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -129,7 +151,8 @@ class ToolCallStatus:
             "arguments": self.arguments,
             "result": self.result,
             "execution_time": self.execution_time,
-            "error_message": self.error_message
+            "error_message": self.error_message,
+            "cache_hit": self.cache_hit
         }
 
 
@@ -231,6 +254,18 @@ class StreamEventBuilder:
             }
         )
     
+    @staticmethod
+    def tool_call_arguments_delta(
+        session_id: str,
+        delta: ToolCallArgumentsDelta
+    ) -> StreamEvent:
+        """创建工具调用参数增量事件"""
+        return StreamEvent(
+            event_type=StreamEventType.TOOL_CALL_ARGUMENTS_DELTA,
+            session_id=session_id,
+            data=delta.to_dict()
+        )
+
     @staticmethod
     def tool_call_start(
         session_id: str, 
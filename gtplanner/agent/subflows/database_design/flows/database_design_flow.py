@@ -6,6 +6,7 @@ Database Design Flow - MySQL 数据库表结构设计流程
 
 from pocketflow import AsyncFlow
 from pocketflow_tracing import trace_flow
+from gtplanner.utils.request_tracing import traced_flow
 from ..nodes.database_design_node import DatabaseDesignNode
 from gtplanner.agent.streaming import (
     emit_processing_status,
@@ -14,6 +15,7 @@ from gtplanner.agent.streaming import (
 
 
 @trace_flow(flow_name="DatabaseDesignFlow")
+@traced_flow(flow_name="DatabaseDesignFlow")
 class TracedDatabaseDesignFlow(AsyncFlow):
     """带有 tracing 的数据库设计流程"""
 
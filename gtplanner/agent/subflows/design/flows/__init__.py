@@ -1,6 +1,6 @@
 """Design 流程"""
 
-from .design_flow import DesignFlow
+from .design_flow import DesignFlow, design_flow_pool
 
-__all__ = ["DesignFlow"]
+__all__ = ["DesignFlow", "design_flow_pool"]
 
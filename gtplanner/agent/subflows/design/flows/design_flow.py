@@ -1,20 +1,25 @@
 """
 Design Flow - 统一的设计文档生成流程
 
-单节点流程，直接调用 DesignNode 生成设计文档。
+DesignNode 生成设计文档的同时，PrefabFunctionsDetailNode 并发查询推荐预制件的函数详情
+（两者都只依赖输入参数，互不依赖），网关查询的耗时被设计文档生成的 LLM 调用覆盖。
 """
 
 from pocketflow import AsyncFlow
 from pocketflow_tracing import trace_flow
+from gtplanner.utils.request_tracing import traced_flow
 from ..nodes.design_node import DesignNode
 from ..nodes.prefab_functions_detail_node import PrefabFunctionsDetailNode
+from ..nodes.parallel_branches_node import ParallelBranchesNode
 from gtplanner.agent.streaming import (
     emit_processing_status,
     emit_error
 )
+from gtplanner.agent.utils.object_pool import ObjectPool
 
 
 @trace_flow(flow_name="DesignFlow")
+@traced_flow(flow_name="DesignFlow")
 class TracedDesignFlow(AsyncFlow):
     """带有 tracing 的设计流程"""
 
@@ -66,24 +71,26 @@ def create_design_flow():
     """
     创建设计流程
 
-    流程：DesignNode -> PrefabFunctionsDetailNode
+    流程：[DesignNode || PrefabFunctionsDetailNode]
 
     DesignNode: 生成系统设计文档
     PrefabFunctionsDetailNode: 查询推荐预制件的函数详情并生成文档
 
+    两个节点并发执行，全部完成后先执行 DesignNode 的后处理；设计文档生成失败时
+    不再保存函数详情文档（与原先顺序执行时的结果一致）。
+
     Returns:
         Flow: 设计流程
     """
-    design_node = DesignNode()
-    prefab_functions_detail_node = PrefabFunctionsDetailNode()
-
-    # 将设计节点连接到预制件函数详情查询节点
-    # 使用 pocketflow 的链接方式：node.next(next_node, action)
-    design_node.next(prefab_functions_detail_node, "default")
+    design_branches = ParallelBranchesNode(
+        DesignNode(),
+        PrefabFunctionsDetailNode(),
+        name="DesignBranches"
+    )
 
     # 创建并返回带 tracing 的 AsyncFlow
     flow = TracedDesignFlow()
-    flow.start_node = design_node
+    flow.start_node = design_branches
     return flow
 
 
@@ -141,3 +148,6 @@ class DesignFlow:
             await emit_error(shared, f"❌ 输入数据验证失败: {str(e)}")
             return False
 
+
+# 设计流程对象池：流程与节点不保存运行期状态，按并发度复用
+design_flow_pool = ObjectPool(DesignFlow)
@@ -0,0 +1,67 @@
+"""
+Parallel Branches Node - 并行分支节点
+
+把互不依赖的节点放在同一步中并发执行：各分支的 prep_async / exec（含重试）同时进行，
+全部完成后再按分支顺序依次执行 post_async 写回 shared。
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from pocketflow import AsyncNode
+
+from gtplanner.utils.request_tracing import trace_span
+
+
+class ParallelBranchesNode(AsyncNode):
+    """
+    并行分支节点
+
+    - post_async 按分支顺序串行执行，写 shared 的逻辑不会交错
+    - 某个分支的 post_async 返回 "error" 时不再执行后续分支的 post_async，
+      与顺序链接时前一个节点出错即停止的语义一致（后续分支的查询结果被丢弃）
+    - 任一分支的 prep/exec 抛出异常时取消其余分支并向上抛出
+    - 节点不保存运行期状态，可以随流程一起被对象池复用
+    """
+
+    def __init__(self, *branches: AsyncNode, name: str = "ParallelBranches"):
+        super().__init__()
+        self.branches = branches
+        self.name = name
+
+    def set_params(self, params):
+        super().set_params(params)
+        for branch in self.branches:
+            branch.set_params(params)
+
+    def set_agui_callback(self, callback):
+        super().set_agui_callback(callback)
+        for branch in self.branches:
+            branch.set_agui_callback(callback)
+
+    async def _prep_and_exec(self, branch: AsyncNode, shared: Dict[str, Any]) -> Tuple[Any, Any]:
+        """执行单个分支的 prep 和 exec"""
+        branch_name = getattr(branch, "name", None) or type(branch).__name__
+        with trace_span(f"{self.name}.{branch_name}", kind="node"):
+            prep_res = await branch.prep_async(shared)
+            exec_res = await branch._exec(prep_res)
+        return prep_res, exec_res
+
+    async def _run_async(self, shared: Dict[str, Any]) -> Optional[str]:
+        tasks: List[asyncio.Task] = [
+            asyncio.ensure_future(self._prep_and_exec(branch, shared)) for branch in self.branches
+        ]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        action = None
+        for branch, (prep_res, exec_res) in zip(self.branches, results):
+            action = await branch.post_async(shared, prep_res, exec_res)
+            if action == "error":
+                break
+        return action
@@ -2,14 +2,17 @@
 Prefab Functions Detail Node - 预制件函数详情查询后置节点
 
 设计流程结束后，查询所有推荐预制件的函数详情，并转换为文档格式，便于下游使用。
+所有预制件和函数的详情通过共享的网关客户端并发查询（带元数据缓存和并发上限，见 prefab_gateway_client）。
 """
 
+import asyncio
 import time
 import json
-import httpx
 from typing import Dict, Any, List
 from pocketflow import AsyncNode
 
+from gtplanner.agent.utils.prefab_gateway_client import get_prefab_gateway_client
+
 from gtplanner.agent.streaming import (
     emit_processing_status,
     emit_error,
@@ -91,55 +94,28 @@ class PrefabFunctionsDetailNode(AsyncNode):
 
             prefabs_to_query = prep_result["prefabs_to_query"]
 
-            # 从配置获取 prefab-gateway 地址
-            from gtplanner.utils.config_manager import get_prefab_gateway_url
-            gateway_url = get_prefab_gateway_url()
+            # 获取共享的 prefab-gateway 客户端
+            client = get_prefab_gateway_client()
 
-            if not gateway_url:
+            if client is None:
                 raise ValueError("Prefab gateway URL not configured")
 
-            # 批量查询函数详情
-            prefabs_details = []
-
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                for prefab_info in prefabs_to_query:
-                    prefab_id = prefab_info["id"]
-                    version = prefab_info["version"]
-                    function_names = prefab_info["functions"]
-
-                    # 查询该预制件的所有函数详情
-                    functions_details = []
-                    for func_name in function_names:
-                        try:
-                            url = f"{gateway_url}/v1/public/prefabs/{prefab_id}/functions/{func_name}"
-                            params = {}
-                            if version and version != "latest":
-                                params["version"] = version
-
-                            response = await client.get(url, params=params)
-                            response.raise_for_status()
-                            function_detail = response.json()
-
-                            functions_details.append({
-                                "name": func_name,
-                                "detail": function_detail
-                            })
-
-                        except Exception as e:
-                            # 单个函数查询失败不影响整体流程
-                            functions_details.append({
-                                "name": func_name,
-                                "error": str(e)
-                            })
-
-                    # 保存该预制件的详情
-                    prefabs_details.append({
-                        "id": prefab_id,
-                        "version": version,
-                        "name": prefab_info["name"],
-                        "description": prefab_info["description"],
-                        "functions": functions_details
-                    })
+            # 并发查询所有预制件的函数详情（单个函数查询失败不影响整体流程）
+            all_details = await asyncio.gather(*(
+                client.get_function_details(prefab_info["id"], prefab_info["functions"], prefab_info["version"])
+                for prefab_info in prefabs_to_query
+            ))
+
+            prefabs_details = [
+                {
+                    "id": prefab_info["id"],
+                    "version": prefab_info["version"],
+                    "name": prefab_info["name"],
+                    "description": prefab_info["description"],
+                    "functions": functions_details
+                }
+                for prefab_info, functions_details in zip(prefabs_to_query, all_details)
+            ]
 
             return {
                 "skip": False,
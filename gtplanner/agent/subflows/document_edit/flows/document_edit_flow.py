@@ -6,11 +6,13 @@ Document Edit Flow
 
 from pocketflow import AsyncFlow
 from pocketflow_tracing import trace_flow
+from gtplanner.utils.request_tracing import traced_flow
 from ..nodes.document_edit_node import DocumentEditNode
 from gtplanner.agent.streaming import emit_processing_status, emit_error
 
 
 @trace_flow(flow_name="DocumentEditFlow")
+@traced_flow(flow_name="DocumentEditFlow")
 class TracedDocumentEditFlow(AsyncFlow):
     """带有 tracing 的文档编辑流程"""
     
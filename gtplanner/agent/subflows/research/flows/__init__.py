@@ -4,10 +4,12 @@ Research Agent 流程包
 包含所有的流程定义文件
 """
 
-from .keyword_research_flow import create_keyword_research_subflow
-from .research_flow import ResearchFlow
+from .keyword_research_flow import create_keyword_research_subflow, keyword_research_subflow_pool
+from .research_flow import ResearchFlow, research_flow_pool
 
 __all__ = [
     'create_keyword_research_subflow',
-    'ResearchFlow'
+    'keyword_research_subflow_pool',
+    'ResearchFlow',
+    'research_flow_pool'
 ]
@@ -7,13 +7,16 @@
 
 from pocketflow import AsyncFlow
 from pocketflow_tracing import trace_flow
+from gtplanner.utils.request_tracing import traced_flow
 from ....nodes.node_search import NodeSearch
 from ....nodes.node_url import NodeURL
 from ..nodes.llm_analysis_node import LLMAnalysisNode
 from ..nodes.result_assembly_node import ResultAssemblyNode
+from gtplanner.agent.utils.object_pool import ObjectPool
 
 
 @trace_flow(flow_name="KeywordResearchFlow")
+@traced_flow(flow_name="KeywordResearchFlow")
 class TracedKeywordResearchFlow(AsyncFlow):
     """带有tracing的关键词研究流程"""
 
@@ -76,3 +79,7 @@ def create_keyword_research_subflow():
     subflow = TracedKeywordResearchFlow(start=search_node)
 
     return subflow
+
+
+# 关键词研究子流程对象池：子流程节点无运行期实例状态，按并发度复用，避免每个关键词重建对象图
+keyword_research_subflow_pool = ObjectPool(create_keyword_research_subflow)
@@ -7,8 +7,10 @@ import asyncio
 import os
 from typing import Dict, List, Any
 from pocketflow_tracing import trace_flow
+from gtplanner.utils.request_tracing import traced_flow
 from pocketflow import AsyncFlow, AsyncNode
-from .keyword_research_flow import create_keyword_research_subflow
+from .keyword_research_flow import keyword_research_subflow_pool
+from gtplanner.agent.utils.object_pool import ObjectPool
 from gtplanner.agent.streaming import (
     emit_processing_status_from_prep,
     emit_error_from_prep,
@@ -18,13 +20,16 @@ from gtplanner.agent.streaming import (
 
 
 class ConcurrentResearchNode(AsyncNode):
-    """并发研究节点 - 在ResearchFlow内部处理并发"""
+    """
+    并发研究节点 - 在ResearchFlow内部处理并发
+
+    节点不保存运行期状态：关键词子流程从对象池借用，执行结果通过 exec_res 传递，
+    因此同一个节点实例可以被多次、并发地复用。
+    """
 
     def __init__(self):
         super().__init__()
         self.name = "concurrent_research"
-        self._subflows_and_data = []
-        self._execution_results = []
 
     async def prep_async(self, shared: Dict[str, Any]) -> Dict[str, Any]:
         """准备并发研究参数"""
@@ -34,16 +39,6 @@ class ConcurrentResearchNode(AsyncNode):
         focus_areas = shared.get("focus_areas", [])
         project_context = shared.get("project_context", "")
 
-        # 创建子流程列表，但不创建单独的数据字典
-        # 而是直接使用主shared字典，只是为每个关键词设置当前关键词
-        subflows_and_keywords = []
-        for keyword in research_keywords:
-            keyword_subflow = create_keyword_research_subflow()
-            subflows_and_keywords.append((keyword_subflow, keyword))
-
-        # 存储到实例变量
-        self._subflows_and_keywords = subflows_and_keywords
-
         return {
             "keywords": research_keywords,
             "focus_areas": focus_areas,
@@ -56,25 +51,25 @@ class ConcurrentResearchNode(AsyncNode):
     async def exec_async(self, prep_res: Dict[str, Any]) -> Dict[str, Any]:
         """并发执行关键词研究"""
 
-        subflows_and_keywords = self._subflows_and_keywords
         keywords = prep_res["keywords"]
 
         # 发送处理状态事件
         await emit_processing_status_from_prep(
             prep_res,
-            f"🚀 开始并发执行 {len(subflows_and_keywords)} 个关键词研究..."
+            f"🚀 开始并发执行 {len(keywords)} 个关键词研究..."
         )
 
         start_time = asyncio.get_event_loop().time()
 
         # 为每个关键词创建独立的shared字典副本，但包含当前关键词信息
-        async def run_keyword_research(subflow, keyword, shared_template):
+        async def run_keyword_research(keyword, shared_template):
             # 创建该关键词的shared字典副本
             keyword_shared = shared_template.copy()
             keyword_shared["current_keyword"] = keyword
 
-            # 运行子流程
-            result = await subflow.run_async(keyword_shared)
+            # 从对象池借用子流程运行（运行期状态都在 keyword_shared 中）
+            async with keyword_research_subflow_pool.acquire() as subflow:
+                result = await subflow.run_async(keyword_shared)
 
             # 返回关键词和结果
             return keyword, keyword_shared.get("research_findings", {}), result
@@ -88,8 +83,8 @@ class ConcurrentResearchNode(AsyncNode):
 
         # 🔧 关键：在节点内部并发执行所有子流程
         results = await asyncio.gather(*[
-            run_keyword_research(subflow, keyword, shared_template)
-            for subflow, keyword in subflows_and_keywords
+            run_keyword_research(keyword, shared_template)
+            for keyword in keywords
         ], return_exceptions=True)
 
         execution_time = asyncio.get_event_loop().time() - start_time
@@ -127,13 +122,9 @@ class ConcurrentResearchNode(AsyncNode):
         successful_count = len(successful_results)
         failed_count = len(failed_results)
 
-        # 存储结果到实例变量
-        self._execution_results = {
-            "successful_results": successful_results,
-            "failed_results": failed_results
-        }
-
         return {
+            "successful_results": successful_results,
+            "failed_results": failed_results,
             "execution_time": execution_time,
             "statistics": {
                 "total": len(keywords),
@@ -149,10 +140,8 @@ class ConcurrentResearchNode(AsyncNode):
         statistics = exec_res["statistics"]
         success_rate = exec_res["success_rate"]
 
-        # 从实例变量获取详细结果
-        execution_results = self._execution_results
-        successful_results = execution_results["successful_results"]
-        failed_results = execution_results["failed_results"]
+        successful_results = exec_res["successful_results"]
+        failed_results = exec_res["failed_results"]
 
         # 构建最终的研究结果
         keyword_results = []
@@ -216,6 +205,7 @@ class ConcurrentResearchNode(AsyncNode):
 
 
 @trace_flow(flow_name="ResearchFlow")
+@traced_flow(flow_name="ResearchFlow")
 class TracedResearchFlow(AsyncFlow):
     """带tracing的研究调研流程"""
 
@@ -306,3 +296,7 @@ class ResearchFlow:
 def create_research_flow():
     """创建研究调研流程实例"""
     return ResearchFlow()
+
+
+# 研究流程对象池：每个进程只按峰值并发数构建流程对象图
+research_flow_pool = ObjectPool(ResearchFlow)
@@ -9,14 +9,17 @@ ShortPlanningNode (直接处理用户需求)
 
 from pocketflow import AsyncFlow
 from pocketflow_tracing import trace_flow
+from gtplanner.utils.request_tracing import traced_flow
 from ..nodes.short_planning_node import ShortPlanningNode
 from gtplanner.agent.streaming import (
     emit_processing_status,
     emit_error
 )
+from gtplanner.agent.utils.object_pool import ObjectPool
 
 
 @trace_flow(flow_name="ShortPlanningFlow")
+@traced_flow(flow_name="ShortPlanningFlow")
 class TracedShortPlanningFlow(AsyncFlow):
     """带有tracing的短规划流程"""
 
@@ -112,4 +115,8 @@ class ShortPlanningFlow:
         
         # previous_planning 和 improvement_points 是可选的，无需强制检查
 
-        return True
\ No newline at end of file
+        return True
+
+
+# 短规划流程对象池：流程与节点不保存运行期状态，按并发度复用
+short_planning_flow_pool = ObjectPool(ShortPlanningFlow)
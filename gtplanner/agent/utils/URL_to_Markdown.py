@@ -7,8 +7,10 @@ import aiohttp
 import asyncio
 from typing import Dict, Optional, Any
 from gtplanner.utils.config_manager import get_jina_api_key
+from gtplanner.agent.utils.research_providers import FetchProvider
+from gtplanner.agent.utils.web_cache import get_web_result_cache, normalize_url
 
-class JinaWebClient:
+class JinaWebClient(FetchProvider):
     """Jina URL转Markdown客户端"""
     
     def __init__(
@@ -105,6 +107,8 @@ class JinaWebClient:
         """
         获取页面基本信息 - 异步版本
 
+        结果按规范化后的 URL 缓存到磁盘（见 web_cache），内容为空的页面不缓存。
+
         Args:
             url: 要获取信息的URL
             **kwargs: 其他请求参数
@@ -112,6 +116,19 @@ class JinaWebClient:
         Returns:
             包含title、description、url、content的字典
         """
+        cache = get_web_result_cache()
+        if cache is None:
+            return await self._get_page_info_uncached(url, **kwargs)
+
+        key = cache.make_key(normalize_url(url), kwargs)
+        return await cache.get_or_fetch(
+            "jina_page", key,
+            lambda: self._get_page_info_uncached(url, **kwargs),
+            should_cache=lambda page: bool(page.get("content"))
+        )
+
+    async def _get_page_info_uncached(self, url: str, **kwargs) -> Dict[str, str]:
+        """调用URL转换API并提取页面信息"""
         result = await self.url_to_markdown(url, **kwargs)
 
         if result.get("code") != 200:
@@ -177,3 +194,20 @@ class JinaWebClient:
                 }
         
         return results
+
+
+# 全局共享客户端
+_jina_web_client: Optional[JinaWebClient] = None
+
+
+def get_jina_web_client() -> JinaWebClient:
+    """
+    获取全局共享的 Jina Web 客户端
+
+    Raises:
+        ValueError: 未配置 API 密钥时抛出（与 JinaWebClient 构造函数一致）
+    """
+    global _jina_web_client
+    if _jina_web_client is None:
+        _jina_web_client = JinaWebClient()
+    return _jina_web_client
@@ -1,40 +1,165 @@
 """
 本地预制件搜索工具（降级模式）
 
-当向量服务不可用时，提供基础的模糊搜索功能。
+当向量服务不可用时，提供基于倒排索引的关键词搜索（BM25排序，见 prefab_search_index）。
 作为 agent tool 使用，让 LLM 自己调用和判断搜索结果。
 """
 
 import json
-from typing import List, Dict, Any
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
+from gtplanner.agent.utils.prefab_search_index import PrefabSearchIndex
+
+# 仓库中的预制件目录
+DEFAULT_PREFABS_PATH = Path(__file__).parent.parent.parent.parent / "prefabs" / "releases" / "community-prefabs.json"
+
+# 默认目录变化检查间隔（秒）
+DEFAULT_CHECK_INTERVAL = 5.0
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """预制件目录快照（加载后不再修改，重新加载时整体替换）"""
+    prefabs: List[Dict]
+    index: PrefabSearchIndex
+    file_version: Tuple[int, int]  # (st_mtime_ns, st_size)
+    loaded_at: float
+    load_time_ms: float
+
 
 class LocalPrefabSearcher:
     """
     本地预制件搜索器
     
-    提供简单的模糊搜索功能，返回匹配的预制件列表。
+    加载预制件目录时构建倒排索引，返回按相关度排序的预制件列表。
     让 LLM 自己判断和选择合适的预制件。
+
+    目录和索引保存在不可变的 CatalogSnapshot 中：重新加载时先在旁边构建新快照，
+    完成后一次性替换引用，进行中的搜索始终使用开始时拿到的完整快照。
+    目录文件最多每 check_interval 秒检查一次，检查和重建都在后台线程中进行，除首次加载外搜索本身不做文件 I/O。
     """
     
-    def __init__(self, prefabs_json_path: str = None):
+    def __init__(self, prefabs_json_path: str = None, check_interval: float = DEFAULT_CHECK_INTERVAL):
         """
         初始化搜索器
         
         Args:
             prefabs_json_path: community-prefabs.json 文件路径，
                              如果为 None 则自动查找
+            check_interval: 检查目录文件是否变化的最小间隔（秒），0 表示每次搜索都检查
         """
         if prefabs_json_path is None:
             # 自动定位 community-prefabs.json
-            current_dir = Path(__file__).parent
-            prefabs_json_path = current_dir.parent.parent.parent / "prefabs" / "releases" / "community-prefabs.json"
+            prefabs_json_path = DEFAULT_PREFABS_PATH
         
         self.prefabs_path = Path(prefabs_json_path)
-        self.prefabs_cache: List[Dict] = None
-        self.last_modified: float = None
-    
+        self.check_interval = max(0.0, float(check_interval))
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._next_check = 0.0
+        self._reload_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    @property
+    def prefabs_cache(self) -> Optional[List[Dict]]:
+        snapshot = self._snapshot
+        return snapshot.prefabs if snapshot else None
+
+    @property
+    def index(self) -> Optional[PrefabSearchIndex]:
+        snapshot = self._snapshot
+        return snapshot.index if snapshot else None
+
+    def _file_version(self) -> Tuple[int, int]:
+        """读取目录文件版本（文件不存在时抛出 FileNotFoundError）"""
+        try:
+            stat = self.prefabs_path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Prefabs JSON not found: {self.prefabs_path}")
+        return stat.st_mtime_ns, stat.st_size
+
+    def _build_snapshot(self, file_version: Tuple[int, int]) -> CatalogSnapshot:
+        """解析目录并构建索引（不修改当前快照）"""
+        start = time.perf_counter()
+        with open(self.prefabs_path, 'r', encoding='utf-8') as f:
+            prefabs = json.load(f)
+        index = PrefabSearchIndex(prefabs)
+        return CatalogSnapshot(
+            prefabs=prefabs,
+            index=index,
+            file_version=file_version,
+            loaded_at=time.time(),
+            load_time_ms=(time.perf_counter() - start) * 1000
+        )
+
+    def reload(self, force: bool = False) -> CatalogSnapshot:
+        """
+        检查目录文件并在变化时重新加载（启动预热时调用）
+
+        Args:
+            force: 为 True 时即使文件未变化也重新构建
+
+        Returns:
+            当前快照
+        """
+        with self._reload_lock:
+            file_version = self._file_version()
+            self._next_check = time.monotonic() + self.check_interval
+            snapshot = self._snapshot
+            if force or snapshot is None or snapshot.file_version != file_version:
+                snapshot = self._build_snapshot(file_version)
+                self._snapshot = snapshot
+            return snapshot
+
+    def get_snapshot(self) -> CatalogSnapshot:
+        """
+        获取当前快照
+
+        首次调用时同步加载；之后检查间隔到期时在后台线程中 stat 目录文件并在变化时重建索引，
+        本次及后续搜索继续使用旧快照，直到新快照构建完成后替换。
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.reload()
+        if time.monotonic() < self._next_check:
+            return snapshot
+        if not self._reload_lock.acquire(blocking=False):
+            return snapshot
+        self._next_check = time.monotonic() + self.check_interval
+        try:
+            thread = threading.Thread(
+                target=self._refresh_in_background, name="prefab-catalog-reload", daemon=True
+            )
+            self._refresh_thread = thread
+            thread.start()
+        except Exception:
+            self._reload_lock.release()
+            raise
+        return snapshot
+
+    def _refresh_in_background(self) -> None:
+        """后台检查目录文件并在变化时替换快照（调用方已持有 _reload_lock，这里负责释放）"""
+        try:
+            file_version = self._file_version()
+            if file_version != self._snapshot.file_version:
+                self._snapshot = self._build_snapshot(file_version)
+        except Exception as e:
+            # 目录暂时不可读或内容不完整时保留旧快照，下个检查间隔再试
+            print(f"⚠️ 预制件目录重新加载失败，继续使用旧目录: {e}")
+        finally:
+            self._reload_lock.release()
+
+    def wait_for_reload(self, timeout: Optional[float] = None) -> bool:
+        """等待进行中的后台重新加载完成，返回是否已完成"""
+        thread = self._refresh_thread
+        if thread is None:
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
+
     def load_prefabs(self) -> List[Dict]:
         """
         加载预制件列表，支持缓存和热更新
@@ -42,19 +167,21 @@ class LocalPrefabSearcher:
         Returns:
             预制件列表
         """
-        if not self.prefabs_path.exists():
-            raise FileNotFoundError(f"Prefabs JSON not found: {self.prefabs_path}")
-        
-        # 检查文件是否被修改
-        current_mtime = self.prefabs_path.stat().st_mtime
-        
-        if self.prefabs_cache is None or current_mtime != self.last_modified:
-            # 重新加载
-            with open(self.prefabs_path, 'r', encoding='utf-8') as f:
-                self.prefabs_cache = json.load(f)
-            self.last_modified = current_mtime
-        
-        return self.prefabs_cache
+        return self.get_snapshot().prefabs
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取目录加载状态"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {"loaded": False, "path": str(self.prefabs_path)}
+        return {
+            "loaded": True,
+            "path": str(self.prefabs_path),
+            "prefabs": len(snapshot.prefabs),
+            "loaded_at": snapshot.loaded_at,
+            "load_time_ms": round(snapshot.load_time_ms, 1),
+            "check_interval_seconds": self.check_interval
+        }
     
     def search(
         self, 
@@ -64,81 +191,19 @@ class LocalPrefabSearcher:
         limit: int = 20
     ) -> List[Dict]:
         """
-        执行模糊搜索
+        执行关键词搜索
         
         Args:
-            query: 搜索关键词（会在 name 和 description 中搜索）
-            tags: 标签过滤（可选）
+            query: 搜索关键词（在 name、tags、id 和 description 中检索，多个词按相关度排序）
+            tags: 标签过滤（可选，至少匹配一个）
             author: 作者过滤（可选）
             limit: 返回结果数量限制
             
         Returns:
-            匹配的预制件列表
-        """
-        prefabs = self.load_prefabs()
-        
-        # 如果没有任何过滤条件，返回所有预制件（限制数量）
-        if not query and not tags and not author:
-            return prefabs[:limit]
-        
-        matched_prefabs = []
-        
-        for prefab in prefabs:
-            # 检查是否匹配
-            if self._is_match(prefab, query, tags, author):
-                matched_prefabs.append(prefab)
-        
-        # 限制返回数量
-        return matched_prefabs[:limit]
-    
-    def _is_match(
-        self, 
-        prefab: Dict, 
-        query: str = None, 
-        tags: List[str] = None,
-        author: str = None
-    ) -> bool:
-        """
-        检查预制件是否匹配搜索条件
-        
-        Args:
-            prefab: 预制件对象
-            query: 搜索关键词
-            tags: 标签过滤
-            author: 作者过滤
-            
-        Returns:
-            是否匹配
+            匹配的预制件列表（有关键词时按相关度排序，否则按目录顺序）
         """
-        # 作者过滤
-        if author and prefab.get("author", "").lower() != author.lower():
-            return False
-        
-        # 标签过滤
-        if tags:
-            prefab_tags = [t.lower() for t in prefab.get("tags", [])]
-            # 至少匹配一个标签
-            if not any(tag.lower() in prefab_tags for tag in tags):
-                return False
-        
-        # 关键词搜索
-        if query:
-            query_lower = query.lower()
-            name = prefab.get("name", "").lower()
-            description = prefab.get("description", "").lower()
-            prefab_id = prefab.get("id", "").lower()
-            prefab_tags = " ".join(prefab.get("tags", [])).lower()
-            
-            # 在任何字段中找到关键词即匹配
-            if (query_lower in name or 
-                query_lower in description or 
-                query_lower in prefab_id or
-                query_lower in prefab_tags):
-                return True
-            else:
-                return False
-        
-        return True
+        snapshot = self.get_snapshot()
+        return snapshot.index.search_prefabs(query=query, tags=tags, author=author, limit=limit)
 
 
 # 全局单例
@@ -149,7 +214,11 @@ def get_local_prefab_searcher() -> LocalPrefabSearcher:
     """获取全局单例的本地搜索器"""
     global _local_searcher_instance
     if _local_searcher_instance is None:
-        _local_searcher_instance = LocalPrefabSearcher()
+        from gtplanner.utils.config_manager import get_prefab_catalog_config
+        config = get_prefab_catalog_config()
+        _local_searcher_instance = LocalPrefabSearcher(
+            check_interval=float(config.get("check_interval_seconds", DEFAULT_CHECK_INTERVAL))
+        )
     return _local_searcher_instance
 
 
@@ -0,0 +1,76 @@
+"""
+对象池
+
+复用构建成本较高的流程（Flow）和节点（Node）对象图。
+
+PocketFlow 在每次运行时都会浅拷贝节点，节点本身只保存配置和客户端，
+运行期状态都放在 shared 字典中，因此同一个流程对象可以被反复使用。
+但 pocketflow_tracing 的 tracer 会把当前 trace 记录在流程实例上，
+所以并发运行需要各自持有一个实例：对象池按需创建，用完归还，
+进程内构建的实例数只取决于峰值并发数，而不是调用次数。
+"""
+
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class ObjectPool(Generic[T]):
+    """线程安全的对象池"""
+
+    def __init__(self, factory: Callable[[], T], max_idle: int = 16):
+        """
+        初始化对象池
+
+        Args:
+            factory: 创建新对象的工厂函数
+            max_idle: 最多保留的空闲对象数量
+        """
+        self.factory = factory
+        self.max_idle = max_idle
+        self._idle: Deque[T] = deque()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._reused = 0
+
+    def checkout(self) -> T:
+        """取出一个对象，没有空闲对象时创建新对象"""
+        with self._lock:
+            if self._idle:
+                self._reused += 1
+                return self._idle.pop()
+            self._created += 1
+        return self.factory()
+
+    def checkin(self, obj: T) -> None:
+        """归还对象"""
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(obj)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[T]:
+        """以异步上下文管理器的方式借用对象"""
+        obj = self.checkout()
+        try:
+            yield obj
+        finally:
+            self.checkin(obj)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取对象池统计信息"""
+        with self._lock:
+            return {
+                "created": self._created,
+                "reused": self._reused,
+                "idle": len(self._idle),
+                "max_idle": self.max_idle
+            }
+
+    def clear(self) -> None:
+        """清空空闲对象（配置变更后可调用，使后续调用重新构建）"""
+        with self._lock:
+            self._idle.clear()
@@ -0,0 +1,254 @@
+"""
+预制件网关元数据客户端
+
+list_prefab_functions / get_function_details 工具和设计流程中的 PrefabFunctionsDetailNode 共用：
+- 连接池：共享一个 httpx.AsyncClient（按事件循环创建，事件循环变化时重建）
+- 并发：所有请求经过同一个信号量，限制对网关的并发数
+- 缓存：按 (接口路径, 版本) 缓存响应。指定版本的预制件不可变，缓存到被 LRU 淘汰为止；
+  latest 在 latest_ttl 内直接命中，过期后带 If-None-Match / If-Modified-Since 发条件请求，304 时继续使用
+- 合并：相同键的并发请求只向网关发一次
+"""
+
+import asyncio
+import copy
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+
+@dataclass
+class _CacheEntry:
+    """缓存条目（value 只读，返回给调用方的是深拷贝）"""
+    value: Any
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+
+def _is_pinned(version: Optional[str]) -> bool:
+    """是否为具体版本号（不可变，可以永久缓存）"""
+    return bool(version) and version != "latest"
+
+
+class PrefabGatewayClient:
+    """预制件网关元数据客户端（共享连接池 + 元数据缓存 + 并发上限）"""
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 10.0,
+        max_concurrency: int = 8,
+        latest_ttl: float = 60.0,
+        max_entries: int = 1024,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """
+        初始化客户端
+
+        Args:
+            base_url: 网关地址
+            timeout: 单个请求超时时间（秒）
+            max_concurrency: 对网关的最大并发请求数（同时也是连接池大小）
+            latest_ttl: latest 版本的元数据在多少秒内不重新验证
+            max_entries: 缓存条目上限（LRU 淘汰）
+            transport: 自定义传输层（测试时注入）
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_concurrency = max(1, max_concurrency)
+        self.latest_ttl = latest_ttl
+        self.max_entries = max_entries
+        self._transport = transport
+
+        self._entries: "OrderedDict[Tuple[str, str], _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "revalidated": 0, "requests": 0}
+
+        # 以下对象绑定事件循环，首次使用或事件循环变化时创建
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    def _bind_loop(self) -> httpx.AsyncClient:
+        """获取当前事件循环上的连接池客户端"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+                transport=self._transport
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._inflight = {}
+        return self._client
+
+    def _lookup(self, key: Tuple[str, str], pinned: bool) -> Tuple[Optional[_CacheEntry], bool]:
+        """查找缓存，返回 (条目, 是否仍然新鲜)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None, False
+            self._entries.move_to_end(key)
+            if pinned or time.monotonic() - entry.fetched_at < self.latest_ttl:
+                self._stats["hits"] += 1
+                return entry, True
+            return entry, False
+
+    def _store(self, key: Tuple[str, str], entry: _CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def _get_json(self, path: str, version: Optional[str]) -> Any:
+        """带缓存、条件请求和请求合并的 GET"""
+        pinned = _is_pinned(version)
+        key = (path, version if pinned else "latest")
+
+        entry, fresh = self._lookup(key, pinned)
+        if fresh:
+            return copy.deepcopy(entry.value)
+
+        client = self._bind_loop()
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return copy.deepcopy(await asyncio.shield(pending))
+
+        future = self._loop.create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._fetch(client, key, path, version if pinned else None, entry)
+            future.set_result(value)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # 没有等待者时避免 "exception was never retrieved" 警告
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        return copy.deepcopy(value)
+
+    async def _fetch(self, client: httpx.AsyncClient, key: Tuple[str, str], path: str,
+                     version: Optional[str], stale: Optional[_CacheEntry]) -> Any:
+        """向网关发起请求（已缓存的 latest 条目发条件请求）"""
+        params = {"version": version} if version else {}
+        headers = {}
+        if stale is not None:
+            if stale.etag:
+                headers["If-None-Match"] = stale.etag
+            if stale.last_modified:
+                headers["If-Modified-Since"] = stale.last_modified
+
+        async with self._semaphore:
+            response = await client.get(path, params=params, headers=headers)
+        with self._lock:
+            self._stats["requests"] += 1
+
+        if response.status_code == 304 and stale is not None:
+            with self._lock:
+                self._stats["revalidated"] += 1
+            stale.fetched_at = time.monotonic()
+            self._store(key, stale)
+            return stale.value
+
+        response.raise_for_status()
+        value = response.json()
+        self._store(key, _CacheEntry(
+            value=value,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            fetched_at=time.monotonic()
+        ))
+        return value
+
+    async def list_functions(self, prefab_id: str, version: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取预制件的函数列表（失败时抛出 httpx.HTTPStatusError 等异常）"""
+        return await self._get_json(f"/v1/public/prefabs/{prefab_id}/functions", version)
+
+    async def get_function(self, prefab_id: str, function_name: str,
+                           version: Optional[str] = None) -> Dict[str, Any]:
+        """获取单个函数的详情（失败时抛出 httpx.HTTPStatusError 等异常）"""
+        return await self._get_json(f"/v1/public/prefabs/{prefab_id}/functions/{function_name}", version)
+
+    async def get_function_details(self, prefab_id: str, function_names: List[str],
+                                   version: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        批量获取函数详情
+
+        先请求一次函数列表：如果列表已经包含这些函数的参数定义，直接使用；
+        否则按函数并发请求详情。单个函数失败不影响其他函数。
+
+        Returns:
+            与 function_names 顺序一致的列表，每项为 {"name", "detail"} 或 {"name", "error"}
+        """
+        try:
+            listed = {
+                item["name"]: item for item in await self.list_functions(prefab_id, version)
+                if isinstance(item, dict) and "name" in item and "parameters" in item
+            }
+        except Exception:
+            listed = {}
+        if all(name in listed for name in function_names):
+            return [{"name": name, "detail": listed[name]} for name in function_names]
+
+        async def fetch(name: str) -> Dict[str, Any]:
+            try:
+                return {"name": name, "detail": await self.get_function(prefab_id, name, version)}
+            except Exception as e:
+                return {"name": name, "error": str(e)}
+
+        return list(await asyncio.gather(*(fetch(name) for name in function_names)))
+
+    def invalidate(self) -> None:
+        """清空元数据缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            **stats,
+            "entries": entries,
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+            "max_concurrency": self.max_concurrency
+        }
+
+
+# 全局单例
+_prefab_gateway_client_instance: Optional[PrefabGatewayClient] = None
+
+
+def get_prefab_gateway_client() -> Optional[PrefabGatewayClient]:
+    """获取全局共享的网关元数据客户端，未配置网关地址时返回 None（地址变化时重建）"""
+    global _prefab_gateway_client_instance
+    from gtplanner.utils.config_manager import get_prefab_gateway_config
+
+    config = get_prefab_gateway_config()
+    base_url = config.get("base_url")
+    if not base_url:
+        return None
+    if _prefab_gateway_client_instance is None or _prefab_gateway_client_instance.base_url != base_url.rstrip("/"):
+        _prefab_gateway_client_instance = PrefabGatewayClient(
+            base_url,
+            timeout=float(config.get("timeout", 10.0)),
+            max_concurrency=int(config.get("max_concurrency", 8)),
+            latest_ttl=float(config.get("latest_ttl_seconds", 60.0)),
+            max_entries=int(config.get("cache_max_entries", 1024))
+        )
+    return _prefab_gateway_client_instance
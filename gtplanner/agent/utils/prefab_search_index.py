@@ -0,0 +1,211 @@
+"""
+预制件倒排索引
+
+LocalPrefabSearcher 使用的内存检索引擎，在加载 community-prefabs.json 时一次性构建：
+- 分词：字母/数字（拉丁、西里尔等任意文字）按其他字符切分并转小写；中日韩文字按连续片段切为
+  二元组（bigram），文档额外索引单字，使单字查询也能命中
+- 打分：BM25F（name / tags / id / description 各自做长度归一化并加权后统一饱和），
+  每个(词, 文档)的贡献（含idf）在构建时算好，查询时只需按文档累加
+- 过滤：标签和作者各自维护倒排表，过滤条件先求出候选文档集合
+- 排序：堆选出 top-k，分数相同时按目录中的原始顺序
+
+索引构建后不再修改，目录文件变化时整体重建一个新索引替换旧的。
+"""
+
+import heapq
+import math
+import operator
+import re
+from array import array
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# 字段权重（名称最重要，其次是标签和ID）
+FIELD_BOOSTS = {
+    "name": 3.0,
+    "tags": 2.5,
+    "id": 2.0,
+    "description": 1.0,
+}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 中日韩文字（假名、汉字、谚文）
+_CJK_CHARS = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+
+# 连续的中日韩文字（第1组） 或 其他文字的单词/数字
+_TOKEN_PATTERN = re.compile(rf"([{_CJK_CHARS}]+)|[^\W_{_CJK_CHARS}]+")
+
+
+def tokenize(text: str, cjk_unigrams: bool = False) -> List[str]:
+    """
+    将文本切分为检索词
+
+    Args:
+        text: 待切分文本
+        cjk_unigrams: 是否同时输出中日韩单字（建索引时开启，查询时只用二元组以减少噪声）
+
+    Returns:
+        检索词列表（保留重复，用于计算词频）
+    """
+    if not text:
+        return []
+
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text.lower()):
+        piece = match.group()
+        if match.group(1) is None or len(piece) == 1:
+            tokens.append(piece)
+        else:
+            tokens.extend(map(operator.add, piece, piece[1:]))
+            if cjk_unigrams:
+                tokens.extend(piece)
+    return tokens
+
+
+def _prefab_fields(prefab: Dict[str, Any]) -> Dict[str, str]:
+    """提取参与检索的字段文本"""
+    tags = prefab.get("tags") or []
+    return {
+        "name": prefab.get("name") or "",
+        "tags": " ".join(tag for tag in tags if isinstance(tag, str)),
+        "id": prefab.get("id") or "",
+        "description": prefab.get("description") or "",
+    }
+
+
+class PrefabSearchIndex:
+    """预制件倒排索引（构建后只读，可在多个线程间共享）"""
+
+    def __init__(self, prefabs: Sequence[Dict[str, Any]]):
+        """
+        构建索引
+
+        Args:
+            prefabs: 预制件列表，文档编号即列表下标
+        """
+        self.prefabs = prefabs
+        self.doc_count = len(prefabs)
+
+        fields = list(FIELD_BOOSTS)
+        field_lengths: Dict[str, List[int]] = {field: [] for field in fields}
+        doc_term_freqs: List[List[Counter]] = []
+        tag_postings: Dict[str, List[int]] = defaultdict(list)
+        author_postings: Dict[str, List[int]] = defaultdict(list)
+
+        for doc_id, prefab in enumerate(prefabs):
+            counters = []
+            for field, text in _prefab_fields(prefab).items():
+                tokens = tokenize(text, cjk_unigrams=True)
+                field_lengths[field].append(len(tokens))
+                counters.append(Counter(tokens))
+            doc_term_freqs.append(counters)
+
+            for tag in {t.lower() for t in prefab.get("tags") or [] if isinstance(t, str)}:
+                tag_postings[tag].append(doc_id)
+            author = prefab.get("author")
+            if isinstance(author, str) and author:
+                author_postings[author.lower()].append(doc_id)
+
+        avg_lengths = [
+            (sum(field_lengths[field]) / self.doc_count if self.doc_count else 0.0) or 1.0
+            for field in fields
+        ]
+        boosts = [FIELD_BOOSTS[field] for field in fields]
+
+        # 词 -> (文档编号列表, BM25F饱和后的词频列表)
+        postings: Dict[str, Tuple[List[int], List[float]]] = {}
+        for doc_id, counters in enumerate(doc_term_freqs):
+            weighted_tf: Dict[str, float] = {}
+            for i, counter in enumerate(counters):
+                if not counter:
+                    continue
+                scale = boosts[i] / (1 - BM25_B + BM25_B * field_lengths[fields[i]][doc_id] / avg_lengths[i])
+                for term, tf in counter.items():
+                    weighted_tf[term] = weighted_tf.get(term, 0.0) + scale * tf
+            for term, tf in weighted_tf.items():
+                entry = postings.get(term)
+                if entry is None:
+                    entry = postings[term] = ([], [])
+                entry[0].append(doc_id)
+                entry[1].append(tf * (BM25_K1 + 1) / (tf + BM25_K1))
+
+        # 权重乘以idf后压缩为定长数组
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        for term, (doc_ids, weights) in postings.items():
+            idf = math.log(1 + (self.doc_count - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            self._postings[term] = (array("I", doc_ids), array("f", [idf * w for w in weights]))
+        self._tag_postings = {tag: frozenset(docs) for tag, docs in tag_postings.items()}
+        self._author_postings = {author: frozenset(docs) for author, docs in author_postings.items()}
+
+    def _filter_candidates(self, tags: Optional[Iterable[str]],
+                           author: Optional[str]) -> Optional[Set[int]]:
+        """根据标签（任一匹配）和作者过滤出候选文档，无过滤条件时返回None"""
+        candidates: Optional[Set[int]] = None
+        if author:
+            candidates = set(self._author_postings.get(author.lower(), ()))
+        if tags:
+            tagged = set()
+            for tag in tags:
+                tagged.update(self._tag_postings.get(tag.lower(), ()))
+            candidates = tagged if candidates is None else candidates & tagged
+        return candidates
+
+    def search(self, query: Optional[str] = None, tags: Optional[Iterable[str]] = None,
+               author: Optional[str] = None, limit: int = 20) -> List[Tuple[int, float]]:
+        """
+        检索预制件
+
+        Args:
+            query: 搜索关键词，多个词之间为“或”关系，按相关度排序
+            tags: 标签过滤（至少匹配一个）
+            author: 作者过滤
+            limit: 返回结果数量限制
+
+        Returns:
+            (文档编号, 分数) 列表；没有关键词时分数为0，按目录顺序返回；
+            关键词中没有可检索的词（如只有标点）时返回空列表
+        """
+        if limit <= 0:
+            return []
+
+        query = query.strip() if query else ""
+        terms = set(tokenize(query))
+        if query and not terms:
+            return []
+
+        candidates = self._filter_candidates(tags, author)
+        if not terms:
+            doc_ids = range(self.doc_count) if candidates is None else sorted(candidates)
+            return [(doc_id, 0.0) for doc_id in doc_ids[:limit]]
+
+        scores: Dict[int, float] = {}
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            if candidates is None:
+                matched = zip(*posting)
+            else:
+                matched = ((doc_id, weight) for doc_id, weight in zip(*posting) if doc_id in candidates)
+            for doc_id, weight in matched:
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(doc_id, score) for doc_id, score in top]
+
+    def search_prefabs(self, query: Optional[str] = None, tags: Optional[Iterable[str]] = None,
+                       author: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """检索并返回预制件对象列表"""
+        return [self.prefabs[doc_id] for doc_id, _ in self.search(query, tags, author, limit)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取索引统计信息"""
+        return {
+            "documents": self.doc_count,
+            "terms": len(self._postings),
+            "postings": sum(len(docs) for docs, _ in self._postings.values()),
+            "tags": len(self._tag_postings),
+            "authors": len(self._author_postings),
+        }
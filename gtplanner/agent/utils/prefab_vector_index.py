@@ -0,0 +1,512 @@
+"""
+预制件本地向量索引
+
+外部向量服务的进程内替代：不可用或未配置时，NodePrefabRecommend 直接在本地做向量检索，
+每次查询也省去一次网络往返。
+
+- 嵌入：默认使用本地哈希嵌入（特征哈希，无需模型和网络）；也可以传入任何提供
+  name / dimension / embed(texts) 的嵌入器，但构建和查询必须使用同一个嵌入器
+- 存储：向量以 float16 或 int8（每行一个缩放系数）写入 .bin 文件，元数据、文档和ID映射
+  写入同名 .json 文件；加载时对 .bin 做内存映射，不把整个矩阵读入内存
+- 检索：安装了NumPy时分块做批量点积并用 argpartition 取 top-k；目录较大时可以在构建时
+  做IVF分区（球面k-means），查询只扫描最相近的几个分区。未安装NumPy时退化为纯Python暴力检索
+
+本模块只依赖标准库（NumPy可选），prefabs/releases/scripts/build_index.py 按文件路径加载它，
+不会导入 gtplanner 包，因此需要兼容CI使用的 Python 3.10。
+"""
+
+import hashlib
+import heapq
+import json
+import math
+import mmap
+import operator
+import re
+import struct
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+FORMAT_VERSION = 1
+DEFAULT_DIMENSION = 256
+# 文档数达到该值且安装了NumPy时，构建默认做IVF分区
+PARTITION_THRESHOLD = 20000
+# NumPy分块计算时每块的行数（float16/int8按块转换为float32，避免整个矩阵常驻内存）
+CHUNK_ROWS = 16384
+
+_DTYPE_SIZES = {"float16": 2, "int8": 1}
+_ALIGNMENT = 64
+
+# 英文单词/数字 或 连续的中日韩文字（与 prefab_search_index 的分词一致）
+_TOKEN_PATTERN = re.compile(
+    r"[a-z0-9]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+"
+)
+
+
+class HashingEmbedder:
+    """
+    本地哈希嵌入
+
+    英文单词（以及长单词的4字母前缀）、中日韩二元组和单字经特征哈希映射到固定维度，
+    词频做对数缩放后L2归一化。只依赖标准库，构建脚本和运行时得到完全相同的向量。
+    """
+
+    name = "hashing-v1"
+
+    def __init__(self, dimension: int = DEFAULT_DIMENSION):
+        self.dimension = dimension
+
+    @staticmethod
+    def _features(text: str) -> Counter:
+        features: Counter = Counter()
+        for piece in _TOKEN_PATTERN.findall((text or "").lower()):
+            if piece[0] < "\u3040":
+                features[piece] += 1.0
+                if len(piece) >= 6:
+                    features[piece[:4] + "*"] += 0.5
+            else:
+                for bigram in map(operator.add, piece, piece[1:]):
+                    features[bigram] += 1.0
+                for char in piece:
+                    features[char] += 0.5
+        return features
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """将文本列表转换为归一化向量列表"""
+        vectors = []
+        for text in texts:
+            vector = [0.0] * self.dimension
+            for feature, count in self._features(text).items():
+                digest = zlib.crc32(feature.encode("utf-8"))
+                weight = 1.0 + math.log(count) if count >= 1 else count
+                vector[digest % self.dimension] += weight if digest & 0x80000000 else -weight
+            norm = math.sqrt(sum(v * v for v in vector))
+            vectors.append([v / norm for v in vector] if norm else vector)
+        return vectors
+
+    def describe(self) -> Dict[str, Any]:
+        return {"name": self.name, "dimension": self.dimension}
+
+
+def prefab_to_document(prefab: Dict[str, Any]) -> Dict[str, Any]:
+    """将 community-prefabs.json 中的预制件转换为检索结果文档（字段与向量服务的文档一致）"""
+    tags = prefab.get("tags") or []
+    tags_str = ", ".join(tags)
+    combined_text = f"{prefab.get('name', '')} {prefab.get('description', '')}"
+    if tags_str:
+        combined_text += f" {tags_str}"
+
+    repo_url = (prefab.get("repo_url") or "").rstrip("/")
+    version = prefab.get("version", "")
+    return {
+        "id": prefab["id"],
+        "type": "PREFAB",
+        "summary": prefab.get("name", ""),
+        "description": prefab.get("description", ""),
+        "tags": tags_str,
+        "combined_text": combined_text,
+        "version": version,
+        "author": prefab.get("author", ""),
+        "repo_url": prefab.get("repo_url", ""),
+        "artifact_url": f"{repo_url}/releases/download/v{version}/{prefab['id']}-{version}.whl" if repo_url else "",
+    }
+
+
+def catalog_fingerprint(catalog_path: Union[str, Path]) -> str:
+    """目录文件内容的指纹，用于判断向量文件是否过期"""
+    return hashlib.sha256(Path(catalog_path).read_bytes()).hexdigest()
+
+
+def default_index_path(catalog_path: Union[str, Path]) -> Path:
+    """目录文件对应的向量索引元数据路径（.bin 与其同名）"""
+    catalog_path = Path(catalog_path)
+    return catalog_path.with_name(f"{catalog_path.stem}.vectors.json")
+
+
+def _pad(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def _quantize_int8(vector: Sequence[float]) -> Tuple[List[int], float]:
+    peak = max((abs(v) for v in vector), default=0.0)
+    if not peak:
+        return [0] * len(vector), 0.0
+    scale = peak / 127.0
+    return [int(round(v / scale)) for v in vector], scale
+
+
+def _kmeans_partitions(matrix, partitions: int, iterations: int = 8, seed: int = 13):
+    """
+    球面k-means（需要NumPy）
+
+    Returns:
+        (质心矩阵, 每行所属分区)
+    """
+    rng = np.random.default_rng(seed)
+    count = matrix.shape[0]
+    sample_size = min(count, partitions * 64)
+    sample = matrix[rng.choice(count, sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, partitions, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for partition in range(partitions):
+            members = sample[assignment == partition]
+            if len(members):
+                centroids[partition] = members.sum(axis=0)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        centroids /= np.where(norms == 0, 1, norms)
+
+    assignment = np.concatenate([
+        np.argmax(matrix[start:start + CHUNK_ROWS] @ centroids.T, axis=1)
+        for start in range(0, count, CHUNK_ROWS)
+    ])
+    return centroids.astype("<f4"), assignment
+
+
+class PrefabVectorIndex:
+    """预制件向量索引（只读，可在多个线程间共享）"""
+
+    def __init__(self, documents: List[Dict[str, Any]], embedder, vectors, dtype: str = "float16",
+                 scales=None, centroids=None, list_offsets: Optional[List[int]] = None,
+                 metadata: Optional[Dict[str, Any]] = None, buffer=None):
+        """
+        一般不直接构造，使用 build() 或 load()
+
+        Args:
+            documents: 文档列表，顺序与向量行一致
+            embedder: 嵌入器
+            vectors: 向量矩阵（NumPy数组或纯Python的行列表）
+            dtype: 存储精度 float16 / int8
+            scales: int8存储时每行的缩放系数
+            centroids: IVF分区质心
+            list_offsets: 各分区在矩阵中的起止行
+            metadata: 元数据（构建参数、目录指纹等）
+            buffer: 内存映射对象（保持引用直到索引释放）
+        """
+        self.documents = documents
+        self.ids = [document["id"] for document in documents]
+        self.embedder = embedder
+        self.dimension = embedder.dimension
+        self.dtype = dtype
+        self.metadata = metadata or {}
+        self._vectors = vectors
+        self._scales = scales
+        self._centroids = centroids
+        self._list_offsets = list_offsets
+        self._buffer = buffer
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @property
+    def partitions(self) -> int:
+        return len(self._list_offsets) - 1 if self._list_offsets else 0
+
+    # ==================== 构建与存储 ====================
+
+    @classmethod
+    def build(cls, documents: List[Dict[str, Any]], embedder=None, dtype: str = "float16",
+              partitions: Union[int, str] = "auto", text_field: str = "combined_text",
+              catalog_sha256: Optional[str] = None) -> "PrefabVectorIndex":
+        """
+        对文档做嵌入并构建索引
+
+        Args:
+            documents: 文档列表
+            embedder: 嵌入器，默认为本地哈希嵌入
+            dtype: 存储精度 float16 / int8
+            partitions: IVF分区数；auto表示文档数达到 PARTITION_THRESHOLD 时取 sqrt(n)；0表示不分区
+            text_field: 用于嵌入的文档字段
+            catalog_sha256: 目录文件指纹（写入元数据）
+        """
+        if dtype not in _DTYPE_SIZES:
+            raise ValueError(f"不支持的向量存储精度: {dtype}")
+        embedder = embedder or HashingEmbedder()
+        rows = embedder.embed([document.get(text_field) or "" for document in documents])
+
+        if partitions == "auto":
+            large = len(documents) >= PARTITION_THRESHOLD and NUMPY_AVAILABLE
+            partitions = int(math.sqrt(len(documents))) if large else 0
+        partitions = min(int(partitions), len(documents))
+        if partitions and not NUMPY_AVAILABLE:
+            raise ImportError("构建IVF分区需要安装 numpy")
+
+        centroids = list_offsets = None
+        if partitions:
+            matrix = np.asarray(rows, dtype=np.float32)
+            centroids, assignment = _kmeans_partitions(matrix, partitions)
+            order = np.argsort(assignment, kind="stable")
+            documents = [documents[i] for i in order]
+            rows = matrix[order]
+            counts = np.bincount(assignment, minlength=partitions)
+            list_offsets = [0] + np.cumsum(counts).tolist()
+
+        # 按存储精度量化，使内存中的检索结果与写入文件后加载的一致
+        scales = None
+        if dtype == "int8":
+            quantized = [_quantize_int8(row) for row in rows]
+            rows = [row for row, _ in quantized]
+            scales = [scale for _, scale in quantized]
+        if NUMPY_AVAILABLE:
+            vectors = np.asarray(rows, dtype="<f2" if dtype == "float16" else "i1")
+            scales = np.asarray(scales, dtype="<f4") if scales is not None else None
+        else:
+            if dtype == "float16":
+                packer = struct.Struct(f"<{embedder.dimension}e")
+                rows = [packer.unpack(packer.pack(*row)) for row in rows]
+            vectors = [list(row) for row in rows]
+
+        metadata = {
+            "embedder": embedder.describe(),
+            "catalog_sha256": catalog_sha256,
+        }
+        return cls(documents, embedder, vectors, dtype, scales, centroids, list_offsets, metadata)
+
+    def save(self, index_path: Union[str, Path]) -> Path:
+        """
+        写入索引文件
+
+        Args:
+            index_path: 元数据JSON路径，向量写入同名 .bin 文件
+
+        Returns:
+            .bin 文件路径
+        """
+        index_path = Path(index_path)
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        bin_path = index_path.with_suffix(".bin")
+        count, dimension = len(self.documents), self.dimension
+
+        offsets = {"vectors": 0}
+        position = _pad(count * dimension * _DTYPE_SIZES[self.dtype])
+        if self.dtype == "int8":
+            offsets["scales"] = position
+            position = _pad(position + count * 4)
+        if self._centroids is not None:
+            offsets["centroids"] = position
+
+        with open(bin_path, "wb") as f:
+            f.write(self._pack_vectors())
+            if "scales" in offsets:
+                f.write(b"\0" * (offsets["scales"] - f.tell()))
+                f.write(struct.pack(f"<{count}f", *[float(s) for s in self._scales]))
+            if "centroids" in offsets:
+                f.write(b"\0" * (offsets["centroids"] - f.tell()))
+                f.write(np.ascontiguousarray(self._centroids, dtype="<f4").tobytes())
+
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "count": count,
+            "dimension": dimension,
+            "dtype": self.dtype,
+            "offsets": offsets,
+            "list_offsets": self._list_offsets,
+            **self.metadata,
+            "ids": self.ids,
+            "documents": self.documents,
+        }
+        index_path.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        return bin_path
+
+    def _pack_vectors(self) -> bytes:
+        if NUMPY_AVAILABLE:
+            return np.ascontiguousarray(self._vectors).tobytes()
+        code = "e" if self.dtype == "float16" else "b"
+        packer = struct.Struct(f"<{self.dimension}{code}")
+        return b"".join(packer.pack(*row) for row in self._vectors)
+
+    @classmethod
+    def load(cls, index_path: Union[str, Path], embedder=None) -> "PrefabVectorIndex":
+        """
+        加载索引文件（向量内存映射）
+
+        Args:
+            index_path: 元数据JSON路径
+            embedder: 嵌入器，默认按元数据创建本地哈希嵌入
+
+        Raises:
+            ValueError: 文件格式或嵌入器与索引不匹配
+        """
+        index_path = Path(index_path)
+        meta = json.loads(index_path.read_text(encoding="utf-8"))
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"不支持的向量索引格式版本: {meta.get('format_version')}")
+
+        described = meta["embedder"]
+        if embedder is None:
+            if described["name"] != HashingEmbedder.name:
+                raise ValueError(f"索引使用嵌入器 {described['name']} 构建，需要显式传入同一个嵌入器")
+            embedder = HashingEmbedder(described["dimension"])
+        if embedder.describe() != described:
+            raise ValueError(f"嵌入器不匹配: 索引为 {described}，当前为 {embedder.describe()}")
+
+        count, dimension, dtype = meta["count"], meta["dimension"], meta["dtype"]
+        offsets = meta["offsets"]
+        scales = centroids = None
+
+        with open(index_path.with_suffix(".bin"), "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if count else b""
+
+        if NUMPY_AVAILABLE:
+            vectors = np.frombuffer(buffer, dtype="<f2" if dtype == "float16" else "i1",
+                                    count=count * dimension, offset=offsets["vectors"]).reshape(count, dimension)
+            if "scales" in offsets:
+                scales = np.frombuffer(buffer, dtype="<f4", count=count, offset=offsets["scales"])
+            if "centroids" in offsets:
+                partitions = len(meta["list_offsets"]) - 1
+                centroids = np.frombuffer(buffer, dtype="<f4", count=partitions * dimension,
+                                          offset=offsets["centroids"]).reshape(partitions, dimension)
+        else:
+            code = "e" if dtype == "float16" else "b"
+            unpacker = struct.Struct(f"<{dimension}{code}")
+            vectors = [list(unpacker.unpack_from(buffer, offsets["vectors"] + i * unpacker.size))
+                       for i in range(count)]
+            if "scales" in offsets:
+                scales = list(struct.unpack_from(f"<{count}f", buffer, offsets["scales"]))
+            if count:
+                buffer.close()
+            buffer = None
+
+        metadata = {key: meta.get(key) for key in ("embedder", "catalog_sha256")}
+        return cls(meta["documents"], embedder, vectors, dtype, scales, centroids,
+                   meta.get("list_offsets"), metadata, buffer)
+
+    # ==================== 检索 ====================
+
+    def search(self, query: str, top_k: int = 10, nprobe: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        检索与查询最相似的文档
+
+        Args:
+            query: 查询文本
+            top_k: 返回数量
+            nprobe: 有IVF分区时扫描的分区数，默认为分区数的1/8（至少4个）
+
+        Returns:
+            (行号, 余弦相似度) 列表，按相似度降序
+        """
+        return self.search_batch([query], top_k, nprobe)[0]
+
+    def search_batch(self, queries: Sequence[str], top_k: int = 10,
+                     nprobe: Optional[int] = None) -> List[List[Tuple[int, float]]]:
+        """批量检索，多个查询共享一次矩阵扫描"""
+        if not queries:
+            return []
+        if not self.documents or top_k <= 0:
+            return [[] for _ in queries]
+        query_vectors = self.embedder.embed(list(queries))
+
+        if not NUMPY_AVAILABLE:
+            return [self._search_python(vector, top_k) for vector in query_vectors]
+
+        query_matrix = np.asarray(query_vectors, dtype=np.float32)
+        if self._centroids is not None and self.partitions > 1:
+            return [self._search_partitions(vector, top_k, nprobe) for vector in query_matrix]
+        scores = self._score_rows(query_matrix, 0, len(self.documents))
+        return [self._top_k(row_scores, top_k) for row_scores in scores]
+
+    def search_documents(self, query: str, top_k: int = 10,
+                         nprobe: Optional[int] = None) -> Dict[str, Any]:
+        """检索并返回与向量服务 /search 接口相同格式的结果"""
+        results = [
+            {"document": dict(self.documents[row]), "score": score}
+            for row, score in self.search(query, top_k, nprobe)
+        ]
+        return {"results": results, "total": len(results)}
+
+    def _score_rows(self, query_matrix, start: int, end: int):
+        """计算查询矩阵与 [start, end) 行的相似度，返回 (查询数, 行数) 的矩阵"""
+        scores = np.empty((query_matrix.shape[0], end - start), dtype=np.float32)
+        for chunk_start in range(start, end, CHUNK_ROWS):
+            chunk_end = min(chunk_start + CHUNK_ROWS, end)
+            chunk = self._vectors[chunk_start:chunk_end].astype(np.float32)
+            chunk_scores = query_matrix @ chunk.T
+            if self._scales is not None:
+                chunk_scores *= self._scales[chunk_start:chunk_end]
+            scores[:, chunk_start - start:chunk_end - start] = chunk_scores
+        return scores
+
+    @staticmethod
+    def _top_k(scores, top_k: int, base: int = 0) -> List[Tuple[int, float]]:
+        if top_k < len(scores):
+            candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(len(scores))
+        ordered = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return [(int(row) + base, float(scores[row])) for row in ordered]
+
+    def _search_partitions(self, query_vector, top_k: int, nprobe: Optional[int]) -> List[Tuple[int, float]]:
+        nprobe = min(self.partitions, nprobe or max(4, self.partitions // 8))
+        probe = np.argsort(-(self._centroids @ query_vector))[:nprobe]
+
+        results: List[Tuple[int, float]] = []
+        for partition in probe:
+            start, end = self._list_offsets[partition], self._list_offsets[partition + 1]
+            if start < end:
+                scores = self._score_rows(query_vector[None, :], start, end)[0]
+                results.extend(self._top_k(scores, top_k, base=start))
+        return heapq.nlargest(top_k, results, key=lambda item: (item[1], -item[0]))
+
+    def _search_python(self, query_vector: List[float], top_k: int) -> List[Tuple[int, float]]:
+        scores = (sum(map(operator.mul, row, query_vector)) for row in self._vectors)
+        if self._scales is not None:
+            scores = (score * scale for score, scale in zip(scores, self._scales))
+        return heapq.nlargest(top_k, enumerate(scores), key=lambda item: (item[1], -item[0]))
+
+
+def load_or_build_index(catalog_path: Union[str, Path], index_path: Union[str, Path, None] = None,
+                        embedder=None) -> PrefabVectorIndex:
+    """
+    加载目录对应的向量索引文件；文件不存在或与目录内容不一致时，直接从目录在内存中构建
+
+    Args:
+        catalog_path: community-prefabs.json 路径
+        index_path: 向量索引元数据路径，默认为目录旁的 <stem>.vectors.json
+        embedder: 嵌入器，默认为本地哈希嵌入
+    """
+    catalog_path = Path(catalog_path)
+    index_path = Path(index_path) if index_path else default_index_path(catalog_path)
+    fingerprint = catalog_fingerprint(catalog_path)
+
+    if index_path.exists():
+        index = PrefabVectorIndex.load(index_path, embedder)
+        if index.metadata.get("catalog_sha256") == fingerprint:
+            return index
+
+    prefabs = json.loads(catalog_path.read_text(encoding="utf-8"))
+    documents = [prefab_to_document(prefab) for prefab in prefabs]
+    return PrefabVectorIndex.build(documents, embedder, catalog_sha256=fingerprint)
+
+
+class LocalVectorIndexLoader:
+    """按目录文件修改时间缓存向量索引（文件变化后下次访问时重新加载）"""
+
+    def __init__(self, catalog_path: Union[str, Path], index_path: Union[str, Path, None] = None):
+        self.catalog_path = Path(catalog_path)
+        self.index_path = Path(index_path) if index_path else default_index_path(self.catalog_path)
+        self._index: Optional[PrefabVectorIndex] = None
+        self._mtimes: Optional[Tuple[float, float]] = None
+
+    def available(self) -> bool:
+        return self.catalog_path.exists()
+
+    def get(self) -> PrefabVectorIndex:
+        """获取当前索引"""
+        mtimes = (
+            self.catalog_path.stat().st_mtime,
+            self.index_path.stat().st_mtime if self.index_path.exists() else 0.0,
+        )
+        if self._index is None or mtimes != self._mtimes:
+            self._index = load_or_build_index(self.catalog_path, self.index_path)
+            self._mtimes = mtimes
+        return self._index
+
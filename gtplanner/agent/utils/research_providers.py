@@ -0,0 +1,264 @@
+"""
+调研数据源（搜索 / 网页转 Markdown）
+
+NodeSearch 和 NodeURL 通过这里的工厂函数获取数据源，不直接依赖 Jina：
+- jina：JinaSearchClient / JinaWebClient（需要 JINA_API_KEY）
+- local：LocalCorpusProvider，从磁盘上的语料文件提供搜索和页面内容，并按对数正态分布注入延迟，
+  用于离线对调研流程（ConcurrentResearchNode / ResearchFlow）做端到端基准和压测
+
+配置见 settings.toml 的 [default.research]。
+"""
+
+import asyncio
+import json
+import math
+import random
+from abc import ABC, abstractmethod
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from gtplanner.agent.utils.prefab_search_index import tokenize
+
+
+class SearchProvider(ABC):
+    """搜索数据源"""
+
+    # 连续搜索多个关键词时，两次请求之间的最小间隔（秒）
+    request_interval: float = 0.0
+
+    @abstractmethod
+    async def search_simple(self, query: str, count: int = 5) -> List[Dict[str, str]]:
+        """
+        搜索
+
+        Returns:
+            包含title、url、description、content的结果列表
+        """
+
+
+class FetchProvider(ABC):
+    """网页内容数据源（URL 转 Markdown）"""
+
+    @abstractmethod
+    async def get_page_info(self, url: str, **kwargs) -> Dict[str, str]:
+        """
+        获取页面内容
+
+        Returns:
+            包含title、description、url、content的字典
+        """
+
+
+class LocalCorpusProvider(SearchProvider, FetchProvider):
+    """
+    本地语料数据源
+
+    语料文件为 JSON 数组或 JSONL，每条记录包含 url、title、description、content。
+    搜索按查询词在标题（权重3）、描述（权重2）和正文（权重1）中的词频打分；
+    页面按 url 精确查找，不存在时与远程服务一样抛出异常。
+
+    每次调用的延迟 = 中位数 * exp(sigma * N(0, 1))，上限为中位数的 10 倍；
+    failure_rate 用于模拟远程服务偶发失败。
+    """
+
+    def __init__(
+        self,
+        corpus_path: Union[str, Path],
+        search_latency_ms: float = 0.0,
+        fetch_latency_ms: float = 0.0,
+        latency_sigma: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        初始化本地语料数据源
+
+        Args:
+            corpus_path: 语料文件路径（.json 或 .jsonl）
+            search_latency_ms: 搜索延迟中位数（毫秒）
+            fetch_latency_ms: 获取页面延迟中位数（毫秒）
+            latency_sigma: 延迟的对数标准差（0 表示固定延迟）
+            failure_rate: 每次调用失败的概率
+            seed: 随机种子（用于可重复的基准）
+        """
+        self.corpus_path = Path(corpus_path)
+        self.search_latency_ms = search_latency_ms
+        self.fetch_latency_ms = fetch_latency_ms
+        self.latency_sigma = latency_sigma
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+
+        self.documents = self._load_corpus(self.corpus_path)
+        self._pages = {self._normalize_url(doc["url"]): doc for doc in self.documents}
+        self._term_counts = [
+            (Counter(tokenize(doc["title"])), Counter(tokenize(doc["description"])),
+             Counter(tokenize(doc["content"])))
+            for doc in self.documents
+        ]
+
+    @staticmethod
+    def _load_corpus(path: Path) -> List[Dict[str, str]]:
+        """读取语料文件"""
+        if not path.exists():
+            raise FileNotFoundError(f"Research corpus not found: {path}")
+        text = path.read_text(encoding="utf-8")
+        if path.suffix == ".jsonl":
+            records = [json.loads(line) for line in text.splitlines() if line.strip()]
+        else:
+            records = json.loads(text)
+
+        documents = []
+        for record in records:
+            if not record.get("url"):
+                continue
+            documents.append({
+                "url": record["url"],
+                "title": record.get("title", ""),
+                "description": record.get("description", ""),
+                "content": record.get("content", "")
+            })
+        return documents
+
+    @staticmethod
+    def _normalize_url(url: str) -> str:
+        return url.strip().rstrip("/")
+
+    async def _simulate(self, median_ms: float, operation: str) -> None:
+        """注入延迟和失败"""
+        if median_ms > 0:
+            factor = math.exp(self.latency_sigma * self._random.gauss(0.0, 1.0)) if self.latency_sigma else 1.0
+            await asyncio.sleep(median_ms * min(factor, 10.0) / 1000)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise Exception(f"本地语料模拟{operation}失败")
+
+    def _score(self, query_terms: List[str], counts: Tuple[Counter, Counter, Counter]) -> int:
+        title, description, content = counts
+        return sum(3 * title[term] + 2 * description[term] + content[term] for term in query_terms)
+
+    async def search_simple(self, query: str, count: int = 5) -> List[Dict[str, str]]:
+        """搜索语料（结果不含正文，与 Jina 的 no-content 模式一致）"""
+        await self._simulate(self.search_latency_ms, "搜索")
+
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        scored = [
+            (score, position)
+            for position, counts in enumerate(self._term_counts)
+            if (score := self._score(query_terms, counts)) > 0
+        ]
+        scored.sort(key=lambda item: (-item[0], item[1]))
+
+        return [
+            {
+                "title": self.documents[position]["title"],
+                "url": self.documents[position]["url"],
+                "description": self.documents[position]["description"],
+                "content": ""
+            }
+            for _, position in scored[:count]
+        ]
+
+    async def get_page_info(self, url: str, **kwargs) -> Dict[str, str]:
+        """按 url 获取语料中的页面"""
+        await self._simulate(self.fetch_latency_ms, "获取页面")
+
+        document = self._pages.get(self._normalize_url(url))
+        if document is None:
+            raise Exception(f"获取页面信息失败: 404 Not Found ({url})")
+        return dict(document)
+
+
+# 本地语料数据源（按配置缓存，配置变化时重建）
+_local_provider: Optional[LocalCorpusProvider] = None
+_local_provider_key: Optional[Tuple] = None
+
+
+def _get_local_provider(config: Dict[str, Any]) -> LocalCorpusProvider:
+    """获取本地语料数据源"""
+    global _local_provider, _local_provider_key
+
+    corpus_path = config.get("local_corpus_path")
+    if not corpus_path:
+        raise ValueError("本地调研语料未配置，请设置 GTPLANNER_RESEARCH_CORPUS_PATH 或 research.local_corpus_path")
+
+    key = (
+        str(corpus_path),
+        float(config.get("local_search_latency_ms", 0)),
+        float(config.get("local_fetch_latency_ms", 0)),
+        float(config.get("local_latency_sigma", 0)),
+        float(config.get("local_failure_rate", 0)),
+        config.get("local_seed")
+    )
+    if _local_provider is None or key != _local_provider_key:
+        try:
+            provider = LocalCorpusProvider(
+                corpus_path,
+                search_latency_ms=key[1],
+                fetch_latency_ms=key[2],
+                latency_sigma=key[3],
+                failure_rate=key[4],
+                seed=key[5]
+            )
+        except (OSError, json.JSONDecodeError) as e:
+            raise ValueError(f"本地调研语料加载失败: {e}")
+        _local_provider, _local_provider_key = provider, key
+    return _local_provider
+
+
+def get_search_provider() -> SearchProvider:
+    """
+    获取当前配置的搜索数据源
+
+    Raises:
+        ValueError: 数据源不可用时抛出（未配置 JINA_API_KEY 或本地语料）
+    """
+    from gtplanner.utils.config_manager import get_research_config
+
+    config = get_research_config()
+    if config["provider"] == "local":
+        return _get_local_provider(config)
+
+    from gtplanner.agent.utils.search import get_jina_search_client
+    return get_jina_search_client()
+
+
+def get_fetch_provider() -> FetchProvider:
+    """
+    获取当前配置的网页内容数据源
+
+    Raises:
+        ValueError: 数据源不可用时抛出（未配置 JINA_API_KEY 或本地语料）
+    """
+    from gtplanner.utils.config_manager import get_research_config
+
+    config = get_research_config()
+    if config["provider"] == "local":
+        return _get_local_provider(config)
+
+    from gtplanner.agent.utils.URL_to_Markdown import get_jina_web_client
+    return get_jina_web_client()
+
+
+def get_research_unavailable_reason() -> Optional[str]:
+    """
+    检查调研数据源是否可用
+
+    Returns:
+        可用时返回 None，否则返回原因（missing_jina_api_key / missing_local_corpus）
+    """
+    from gtplanner.utils.config_manager import get_research_config, get_jina_api_key
+
+    config = get_research_config()
+    if config["provider"] == "local":
+        try:
+            _get_local_provider(config)
+        except ValueError:
+            return "missing_local_corpus"
+        return None
+
+    import os
+    jina_api_key = get_jina_api_key() or os.getenv("JINA_API_KEY")
+    # 确保API密钥不为空且不是占位符
+    if not jina_api_key or not jina_api_key.strip() or jina_api_key.startswith("@format"):
+        return "missing_jina_api_key"
+    return None
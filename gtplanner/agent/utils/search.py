@@ -7,10 +7,15 @@ import aiohttp
 import asyncio
 from typing import Dict, List, Optional, Any
 from gtplanner.utils.config_manager import get_jina_api_key
+from gtplanner.agent.utils.research_providers import SearchProvider
+from gtplanner.agent.utils.web_cache import get_web_result_cache, normalize_query
 
 
-class JinaSearchClient:
+class JinaSearchClient(SearchProvider):
     """Jina 搜索引擎客户端"""
+
+    # 连续搜索多个关键词时避免请求过于频繁
+    request_interval = 0.5
     
     def __init__(
         self,
@@ -102,6 +107,8 @@ class JinaSearchClient:
         """
         简化的搜索接口，只返回基本信息 - 异步版本
 
+        结果按规范化后的查询词缓存到磁盘（见 web_cache），空结果不缓存。
+
         Args:
             query: 搜索查询字符串
             count: 返回结果数量
@@ -109,6 +116,19 @@ class JinaSearchClient:
         Returns:
             包含title、url、description的结果列表
         """
+        cache = get_web_result_cache()
+        if cache is None:
+            return await self._search_simple_uncached(query, count)
+
+        key = cache.make_key(normalize_query(query), count)
+        return await cache.get_or_fetch(
+            "jina_search", key,
+            lambda: self._search_simple_uncached(query, count),
+            should_cache=bool
+        )
+
+    async def _search_simple_uncached(self, query: str, count: int) -> List[Dict[str, str]]:
+        """调用搜索API并提取基本信息"""
         result = await self.search(query, count=count)
         
         if result.get("code") != 200:
@@ -188,3 +208,20 @@ class JinaSearchClient:
         return {
             "tokens": usage.get("tokens", 0)
         }
+
+
+# 全局共享客户端
+_jina_search_client: Optional[JinaSearchClient] = None
+
+
+def get_jina_search_client() -> JinaSearchClient:
+    """
+    获取全局共享的 Jina 搜索客户端
+
+    Raises:
+        ValueError: 未配置 API 密钥时抛出（与 JinaSearchClient 构造函数一致）
+    """
+    global _jina_search_client
+    if _jina_search_client is None:
+        _jina_search_client = JinaSearchClient()
+    return _jina_search_client
@@ -3,6 +3,7 @@
 
 负责在应用启动时进行必要的初始化工作，包括：
 - 工具索引预热
+- 本地预制件目录预加载
 - 系统状态检查
 - 配置验证
 
@@ -60,7 +61,14 @@ async def initialize_application(
         # 注意：预制件索引由 CI/CD 构建，不在启动时加载
         # 如需重建索引，请运行: python prefabs/releases/scripts/build_index.py
 
-        # 3. 其他初始化任务可以在这里添加
+        # 3. 预加载本地预制件目录（首次搜索不再承担 JSON 解析和建索引的开销）
+        catalog_result = await _warm_prefab_catalog(shared)
+        init_result["components"]["prefab_catalog"] = catalog_result
+
+        if not catalog_result["loaded"]:
+            init_result["errors"].append("本地预制件目录加载失败")
+
+        # 4. 其他初始化任务可以在这里添加
         
         # 判断整体初始化是否成功
         init_result["success"] = len(init_result["errors"]) == 0
@@ -191,6 +199,28 @@ async def _check_vector_service_config(shared: Dict[str, Any] = None) -> Dict[st
         }
 
 
+async def _warm_prefab_catalog(shared: Dict[str, Any] = None) -> Dict[str, Any]:
+    """预加载本地预制件目录并构建关键词索引"""
+    from gtplanner.agent.utils.local_prefab_searcher import get_local_prefab_searcher
+
+    try:
+        if shared:
+            await emit_processing_status(shared, "📦 加载本地预制件目录...")
+
+        searcher = get_local_prefab_searcher()
+        await asyncio.to_thread(searcher.reload)
+        result = searcher.get_status()
+        logger.info(f"✅ 本地预制件目录已加载: {result['prefabs']} 个预制件，耗时 {result['load_time_ms']}ms")
+        return result
+
+    except Exception as e:
+        logger.warning(f"⚠️ 本地预制件目录加载失败: {str(e)}")
+        return {
+            "loaded": False,
+            "error": f"本地预制件目录加载失败: {str(e)}"
+        }
+
+
 def initialize_application_sync() -> Dict[str, Any]:
     """
     同步版本的应用初始化（用于非异步环境）
@@ -227,10 +257,18 @@ async def get_application_status() -> Dict[str, Any]:
             "index_name": vector_config.get("prefabs_index_name", "document_gtplanner_prefabs"),
             "note": "索引由 CI/CD 构建，不在运行时管理"
         },
+        "prefab_catalog": _get_prefab_catalog_status(),
         "vector_service": await _check_vector_service_config()
     }
 
 
+def _get_prefab_catalog_status() -> Dict[str, Any]:
+    """获取本地预制件目录加载状态（不触发加载）"""
+    from gtplanner.agent.utils.local_prefab_searcher import get_local_prefab_searcher
+
+    return get_local_prefab_searcher().get_status()
+
+
 # 便捷函数
 async def ensure_application_ready(shared: Dict[str, Any] = None) -> bool:
     """确保应用就绪"""
@@ -0,0 +1,314 @@
+"""
+网页搜索 / URL 转 Markdown 结果的磁盘缓存
+
+调研时热门关键词（FastAPI、Redis、RAG……）的搜索结果和页面内容在不同会话之间反复请求，
+这里把 JinaSearchClient.search_simple 和 JinaWebClient.get_page_info 的结果持久化到 SQLite：
+- 键：按命名空间（数据源）区分，查询词统一小写并合并空白，URL 去掉锚点和末尾斜杠，再做 SHA-256
+- TTL：每个命名空间单独配置，过期条目在读取时视为未命中，写入时定期清理
+- 压缩：结果 JSON 超过阈值时用 body_codec 压缩（zlib，安装 zstandard 时可用 zstd）
+- 多进程共享：数据库使用 WAL 模式，多个 worker 打开同一个文件即可共享缓存，
+  写冲突由 SQLite 的文件锁和 busy_timeout 处理
+- 进程内相同键的并发请求合并为一次外部调用
+- 缓存读写失败时记录错误并直接调用数据源，不影响调研流程
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from gtplanner.agent.persistence.body_codec import decode_body, encode_body, resolve_codec
+from gtplanner.agent.persistence.connection_pool import SQLiteConnectionPool
+
+# 每写入多少次清理一次过期和超量条目
+PRUNE_EVERY_WRITES = 200
+
+_WHITESPACE = re.compile(r"\s+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS web_cache (
+    namespace TEXT NOT NULL,
+    cache_key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    codec TEXT,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, cache_key)
+);
+CREATE INDEX IF NOT EXISTS idx_web_cache_expires_at ON web_cache (expires_at);
+"""
+
+
+def normalize_query(query: str) -> str:
+    """规范化搜索查询（小写、合并空白）"""
+    return _WHITESPACE.sub(" ", (query or "").strip()).lower()
+
+
+def normalize_url(url: str) -> str:
+    """规范化 URL（协议和域名小写，去掉锚点和路径末尾的斜杠）"""
+    parts = urlsplit((url or "").strip())
+    path = parts.path.rstrip("/")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+
+class WebResultCache:
+    """网页结果磁盘缓存（SQLite）"""
+
+    def __init__(
+        self,
+        db_path: str,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 86400.0,
+        max_entries: int = 20000,
+        codec: Optional[str] = "zlib",
+        compression_threshold: int = 1024,
+        compression_level: int = 6,
+        busy_timeout_ms: int = 5000
+    ):
+        """
+        初始化缓存
+
+        Args:
+            db_path: 缓存数据库文件路径（多个 worker 使用同一路径即可共享）
+            ttls: 各命名空间的过期时间（秒）
+            default_ttl: 未单独配置的命名空间的过期时间（秒）
+            max_entries: 条目上限，超出时清理最早写入的条目
+            codec: 压缩编码（zlib / zstd / None）
+            compression_threshold: 压缩阈值（UTF-8 字节数）
+            compression_level: 压缩级别
+            busy_timeout_ms: 等待其他进程释放数据库锁的超时时间（毫秒）
+        """
+        self.db_path = db_path
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.codec = resolve_codec(codec)
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+
+        self._pool = SQLiteConnectionPool(db_path, readers=2, mmap_size_mb=0, busy_timeout_ms=busy_timeout_ms)
+        with self._pool.writer() as conn:
+            conn.executescript(_SCHEMA)
+
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._inflight: Dict[Tuple[asyncio.AbstractEventLoop, str, str], asyncio.Future] = {}
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """由规范化后的键组成部分生成缓存键"""
+        raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, namespace: str) -> float:
+        return float(self.ttls.get(namespace, self.default_ttl))
+
+    def _count(self, namespace: str, stat: str) -> None:
+        with self._lock:
+            counters = self._stats.setdefault(
+                namespace, {"hits": 0, "misses": 0, "writes": 0, "coalesced": 0, "errors": 0}
+            )
+            counters[stat] += 1
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """读取未过期的缓存值，未命中返回 None"""
+        try:
+            with self._pool.reader() as conn:
+                row = conn.execute(
+                    "SELECT value, codec FROM web_cache WHERE namespace = ? AND cache_key = ? AND expires_at > ?",
+                    (namespace, key, time.time())
+                ).fetchone()
+            if row is None:
+                self._count(namespace, "misses")
+                return None
+            value = json.loads(decode_body(row["value"], row["codec"]))
+        except (sqlite3.Error, ValueError, RuntimeError) as e:
+            print(f"⚠️ 网页结果缓存读取失败: {e}")
+            self._count(namespace, "errors")
+            return None
+        self._count(namespace, "hits")
+        return value
+
+    def put(self, namespace: str, key: str, value: Any) -> None:
+        """写入缓存值"""
+        now = time.time()
+        stored, codec = encode_body(
+            json.dumps(value, ensure_ascii=False), self.codec,
+            self.compression_threshold, self.compression_level
+        )
+        try:
+            with self._pool.writer() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO web_cache (namespace, cache_key, value, codec, created_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (namespace, key, stored, codec, now, now + self.ttl_for(namespace))
+                )
+        except sqlite3.Error as e:
+            print(f"⚠️ 网页结果缓存写入失败: {e}")
+            self._count(namespace, "errors")
+            return
+        self._count(namespace, "writes")
+
+        with self._lock:
+            self._writes_since_prune += 1
+            prune = self._writes_since_prune >= PRUNE_EVERY_WRITES
+            if prune:
+                self._writes_since_prune = 0
+        if prune:
+            self.prune()
+
+    def prune(self) -> int:
+        """清理过期条目和超出上限的最早条目，返回删除数量"""
+        try:
+            with self._pool.writer() as conn:
+                deleted = conn.execute("DELETE FROM web_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+                deleted += conn.execute(
+                    "DELETE FROM web_cache WHERE rowid IN ("
+                    "SELECT rowid FROM web_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                ).rowcount
+            return deleted
+        except sqlite3.Error as e:
+            print(f"⚠️ 网页结果缓存清理失败: {e}")
+            return 0
+
+    async def get_or_fetch(
+        self,
+        namespace: str,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        should_cache: Callable[[Any], bool] = lambda value: True
+    ) -> Any:
+        """
+        读取缓存，未命中时调用 fetch 并写入缓存
+
+        Args:
+            namespace: 命名空间（数据源）
+            key: 缓存键（make_key 生成）
+            fetch: 获取结果的协程函数，异常直接抛给调用方且不缓存
+            should_cache: 判断结果是否值得缓存（例如空的搜索结果不缓存）
+        """
+        cached = await asyncio.to_thread(self.get, namespace, key)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        inflight_key = (loop, namespace, key)
+        pending = self._inflight.get(inflight_key)
+        if pending is not None:
+            self._count(namespace, "coalesced")
+            return await asyncio.shield(pending)
+
+        future = loop.create_future()
+        self._inflight[inflight_key] = future
+        try:
+            value = await fetch()
+            future.set_result(value)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # 没有等待者时避免 "exception was never retrieved" 警告
+            raise
+        finally:
+            self._inflight.pop(inflight_key, None)
+
+        if should_cache(value):
+            await asyncio.to_thread(self.put, namespace, key, value)
+        return value
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._pool.writer() as conn:
+            conn.execute("DELETE FROM web_cache")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息（命中率按命名空间和总体统计，条目数为所有 worker 共享的数据库）"""
+        with self._lock:
+            namespaces = {name: dict(counters) for name, counters in self._stats.items()}
+        try:
+            with self._pool.reader() as conn:
+                entries = conn.execute("SELECT COUNT(*) FROM web_cache").fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+
+        totals = {"hits": 0, "misses": 0, "writes": 0, "coalesced": 0, "errors": 0}
+        for counters in namespaces.values():
+            lookups = counters["hits"] + counters["misses"]
+            counters["hit_rate"] = counters["hits"] / lookups if lookups else 0.0
+            for stat in totals:
+                totals[stat] += counters[stat]
+        lookups = totals["hits"] + totals["misses"]
+        return {
+            "enabled": True,
+            "db_path": self.db_path,
+            "entries": entries,
+            **totals,
+            "hit_rate": totals["hits"] / lookups if lookups else 0.0,
+            "namespaces": namespaces
+        }
+
+    def close(self) -> None:
+        self._pool.close()
+
+
+# 全局单例
+_web_result_cache: Optional[WebResultCache] = None
+_web_result_cache_lock = threading.Lock()
+
+
+def get_web_result_cache() -> Optional[WebResultCache]:
+    """获取全局网页结果缓存，未启用时返回 None（数据库路径变化时重建）"""
+    global _web_result_cache
+    from gtplanner.utils.config_manager import get_web_cache_config
+
+    config = get_web_cache_config()
+    if not config.get("enabled", True):
+        return None
+
+    db_path = str(config.get("db_path") or "gtplanner_web_cache.db")
+    with _web_result_cache_lock:
+        if _web_result_cache is None or _web_result_cache.db_path != db_path:
+            if _web_result_cache is not None:
+                _web_result_cache.close()
+                _web_result_cache = None
+            try:
+                _web_result_cache = WebResultCache(
+                    db_path,
+                    ttls={
+                        "jina_search": float(config.get("search_ttl_seconds", 86400)),
+                        "jina_page": float(config.get("page_ttl_seconds", 604800))
+                    },
+                    max_entries=int(config.get("max_entries", 20000)),
+                    codec=config.get("compression_codec", "zlib"),
+                    compression_threshold=int(config.get("compression_threshold_bytes", 1024))
+                )
+            except (sqlite3.Error, OSError, ValueError) as e:
+                # 缓存不可用时直接请求数据源
+                print(f"⚠️ 网页结果缓存初始化失败，已禁用: {e}")
+                return None
+        return _web_result_cache
+
+
+def peek_web_result_cache() -> Optional[WebResultCache]:
+    """获取已创建的全局网页结果缓存，尚未使用时返回 None（不创建缓存数据库，供状态查询使用）"""
+    return _web_result_cache
+
+
+def get_web_cache_status() -> Dict[str, Any]:
+    """获取网页结果缓存状态（缓存尚未使用时返回零统计，不打开或创建数据库文件）"""
+    from gtplanner.utils.config_manager import get_web_cache_config
+
+    if not get_web_cache_config().get("enabled", True):
+        return {"enabled": False}
+    cache = peek_web_result_cache()
+    if cache is None:
+        return {"enabled": True, "initialized": False, "entries": 0, "hits": 0, "misses": 0, "hit_rate": 0.0}
+    return cache.get_stats()
@@ -236,7 +236,16 @@ class MultilingualConfig:
                     "base_url": self._settings.get("vector_service.base_url"),
                     "timeout": self._settings.get("vector_service.timeout", 30),
                     "prefabs_index_name": self._settings.get("vector_service.prefabs_index_name", "document_gtplanner_prefabs"),
-                    "vector_field": self._settings.get("vector_service.vector_field", "combined_text")
+                    "vector_field": self._settings.get("vector_service.vector_field", "combined_text"),
+                    "backend": self._settings.get("vector_service.backend", "auto"),
+                    "local_index_path": self._settings.get("vector_service.local_index_path", ""),
+                    "local_min_score": self._settings.get("vector_service.local_min_score", 0.15),
+                    "local_nprobe": self._settings.get("vector_service.local_nprobe", 0),
+                    "llm_filter_skip_score": self._settings.get("vector_service.llm_filter_skip_score", 0.75),
+                    "llm_filter_skip_gap": self._settings.get("vector_service.llm_filter_skip_gap", 0.15),
+                    "local_llm_filter_skip_score": self._settings.get("vector_service.local_llm_filter_skip_score", 0.45),
+                    "local_llm_filter_skip_gap": self._settings.get("vector_service.local_llm_filter_skip_gap", 0.08),
+                    "llm_filter_card_chars": self._settings.get("vector_service.llm_filter_card_chars", 200)
                 })
             except Exception as e:
                 logger.warning(f"Error reading vector service config from settings: {e}")
@@ -251,7 +260,16 @@ class MultilingualConfig:
             "base_url": os.getenv("VECTOR_SERVICE_BASE_URL") or os.getenv("GTPLANNER_VECTOR_SERVICE_BASE_URL") or config.get("base_url"),
             "timeout": int(os.getenv("VECTOR_SERVICE_TIMEOUT") or config.get("timeout", 30)),
             "prefabs_index_name": prefabs_index,
-            "vector_field": os.getenv("VECTOR_SERVICE_VECTOR_FIELD") or config.get("vector_field", "combined_text")
+            "vector_field": os.getenv("VECTOR_SERVICE_VECTOR_FIELD") or config.get("vector_field", "combined_text"),
+            "backend": (os.getenv("VECTOR_SERVICE_BACKEND") or config.get("backend") or "auto").lower(),
+            "local_index_path": os.getenv("VECTOR_SERVICE_LOCAL_INDEX_PATH") or config.get("local_index_path") or None,
+            "local_min_score": float(config.get("local_min_score", 0.15)),
+            "local_nprobe": int(config.get("local_nprobe") or 0),
+            "llm_filter_skip_score": float(config.get("llm_filter_skip_score", 0.75)),
+            "llm_filter_skip_gap": float(config.get("llm_filter_skip_gap", 0.15)),
+            "local_llm_filter_skip_score": float(config.get("local_llm_filter_skip_score", 0.45)),
+            "local_llm_filter_skip_gap": float(config.get("local_llm_filter_skip_gap", 0.08)),
+            "llm_filter_card_chars": int(config.get("llm_filter_card_chars", 200))
         })
 
         return {k: v for k, v in config.items() if v is not None}
@@ -278,6 +296,322 @@ class MultilingualConfig:
 
         return None
 
+    def get_prefab_gateway_config(self) -> Dict[str, Any]:
+        """Get prefab gateway metadata client configuration.
+
+        Returns:
+            Dictionary containing prefab gateway client configuration
+        """
+        config = {
+            "timeout": 10.0,
+            "max_concurrency": 8,
+            "latest_ttl_seconds": 60.0,
+            "cache_max_entries": 1024
+        }
+
+        # Try dynaconf settings first
+        if self._settings:
+            try:
+                for key, default in list(config.items()):
+                    config[key] = self._settings.get(f"prefab_gateway.{key}", default)
+            except Exception as e:
+                logger.warning(f"Error reading prefab gateway config from settings: {e}")
+
+        config["base_url"] = self.get_prefab_gateway_url()
+
+        # Environment variables have higher priority than settings.toml
+        env_concurrency = os.getenv("GTPLANNER_PREFAB_GATEWAY_MAX_CONCURRENCY")
+        if env_concurrency:
+            config["max_concurrency"] = int(env_concurrency)
+
+        env_ttl = os.getenv("GTPLANNER_PREFAB_GATEWAY_LATEST_TTL_SECONDS")
+        if env_ttl:
+            config["latest_ttl_seconds"] = float(env_ttl)
+
+        return config
+
+    def get_prefab_catalog_config(self) -> Dict[str, Any]:
+        """Get local prefab catalog (community-prefabs.json) configuration.
+
+        Returns:
+            Dictionary containing prefab catalog configuration
+        """
+        config = {
+            "check_interval_seconds": 5.0
+        }
+
+        # Try dynaconf settings first
+        if self._settings:
+            try:
+                config["check_interval_seconds"] = self._settings.get(
+                    "prefab_catalog.check_interval_seconds", config["check_interval_seconds"]
+                )
+            except Exception as e:
+                logger.warning(f"Error reading prefab catalog config from settings: {e}")
+
+        # Environment variables have higher priority than settings.toml
+        env_interval = os.getenv("GTPLANNER_PREFAB_CATALOG_CHECK_INTERVAL_SECONDS")
+        if env_interval:
+            config["check_interval_seconds"] = float(env_interval)
+
+        return config
+
+    def get_research_config(self) -> Dict[str, Any]:
+        """Get research data source (search / fetch provider) configuration.
+
+        Returns:
+            Dictionary containing research provider configuration
+        """
+        config = {
+            "provider": "jina",
+            "local_corpus_path": "",
+            "local_search_latency_ms": 1000.0,
+            "local_fetch_latency_ms": 1500.0,
+            "local_latency_sigma": 0.4,
+            "local_failure_rate": 0.0,
+            "local_seed": None
+        }
+
+        # Try dynaconf settings first
+        if self._settings:
+            try:
+                for key, default in list(config.items()):
+                    config[key] = self._settings.get(f"research.{key}", default)
+            except Exception as e:
+                logger.warning(f"Error reading research config from settings: {e}")
+
+        # Environment variables have higher priority than settings.toml
+        config["provider"] = (os.getenv("GTPLANNER_RESEARCH_PROVIDER") or config.get("provider") or "jina").lower()
+        config["local_corpus_path"] = os.getenv("GTPLANNER_RESEARCH_CORPUS_PATH") or config.get("local_corpus_path") or None
+
+        env_search_latency = os.getenv("GTPLANNER_RESEARCH_SEARCH_LATENCY_MS")
+        if env_search_latency:
+            config["local_search_latency_ms"] = float(env_search_latency)
+
+        env_fetch_latency = os.getenv("GTPLANNER_RESEARCH_FETCH_LATENCY_MS")
+        if env_fetch_latency:
+            config["local_fetch_latency_ms"] = float(env_fetch_latency)
+
+        return config
+
+    def get_web_cache_config(self) -> Dict[str, Any]:
+        """Get on-disk web search / URL-to-markdown result cache configuration.
+
+        Returns:
+            Dictionary containing web result cache configuration
+        """
+        config = {
+            "enabled": True,
+            "db_path": "gtplanner_web_cache.db",
+            "search_ttl_seconds": 86400,
+            "page_ttl_seconds": 604800,
+            "max_entries": 20000,
+            "compression_codec": "zlib",
+            "compression_threshold_bytes": 1024
+        }
+
+        # Try dynaconf settings first
+        if self._settings:
+            try:
+                for key, default in list(config.items()):
+                    config[key] = self._settings.get(f"web_cache.{key}", default)
+            except Exception as e:
+                logger.warning(f"Error reading web cache config from settings: {e}")
+
+        # Environment variables have higher priority than settings.toml
+        env_enabled = os.getenv("GTPLANNER_WEB_CACHE_ENABLED")
+        if env_enabled is not None:
+            config["enabled"] = env_enabled.lower() in ("1", "true", "yes", "on")
+
+        env_db_path = os.getenv("GTPLANNER_WEB_CACHE_DB_PATH")
+        if env_db_path:
+            config["db_path"] = env_db_path
+
+        env_search_ttl = os.getenv("GTPLANNER_WEB_CACHE_SEARCH_TTL_SECONDS")
+        if env_search_ttl:
+            config["search_ttl_seconds"] = float(env_search_ttl)
+
+        env_page_ttl = os.getenv("GTPLANNER_WEB_CACHE_PAGE_TTL_SECONDS")
+        if env_page_ttl:
+            config["page_ttl_seconds"] = float(env_page_ttl)
+
+        return config
+
+    def get_tool_cache_config(self) -> Dict[str, Any]:
+        """Get tool result cache configuration.
+
+        Returns:
+            Dictionary containing tool cache configuration
+        """
+        config = {"enabled": True, "max_entries": 512}
+
+        # Try dynaconf settings first
+        if self._settings:
+            try:
+                config.update({
+                    "enabled": self._settings.get("tool_cache.enabled", True),
+                    "max_entries": self._settings.get("tool_cache.max_entries", 512)
+                })
+            except Exception as e:
+                logger.warning(f"Error reading tool cache config from settings: {e}")
+
+        # Environment variables have higher priority than settings.toml
+        env_enabled = os.getenv("GTPLANNER_TOOL_CACHE_ENABLED")
+        if env_enabled is not None:
+            config["enabled"] = env_enabled.lower() in ("true", "1", "yes", "on")
+
+        env_max_entries = os.getenv("GTPLANNER_TOOL_CACHE_MAX_ENTRIES")
+        if env_max_entries:
+            config["max_entries"] = int(env_max_entries)
+
+        return config
+
+    def get_tracing_config(self) -> Dict[str, Any]:
+        """Get in-process request tracing configuration.
+
+        Returns:
+            Dictionary containing tracing configuration
+        """
+        config = {"enabled": True, "max_traces": 200, "jsonl_path": ""}
+
+        # Try dynaconf settings first
+        if self._settings:
+            try:
+                config.update({
+                    "enabled": self._settings.get("tracing.enabled", True),
+                    "max_traces": self._settings.get("tracing.max_traces", 200),
+                    "jsonl_path": self._settings.get("tracing.jsonl_path", "")
+                })
+            except Exception as e:
+                logger.warning(f"Error reading tracing config from settings: {e}")
+
+        # Environment variables have higher priority than settings.toml
+        env_enabled = os.getenv("GTPLANNER_TRACING_ENABLED")
+        if env_enabled is not None:
+            config["enabled"] = env_enabled.lower() in ("true", "1", "yes", "on")
+
+        env_max_traces = os.getenv("GTPLANNER_TRACING_MAX_TRACES")
+        if env_max_traces:
+            config["max_traces"] = int(env_max_traces)
+
+        env_jsonl_path = os.getenv("GTPLANNER_TRACING_JSONL_PATH")
+        if env_jsonl_path is not None:
+            config["jsonl_path"] = env_jsonl_path
+
+        return config
+
+    def get_database_config(self) -> Dict[str, Any]:
+        """Get SQLite persistence connection pool configuration.
+
+        Returns:
+            Dictionary containing database configuration
+        """
+        config = {
+            "pool_readers": 4,
+            "cache_size_kb": 8192,
+            "mmap_size_mb": 64,
+            "cached_statements": 256,
+            "busy_timeout_ms": 5000,
+            "compression_codec": "zlib",
+            "compression_threshold_bytes": 2048,
+            "compression_level": 6
+        }
+
+        # Try dynaconf settings first
+        if self._settings:
+            try:
+                for key, default in list(config.items()):
+                    config[key] = self._settings.get(f"database.{key}", default)
+            except Exception as e:
+                logger.warning(f"Error reading database config from settings: {e}")
+
+        # Environment variables have higher priority than settings.toml
+        env_readers = os.getenv("GTPLANNER_DB_POOL_READERS")
+        if env_readers:
+            config["pool_readers"] = int(env_readers)
+
+        env_cache_size = os.getenv("GTPLANNER_DB_CACHE_SIZE_KB")
+        if env_cache_size:
+            config["cache_size_kb"] = int(env_cache_size)
+
+        env_mmap_size = os.getenv("GTPLANNER_DB_MMAP_SIZE_MB")
+        if env_mmap_size:
+            config["mmap_size_mb"] = int(env_mmap_size)
+
+        env_codec = os.getenv("GTPLANNER_DB_COMPRESSION_CODEC")
+        if env_codec is not None:
+            config["compression_codec"] = env_codec
+
+        env_threshold = os.getenv("GTPLANNER_DB_COMPRESSION_THRESHOLD_BYTES")
+        if env_threshold:
+            config["compression_threshold_bytes"] = int(env_threshold)
+
+        return config
+
+    def get_server_session_config(self) -> Dict[str, Any]:
+        """Get server-side session store configuration.
+
+        Returns:
+            Dictionary containing server session configuration
+        """
+        config = {
+            "db_path": "gtplanner_conversations.db",
+            "cache_max_sessions": 256,
+            "cache_ttl_seconds": 1800
+        }
+
+        # Try dynaconf settings first
+        if self._settings:
+            try:
+                for key, default in list(config.items()):
+                    config[key] = self._settings.get(f"server_session.{key}", default)
+            except Exception as e:
+                logger.warning(f"Error reading server session config from settings: {e}")
+
+        # Environment variables have higher priority than settings.toml
+        env_db_path = os.getenv("GTPLANNER_SESSION_DB_PATH")
+        if env_db_path:
+            config["db_path"] = env_db_path
+
+        env_max_sessions = os.getenv("GTPLANNER_SESSION_CACHE_MAX_SESSIONS")
+        if env_max_sessions:
+            config["cache_max_sessions"] = int(env_max_sessions)
+
+        env_ttl = os.getenv("GTPLANNER_SESSION_CACHE_TTL_SECONDS")
+        if env_ttl:
+            config["cache_ttl_seconds"] = float(env_ttl)
+
+        return config
+
+    def get_tokenizer_config(self) -> Dict[str, Any]:
+        """Get token counter configuration.
+
+        Returns:
+            Dictionary containing tokenizer configuration
+        """
+        config = {"backend": "auto", "encoding": "o200k_base"}
+
+        # Try dynaconf settings first
+        if self._settings:
+            try:
+                config.update({
+                    "backend": self._settings.get("tokenizer.backend", "auto"),
+                    "encoding": self._settings.get("tokenizer.encoding", "o200k_base")
+                })
+            except Exception as e:
+                logger.warning(f"Error reading tokenizer config from settings: {e}")
+
+        # Environment variables have higher priority than settings.toml
+        env_backend = os.getenv("GTPLANNER_TOKENIZER_BACKEND")
+        if env_backend:
+            config["backend"] = env_backend
+
+        env_encoding = os.getenv("GTPLANNER_TOKENIZER_ENCODING")
+        if env_encoding:
+            config["encoding"] = env_encoding
+
+        return config
+
     def get_all_config(self) -> Dict[str, Any]:
         """Get all configuration as a dictionary.
 
@@ -410,6 +744,87 @@ def get_prefab_gateway_url() -> Optional[str]:
     return multilingual_config.get_prefab_gateway_url()
 
 
+def get_prefab_gateway_config() -> Dict[str, Any]:
+    """Convenience function to get prefab gateway metadata client configuration.
+
+    Returns:
+        Dictionary containing prefab gateway client configuration
+    """
+    return multilingual_config.get_prefab_gateway_config()
+
+
+def get_prefab_catalog_config() -> Dict[str, Any]:
+    """Convenience function to get local prefab catalog configuration.
+
+    Returns:
+        Dictionary containing prefab catalog configuration
+    """
+    return multilingual_config.get_prefab_catalog_config()
+
+
+def get_research_config() -> Dict[str, Any]:
+    """Convenience function to get research provider configuration.
+
+    Returns:
+        Dictionary containing research provider configuration
+    """
+    return multilingual_config.get_research_config()
+
+
+def get_web_cache_config() -> Dict[str, Any]:
+    """Convenience function to get web result cache configuration.
+
+    Returns:
+        Dictionary containing web result cache configuration
+    """
+    return multilingual_config.get_web_cache_config()
+
+
+def get_tool_cache_config() -> Dict[str, Any]:
+    """Convenience function to get tool result cache configuration.
+
+    Returns:
+        Dictionary containing tool cache configuration
+    """
+    return multilingual_config.get_tool_cache_config()
+
+
+def get_tracing_config() -> Dict[str, Any]:
+    """Convenience function to get request tracing configuration.
+
+    Returns:
+        Dictionary containing tracing configuration
+    """
+    return multilingual_config.get_tracing_config()
+
+
+def get_database_config() -> Dict[str, Any]:
+    """Convenience function to get SQLite connection pool configuration.
+
+    Returns:
+        Dictionary containing database configuration
+    """
+    return multilingual_config.get_database_config()
+
+
+def get_server_session_config() -> Dict[str, Any]:
+    """Convenience function to get server-side session store configuration.
+
+    Returns:
+        Dictionary containing server session configuration
+    """
+    return multilingual_config.get_server_session_config()
+
+
+def get_tokenizer_config() -> Dict[str, Any]:
+    """Convenience function to get token counter configuration.
+
+    Returns:
+        Dictionary containing tokenizer configuration
+    """
+    return multilingual_config.get_tokenizer_config()
+
+
 def get_all_config() -> Dict[str, Any]:
     """Convenience function to get all configuration.
 
@@ -23,6 +23,7 @@ from openai import AsyncOpenAI
 from openai.types.chat import ChatCompletion, ChatCompletionChunk
 
 from gtplanner.utils.logger_config import get_openai_logger
+from gtplanner.utils.request_tracing import Span, trace_span, start_span, end_span
 
 try:
     from dynaconf import Dynaconf
@@ -445,6 +446,7 @@ class SimpleOpenAIConfig:
         log_responses: bool = True,
         function_calling_enabled: bool = True,
         tool_choice: str = "auto",
+        stream_include_usage: bool = True,
     ):
         # 尝试从 settings.toml 加载配置
         settings = self._load_settings()
@@ -461,6 +463,8 @@ class SimpleOpenAIConfig:
         self.log_responses = self._get_setting(settings, "llm.log_responses", log_responses)
         self.function_calling_enabled = self._get_setting(settings, "llm.function_calling_enabled", function_calling_enabled)
         self.tool_choice = self._get_setting(settings, "llm.tool_choice", tool_choice)
+        # 流式响应末尾附带用量信息（用于统计提示词缓存命中），不支持 stream_options 的服务可关闭
+        self.stream_include_usage = self._get_setting(settings, "llm.stream_include_usage", stream_include_usage)
 
         if not self.api_key:
             raise ValueError("OpenAI API key is required. Set OPENAI_API_KEY environment variable or configure llm.api_key in settings.toml.")
@@ -664,13 +668,7 @@ class OpenAIClient:
         )
 
         # 性能统计
-        self.stats = {
-            "total_requests": 0,
-            "successful_requests": 0,
-            "failed_requests": 0,
-            "total_tokens": 0,
-            "total_time": 0.0
-        }
+        self.stats = self._new_stats()
 
 
         # 记录初始化日志
@@ -737,6 +735,8 @@ class OpenAIClient:
 
         if stream:
             params["stream"] = True
+            if self.config.stream_include_usage:
+                params.setdefault("stream_options", {"include_usage": True})
 
         # 添加工具支持
         if tools and self.config.function_calling_enabled:
@@ -746,11 +746,36 @@ class OpenAIClient:
 
         return params
 
+    @staticmethod
+    def _new_stats() -> Dict[str, Any]:
+        """创建空的统计信息"""
+        return {
+            "total_requests": 0,
+            "successful_requests": 0,
+            "failed_requests": 0,
+            "total_tokens": 0,
+            "prompt_tokens": 0,
+            "cached_prompt_tokens": 0,
+            "total_time": 0.0
+        }
+
+    def _record_usage(self, usage: Any) -> None:
+        """记录token用量（包括命中提示词前缀缓存的token数）"""
+        self.stats["total_tokens"] += getattr(usage, "total_tokens", 0) or 0
+        self.stats["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+
+        # OpenAI: usage.prompt_tokens_details.cached_tokens；DeepSeek: usage.prompt_cache_hit_tokens
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None) if details else None
+        if cached_tokens is None:
+            cached_tokens = getattr(usage, "prompt_cache_hit_tokens", None)
+        self.stats["cached_prompt_tokens"] += cached_tokens or 0
+
     def _update_success_stats(self, response: Any) -> None:
         """更新成功统计信息"""
         self.stats["successful_requests"] += 1
         if hasattr(response, 'usage') and response.usage:
-            self.stats["total_tokens"] += response.usage.total_tokens
+            self._record_usage(response.usage)
 
     def _update_failure_stats(self) -> None:
         """更新失败统计信息"""
@@ -796,7 +821,9 @@ class OpenAIClient:
             async def _api_call():
                 return await self.async_client.chat.completions.create(**params)
 
-            response = await self.retry_manager.execute_with_retry(_api_call)
+            with trace_span("llm.chat_completion", kind="llm", model=params.get("model")) as span:
+                response = await self.retry_manager.execute_with_retry(_api_call)
+                self._set_usage_attributes(span, getattr(response, "usage", None))
 
             # 更新统计信息
             self._update_success_stats(response)
@@ -836,6 +863,9 @@ class OpenAIClient:
         """
         start_time = time.time()
         self.stats["total_requests"] += 1
+        # 异步生成器可能在其他上下文中被关闭，因此不把该 span 设为当前 span
+        span = start_span("llm.chat_completion_stream", kind="llm", activate=False, model=self.config.model)
+        span_error = None
 
         try:
             # 提取filter_tool_tags参数，避免传递给OpenAI API
@@ -860,13 +890,18 @@ class OpenAIClient:
 
             chunk_count = 0
             full_content = ""
-            total_tokens = 0
+            usage = None
+            # 请求了用量信息时，finish_reason 之后还有一个只带 usage 的数据块
+            wait_for_usage = "stream_options" in params
+            finished = False
 
             # 初始化工具调用标签过滤器（如果启用）
             tag_filter = ToolCallTagFilter() if filter_tool_tags_param else None
 
             async for chunk in stream:
                 chunk_count += 1
+                if chunk_count == 1:
+                    span.set_attribute("first_chunk_ms", (time.time() - span.start_time) * 1000)
 
                 # 收集响应内容用于日志记录
                 if chunk.choices and chunk.choices[0].delta.content:
@@ -874,9 +909,11 @@ class OpenAIClient:
 
                 # 收集token使用信息
                 if hasattr(chunk, 'usage') and chunk.usage:
-                    total_tokens = chunk.usage.total_tokens
-
+                    usage = chunk.usage
 
+                # 已结束的流只继续读取用量信息
+                if finished:
+                    continue
 
                 # 如果启用了工具调用标签过滤，处理delta.content
                 if filter_tool_tags_param and tag_filter and chunk.choices and chunk.choices[0].delta.content:
@@ -921,7 +958,9 @@ class OpenAIClient:
                     yield filtered_chunk
 
                     if finish_reason is not None:
-                        break
+                        if not wait_for_usage:
+                            break
+                        finished = True
                 else:
                     # 提前结束：如果收到finish_reason，先输出再终止循环
                     finish_reason = None
@@ -933,7 +972,9 @@ class OpenAIClient:
                     yield chunk
 
                     if finish_reason is not None:
-                        break
+                        if not wait_for_usage:
+                            break
+                        finished = True
 
             # 如果启用了过滤，处理剩余的内容
             if filter_tool_tags_param and tag_filter:
@@ -959,21 +1000,32 @@ class OpenAIClient:
 
             # 更新统计信息
             self.stats["successful_requests"] += 1
-            if total_tokens > 0:
-                self.stats["total_tokens"] += total_tokens
+            if usage:
+                self._record_usage(usage)
+            self._set_usage_attributes(span, usage)
 
             # 记录响应日志（流式响应）
             self._log_stream_response("chat_completion_stream", chunk_count, full_content)
 
         except Exception as e:
             self._update_failure_stats()
+            span_error = e
             raise self._handle_error(e)
 
         finally:
             self.stats["total_time"] += time.time() - start_time
-
-
-
+            end_span(span, error=span_error)
+
+    @staticmethod
+    def _set_usage_attributes(span: Span, usage: Any) -> None:
+        """把token用量写入追踪span"""
+        if not usage:
+            return
+        span.set_attribute("prompt_tokens", getattr(usage, "prompt_tokens", None))
+        span.set_attribute("completion_tokens", getattr(usage, "completion_tokens", None))
+        details = getattr(usage, "prompt_tokens_details", None)
+        if details is not None and getattr(details, "cached_tokens", None) is not None:
+            span.set_attribute("cached_prompt_tokens", details.cached_tokens)
 
     
     def _handle_error(self, error: Exception) -> OpenAIClientError:
@@ -1055,18 +1107,15 @@ class OpenAIClient:
                 self.logger.info(f"📝 完整流式响应内容: {content}")
 
     def get_stats(self) -> Dict[str, Any]:
-        """获取性能统计信息"""
-        return self.stats.copy()
+        """获取性能统计信息（包括提示词缓存命中率）"""
+        stats = self.stats.copy()
+        prompt_tokens = stats["prompt_tokens"]
+        stats["cached_prompt_token_rate"] = stats["cached_prompt_tokens"] / prompt_tokens if prompt_tokens else 0.0
+        return stats
     
     def reset_stats(self) -> None:
         """重置性能统计信息"""
-        self.stats = {
-            "total_requests": 0,
-            "successful_requests": 0,
-            "failed_requests": 0,
-            "total_tokens": 0,
-            "total_time": 0.0
-        }
+        self.stats = self._new_stats()
 
 
 # 全局客户端实例
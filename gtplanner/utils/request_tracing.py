@@ -0,0 +1,404 @@
+"""
+进程内请求追踪
+
+轻量级的 span API，不依赖外部追踪后端，用于定位单个请求的耗时分布：
+- trace_span(): 以上下文管理器的方式记录一个 span（请求、ReAct 轮次、工具调用等）
+- start_span()/end_span(): 无法使用 with 语句时手动记录（如异步生成器中的流式 LLM 调用）
+- traced_flow(): 流式类装饰器，为流程及其每个节点记录 span
+
+span 之间的父子关系通过 contextvars 传递，asyncio.gather 创建的并发任务会自动继承父 span。
+结束的 span 保存在内存环形缓冲区中（按 trace 分组，只保留最近的若干个 trace），
+可选地由后台线程追加写入 JSONL 文件，通过 get_span_recorder().get_waterfall(trace_id) 获取瀑布图数据。
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pocketflow import AsyncNode
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """追踪片段"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    kind: str = "internal"  # request / cycle / llm / tool / flow / node / internal
+    start_time: float = field(default_factory=time.time)
+    end_time: Optional[float] = None
+    status: str = "ok"
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    _token: Optional[Token] = field(default=None, repr=False, compare=False)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        """耗时（毫秒），未结束时为 None"""
+        if self.end_time is None:
+            return None
+        return (self.end_time - self.start_time) * 1000
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """设置属性"""
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "kind": self.kind,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("gtplanner_current_span", default=None)
+
+
+class SpanRecorder:
+    """
+    span 记录器（内存环形缓冲区 + 可选 JSONL 导出）
+
+    根 span 开始时登记 trace，其余 span 在结束时写入所属 trace；
+    trace 数量超过 max_traces 时淘汰最早的 trace。
+    """
+
+    def __init__(self, max_traces: int = 200, jsonl_path: Optional[str] = None, enabled: bool = True):
+        self.max_traces = max_traces
+        self.jsonl_path = jsonl_path or None
+        self.enabled = enabled
+
+        self._traces: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # JSONL 导出在后台线程中进行，记录 span 时只入队，不在事件循环上做文件 I/O
+        self._export_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._export_thread: Optional[threading.Thread] = None
+
+    def start_trace(self, root: Span) -> None:
+        """登记一个新的 trace"""
+        with self._lock:
+            self._traces[root.trace_id] = {"root": root, "spans": []}
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+
+    def record(self, span: Span) -> None:
+        """记录已结束的 span"""
+        with self._lock:
+            trace = self._traces.get(span.trace_id)
+            if trace is not None:
+                trace["spans"].append(span)
+
+        if self.jsonl_path:
+            self._ensure_export_thread()
+            self._export_queue.put(span.to_dict())
+
+    def _ensure_export_thread(self) -> None:
+        if self._export_thread is None or not self._export_thread.is_alive():
+            with self._lock:
+                if self._export_thread is None or not self._export_thread.is_alive():
+                    self._export_thread = threading.Thread(
+                        target=self._export_loop, name="span-jsonl-exporter", daemon=True
+                    )
+                    self._export_thread.start()
+
+    def _export_loop(self) -> None:
+        """后台导出线程：批量取出已结束的 span 追加写入 JSONL 文件（导出失败不影响请求处理）"""
+        while True:
+            batch = [self._export_queue.get()]
+            while True:
+                try:
+                    batch.append(self._export_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                lines = [json.dumps(item, ensure_ascii=False, default=str) for item in batch]
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning(f"导出 span 到 {self.jsonl_path} 失败，丢弃 {len(batch)} 条: {e}")
+            finally:
+                for _ in batch:
+                    self._export_queue.task_done()
+
+    def flush(self) -> None:
+        """等待已记录的 span 全部写入 JSONL 文件"""
+        if self._export_thread is not None:
+            self._export_queue.join()
+
+    def list_traces(self, session_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """列出最近的 trace 摘要（最新的在前）"""
+        with self._lock:
+            roots = [trace["root"] for trace in reversed(self._traces.values())]
+            span_counts = {trace_id: len(trace["spans"]) for trace_id, trace in self._traces.items()}
+
+        summaries = []
+        for root in roots:
+            if session_id and root.attributes.get("session_id") != session_id:
+                continue
+            summaries.append({
+                "trace_id": root.trace_id,
+                "name": root.name,
+                "session_id": root.attributes.get("session_id"),
+                "start_time": root.start_time,
+                "duration_ms": root.duration_ms,
+                "status": root.status,
+                "span_count": span_counts.get(root.trace_id, 0)
+            })
+            if len(summaries) >= limit:
+                break
+        return summaries
+
+    def get_waterfall(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取 trace 的瀑布图数据
+
+        Returns:
+            按开始时间排序的 span 列表（含相对根 span 的偏移、耗时和嵌套深度），trace 不存在时返回 None
+        """
+        with self._lock:
+            trace = self._traces.get(trace_id)
+            if trace is None:
+                return None
+            root = trace["root"]
+            spans = list(trace["spans"])
+
+        if root not in spans:
+            spans.append(root)  # 请求仍在进行中
+        spans.sort(key=lambda s: s.start_time)
+
+        parents = {s.span_id: s.parent_id for s in spans}
+
+        def depth_of(span: Span) -> int:
+            depth, parent_id = 0, span.parent_id
+            while parent_id in parents:
+                depth += 1
+                parent_id = parents[parent_id]
+            return depth
+
+        return {
+            "trace_id": trace_id,
+            "name": root.name,
+            "attributes": root.attributes,
+            "start_time": root.start_time,
+            "duration_ms": root.duration_ms,
+            "status": root.status,
+            "spans": [
+                {
+                    "name": s.name,
+                    "kind": s.kind,
+                    "span_id": s.span_id,
+                    "parent_id": s.parent_id,
+                    "depth": depth_of(s),
+                    "offset_ms": (s.start_time - root.start_time) * 1000,
+                    "duration_ms": s.duration_ms,
+                    "status": s.status,
+                    "error": s.error,
+                    "attributes": s.attributes
+                }
+                for s in spans
+            ]
+        }
+
+    def clear(self) -> None:
+        """清空所有 trace"""
+        with self._lock:
+            self._traces.clear()
+
+
+def start_span(name: str, kind: str = "internal", activate: bool = True, **attributes: Any) -> Span:
+    """
+    开始一个 span
+
+    Args:
+        name: span 名称
+        kind: span 类型
+        activate: 是否设为当前 span（子 span 将挂在其下）；
+            异步生成器等无法保证在同一上下文中结束的场景应传 False
+        **attributes: span 属性
+
+    Returns:
+        Span 对象，需要调用 end_span() 结束
+    """
+    recorder = get_span_recorder()
+    parent = _current_span.get()
+
+    span = Span(
+        name=name,
+        trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+        span_id=uuid.uuid4().hex[:16],
+        parent_id=parent.span_id if parent else None,
+        kind=kind,
+        attributes=attributes
+    )
+
+    if not recorder.enabled:
+        return span
+
+    if parent is None:
+        recorder.start_trace(span)
+    if activate:
+        span._token = _current_span.set(span)
+    return span
+
+
+def end_span(span: Span, error: Optional[BaseException] = None) -> None:
+    """结束 span 并记录"""
+    span.end_time = time.time()
+    if error is not None:
+        span.status = "error"
+        span.error = f"{type(error).__name__}: {error}"
+
+    if span._token is not None:
+        _current_span.reset(span._token)
+        span._token = None
+
+    recorder = get_span_recorder()
+    if recorder.enabled:
+        recorder.record(span)
+
+
+@contextmanager
+def trace_span(name: str, kind: str = "internal", **attributes: Any) -> Iterator[Span]:
+    """
+    以上下文管理器的方式记录 span（同步和异步代码均可使用）
+
+    用法:
+        with trace_span("tool.research", kind="tool", call_id=call_id) as span:
+            result = await execute_agent_tool(...)
+            span.set_attribute("success", result.get("success"))
+    """
+    span = start_span(name, kind, **attributes)
+    try:
+        yield span
+    except BaseException as e:
+        end_span(span, error=e)
+        raise
+    else:
+        end_span(span)
+
+
+def get_current_span() -> Optional[Span]:
+    """获取当前 span"""
+    return _current_span.get()
+
+
+def get_current_trace_id() -> Optional[str]:
+    """获取当前 trace ID"""
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+
+# (节点类, 流程名) -> 带 span 的节点子类
+_traced_node_classes: Dict[Tuple[type, str], type] = {}
+_traced_node_classes_lock = threading.Lock()
+
+
+def _traced_node_class(node_class: type, flow_name: str) -> type:
+    """
+    获取在 _run_async / _run 外包一层节点 span 的子类
+
+    使用子类而不是给实例绑定方法：流程编排时会 copy.copy 节点，
+    实例上绑定的方法在副本中仍然指向原节点。
+    """
+    key = (node_class, flow_name)
+    with _traced_node_classes_lock:
+        traced_class = _traced_node_classes.get(key)
+        if traced_class is not None:
+            return traced_class
+
+        def span_name(node) -> str:
+            return f"{flow_name}.{getattr(node, 'name', None) or node_class.__name__}"
+
+        if issubclass(node_class, AsyncNode):
+            async def _run_async(self, shared):
+                with trace_span(span_name(self), kind="node"):
+                    return await super(traced_class, self)._run_async(shared)
+            namespace = {"_run_async": _run_async}
+        else:
+            def _run(self, shared):
+                with trace_span(span_name(self), kind="node"):
+                    return super(traced_class, self)._run(shared)
+            namespace = {"_run": _run}
+
+        namespace.update({
+            "__module__": node_class.__module__,
+            "__qualname__": node_class.__qualname__,
+            "__doc__": node_class.__doc__,
+            "_traced_flow_name": flow_name
+        })
+        traced_class = type(node_class.__name__, (node_class,), namespace)
+        _traced_node_classes[key] = traced_class
+        return traced_class
+
+
+def _instrument_flow_nodes(flow, flow_name: str) -> None:
+    """为流程图中尚未追踪的节点换上带 span 的子类（嵌套流程由其自身的装饰器处理）"""
+    pending, visited = [getattr(flow, "start_node", None)], set()
+    while pending:
+        node = pending.pop()
+        if node is None or id(node) in visited:
+            continue
+        visited.add(id(node))
+        if getattr(type(node), "_traced_flow_name", None) is None:
+            node.__class__ = _traced_node_class(type(node), flow_name)
+        pending.extend(node.successors.values())
+
+
+def traced_flow(flow_name: str):
+    """
+    流程类装饰器：为流程本身及其执行的每个节点记录 span
+
+    与 pocketflow_tracing 的 trace_flow 可以叠加使用（本装饰器放在内层）。
+    不改动 pocketflow 的编排逻辑：每次运行前把流程图中的节点换成在 _run_async 外包一层 span 的子类
+    （每个节点只处理一次，运行期间新加入的节点在下次运行时处理）。
+    """
+    def decorator(flow_class):
+        original_run_async = flow_class._run_async
+
+        async def _run_async(self, shared):
+            _instrument_flow_nodes(self, flow_name)
+            with trace_span(flow_name, kind="flow"):
+                return await original_run_async(self, shared)
+
+        flow_class._run_async = _run_async
+        return flow_class
+
+    return decorator
+
+
+# 全局单例
+_span_recorder_instance = None
+
+
+def get_span_recorder() -> SpanRecorder:
+    """获取全局单例的 span 记录器"""
+    global _span_recorder_instance
+    if _span_recorder_instance is None:
+        from gtplanner.utils.config_manager import get_tracing_config
+
+        config = get_tracing_config()
+        _span_recorder_instance = SpanRecorder(
+            max_traces=config.get("max_traces", 200),
+            jsonl_path=config.get("jsonl_path") or None,
+            enabled=config.get("enabled", True)
+        )
+    return _span_recorder_instance
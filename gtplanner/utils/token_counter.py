@@ -0,0 +1,165 @@
+"""
+Token计数
+
+压缩阈值判断、上下文预算和统计信息共用的token计数器：
+- 安装了可选依赖 tiktoken 且本地可加载BPE编码时，使用与模型一致的精确计数
+- 否则使用启发式估算：在C层统计非ASCII字符、英文字母/单词、数字和符号，
+  不在Python层逐字符循环
+
+消息写入数据库时计算一次并保存在token_count列（以及压缩上下文的计数字段）中，
+之后的阈值判断和预算计算直接读取存储的计数。
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 每条消息的格式开销（role、分隔符等）
+TOKENS_PER_MESSAGE = 3
+# 图片的token开销（low为固定值，其他细节级别按一张1024px图片估算）
+IMAGE_TOKENS_LOW = 85
+IMAGE_TOKENS_HIGH = 765
+
+_ASCII_LETTERS = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+_ASCII_DIGITS = b"0123456789"
+_ASCII_SPACES = b" \t\n\r\x0b\x0c"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    启发式估算文本的token数量
+
+    - 非ASCII字符（中日韩文字、全角标点等）：每个约1个token
+    - 英文：每个单词至少1个token，长单词约4个字母1个token
+    - 数字：约3位1个token
+    - 其他符号：约2个1个token（JSON中的 `":` 等常被合并）
+
+    全部统计通过 encode/translate/split 在C层完成，不在Python层逐字符循环。
+    """
+    if not text:
+        return 0
+
+    ascii_bytes = text.encode("ascii", "ignore")
+    non_ascii = len(text) - len(ascii_bytes)
+    letters = len(ascii_bytes) - len(ascii_bytes.translate(None, _ASCII_LETTERS))
+    digits = len(ascii_bytes) - len(ascii_bytes.translate(None, _ASCII_DIGITS))
+    spaces = len(ascii_bytes) - len(ascii_bytes.translate(None, _ASCII_SPACES))
+    symbols = len(ascii_bytes) - letters - digits - spaces
+    words = len(ascii_bytes.split()) if letters else 0
+
+    return non_ascii + max(words, -(-letters // 4)) + -(-digits // 3) + -(-symbols // 2)
+
+
+class TokenCounter:
+    """Token计数器（tiktoken精确计数，不可用时回退为启发式估算）"""
+
+    def __init__(self, encoding_name: str = "o200k_base", backend: str = "auto"):
+        """
+        初始化token计数器
+
+        Args:
+            encoding_name: tiktoken编码名称
+            backend: auto（优先tiktoken）/ tiktoken（必须使用tiktoken）/ heuristic（只用启发式估算）
+        """
+        self.encoding_name = encoding_name
+        self._encoding = None
+
+        if backend not in ("auto", "tiktoken", "heuristic"):
+            raise ValueError(f"不支持的token计数后端: {backend}")
+
+        if backend != "heuristic":
+            if TIKTOKEN_AVAILABLE:
+                try:
+                    self._encoding = tiktoken.get_encoding(encoding_name)
+                except Exception as e:
+                    # BPE文件不在本地缓存且无法下载时回退
+                    if backend == "tiktoken":
+                        raise
+                    logger.warning(f"无法加载tiktoken编码 {encoding_name}，使用启发式估算: {e}")
+            elif backend == "tiktoken":
+                raise ImportError("backend=tiktoken 需要安装 tiktoken")
+
+        self.backend = "tiktoken" if self._encoding is not None else "heuristic"
+
+    def count(self, content: Union[str, List[Dict[str, Any]], None]) -> int:
+        """
+        计算消息内容的token数量
+
+        Args:
+            content: 文本或多模态内容列表（文本部分计数，图片按细节级别计固定开销）
+        """
+        if not content:
+            return 0
+        if isinstance(content, str):
+            return self._count_text(content)
+
+        total = 0
+        for part in content:
+            if not isinstance(part, dict):
+                continue
+            if part.get("type") == "text":
+                total += self._count_text(part.get("text", ""))
+            elif part.get("type") == "image_url":
+                detail = (part.get("image_url") or {}).get("detail", "auto")
+                total += IMAGE_TOKENS_LOW if detail == "low" else IMAGE_TOKENS_HIGH
+        return total
+
+    def _count_text(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode_ordinary(text))
+        return estimate_tokens(text)
+
+    def count_message(self, message: Dict[str, Any]) -> int:
+        """
+        计算一条OpenAI格式消息的token数量（内容 + tool_calls参数 + 格式开销）
+
+        Args:
+            message: 包含role、content，可选tool_calls、tool_call_id的消息字典
+        """
+        total = TOKENS_PER_MESSAGE + self.count(message.get("content"))
+        for tool_call in message.get("tool_calls") or []:
+            function = (tool_call.get("function") if isinstance(tool_call, dict) else None) or {}
+            total += self._count_text(function.get("name") or "")
+            total += self._count_text(function.get("arguments") or "")
+        if message.get("tool_call_id"):
+            total += self._count_text(message["tool_call_id"])
+        return total
+
+    def count_messages(self, messages: Iterable[Dict[str, Any]]) -> int:
+        """计算消息列表的token总数"""
+        return sum(self.count_message(message) for message in messages)
+
+
+# 全局单例
+_token_counter_instance: Optional[TokenCounter] = None
+
+
+def get_token_counter() -> TokenCounter:
+    """获取全局单例的token计数器"""
+    global _token_counter_instance
+    if _token_counter_instance is None:
+        from gtplanner.utils.config_manager import get_tokenizer_config
+
+        config = get_tokenizer_config()
+        _token_counter_instance = TokenCounter(
+            encoding_name=config.get("encoding", "o200k_base"),
+            backend=config.get("backend", "auto")
+        )
+    return _token_counter_instance
+
+
+def count_tokens(content: Union[str, List[Dict[str, Any]], None]) -> int:
+    """便捷函数：计算消息内容的token数量"""
+    return get_token_counter().count(content)
+
+
+def count_message_tokens(message: Dict[str, Any]) -> int:
+    """便捷函数：计算一条消息的token数量（含格式开销）"""
+    return get_token_counter().count_message(message)
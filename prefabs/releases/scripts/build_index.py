@@ -6,21 +6,35 @@
 当 community-prefabs.json 更新时，通过 GitHub Actions 调用此脚本
 将预制件数据推送到向量服务建立索引。
 
+默认清空索引后分批并发全量写入，并写下清单（<stem>.index-manifest.json，记录每个文档的
+ID、版本和内容哈希）。指定 --incremental 时与清单对比，只写入新增或变化的文档，并删除已从
+目录移除的文档。增量模式依赖向量服务按文档ID覆盖写入（POST /documents）和按ID删除
+（DELETE /documents），同步前后都会核对索引中的文档数与清单是否一致：同步前不一致或无法获取
+文档数时改为全量重建，同步后不一致时删除清单并报错，下次运行全量重建。
+
+也可以生成本地向量索引文件（--local-index），供 NodePrefabRecommend 离线检索。
+该功能按文件路径加载仓库中的 gtplanner/agent/utils/prefab_vector_index.py（只依赖标准库，
+安装了 numpy 时可对大目录做IVF分区），同样不导入 gtplanner 包。
+
 用法:
-    python build_index.py --vector-service-url <URL> [--input <JSON_PATH>]
+    python build_index.py --vector-service-url <URL> [--input <JSON_PATH>] [--incremental]
+    python build_index.py --local-index [--dtype int8] [--partitions auto]
 
 环境变量:
     VECTOR_SERVICE_URL: 向量服务地址（可选，优先级低于命令行参数）
 """
 
 import argparse
+import hashlib
+import importlib.util
 import json
 import sys
 import os
 import time
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
 
 # 默认配置
@@ -28,6 +42,66 @@ DEFAULT_INDEX_NAME = "document_gtplanner_prefabs"
 DEFAULT_VECTOR_FIELD = "combined_text"
 DEFAULT_VECTOR_DIMENSION = 1024
 DEFAULT_TIMEOUT = 30
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_BATCH_BYTES = 1024 * 1024
+DEFAULT_CONCURRENCY = 4
+
+# 增量同步清单格式版本；内容哈希不包含每次构建都会变化的时间戳字段
+MANIFEST_VERSION = 1
+VOLATILE_FIELDS = ("created_at", "updated_at")
+
+# 索引信息（GET /index/<name>）中表示文档数的字段
+INDEX_COUNT_FIELDS = ("document_count", "documents_count", "doc_count", "count", "total")
+
+
+def load_vector_index_module():
+    """按文件路径加载本地向量索引模块（脚本位于 prefabs/releases/scripts/）"""
+    module_path = Path(__file__).resolve().parents[3] / "gtplanner" / "agent" / "utils" / "prefab_vector_index.py"
+    spec = importlib.util.spec_from_file_location("prefab_vector_index", module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_local_index(input_json: Path, prefabs: List[Dict], output: Path = None,
+                      dtype: str = "float16", partitions: str = "auto") -> Dict[str, Any]:
+    """
+    生成本地向量索引文件（<stem>.vectors.json 元数据 + <stem>.vectors.bin 向量）
+
+    Args:
+        input_json: community-prefabs.json 路径（用于计算目录指纹）
+        prefabs: 预制件列表
+        output: 元数据文件路径，默认与目录文件同目录
+        dtype: 向量存储精度 float16 / int8
+        partitions: IVF分区数，auto 表示按目录大小自动决定
+
+    Returns:
+        构建结果
+    """
+    vector_index = load_vector_index_module()
+    output = output or vector_index.default_index_path(input_json)
+
+    start_time = time.time()
+    documents = [vector_index.prefab_to_document(prefab) for prefab in prefabs]
+    index = vector_index.PrefabVectorIndex.build(
+        documents,
+        dtype=dtype,
+        partitions=partitions if partitions == "auto" else int(partitions),
+        catalog_sha256=vector_index.catalog_fingerprint(input_json)
+    )
+    bin_path = index.save(output)
+
+    result = {
+        "local_index": str(output),
+        "documents": len(index),
+        "dimension": index.dimension,
+        "dtype": dtype,
+        "partitions": index.partitions,
+        "bytes": bin_path.stat().st_size,
+        "elapsed_time": round(time.time() - start_time, 2)
+    }
+    print(f"✅ 本地向量索引已生成: {output} ({result['documents']} 个文档, {result['bytes']} 字节)")
+    return result
 
 
 def check_vector_service_available(vector_service_url: str) -> bool:
@@ -84,20 +158,153 @@ def convert_prefab_to_document(prefab: Dict) -> Dict[str, Any]:
     return document
 
 
+def document_content_hash(document: Dict[str, Any]) -> str:
+    """计算文档内容哈希（不含每次构建都会变化的时间戳字段）"""
+    content = {key: value for key, value in document.items() if key not in VOLATILE_FIELDS}
+    payload = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def default_manifest_path(input_json: Path) -> Path:
+    """默认清单路径：与目录文件同目录的 <stem>.index-manifest.json"""
+    return input_json.with_name(f"{input_json.stem}.index-manifest.json")
+
+
+def load_manifest(manifest_path: Path, index_name: str, vector_field: str) -> Optional[Dict[str, Dict[str, str]]]:
+    """
+    读取上次成功同步的清单
+
+    Returns:
+        文档ID -> {"version", "hash"}；清单不存在、损坏或与当前索引配置不一致时返回 None（需要全量重建）
+    """
+    if manifest_path is None or not manifest_path.exists():
+        return None
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  清单文件无法读取，将全量重建: {e}")
+        return None
+
+    if (manifest.get("manifest_version") != MANIFEST_VERSION
+            or manifest.get("index_name") != index_name
+            or manifest.get("vector_field") != vector_field):
+        print(f"⚠️  清单与当前索引配置不一致，将全量重建")
+        return None
+    return manifest.get("documents") or {}
+
+
+def save_manifest(manifest_path: Path, index_name: str, vector_field: str,
+                  entries: Dict[str, Dict[str, str]]) -> None:
+    """原子写入清单（先写临时文件再替换）"""
+    manifest = {
+        "manifest_version": MANIFEST_VERSION,
+        "index_name": index_name,
+        "vector_field": vector_field,
+        "updated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "documents": dict(sorted(entries.items())),
+    }
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def diff_documents(documents: List[Dict], entries: Dict[str, Dict[str, str]]
+                   ) -> Tuple[List[Dict], List[str], Dict[str, Dict[str, str]]]:
+    """
+    对比当前文档与清单
+
+    Returns:
+        (新增或内容变化的文档, 已从目录移除的文档ID, 当前文档ID -> 清单条目)
+    """
+    current = {}
+    changed = []
+    for document in documents:
+        entry = {"version": document.get("version", ""), "hash": document_content_hash(document)}
+        current[document["id"]] = entry
+        if entries.get(document["id"]) != entry:
+            changed.append(document)
+    removed = sorted(doc_id for doc_id in entries if doc_id not in current)
+    return changed, removed, current
+
+
+def get_index_document_count(session: requests.Session, vector_service_url: str, index_name: str,
+                             timeout: int) -> Optional[int]:
+    """
+    获取索引中的文档数（GET /index/<name>）
+
+    Returns:
+        文档数；索引不存在、请求失败或响应中没有文档数字段时返回 None
+    """
+    try:
+        response = session.get(f"{vector_service_url}/index/{index_name}", timeout=timeout)
+        if response.status_code != 200:
+            return None
+        info = response.json()
+    except Exception:
+        return None
+
+    for container in (info, info.get("data"), info.get("stats")) if isinstance(info, dict) else ():
+        if not isinstance(container, dict):
+            continue
+        for field in INDEX_COUNT_FIELDS:
+            if isinstance(container.get(field), int):
+                return container[field]
+    return None
+
+
+def split_batches(documents: List[Dict], batch_size: int = DEFAULT_BATCH_SIZE,
+                  max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES) -> List[List[Dict]]:
+    """按文档数和请求体大小切分批次（单个超大文档独占一批）"""
+    batches, batch, batch_bytes = [], [], 0
+    for document in documents:
+        size = len(json.dumps(document, ensure_ascii=False).encode("utf-8"))
+        if batch and (len(batch) >= batch_size or batch_bytes + size > max_batch_bytes):
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(document)
+        batch_bytes += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _create_session(concurrency: int) -> requests.Session:
+    """创建连接池大小与并发数匹配的会话"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max(1, concurrency))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Content-Type"] = "application/json"
+    return session
+
+
 def call_vector_service_index(
     vector_service_url: str,
     index_name: str,
     documents: List[Dict],
     vector_field: str,
     force_reindex: bool,
-    timeout: int
+    timeout: int,
+    manifest_path: Optional[Path] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    incremental: bool = False
 ) -> Dict[str, Any]:
     """
     调用向量服务建立索引
 
     步骤：
-    1. 创建索引（如果需要）
-    2. 添加文档
+    1. 增量模式下读取清单，并核对索引文档数；非增量模式、没有可用清单、文档数不一致
+       或强制重建时清空索引，按全量处理
+    2. 创建索引（如果需要）
+    3. 删除目录中已移除的文档
+    4. 分批并发写入新增或变化的文档（按文档ID覆盖）
+    5. 写回清单（只记录写入成功的文档，失败的批次下次运行会重试）
+    6. 增量模式下再次核对索引文档数，不一致时删除清单并报错
 
     Args:
         vector_service_url: 向量服务地址
@@ -106,17 +313,34 @@ def call_vector_service_index(
         vector_field: 向量字段名
         force_reindex: 是否强制重建
         timeout: 请求超时时间
+        manifest_path: 清单路径，为空时每次都全量重建
+        batch_size: 每批最多文档数
+        max_batch_bytes: 每批请求体最大字节数
+        concurrency: 并发请求数
+        incremental: 是否按清单增量同步（默认全量重建）
 
     Returns:
         索引结果
     """
-    # 1. 如果强制重建，先清空索引
-    if force_reindex:
+    session = _create_session(concurrency)
+    entries = None
+    if incremental and not force_reindex:
+        entries = load_manifest(manifest_path, index_name, vector_field)
+    if entries is not None:
+        index_count = get_index_document_count(session, vector_service_url, index_name, timeout)
+        if index_count is None:
+            print(f"⚠️  无法获取索引文档数，无法确认清单与索引一致，将全量重建")
+            entries = None
+        elif index_count != len(entries):
+            print(f"⚠️  索引文档数 {index_count} 与清单 {len(entries)} 不一致，将全量重建")
+            entries = None
+    mode = "incremental" if entries is not None else "full"
+
+    # 1. 全量模式下先清空索引
+    if entries is None:
+        entries = {}
         try:
-            requests.delete(
-                f"{vector_service_url}/index/{index_name}/clear",
-                timeout=timeout
-            )
+            session.delete(f"{vector_service_url}/index/{index_name}/clear", timeout=timeout)
             print(f"🗑️  已清空旧索引")
         except Exception as e:
             print(f"⚠️  清空索引失败（可能索引不存在）: {e}")
@@ -128,11 +352,10 @@ def call_vector_service_index(
         "description": f"预制件索引: {index_name}"
     }
 
-    response = requests.put(
+    response = session.put(
         f"{vector_service_url}/index/{index_name}",
         json=create_index_request,
-        timeout=timeout,
-        headers={"Content-Type": "application/json"}
+        timeout=timeout
     )
 
     if response.status_code != 200:
@@ -141,39 +364,108 @@ def call_vector_service_index(
 
     print(f"✅ 索引已就绪: {index_name}")
 
-    # 3. 添加文档
-    create_docs_request = {
-        "documents": documents,
-        "vector_field": vector_field,
-        "index": index_name
-    }
+    changed, removed, current = diff_documents(documents, entries)
+    print(f"🔍 同步模式: {mode}，新增/变化 {len(changed)}，删除 {len(removed)}，"
+          f"未变化 {len(documents) - len(changed)}")
+
+    # 3. 删除已移除的文档
+    for start in range(0, len(removed), batch_size):
+        ids = removed[start:start + batch_size]
+        response = session.delete(
+            f"{vector_service_url}/documents",
+            json={"index": index_name, "ids": ids},
+            timeout=timeout
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"删除文档失败: {response.status_code}, {response.text}")
+        for doc_id in ids:
+            entries.pop(doc_id, None)
+        print(f"🗑️  已删除 {len(ids)} 个文档: {', '.join(ids)}")
+
+    # 4. 分批并发写入
+    def upload(batch: List[Dict]) -> int:
+        response = session.post(
+            f"{vector_service_url}/documents",
+            json={"documents": batch, "vector_field": vector_field, "index": index_name},
+            timeout=timeout
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.status_code}, {response.text}")
+        return response.json().get("count", len(batch))
 
-    response = requests.post(
-        f"{vector_service_url}/documents",
-        json=create_docs_request,
-        timeout=timeout,
-        headers={"Content-Type": "application/json"}
-    )
+    batches = split_batches(changed, batch_size, max_batch_bytes)
+    indexed_count, done, errors = 0, 0, []
+    start_time = time.time()
 
-    if response.status_code == 200:
-        result = response.json()
-        print(f"✅ 已添加 {result.get('count', 0)} 个文档到索引: {index_name}")
-        return result
-    else:
-        error_msg = f"添加文档失败: {response.status_code}, {response.text}"
-        raise RuntimeError(error_msg)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(upload, batch): batch for batch in batches}
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                indexed_count += future.result()
+            except Exception as e:
+                errors.append(f"{batch[0]['id']}..{batch[-1]['id']}: {e}")
+                print(f"❌ 批次写入失败 ({len(batch)} 个文档): {e}")
+                continue
+            for document in batch:
+                entries[document["id"]] = current[document["id"]]
+            done += len(batch)
+            elapsed = max(time.time() - start_time, 1e-6)
+            print(f"   [{done}/{len(changed)}] +{len(batch)} 文档，{done / elapsed:.1f} 文档/秒")
+
+    upload_time = time.time() - start_time
+    if manifest_path is not None:
+        save_manifest(manifest_path, index_name, vector_field, entries)
+
+    if errors:
+        raise RuntimeError(f"{len(errors)}/{len(batches)} 个批次写入失败: {'; '.join(errors)}")
+
+    # 6. 核对增量同步结果（写入没有按ID覆盖或删除没有生效时文档数会对不上）
+    if mode == "incremental":
+        index_count = get_index_document_count(session, vector_service_url, index_name, timeout)
+        if index_count is not None and index_count != len(entries):
+            if manifest_path is not None:
+                manifest_path.unlink(missing_ok=True)
+            raise RuntimeError(
+                f"增量同步后索引文档数 {index_count} 与清单 {len(entries)} 不一致，"
+                f"已删除清单，请使用全量重建"
+            )
+
+    print(f"✅ 已写入 {indexed_count} 个文档到索引: {index_name}")
+    return {
+        "mode": mode,
+        "count": indexed_count,
+        "upserted": len(changed),
+        "deleted": len(removed),
+        "unchanged": len(documents) - len(changed),
+        "batches": len(batches),
+        "docs_per_second": round(len(changed) / upload_time, 1) if upload_time > 0 else None
+    }
 
 
-def build_index(vector_service_url: str, input_json: Path):
+def build_index(vector_service_url: str, input_json: Path, local_index: Path = None,
+                dtype: str = "float16", partitions: str = "auto", full_rebuild: bool = False,
+                manifest_path: Path = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES, concurrency: int = DEFAULT_CONCURRENCY,
+                incremental: bool = False):
     """
     构建预制件索引
 
     Args:
-        vector_service_url: 向量服务地址
+        vector_service_url: 向量服务地址（为空时只生成本地向量索引）
         input_json: community-prefabs.json 路径
+        local_index: 本地向量索引元数据路径（为空时不生成）
+        dtype: 本地向量存储精度
+        partitions: 本地向量索引的IVF分区数
+        full_rebuild: 是否忽略清单、清空索引后全量写入（优先于 incremental）
+        manifest_path: 增量同步清单路径，默认与目录文件同目录
+        batch_size: 每批最多文档数
+        max_batch_bytes: 每批请求体最大字节数
+        concurrency: 并发请求数
+        incremental: 是否按清单增量同步
     """
     print(f"🚀 Starting prefab index build")
-    print(f"   Vector Service: {vector_service_url}")
+    print(f"   Vector Service: {vector_service_url or '-'}")
     print(f"   Input JSON: {input_json}")
 
     # 1. 验证输入文件
@@ -186,6 +478,17 @@ def build_index(vector_service_url: str, input_json: Path):
 
     print(f"📦 Loaded {len(prefabs)} prefabs from {input_json.name}")
 
+    if local_index is not None:
+        try:
+            local_result = build_local_index(input_json, prefabs, local_index or None, dtype, partitions)
+            print(json.dumps(local_result, indent=2, ensure_ascii=False))
+        except Exception as e:
+            print(f"❌ Failed to build local vector index: {e}")
+            sys.exit(1)
+
+    if not vector_service_url:
+        return
+
     # 2. 检查向量服务是否可用
     if not check_vector_service_available(vector_service_url):
         print(f"❌ Vector service is not available at {vector_service_url}")
@@ -217,8 +520,13 @@ def build_index(vector_service_url: str, input_json: Path):
             index_name=DEFAULT_INDEX_NAME,
             documents=documents,
             vector_field=DEFAULT_VECTOR_FIELD,
-            force_reindex=True,
-            timeout=DEFAULT_TIMEOUT
+            force_reindex=full_rebuild,
+            timeout=DEFAULT_TIMEOUT,
+            manifest_path=manifest_path or default_manifest_path(input_json),
+            batch_size=batch_size,
+            max_batch_bytes=max_batch_bytes,
+            concurrency=concurrency,
+            incremental=incremental
         )
 
         elapsed_time = time.time() - start_time
@@ -226,7 +534,8 @@ def build_index(vector_service_url: str, input_json: Path):
         # 5. 输出结果
         print(f"\n✅ Index build completed successfully!")
         print(f"   Index Name: {DEFAULT_INDEX_NAME}")
-        print(f"   Indexed Count: {len(documents)}")
+        print(f"   Mode: {result['mode']}")
+        print(f"   Upserted: {result['upserted']}  Deleted: {result['deleted']}  Unchanged: {result['unchanged']}")
         print(f"   Elapsed Time: {round(elapsed_time, 2)}s")
 
         # 输出详细结果（JSON 格式，便于 CI/CD 解析）
@@ -234,7 +543,8 @@ def build_index(vector_service_url: str, input_json: Path):
         build_result = {
             "success": True,
             "index_name": DEFAULT_INDEX_NAME,
-            "indexed_count": len(documents),
+            "indexed_count": result["count"],
+            "documents": len(documents),
             "elapsed_time": round(elapsed_time, 2),
             "vector_service_url": vector_service_url,
             **result
@@ -261,6 +571,9 @@ Examples:
   python build_index.py --vector-service-url http://localhost:8000 \\
     --input /path/to/community-prefabs.json
 
+  # Only sync documents changed since the last run (manifest-based)
+  python build_index.py --vector-service-url http://localhost:8000 --incremental
+
   # Use environment variable for vector service URL
   export VECTOR_SERVICE_URL=http://localhost:8000
   python build_index.py
@@ -279,11 +592,73 @@ Examples:
         default=None
     )
 
+    parser.add_argument(
+        "--local-index",
+        nargs="?",
+        const="",
+        default=None,
+        help="Also write an embedded vector index (default path: <input>.vectors.json next to the input)"
+    )
+
+    parser.add_argument(
+        "--dtype",
+        choices=["float16", "int8"],
+        default="float16",
+        help="Storage precision of the local vectors (default: float16)"
+    )
+
+    parser.add_argument(
+        "--partitions",
+        default="auto",
+        help="IVF partitions of the local index: auto, 0 (none) or a number (requires numpy)"
+    )
+
+    sync_mode = parser.add_mutually_exclusive_group()
+    sync_mode.add_argument(
+        "--full",
+        action="store_true",
+        help="Clear the index and upload every document (default)"
+    )
+    sync_mode.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only upload changed documents and delete removed ones, based on the manifest of the last run "
+             "(requires the vector service to replace documents by id; falls back to --full when the "
+             "index document count does not match the manifest)"
+    )
+
+    parser.add_argument(
+        "--manifest",
+        default=None,
+        help="Path of the incremental sync manifest (default: <input>.index-manifest.json next to the input)"
+    )
+
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Maximum documents per upload request (default: {DEFAULT_BATCH_SIZE})"
+    )
+
+    parser.add_argument(
+        "--max-batch-bytes",
+        type=int,
+        default=DEFAULT_MAX_BATCH_BYTES,
+        help=f"Maximum JSON size of one upload request (default: {DEFAULT_MAX_BATCH_BYTES})"
+    )
+
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Parallel upload requests (default: {DEFAULT_CONCURRENCY})"
+    )
+
     args = parser.parse_args()
 
     # 验证参数
-    if not args.vector_service_url:
-        print("❌ Error: --vector-service-url is required")
+    if not args.vector_service_url and args.local_index is None:
+        print("❌ Error: --vector-service-url is required (or use --local-index)")
         print("   Either provide it via command line or set VECTOR_SERVICE_URL environment variable")
         parser.print_help()
         sys.exit(1)
@@ -297,7 +672,16 @@ Examples:
         input_json = script_dir.parent / "community-prefabs.json"
 
     # 构建索引
-    build_index(args.vector_service_url, input_json)
+    local_index = Path(args.local_index) if args.local_index else args.local_index
+    build_index(
+        args.vector_service_url, input_json, local_index, args.dtype, args.partitions,
+        full_rebuild=args.full,
+        incremental=args.incremental,
+        manifest_path=Path(args.manifest) if args.manifest else None,
+        batch_size=args.batch_size,
+        max_batch_bytes=args.max_batch_bytes,
+        concurrency=args.concurrency
+    )
 
 
 if __name__ == "__main__":
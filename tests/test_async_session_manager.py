@@ -0,0 +1,97 @@
+"""
+异步会话管理器测试
+
+测试数据库读写在后台线程执行、一次处理结果在单个事务中写入，以及写入失败时整体回滚。
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import pytest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.agent.context_types import AgentResult, Message, MessageRole
+from gtplanner.agent.persistence.async_session_manager import get_async_session_manager
+from gtplanner.agent.persistence.connection_pool import close_connection_pools
+from gtplanner.agent.persistence.sqlite_session_manager import SQLiteSessionManager
+
+
+def _message(role, content, **kwargs):
+    return Message(role=role, content=content, timestamp="2025-01-01T00:00:00", **kwargs)
+
+
+def _agent_result(*messages):
+    return AgentResult(success=True, new_messages=list(messages))
+
+
+@pytest.mark.asyncio
+async def test_agent_result_saved_in_one_transaction_off_loop(tmp_path):
+    """测试结果保存在写线程中执行，且只提交一次事务"""
+    manager = SQLiteSessionManager(str(tmp_path / "async.db"))
+    store = get_async_session_manager(manager)
+    try:
+        session_id = await store.create_new_session("async")
+
+        commits = []
+        with manager.dao.transaction() as conn:
+            conn.set_trace_callback(
+                lambda sql: commits.append(threading.current_thread().name) if sql.strip().upper() == "COMMIT" else None
+            )
+
+        result = _agent_result(
+            _message(MessageRole.ASSISTANT, "调用工具", tool_calls=[{"id": "call_1"}]),
+            _message(MessageRole.TOOL, '{"ok": true}', tool_call_id="call_1"),
+            _message(MessageRole.ASSISTANT, "完成"),
+        )
+        assert await store.update_from_agent_result(result, user_input="开始")
+
+        assert len(commits) == 1
+        assert commits[0].startswith("gtplanner-db-writer")
+        assert threading.current_thread().name not in commits
+
+        context = await store.build_agent_context()
+        assert [m.content for m in context.dialogue_history] == ["开始", "调用工具", '{"ok": true}', "完成"]
+        assert context.session_id == session_id
+    finally:
+        await store.close()
+        close_connection_pools()
+
+
+@pytest.mark.asyncio
+async def test_failed_save_rolls_back_whole_result(tmp_path):
+    """测试任一消息写入失败时，本次结果的所有写入都回滚"""
+    manager = SQLiteSessionManager(str(tmp_path / "rollback.db"))
+    store = get_async_session_manager(manager)
+    try:
+        session_id = await store.create_new_session("rollback")
+
+        result = _agent_result(
+            _message(MessageRole.ASSISTANT, "第一条"),
+            _message(MessageRole.ASSISTANT, None),  # content为None，写入失败
+        )
+        assert not await store.update_from_agent_result(result, user_input="开始")
+
+        assert await store.get_messages(session_id=session_id) == []
+        context = await store.build_agent_context()
+        assert context.dialogue_history == []
+
+        # 事件循环在数据库操作期间保持响应
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        for i in range(20):
+            await store.add_user_message(f"消息 {i}")
+        task.cancel()
+        assert ticks > 0
+    finally:
+        await store.close()
+        close_connection_pools()
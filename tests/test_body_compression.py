@@ -0,0 +1,175 @@
+"""
+消息正文压缩测试
+
+测试超过阈值的正文透明压缩、全文搜索读取解码后的正文、compact()重新压缩历史数据并清除失效的索引条目，
+以及没有注册解码函数的连接也能写入消息表。
+"""
+
+import sys
+import os
+import json
+import sqlite3
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.agent.persistence.connection_pool import close_connection_pools
+from gtplanner.agent.persistence.database_schema import DatabaseSchema, migrate_database
+from gtplanner.agent.persistence.sqlite_session_manager import SQLiteSessionManager
+
+
+def _large_body(marker):
+    """模拟体积较大的工具结果JSON"""
+    return json.dumps({"marker": marker, "nodes": [{"name": f"节点{i}", "desc": "处理用户请求" * 5} for i in range(50)]},
+                      ensure_ascii=False)
+
+
+def test_large_body_round_trip_and_search(tmp_path):
+    """测试大正文压缩存储、读取还原，且全文搜索和片段不受影响"""
+    manager = SQLiteSessionManager(str(tmp_path / "compress.db"))
+    try:
+        session_id = manager.create_new_session("压缩")
+        body = _large_body("独角兽标记")
+        manager.add_user_message("短消息")
+        manager.add_tool_message(body, tool_call_id="call_1")
+
+        messages = manager.get_messages()
+        assert [m["content"] for m in messages] == ["短消息", body]
+
+        with manager.dao.get_connection() as conn:
+            rows = conn.execute(
+                "SELECT content, content_codec FROM messages ORDER BY rowid"
+            ).fetchall()
+        assert rows[0]["content_codec"] is None
+        assert rows[1]["content_codec"] == "zlib"
+        assert isinstance(rows[1]["content"], bytes) and len(rows[1]["content"]) < len(body.encode("utf-8"))
+
+        context = manager.dao.get_active_compressed_context(session_id)
+        assert context["compressed_messages"][1]["content"] == body
+
+        hits = manager.dao.search_messages("独角兽标记")
+        assert len(hits) == 1 and "[独角兽标记]" in hits[0]["snippet"]
+        assert manager.dao.search_messages("独角")[0]["message_id"] == messages[1]["message_id"]
+    finally:
+        close_connection_pools()
+
+
+def test_compact_recompresses_existing_rows(tmp_path, monkeypatch):
+    """测试关闭压缩时写入的历史正文可由compact()重新压缩，并在存储统计中体现"""
+    db_path = str(tmp_path / "compact.db")
+    monkeypatch.setenv("GTPLANNER_DB_COMPRESSION_CODEC", "none")
+    manager = SQLiteSessionManager(db_path)
+    try:
+        session_id = manager.create_new_session("历史数据")
+        body = _large_body("历史正文")
+        manager.add_tool_message(body, tool_call_id="call_1")
+        storage = manager.get_global_statistics()["storage"]
+        assert storage["messages"] == {"none": {"rows": 1, "bytes": len(body.encode("utf-8"))}}
+    finally:
+        close_connection_pools()
+
+    monkeypatch.setenv("GTPLANNER_DB_COMPRESSION_CODEC", "zlib")
+    manager = SQLiteSessionManager(db_path)
+    try:
+        result = manager.dao.compact()
+        assert result["recompressed_rows"] == 2  # 消息表和压缩上下文各一行
+
+        storage = manager.get_global_statistics()["storage"]
+        assert set(storage["messages"]) == {"zlib"}
+        assert set(storage["compressed_context_messages"]) == {"zlib"}
+        assert result["after"]["wal_bytes"] == 0
+
+        assert manager.get_messages(session_id=session_id)[0]["content"] == body
+        assert len(manager.dao.search_messages("历史正文")) == 1
+    finally:
+        close_connection_pools()
+
+
+def test_plain_connection_can_write_messages(tmp_path):
+    """测试没有注册解码函数的连接（如sqlite3命令行）可以写入消息，且写入的正文可被搜索"""
+    db_path = str(tmp_path / "plain.db")
+    manager = SQLiteSessionManager(db_path)
+    try:
+        session_id = manager.create_new_session("外部写入")
+        manager.add_tool_message(_large_body("压缩标记"), tool_call_id="call_1")
+    finally:
+        close_connection_pools()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO messages (message_id, session_id, role, content) VALUES ('external', ?, 'user', '命令行写入的消息')",
+        (session_id,)
+    )
+    conn.execute("UPDATE messages SET content = '命令行修改后的消息' WHERE message_id = 'external'")
+    conn.commit()
+    conn.close()
+
+    manager = SQLiteSessionManager(db_path)
+    try:
+        assert [h["message_id"] for h in manager.dao.search_messages("命令行修改")] == ["external"]
+        assert manager.dao.search_messages("命令行写入") == []
+        assert len(manager.dao.search_messages("压缩标记")) == 1
+    finally:
+        close_connection_pools()
+
+
+def test_compact_clears_index_entries_of_cascade_deleted_messages(tmp_path):
+    """测试在DAO之外级联删除压缩消息留下的全文索引条目由compact()清除"""
+    db_path = str(tmp_path / "cascade.db")
+    manager = SQLiteSessionManager(db_path)
+    try:
+        session_id = manager.create_new_session("级联删除")
+        manager.add_tool_message(_large_body("级联标记"), tool_call_id="call_1")
+        manager.add_user_message("未压缩的级联标记")
+    finally:
+        close_connection_pools()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+    conn.commit()
+
+    def postings():
+        return conn.execute("SELECT COUNT(*) FROM messages_fts WHERE messages_fts MATCH '级联标记'").fetchone()[0]
+
+    assert conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 0
+    assert postings() == 1  # 压缩正文的条目无法由触发器删除
+
+    manager = SQLiteSessionManager(db_path)
+    try:
+        assert manager.dao.search_messages("级联标记") == []
+        manager.dao.compact()
+        assert postings() == 0
+    finally:
+        conn.close()
+        close_connection_pools()
+
+
+def test_migration_to_v7_replaces_decode_triggers(tmp_path):
+    """测试从v6升级时把依赖解码函数的全文索引触发器替换掉"""
+    db_path = str(tmp_path / "v6.db")
+    manager = SQLiteSessionManager(db_path)
+    session_id = manager.create_new_session("v6")
+    close_connection_pools()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP TRIGGER messages_fts_insert")
+    conn.execute("""
+        CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts (rowid, content)
+            VALUES (NEW.rowid, gtplanner_decode(NEW.content, NEW.content_codec));
+        END
+    """)
+    conn.execute("UPDATE database_metadata SET value = '6' WHERE key = 'schema_version'")
+    conn.commit()
+    conn.close()
+
+    assert migrate_database(db_path) == DatabaseSchema.CURRENT_VERSION
+
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO messages (message_id, session_id, role, content) VALUES ('m1', ?, 'user', '迁移后写入')",
+        (session_id,)
+    )
+    conn.commit()
+    conn.close()
@@ -0,0 +1,177 @@
+"""
+预制件索引增量同步测试
+
+按文件路径加载 prefabs/releases/scripts/build_index.py（与CI中的用法一致，不导入 gtplanner 包），
+用记录请求的假会话代替向量服务，测试默认全量重建、清单对比、分批写入、删除已移除文档、
+失败批次的重试，以及索引文档数与清单不一致时回退为全量重建。
+"""
+
+import sys
+import os
+import importlib.util
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCRIPT_PATH = Path(__file__).resolve().parent.parent / "prefabs" / "releases" / "scripts" / "build_index.py"
+spec = importlib.util.spec_from_file_location("build_index", SCRIPT_PATH)
+build_index = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(build_index)
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, payload=None):
+        self.status_code = status_code
+        self.text = json.dumps(payload or {})
+        self._payload = payload or {}
+
+    def json(self):
+        return self._payload
+
+
+class FakeSession:
+    """
+    记录请求的假向量服务，fail_ids 中的文档所在批次返回500
+
+    indexed 模拟索引中的文档；replace_by_id 为 False 时模拟写入不按ID覆盖（重复写入会追加）。
+    """
+
+    def __init__(self, fail_ids=(), indexed=None, replace_by_id=True):
+        self.fail_ids = set(fail_ids)
+        self.indexed = list(indexed or [])
+        self.replace_by_id = replace_by_id
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def _record(self, method, url, json=None):
+        with self.lock:
+            self.calls.append((method, url.split("/", 3)[-1], json))
+
+    def get(self, url, timeout=None):
+        self._record("GET", url)
+        return FakeResponse(200, {"name": "idx", "document_count": len(self.indexed)})
+
+    def put(self, url, json=None, timeout=None):
+        self._record("PUT", url, json)
+        return FakeResponse()
+
+    def delete(self, url, json=None, timeout=None):
+        self._record("DELETE", url, json)
+        with self.lock:
+            if url.endswith("/clear"):
+                self.indexed = []
+            else:
+                self.indexed = [doc_id for doc_id in self.indexed if doc_id not in json["ids"]]
+        return FakeResponse()
+
+    def post(self, url, json=None, timeout=None):
+        self._record("POST", url, json)
+        if any(doc["id"] in self.fail_ids for doc in json["documents"]):
+            return FakeResponse(500, {"detail": "boom"})
+        with self.lock:
+            for doc in json["documents"]:
+                if not self.replace_by_id or doc["id"] not in self.indexed:
+                    self.indexed.append(doc["id"])
+        return FakeResponse(200, {"count": len(json["documents"])})
+
+    def uploaded_ids(self):
+        return sorted(doc["id"] for method, _, body in self.calls if method == "POST" for doc in body["documents"])
+
+    def deleted_ids(self):
+        return sorted(doc_id for method, path, body in self.calls
+                      if method == "DELETE" and body for doc_id in body["ids"])
+
+    def cleared(self):
+        return any(method == "DELETE" and path.endswith("/clear") for method, path, _ in self.calls)
+
+
+def _prefab(prefab_id, description="desc", version="1.0.0"):
+    return {"id": prefab_id, "name": prefab_id.title(), "description": description, "tags": ["t"],
+            "version": version, "author": "alice", "repo_url": f"https://github.com/alice/{prefab_id}"}
+
+
+def _sync(monkeypatch, manifest_path, prefabs, session=None, incremental=True, **kwargs):
+    session = session or FakeSession()
+    monkeypatch.setattr(build_index, "_create_session", lambda concurrency: session)
+    documents = [build_index.convert_prefab_to_document(prefab) for prefab in prefabs]
+    result = build_index.call_vector_service_index(
+        "http://vector", "idx", documents, "combined_text", force_reindex=False, timeout=5,
+        manifest_path=manifest_path, batch_size=2, concurrency=3, incremental=incremental, **kwargs
+    )
+    return session, result
+
+
+def test_incremental_sync_upserts_changed_and_deletes_removed(tmp_path, monkeypatch):
+    """测试首次全量写入并生成清单，之后只同步变化：未变化时不写入，修改/新增/删除各自生效"""
+    manifest_path = tmp_path / "community-prefabs.index-manifest.json"
+    prefabs = [_prefab(f"p{i}") for i in range(5)]
+
+    session, result = _sync(monkeypatch, manifest_path, prefabs)
+    assert session.cleared() and result["mode"] == "full"
+    assert session.uploaded_ids() == [f"p{i}" for i in range(5)]
+    assert result["batches"] == 3 and result["count"] == 5
+    assert set(json.loads(manifest_path.read_text(encoding="utf-8"))["documents"]) == {f"p{i}" for i in range(5)}
+
+    # 时间戳每次都会变化，但不影响内容哈希
+    index = session.indexed
+    session, result = _sync(monkeypatch, manifest_path, prefabs, session=FakeSession(indexed=index))
+    assert not session.cleared() and result["mode"] == "incremental"
+    assert session.uploaded_ids() == [] and result["unchanged"] == 5 and result["count"] == 0
+
+    updated = [prefabs[0], _prefab("p1", description="new"), prefabs[2], _prefab("p3", version="2.0.0"),
+               _prefab("p9")]
+    session, result = _sync(monkeypatch, manifest_path, updated, session=FakeSession(indexed=session.indexed))
+    assert session.uploaded_ids() == ["p1", "p3", "p9"]
+    assert session.deleted_ids() == ["p4"]
+    assert (result["upserted"], result["deleted"], result["unchanged"]) == (3, 1, 2)
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))["documents"]
+    assert set(manifest) == {"p0", "p1", "p2", "p3", "p9"} and manifest["p3"]["version"] == "2.0.0"
+
+    # 索引配置变化时清单失效，自动全量重建
+    assert build_index.load_manifest(manifest_path, "other_index", "combined_text") is None
+
+
+def test_failed_batches_are_retried_next_run(tmp_path, monkeypatch):
+    """测试部分批次失败时报错，清单只记录成功写入的文档，下次运行只重试失败的文档"""
+    manifest_path = tmp_path / "manifest.json"
+    prefabs = [_prefab(f"p{i}") for i in range(6)]
+
+    failing = FakeSession(fail_ids={"p3"})
+    with pytest.raises(RuntimeError, match="1/3"):
+        _sync(monkeypatch, manifest_path, prefabs, session=failing)
+    assert set(json.loads(manifest_path.read_text(encoding="utf-8"))["documents"]) == {"p0", "p1", "p4", "p5"}
+
+    session, result = _sync(monkeypatch, manifest_path, prefabs, session=FakeSession(indexed=failing.indexed))
+    assert session.uploaded_ids() == ["p2", "p3"] and result["mode"] == "incremental"
+
+    # 批次同时受文档数和请求体大小限制，超大文档独占一批
+    documents = [{"id": "a", "text": "x" * 10}, {"id": "b", "text": "x" * 500}, {"id": "c", "text": "x"}]
+    batches = build_index.split_batches(documents, batch_size=10, max_batch_bytes=200)
+    assert [[doc["id"] for doc in batch] for batch in batches] == [["a"], ["b"], ["c"]]
+
+
+def test_full_rebuild_by_default_and_count_checked_against_manifest(tmp_path, monkeypatch):
+    """测试默认全量重建；增量模式下索引文档数与清单不一致时回退为全量，写入未按ID覆盖时报错"""
+    manifest_path = tmp_path / "manifest.json"
+    prefabs = [_prefab(f"p{i}") for i in range(4)]
+
+    session, result = _sync(monkeypatch, manifest_path, prefabs)
+    session, result = _sync(monkeypatch, manifest_path, prefabs, session=FakeSession(indexed=session.indexed),
+                            incremental=False)
+    assert session.cleared() and result["mode"] == "full" and result["count"] == 4
+
+    # 索引被其他途径清空，清单仍记录4个文档
+    session, result = _sync(monkeypatch, manifest_path, prefabs, session=FakeSession())
+    assert session.cleared() and result["mode"] == "full"
+    assert session.uploaded_ids() == [f"p{i}" for i in range(4)]
+
+    # 向量服务不按ID覆盖：同步后文档数对不上，删除清单，下次全量重建
+    duplicating = FakeSession(indexed=session.indexed, replace_by_id=False)
+    with pytest.raises(RuntimeError, match="不一致"):
+        _sync(monkeypatch, manifest_path, [_prefab("p0", description="new")] + prefabs[1:], session=duplicating)
+    assert not manifest_path.exists()
@@ -0,0 +1,155 @@
+"""
+压缩上下文追加存储测试
+
+测试消息以行的形式追加到compressed_context_messages表、计数增量维护，
+以及旧版本数据库（消息存放在JSON数组中）的迁移。
+"""
+
+import sys
+import os
+import json
+import sqlite3
+import threading
+
+import pytest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.agent.persistence.connection_pool import close_connection_pools
+from gtplanner.agent.persistence.database_dao import DatabaseDAO
+from gtplanner.agent.persistence import database_schema
+from gtplanner.agent.persistence.database_schema import DatabaseSchema, initialize_database, migrate_database
+from gtplanner.agent.persistence.sqlite_session_manager import SQLiteSessionManager
+
+
+def test_append_messages_as_rows(tmp_path):
+    """测试追加消息只插入新行，读取时按序号返回且计数正确"""
+    db_path = str(tmp_path / "append.db")
+    manager = SQLiteSessionManager(db_path)
+    try:
+        session_id = manager.create_new_session("append")
+        manager.add_user_message("你好")
+        manager.add_assistant_message("需要什么帮助？", tool_calls=[{"id": "call_1"}])
+        manager.add_tool_message('{"ok": true}', tool_call_id="call_1")
+
+        context = manager.dao.get_active_compressed_context(session_id)
+        assert [m["role"] for m in context["compressed_messages"]] == ["user", "assistant", "tool"]
+        assert context["compressed_messages"][1]["tool_calls"] == [{"id": "call_1"}]
+        assert context["compressed_message_count"] == 3
+        assert context["compressed_token_count"] == sum(m["token_count"] for m in context["compressed_messages"])
+
+        agent_context = manager.build_agent_context(session_id)
+        assert [m.content for m in agent_context.dialogue_history] == ["你好", "需要什么帮助？", '{"ok": true}']
+
+        with manager.dao.get_connection() as conn:
+            ordinals = [row[0] for row in conn.execute(
+                "SELECT ordinal FROM compressed_context_messages WHERE context_id = ? ORDER BY ordinal",
+                (context["context_id"],)
+            )]
+            blob = conn.execute(
+                "SELECT compressed_messages FROM compressed_context WHERE context_id = ?",
+                (context["context_id"],)
+            ).fetchone()[0]
+        assert ordinals == [0, 1, 2]
+        assert blob == "[]"
+    finally:
+        close_connection_pools()
+
+
+def test_migrates_v1_json_blobs(tmp_path):
+    """测试v1数据库中的JSON数组被拆分为消息行"""
+    db_path = str(tmp_path / "legacy.db")
+    initialize_database(db_path)
+
+    # 构造v1格式：没有消息表，消息以JSON数组存放在compressed_context中
+    legacy_messages = [
+        {"message_id": "m1", "role": "user", "content": "旧消息", "token_count": 3},
+        {"message_id": "m2", "role": "assistant", "content": "旧回复", "token_count": 4},
+    ]
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DROP TABLE compressed_context_messages")
+        conn.execute("INSERT INTO sessions (session_id, title) VALUES ('s1', 'legacy')")
+        conn.execute("""
+            INSERT INTO compressed_context (
+                context_id, session_id, compression_version,
+                original_message_count, compressed_message_count,
+                original_token_count, compressed_token_count, compression_ratio,
+                compressed_messages, summary
+            ) VALUES ('c1', 's1', 1, 2, 2, 7, 7, 1.0, ?, '')
+        """, (json.dumps(legacy_messages),))
+        conn.execute("UPDATE database_metadata SET value = '1' WHERE key = 'schema_version'")
+
+    dao = DatabaseDAO(db_path)
+    manager = SQLiteSessionManager(db_path)
+    try:
+        assert dao.get_compressed_context_messages("s1") == legacy_messages
+
+        manager.add_user_message("新消息", session_id="s1")
+        messages = dao.get_compressed_context_messages("s1")
+        assert [m["content"] for m in messages] == ["旧消息", "旧回复", "新消息"]
+        assert dao.get_active_compressed_context("s1", include_messages=False)["compressed_message_count"] == 3
+
+        with dao.get_connection() as conn:
+            version = conn.execute(
+                "SELECT value FROM database_metadata WHERE key = 'schema_version'"
+            ).fetchone()[0]
+        assert int(version) == DatabaseSchema.CURRENT_VERSION
+    finally:
+        close_connection_pools()
+
+
+def test_concurrent_compressions_get_distinct_versions(tmp_path):
+    """测试并发压缩时版本号在写事务内分配，不会重复，且只有最新版本处于活跃状态"""
+    db_path = str(tmp_path / "versions.db")
+    initialize_database(db_path)
+    dao = DatabaseDAO(db_path)
+    try:
+        session_id = dao.create_session("versions")
+        barrier = threading.Barrier(8)
+
+        def compress(i):
+            barrier.wait()
+            dao.create_compressed_context(session_id, i, [], f"摘要{i}")
+
+        threads = [threading.Thread(target=compress, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with dao.get_connection() as conn:
+            rows = conn.execute(
+                "SELECT compression_version, is_active FROM compressed_context WHERE session_id = ?",
+                (session_id,)
+            ).fetchall()
+        # 版本1是创建会话时的初始上下文
+        assert sorted(row[0] for row in rows) == list(range(1, 10))
+        assert [row[0] for row in rows if row[1]] == [9]
+    finally:
+        close_connection_pools()
+
+
+def test_failed_migration_step_rolls_back_ddl(tmp_path, monkeypatch):
+    """测试某一步迁移失败时，该步骤中的DDL和版本号一起回滚"""
+    db_path = str(tmp_path / "rollback.db")
+    initialize_database(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE database_metadata SET value = '4' WHERE key = 'schema_version'")
+    conn.commit()
+    conn.close()
+
+    def failing_migration(conn):
+        conn.execute("CREATE TABLE half_migrated (id INTEGER)")
+        raise RuntimeError("迁移失败")
+
+    monkeypatch.setitem(database_schema.MIGRATIONS, 4, failing_migration)
+    with pytest.raises(RuntimeError):
+        migrate_database(db_path)
+
+    conn = sqlite3.connect(db_path)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    version = conn.execute("SELECT value FROM database_metadata WHERE key = 'schema_version'").fetchone()[0]
+    conn.close()
+    assert "half_migrated" not in tables
+    assert version == "4"
@@ -0,0 +1,82 @@
+"""
+设计流程并行分支测试
+
+测试 DesignNode 与 PrefabFunctionsDetailNode 并发执行：总耗时约等于两者中较慢的一个，
+全部完成后 prefabs_info.md 并入 generated_documents；设计文档生成失败时不保存函数详情文档。
+"""
+
+import sys
+import os
+import asyncio
+import time
+
+import httpx
+import pytest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.agent.subflows.design.flows.design_flow import create_design_flow
+from gtplanner.agent.subflows.design.nodes import prefab_functions_detail_node
+from gtplanner.agent.subflows.design.nodes.design_node import DesignNode
+from gtplanner.agent.utils.prefab_gateway_client import PrefabGatewayClient
+
+LATENCY = 0.5
+
+
+@pytest.fixture
+def slow_services(monkeypatch):
+    """设计 LLM 调用和网关查询各耗时 LATENCY 秒"""
+    design_result = {"design_document": "# 设计文档"}
+
+    async def design_exec(self, prep_res):
+        await asyncio.sleep(LATENCY)
+        return dict(design_result)
+
+    async def gateway(request):
+        await asyncio.sleep(LATENCY)
+        functions = [{"name": name, "parameters": {}} for name in ("parse", "extract_tables")]
+        return httpx.Response(200, json=functions)
+
+    client = PrefabGatewayClient("http://gateway", transport=httpx.MockTransport(gateway))
+    monkeypatch.setattr(DesignNode, "exec_async", design_exec)
+    monkeypatch.setattr(prefab_functions_detail_node, "get_prefab_gateway_client", lambda: client)
+    return design_result
+
+
+def _shared():
+    return {
+        "user_requirements": "做一个PDF摘要工具",
+        "recommended_prefabs": [
+            {"id": "pdf-parser", "version": "1.0.0", "name": "PDF 解析", "description": "解析 PDF",
+             "functions": [{"name": "parse"}, {"name": "extract_tables"}]},
+        ],
+    }
+
+
+@pytest.mark.asyncio
+async def test_design_and_prefab_details_run_concurrently(slow_services):
+    """测试两个分支并发执行，完成后 design.md 和 prefabs_info.md 都已保存"""
+    shared = _shared()
+    start = time.perf_counter()
+    await create_design_flow().run_async(shared)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 1.7 * LATENCY  # 顺序执行需要 2 * LATENCY
+    assert shared["system_design"] == "# 设计文档"
+    assert [f["name"] for f in shared["prefab_functions_details"][0]["functions"]] == ["parse", "extract_tables"]
+    assert [doc["filename"] for doc in shared["generated_documents"]] == ["design.md", "prefabs_info.md"]
+
+
+@pytest.mark.asyncio
+async def test_design_failure_discards_prefab_details(slow_services):
+    """测试设计文档生成失败时，与顺序执行一样不保存函数详情文档"""
+    slow_services.clear()
+    slow_services["error"] = "LLM 调用失败"
+    shared = _shared()
+    result = await create_design_flow().run_async(shared)
+
+    assert result == "error"
+    assert shared["design_error"] == "LLM 调用失败"
+    assert "prefab_functions_document" not in shared
+    assert "prefabs_info.md" not in [doc["filename"] for doc in shared.get("generated_documents", [])]
@@ -0,0 +1,88 @@
+"""
+对象池测试
+
+测试流程对象的池化复用，并提供逐次构建与池化复用的对比基准：
+
+    python tests/test_object_pool.py
+"""
+
+import sys
+import os
+import time
+import asyncio
+import tracemalloc
+import pytest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.agent.utils.object_pool import ObjectPool
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_idle_objects():
+    """测试顺序调用时只构建一次对象"""
+    pool = ObjectPool(object)
+
+    for _ in range(5):
+        async with pool.acquire():
+            pass
+
+    stats = pool.get_stats()
+    assert stats["created"] == 1
+    assert stats["reused"] == 4
+    assert stats["idle"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_concurrent_checkout():
+    """测试并发借用时每个调用方持有独立实例，且空闲数量受 max_idle 限制"""
+    pool = ObjectPool(object, max_idle=2)
+    borrowed = []
+
+    async def borrow():
+        async with pool.acquire() as obj:
+            borrowed.append(obj)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(borrow() for _ in range(4)))
+
+    assert len({id(obj) for obj in borrowed}) == 4
+    assert pool.get_stats()["created"] == 4
+    assert pool.get_stats()["idle"] == 2
+
+
+def _benchmark(label, build, iterations=200):
+    """测量每次调用的耗时和内存分配"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        build()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<12} {elapsed / iterations * 1e6:>10.1f} us/次  峰值内存 {peak / 1024:>8.1f} KiB")
+
+
+def main():
+    """对比逐次构建与池化复用流程对象的开销"""
+    from gtplanner.agent.subflows.research.flows.research_flow import ResearchFlow
+    from gtplanner.agent.subflows.research.flows.keyword_research_flow import create_keyword_research_subflow
+    from gtplanner.agent.subflows.design.flows.design_flow import DesignFlow
+
+    factories = {
+        "research": ResearchFlow,
+        "keyword": create_keyword_research_subflow,
+        "design": DesignFlow,
+    }
+
+    for name, factory in factories.items():
+        pool = ObjectPool(factory)
+        print(f"== {name} ==")
+        _benchmark("逐次构建", factory)
+        _benchmark("池化复用", lambda: pool.checkin(pool.checkout()))
+        print(f"池统计: {pool.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
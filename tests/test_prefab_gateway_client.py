@@ -0,0 +1,128 @@
+"""
+预制件网关元数据客户端测试
+
+用 httpx.MockTransport 模拟网关，测试指定版本的永久缓存、latest 的条件请求（ETag / 304）、
+并发上限与请求合并，以及 PrefabFunctionsDetailNode 的并发查询。
+"""
+
+import sys
+import os
+import asyncio
+
+import httpx
+import pytest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.agent.utils.prefab_gateway_client import PrefabGatewayClient
+
+
+class FakeGateway:
+    """模拟网关：记录请求并统计最大并发数"""
+
+    def __init__(self, list_includes_parameters=False, delay=0.01):
+        self.list_includes_parameters = list_includes_parameters
+        self.delay = delay
+        self.requests = []
+        self.etag = '"v1"'
+        self.active = 0
+        self.max_active = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+
+        if request.headers.get("If-None-Match") == self.etag:
+            return httpx.Response(304)
+        parts = request.url.path.split("/")  # /v1/public/prefabs/{id}/functions[/{name}]
+        if parts[-1] == "missing":
+            return httpx.Response(404, json={"detail": "Function not found"})
+        if parts[-1] == "functions":
+            functions = [{"name": f"f{i}", "description": f"函数{i}"} for i in range(6)]
+            if self.list_includes_parameters:
+                for function in functions:
+                    function["parameters"] = {"type": "object"}
+            return httpx.Response(200, json=functions, headers={"ETag": self.etag})
+        return httpx.Response(200, json={"name": parts[-1], "etag": self.etag,
+                                         "version": request.url.params.get("version", "latest")},
+                              headers={"ETag": self.etag})
+
+
+def _client(gateway, **kwargs):
+    return PrefabGatewayClient("http://gateway", transport=httpx.MockTransport(gateway.handler), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_pinned_versions_cached_and_latest_revalidated():
+    """测试指定版本只请求一次；latest 过期后带 If-None-Match 重新验证，304 复用、内容变化时更新"""
+    gateway = FakeGateway()
+    client = _client(gateway, latest_ttl=0.0)
+
+    first = await client.get_function("pdf-parser", "parse", "1.0.0")
+    first["name"] = "modified"  # 调用方修改结果不影响缓存
+    assert (await client.get_function("pdf-parser", "parse", "1.0.0"))["name"] == "parse"
+    assert len(gateway.requests) == 1 and gateway.requests[0].url.params["version"] == "1.0.0"
+
+    assert (await client.get_function("pdf-parser", "parse"))["version"] == "latest"
+    assert (await client.get_function("pdf-parser", "parse", "latest"))["etag"] == '"v1"'
+    assert gateway.requests[-1].headers["If-None-Match"] == '"v1"' and "version" not in gateway.requests[-1].url.params
+
+    gateway.etag = '"v2"'
+    assert (await client.get_function("pdf-parser", "parse"))["etag"] == '"v2"'
+    stats = client.get_stats()
+    assert (stats["requests"], stats["hits"], stats["revalidated"]) == (4, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_details_bounded_and_coalesced():
+    """测试批量查询：并发数不超过上限、相同请求合并、单个失败不影响其他函数、列表含参数时只请求一次"""
+    gateway = FakeGateway()
+    client = _client(gateway, max_concurrency=2)
+
+    names = ["f0", "f1", "f2", "missing", "f4", "f5"]
+    details, again = await asyncio.gather(
+        client.get_function_details("pdf-parser", names, "1.0.0"),
+        client.get_function_details("pdf-parser", names, "1.0.0"),
+    )
+    assert [d["name"] for d in details] == names
+    assert "error" in details[3] and all("detail" in d for i, d in enumerate(details) if i != 3)
+    assert again == details
+    assert gateway.max_active <= 2
+    assert len(gateway.requests) == 1 + len(names)  # 一次列表请求 + 每个函数一次
+
+    gateway = FakeGateway(list_includes_parameters=True)
+    client = _client(gateway)
+    details = await client.get_function_details("pdf-parser", ["f1", "f3"], "1.0.0")
+    assert [d["detail"]["parameters"] for d in details] == [{"type": "object"}] * 2
+    assert len(gateway.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_functions_detail_node_fetches_concurrently(monkeypatch):
+    """测试设计流程的函数详情节点并发查询所有预制件，结果顺序与推荐顺序一致"""
+    from gtplanner.agent.subflows.design.nodes import prefab_functions_detail_node as module
+
+    gateway = FakeGateway(delay=0.05)
+    client = _client(gateway, max_concurrency=8)
+    monkeypatch.setattr(module, "get_prefab_gateway_client", lambda: client)
+
+    node = module.PrefabFunctionsDetailNode()
+    prep = {"skip": False, "prefabs_to_query": [
+        {"id": f"prefab-{i}", "version": "1.0.0", "name": f"预制件{i}", "description": "",
+         "functions": ["f0", "f1", "f2"]}
+        for i in range(4)
+    ]}
+    start = asyncio.get_running_loop().time()
+    result = await node.exec_async(prep)
+    elapsed = asyncio.get_running_loop().time() - start
+
+    assert [p["id"] for p in result["prefabs_details"]] == [f"prefab-{i}" for i in range(4)]
+    assert all(f["detail"]["name"] == f["name"] for p in result["prefabs_details"] for f in p["functions"])
+    assert gateway.max_active > 1
+    assert elapsed < 16 * 0.05  # 串行需要 4 次列表 + 12 次详情请求
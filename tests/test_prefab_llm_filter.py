@@ -0,0 +1,119 @@
+"""
+预制件推荐大模型筛选测试
+
+测试向量分数足够明确时跳过大模型筛选（高分阈值 / 分差阈值，按检索后端选取），需要大模型时发送精简候选卡片，
+以及跳过率和节省延迟的统计。
+"""
+
+import sys
+import os
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _candidates(scores):
+    return {
+        "results": [
+            {"score": score, "document": {
+                "id": f"prefab-{i}", "type": "PREFAB", "summary": f"预制件{i}", "tags": "pdf, 文档",
+                "description": "解析 PDF 文件并提取文本和表格。" * 40, "version": "1.0.0",
+                "artifact_url": f"https://example.com/prefab-{i}.whl"}}
+            for i, score in enumerate(scores)
+        ],
+        "total": len(scores)
+    }
+
+
+@pytest.fixture
+def node(tmp_path, monkeypatch):
+    from gtplanner.agent.nodes import node_prefab_recommend
+    from gtplanner.agent.utils.prefab_vector_index import LocalVectorIndexLoader
+
+    # 不创建全局 OpenAI 客户端，下面替换为模拟客户端
+    monkeypatch.setattr(node_prefab_recommend, "get_openai_client", lambda: SimpleNamespace())
+    catalog = tmp_path / "community-prefabs.json"
+    catalog.write_text("[]", encoding="utf-8")
+    node = node_prefab_recommend.NodePrefabRecommend()
+    node.vector_service_url = None
+    node.backend = "local"
+    node.local_index = LocalVectorIndexLoader(catalog)
+    node.local_min_score = 0.1
+    node.local_llm_filter_skip_score, node.local_llm_filter_skip_gap = 0.75, 0.15
+    node.llm_filter_skip_score, node.llm_filter_skip_gap = 0.95, 0.5
+
+    async def chat_completion(messages, **kwargs):
+        await asyncio.sleep(0.02)
+        content = json.dumps({"selected_prefabs": [{"index": 1, "reason": "最相关"}]})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    node.openai_client = SimpleNamespace(chat_completion=AsyncMock(side_effect=chat_completion))
+    return node
+
+
+async def _recommend(node, monkeypatch, scores, top_k=2):
+    monkeypatch.setattr(node, "_search_prefabs_local", AsyncMock(return_value=_candidates(scores)))
+    prep = await node.prep_async({"query": "pdf 解析", "top_k": top_k, "use_llm_filter": True})
+    return await node.exec_async(prep)
+
+
+@pytest.mark.asyncio
+async def test_llm_filter_skipped_when_scores_are_decisive(node, monkeypatch):
+    """测试高分或分差明显时跳过大模型，分数接近时调用大模型并统计跳过率与节省的延迟"""
+    result = await _recommend(node, monkeypatch, [0.52, 0.48, 0.46])
+    assert result["search_metadata"]["llm_filter"]["decision"] == "llm"
+    assert [p["id"] for p in result["recommended_prefabs"]] == ["prefab-1"]
+
+    result = await _recommend(node, monkeypatch, [0.9, 0.8, 0.3])
+    assert result["search_metadata"]["llm_filter"]["decision"] == "skipped_score"
+    assert [p["id"] for p in result["recommended_prefabs"]] == ["prefab-0", "prefab-1"]
+
+    result = await _recommend(node, monkeypatch, [0.55, 0.5, 0.2])
+    assert result["search_metadata"]["llm_filter"]["decision"] == "skipped_gap"
+    assert result["search_metadata"]["llm_filter"]["saved_ms"] >= 20
+
+    assert node.openai_client.chat_completion.await_count == 1
+    stats = node.get_llm_filter_stats()
+    assert (stats["calls"], stats["skipped"], stats["llm_calls"]) == (3, 2, 1)
+    assert stats["skip_rate"] == pytest.approx(2 / 3)
+    assert stats["latency_saved_ms"] == pytest.approx(2 * stats["avg_llm_latency_ms"], abs=1)
+
+    # 阈值为0时关闭对应规则
+    node.local_llm_filter_skip_score = node.local_llm_filter_skip_gap = 0
+    result = await _recommend(node, monkeypatch, [0.9, 0.8, 0.3])
+    assert result["search_metadata"]["llm_filter"]["decision"] == "llm"
+
+
+@pytest.mark.asyncio
+async def test_llm_filter_thresholds_follow_backend(node, monkeypatch):
+    """测试跳过阈值按检索后端选取：同样的分数在本地后端足够明确，在向量服务的尺度上仍需大模型"""
+    scores = [0.55, 0.5, 0.2]
+    result = await _recommend(node, monkeypatch, scores)
+    assert result["search_metadata"]["llm_filter"]["decision"] == "skipped_gap"
+
+    monkeypatch.setattr(node, "_resolve_backend", lambda: "remote")
+    monkeypatch.setattr(node, "_search_prefabs_vector", AsyncMock(return_value=_candidates(scores)))
+    prep = await node.prep_async({"query": "pdf 解析", "top_k": 2, "use_llm_filter": True, "min_score": 0.1})
+    result = await node.exec_async(prep)
+    assert result["search_metadata"]["backend"] == "remote"
+    assert result["search_metadata"]["llm_filter"]["decision"] == "llm"
+
+
+@pytest.mark.asyncio
+async def test_llm_filter_prompt_uses_compact_cards(node, monkeypatch):
+    """测试发送给大模型的是精简候选卡片：每行一个，描述截断，不含下载地址等元数据"""
+    node.llm_card_chars = 50
+    await _recommend(node, monkeypatch, [0.5, 0.49, 0.48, 0.47])
+
+    prompt = node.openai_client.chat_completion.await_args.kwargs["messages"][0]["content"]
+    cards = [json.loads(line) for line in prompt.splitlines() if line.startswith('{"index"')]
+    assert [card["index"] for card in cards] == [0, 1, 2, 3]
+    assert set(cards[0]) == {"index", "id", "name", "tags", "description"}
+    assert len(cards[0]["description"]) == 51 and cards[0]["description"].endswith("…")
+    assert "artifact_url" not in prompt and "example.com" not in prompt
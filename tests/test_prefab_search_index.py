@@ -0,0 +1,203 @@
+"""
+预制件倒排索引测试
+
+测试中英文分词、BM25字段加权排序、标签/作者过滤，以及目录文件变化时重建索引；
+并提供10万预制件合成目录上的基准（对比原线性子串扫描）：
+
+    python tests/test_prefab_search_index.py
+"""
+
+import sys
+import os
+import json
+import random
+import threading
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.agent.utils.local_prefab_searcher import LocalPrefabSearcher
+from gtplanner.agent.utils.prefab_search_index import PrefabSearchIndex, tokenize
+
+PREFABS = [
+    {"id": "pdf-parser", "author": "alice", "name": "PDF 文档解析", "tags": ["pdf", "文档"],
+     "description": "解析 PDF 文件并提取文本和表格"},
+    {"id": "llm-client", "author": "bob", "name": "大模型客户端", "tags": ["llm", "ai"],
+     "description": "基于 OpenAI 兼容 API 的文本生成，也可以用于文档摘要"},
+    {"id": "image-ocr", "author": "alice", "name": "Image OCR", "tags": ["ocr", "图片"],
+     "description": "Recognize text in images and scanned pdf pages"},
+]
+
+
+def test_tokenize_and_ranked_search():
+    """测试中英文分词、多词查询按相关度排序，以及名称字段权重高于描述"""
+    assert tokenize("LLM-Client 大模型") == ["llm", "client", "大模", "模型"]
+    assert tokenize("图", cjk_unigrams=True) == ["图"]
+
+    index = PrefabSearchIndex(PREFABS)
+    # 名称命中排在仅描述命中之前；多词查询不要求整句作为子串出现
+    assert [PREFABS[i]["id"] for i, _ in index.search("文档")] == ["pdf-parser", "llm-client"]
+    assert [PREFABS[i]["id"] for i, _ in index.search("scanned pdf", limit=2)] == ["image-ocr", "pdf-parser"]
+    assert index.search_prefabs("client")[0]["id"] == "llm-client"
+    assert index.search_prefabs("图")[0]["id"] == "image-ocr"  # 单字查询命中单字索引
+    assert index.search("不存在的词") == []
+
+    scores = [score for _, score in index.search("pdf")]
+    assert scores == sorted(scores, reverse=True) and scores[0] > 0
+
+
+def test_non_latin_and_tokenless_queries():
+    """测试西里尔等非拉丁文字的名称可以检索到自身，只有标点的查询不返回整个目录"""
+    prefabs = PREFABS + [
+        {"id": "smeta", "author": "ivan", "name": "Смета проекта", "tags": ["финансы"],
+         "description": "Расчёт сметы"},
+    ]
+    assert tokenize("Смета café_v2") == ["смета", "café", "v2"]
+
+    index = PrefabSearchIndex(prefabs)
+    assert [prefabs[i]["id"] for i, _ in index.search("Смета")] == ["smeta"]
+    assert index.search_prefabs("финансы")[0]["id"] == "smeta"
+    assert index.search("???") == []
+    assert index.search("???", tags=["pdf"]) == []
+    assert len(index.search("  ")) == len(prefabs)  # 空白查询等同于不带关键词
+
+
+def test_filters_and_reload_on_mtime_change(tmp_path):
+    """测试标签（任一匹配）与作者过滤，以及目录文件修改后重建索引"""
+    path = tmp_path / "community-prefabs.json"
+    path.write_text(json.dumps(PREFABS, ensure_ascii=False), encoding="utf-8")
+    searcher = LocalPrefabSearcher(str(path), check_interval=0)
+
+    assert [p["id"] for p in searcher.search(tags=["OCR", "llm"])] == ["llm-client", "image-ocr"]
+    assert [p["id"] for p in searcher.search(query="pdf", author="ALICE")] == ["pdf-parser", "image-ocr"]
+    assert searcher.search(query="pdf", tags=["llm"]) == []
+    assert len(searcher.search(limit=2)) == 2
+    first_index = searcher.index
+
+    searcher.search(query="pdf")
+    assert searcher.index is first_index  # 文件未变化时不重建
+
+    updated = PREFABS + [{"id": "video-cut", "author": "carol", "name": "视频剪辑", "tags": ["视频"],
+                          "description": "剪辑视频片段"}]
+    path.write_text(json.dumps(updated, ensure_ascii=False), encoding="utf-8")
+    os.utime(path, (time.time() + 10, time.time() + 10))
+    searcher.search(query="视频")  # 发现变化，后台重建索引
+    assert searcher.wait_for_reload(timeout=5)
+    assert searcher.search(query="视频")[0]["id"] == "video-cut"
+    assert searcher.index is not first_index
+
+
+def test_change_detection_throttled_and_snapshot_swapped(tmp_path, monkeypatch):
+    """测试检查间隔内的搜索不 stat 目录文件，重新加载在后台进行，完成前搜索继续使用旧快照"""
+    path = tmp_path / "community-prefabs.json"
+    path.write_text(json.dumps(PREFABS, ensure_ascii=False), encoding="utf-8")
+    searcher = LocalPrefabSearcher(str(path), check_interval=60)
+    first = searcher.reload()
+    assert searcher.get_status()["prefabs"] == len(PREFABS)
+
+    stat_calls = []
+    original = LocalPrefabSearcher._file_version
+    monkeypatch.setattr(LocalPrefabSearcher, "_file_version",
+                        lambda self: stat_calls.append(1) or original(self))
+    path.write_text(json.dumps(PREFABS[:1], ensure_ascii=False), encoding="utf-8")
+    os.utime(path, (time.time() + 10, time.time() + 10))
+    for _ in range(100):
+        assert len(searcher.search(limit=10)) == len(PREFABS)
+    assert stat_calls == []
+
+    # 检查间隔到期：本次搜索仍返回旧快照，后台构建完成后替换，旧快照本身保持不变
+    searcher._next_check = 0.0
+    assert len(searcher.search(limit=10)) == len(PREFABS)
+    assert searcher.wait_for_reload(timeout=5)
+    assert [p["id"] for p in searcher.search(limit=10)] == ["pdf-parser"]
+    assert len(stat_calls) == 1 and searcher.get_snapshot() is not first
+    assert len(first.prefabs) == len(PREFABS) and len(first.index.search_prefabs(limit=10)) == len(PREFABS)
+
+
+def test_slow_or_failed_rebuild_does_not_block_search(tmp_path, monkeypatch):
+    """测试重建索引期间搜索不等待，重建失败时保留旧快照"""
+    path = tmp_path / "community-prefabs.json"
+    path.write_text(json.dumps(PREFABS, ensure_ascii=False), encoding="utf-8")
+    searcher = LocalPrefabSearcher(str(path), check_interval=0)
+    first = searcher.reload()
+
+    release = threading.Event()
+    original = LocalPrefabSearcher._build_snapshot
+    monkeypatch.setattr(LocalPrefabSearcher, "_build_snapshot",
+                        lambda self, version: release.wait(5) and original(self, version))
+    path.write_text(json.dumps(PREFABS[:1], ensure_ascii=False), encoding="utf-8")
+    os.utime(path, (time.time() + 10, time.time() + 10))
+
+    start = time.perf_counter()
+    for _ in range(20):
+        assert len(searcher.search(limit=10)) == len(PREFABS)
+    assert time.perf_counter() - start < 1.0
+    release.set()
+    assert searcher.wait_for_reload(timeout=5)
+    assert len(searcher.search(limit=10)) == 1
+
+    path.write_text("[{", encoding="utf-8")  # 写入过程中的不完整文件
+    os.utime(path, (time.time() + 20, time.time() + 20))
+    searcher.search(limit=10)
+    assert searcher.wait_for_reload(timeout=5)
+    assert len(searcher.search(limit=10)) == 1 and searcher.get_snapshot() is not first
+
+
+def _synthetic_catalog(size, seed=7):
+    """生成合成预制件目录（描述用词服从Zipf分布，领域词为中等频率）"""
+    rng = random.Random(seed)
+    words = ["pdf", "image", "audio", "video", "parser", "client", "agent", "search", "vector", "cache",
+             "translate", "summary", "ocr", "crawler", "database", "workflow", "email", "chart"]
+    cjk = ["文档", "解析", "图片", "音频", "视频", "搜索", "翻译", "摘要", "数据库", "工作流", "邮件", "图表"]
+    vocabulary = [f"term{i}" for i in range(5000)]
+    vocabulary[50:50 + len(words) + len(cjk)] = words + cjk
+    zipf_weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+    catalog = []
+    for i in range(size):
+        name_words = rng.sample(words, 2)
+        catalog.append({
+            "id": f"{'-'.join(name_words)}-{i}",
+            "author": f"author{i % 500}",
+            "name": " ".join(name_words) + " " + "".join(rng.sample(cjk, 2)),
+            "tags": rng.sample(words, 2) + rng.sample(cjk, 1),
+            "description": " ".join(rng.choices(vocabulary, weights=zipf_weights, k=30)),
+        })
+    return catalog
+
+
+def _linear_scan(prefabs, query, limit=20):
+    """引入倒排索引之前的线性子串扫描"""
+    query_lower = query.lower()
+    matched = []
+    for prefab in prefabs:
+        if (query_lower in prefab["name"].lower() or query_lower in prefab["description"].lower()
+                or query_lower in prefab["id"].lower() or query_lower in " ".join(prefab["tags"]).lower()):
+            matched.append(prefab)
+    return matched[:limit]
+
+
+def main():
+    """在10万预制件合成目录上对比线性扫描和倒排索引"""
+    catalog = _synthetic_catalog(100_000)
+    queries = ["pdf", "视频", "vector search", "数据库 cache", "workflow 邮件"]
+
+    start = time.perf_counter()
+    index = PrefabSearchIndex(catalog)
+    print(f"构建索引: {time.perf_counter() - start:.2f}s  {index.get_stats()}")
+
+    for label, func in (("线性扫描", lambda q: _linear_scan(catalog, q)),
+                        ("倒排索引", lambda q: index.search(q, limit=20)),
+                        ("索引+标签", lambda q: index.search(q, tags=["agent"], limit=20))):
+        start = time.perf_counter()
+        rounds = 5
+        for _ in range(rounds):
+            for query in queries:
+                func(query)
+        elapsed = (time.perf_counter() - start) / (rounds * len(queries))
+        print(f"{label:<8} {elapsed * 1000:>8.2f} ms/查询")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+本地向量索引测试
+
+测试哈希嵌入索引的存储往返（float16/int8）、目录变化后的重建、NodePrefabRecommend 的本地后端，
+以及安装NumPy时IVF分区检索相对暴力检索的召回率；并提供合成目录上的基准：
+
+    python tests/test_prefab_vector_index.py
+"""
+
+import sys
+import os
+import json
+import random
+import time
+from types import SimpleNamespace
+import pytest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.agent.utils.prefab_vector_index import (
+    HashingEmbedder, LocalVectorIndexLoader, PrefabVectorIndex, NUMPY_AVAILABLE,
+    default_index_path, load_or_build_index, prefab_to_document
+)
+
+PREFABS = [
+    {"id": "pdf-parser", "version": "1.0.0", "author": "alice", "repo_url": "https://github.com/alice/pdf-parser",
+     "name": "PDF 文档解析", "tags": ["pdf", "文档"], "description": "解析 PDF 文件并提取文本和表格"},
+    {"id": "llm-client", "version": "1.0.1", "author": "bob", "repo_url": "https://github.com/bob/llm-client",
+     "name": "大模型客户端", "tags": ["llm", "ai"], "description": "基于 OpenAI 兼容 API 的文本生成和内容分析"},
+    {"id": "video-cut", "version": "0.2.0", "author": "carol", "repo_url": "https://github.com/carol/video-cut",
+     "name": "视频剪辑", "tags": ["video", "视频"], "description": "Cut and merge video clips with ffmpeg"},
+]
+
+
+def _write_catalog(tmp_path, prefabs=PREFABS):
+    path = tmp_path / "community-prefabs.json"
+    path.write_text(json.dumps(prefabs, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def test_index_roundtrip_and_embedder_check(tmp_path):
+    """测试float16/int8索引写入后加载的检索结果与内存中一致，嵌入器不匹配时拒绝加载"""
+    documents = [prefab_to_document(prefab) for prefab in PREFABS]
+    for dtype in ("float16", "int8"):
+        built = PrefabVectorIndex.build(documents, dtype=dtype)
+        built.save(tmp_path / f"{dtype}.vectors.json")
+        loaded = PrefabVectorIndex.load(tmp_path / f"{dtype}.vectors.json")
+
+        for query in ("大模型 文本生成", "pdf 表格", "video clips"):
+            expected = built.search(query, top_k=2)
+            actual = loaded.search(query, top_k=2)
+            assert [row for row, _ in actual] == [row for row, _ in expected]
+            assert all(abs(a - e) < 1e-5 for (_, a), (_, e) in zip(actual, expected))
+
+        assert loaded.ids[loaded.search("大模型 文本生成", 1)[0][0]] == "llm-client"
+        result = loaded.search_documents("视频剪辑", top_k=1)
+        assert result["total"] == 1 and result["results"][0]["document"]["id"] == "video-cut"
+
+    assert (tmp_path / "int8.vectors.bin").stat().st_size < (tmp_path / "float16.vectors.bin").stat().st_size
+    with pytest.raises(ValueError):
+        PrefabVectorIndex.load(tmp_path / "int8.vectors.json", embedder=HashingEmbedder(dimension=128))
+
+
+def test_stale_index_file_is_rebuilt_from_catalog(tmp_path):
+    """测试向量文件与目录指纹不一致时从目录重建，目录修改后加载器重新加载"""
+    catalog = _write_catalog(tmp_path)
+    loader = LocalVectorIndexLoader(catalog)
+    assert len(loader.get()) == 3 and loader.get() is loader.get()
+
+    load_or_build_index(catalog).save(default_index_path(catalog))
+    assert PrefabVectorIndex.load(default_index_path(catalog)).ids == loader.get().ids
+
+    updated = PREFABS + [{"id": "email-sender", "version": "1.0.0", "author": "dave", "repo_url": "",
+                          "name": "邮件发送", "tags": ["email"], "description": "Send emails over SMTP"}]
+    _write_catalog(tmp_path, updated)
+    os.utime(catalog, (time.time() + 10, time.time() + 10))
+    index = loader.get()
+    assert len(index) == 4
+    assert index.ids[index.search("邮件发送 smtp", 1)[0][0]] == "email-sender"
+
+
+@pytest.mark.asyncio
+async def test_node_recommends_from_local_index_offline(tmp_path, monkeypatch):
+    """测试向量服务不可用时，节点使用本地向量索引完成推荐"""
+    from gtplanner.agent.nodes import node_prefab_recommend
+    # 不创建全局 OpenAI 客户端（本测试不调用大模型，全局单例会被后续测试复用）
+    monkeypatch.setattr(node_prefab_recommend, "get_openai_client", lambda: SimpleNamespace())
+
+    node = node_prefab_recommend.NodePrefabRecommend()
+    node.vector_service_url = None
+    node.local_index = LocalVectorIndexLoader(_write_catalog(tmp_path))
+
+    node.backend = "remote"
+    assert not node.vector_service_available
+    node.backend = "auto"
+    assert node.vector_service_available
+
+    prep = await node.prep_async({"query": "大模型文本生成", "top_k": 2, "use_llm_filter": False})
+    result = await node.exec_async(prep)
+    assert result["search_mode"] == "local_vector"
+    assert result["search_metadata"]["min_score"] == node.local_min_score
+    assert result["recommended_prefabs"][0]["id"] == "llm-client"
+    assert result["recommended_prefabs"][0]["summary"] == "大模型客户端"
+
+
+@pytest.mark.asyncio
+async def test_recommend_tool_only_overrides_min_score_when_given(tmp_path, monkeypatch):
+    """测试 prefab_recommend 工具未指定阈值时使用节点按后端取的默认阈值"""
+    from gtplanner.agent.function_calling.agent_tools import _execute_prefab_recommend
+    from gtplanner.agent.nodes import node_prefab_recommend
+    monkeypatch.setattr(node_prefab_recommend, "get_openai_client", lambda: SimpleNamespace())
+
+    node = node_prefab_recommend.NodePrefabRecommend()
+    node.vector_service_url = None
+    node.local_index = LocalVectorIndexLoader(_write_catalog(tmp_path))
+    monkeypatch.setattr(node_prefab_recommend, "get_prefab_recommend_node", lambda: node)
+
+    used = []
+    exec_async = node.exec_async
+
+    async def recording_exec(prep_res):
+        result = await exec_async(prep_res)
+        used.append(result["search_metadata"]["min_score"])
+        return result
+
+    node.exec_async = recording_exec
+
+    shared = {"min_score": 0.9}  # 上一次调用遗留的阈值不应生效
+    for arguments in ({"query": "大模型文本生成", "use_llm_filter": False},
+                      {"query": "大模型文本生成", "use_llm_filter": False, "min_score": 0.05}):
+        result = await _execute_prefab_recommend(arguments, shared)
+        assert result["success"], result
+    assert used == [node.local_min_score, 0.05]
+
+
+def _synthetic_documents(size, themes=400, seed=11):
+    """生成合成预制件文档和查询（每个预制件属于一个主题，由主题关键词和随机描述词组成）"""
+    rng = random.Random(seed)
+    theme_keywords = [[f"t{theme}k{i}" for i in range(8)] for theme in range(themes)]
+    words = [f"word{i}" for i in range(3000)]
+    documents = []
+    for i in range(size):
+        keywords = theme_keywords[i % themes]
+        text = " ".join(rng.sample(keywords, 5) + rng.sample(words, 10))
+        documents.append({"id": f"prefab-{i}", "combined_text": text})
+    queries = [" ".join(rng.sample(theme_keywords[rng.randrange(themes)], 3)) for _ in range(50)]
+    return documents, queries
+
+
+def _recall(index, brute, queries, top_k=10):
+    """召回率：分区检索结果中分数不低于暴力检索第k名的比例（与第k名同分的文档都算命中）"""
+    hits = total = 0
+    for query in queries:
+        expected = brute.search(query, top_k)
+        threshold = expected[-1][1] - 1e-6
+        hits += min(len(expected), sum(1 for _, score in index.search(query, top_k) if score >= threshold))
+        total += len(expected)
+    return hits / total
+
+
+def test_partitioned_search_recall():
+    """测试IVF分区检索相对暴力检索的召回率（需要NumPy）"""
+    pytest.importorskip("numpy")
+    documents, queries = _synthetic_documents(4000, themes=200)
+    brute = PrefabVectorIndex.build(documents, partitions=0)
+    partitioned = PrefabVectorIndex.build(documents, partitions=32)
+    assert partitioned.partitions == 32
+    assert _recall(partitioned, brute, queries) >= 0.9
+
+    for batch_result, query in zip(brute.search_batch(queries[:5], top_k=3), queries[:5]):
+        single = brute.search(query, 3)
+        assert [score for _, score in batch_result] == pytest.approx([score for _, score in single], abs=1e-5)
+
+
+def main():
+    """对比暴力检索和IVF分区检索（需要NumPy），以及未安装NumPy时的纯Python检索"""
+    if not NUMPY_AVAILABLE:
+        documents, queries = _synthetic_documents(5_000)
+        index = PrefabVectorIndex.build(documents)
+        start = time.perf_counter()
+        for query in queries[:10]:
+            index.search(query, 10)
+        print(f"纯Python暴力检索(5千) {(time.perf_counter() - start) / 10 * 1000:.1f} ms/查询（安装numpy后可测试10万规模）")
+        return
+
+    documents, queries = _synthetic_documents(100_000, themes=10_000)
+    start = time.perf_counter()
+    brute = PrefabVectorIndex.build(documents, partitions=0)
+    print(f"嵌入+构建(10万): {time.perf_counter() - start:.1f}s")
+    start = time.perf_counter()
+    partitioned = PrefabVectorIndex.build(documents, partitions="auto")
+    print(f"嵌入+构建+IVF分区({partitioned.partitions}): {time.perf_counter() - start:.1f}s")
+
+    for label, func in (("暴力检索", lambda q: brute.search(q, 10)),
+                        ("IVF分区", lambda q: partitioned.search(q, 10)),
+                        ("批量暴力检索", None)):
+        start = time.perf_counter()
+        if func is None:
+            brute.search_batch(queries, 10)
+        else:
+            for query in queries:
+                func(query)
+        print(f"{label:<8} {(time.perf_counter() - start) / len(queries) * 1000:>8.2f} ms/查询")
+    print(f"IVF召回率@10: {_recall(partitioned, brute, queries):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+系统提示词组装测试
+
+测试预编译模板的静态前缀在各次调用间保持一致，以及提示词缓存命中率统计。
+"""
+
+import sys
+import os
+from types import SimpleNamespace
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.agent.prompts import get_prompt_manager, get_prompt, PromptTypes
+from gtplanner.agent.flows.react_orchestrator_refactored.react_orchestrator_node import ReActOrchestratorNode
+from gtplanner.utils.openai_client import OpenAIClient, SimpleOpenAIConfig
+
+
+def test_templates_precompiled_for_all_languages():
+    """测试全局管理器预编译了所有语言的模板，且重复获取返回同一对象"""
+    manager = get_prompt_manager()
+    for language in ("zh", "en", "ja", "es", "fr"):
+        assert ("orchestrator_function_calling", language) in manager._compiled
+
+    first = get_prompt(PromptTypes.System.ORCHESTRATOR_FUNCTION_CALLING, language="en")
+    second = get_prompt(PromptTypes.System.ORCHESTRATOR_FUNCTION_CALLING, language="en")
+    assert first is second
+
+
+def test_system_prompt_static_prefix():
+    """测试动态内容只追加在静态前缀之后"""
+    node = ReActOrchestratorNode.__new__(ReActOrchestratorNode)
+    static_prefix = get_prompt(PromptTypes.System.ORCHESTRATOR_FUNCTION_CALLING, language="zh")
+
+    without_docs = node._build_system_prompt("zh", [])
+    with_docs = node._build_system_prompt("zh", [{"filename": "design.md"}])
+
+    assert without_docs == static_prefix
+    assert with_docs.startswith(static_prefix)
+    assert "- design.md" in with_docs[len(static_prefix):]
+
+
+def test_cached_prompt_token_rate():
+    """测试提示词缓存命中率统计（兼容 OpenAI 与 DeepSeek 的用量字段）"""
+    client = OpenAIClient(SimpleOpenAIConfig(api_key="test-key"))
+
+    client._record_usage(SimpleNamespace(
+        total_tokens=120, prompt_tokens=100,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=80)
+    ))
+    client._record_usage(SimpleNamespace(
+        total_tokens=120, prompt_tokens=100,
+        prompt_tokens_details=None, prompt_cache_hit_tokens=20
+    ))
+
+    stats = client.get_stats()
+    assert stats["prompt_tokens"] == 200
+    assert stats["cached_prompt_tokens"] == 100
+    assert stats["cached_prompt_token_rate"] == 0.5
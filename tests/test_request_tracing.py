@@ -0,0 +1,109 @@
+"""
+进程内请求追踪测试
+
+测试 span 的父子关系传递、流程节点 span 以及瀑布图数据。
+"""
+
+import sys
+import os
+import asyncio
+import json
+from unittest.mock import patch
+import pytest
+from pocketflow import AsyncNode, AsyncFlow
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.utils import request_tracing
+from gtplanner.utils.request_tracing import SpanRecorder, trace_span, traced_flow, get_current_trace_id
+
+
+class _SleepNode(AsyncNode):
+    """测试用节点"""
+
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+
+    async def exec_async(self, prep_res):
+        await asyncio.sleep(0.01)
+
+
+@traced_flow(flow_name="ToyFlow")
+class _ToyFlow(AsyncFlow):
+    """测试用流程"""
+
+    def __init__(self):
+        first = _SleepNode("FirstNode")
+        first >> _SleepNode("SecondNode")
+        super().__init__(start=first)
+
+
+@pytest.mark.asyncio
+async def test_waterfall_nesting_and_concurrency(tmp_path):
+    """测试并发子任务继承父 span，瀑布图包含流程节点和嵌套深度"""
+    jsonl_path = tmp_path / "spans.jsonl"
+    recorder = SpanRecorder(jsonl_path=str(jsonl_path))
+
+    async def tool(name):
+        with trace_span(f"tool.{name}", kind="tool"):
+            await _ToyFlow().run_async({})
+
+    with patch.object(request_tracing, "_span_recorder_instance", recorder):
+        with trace_span("request", kind="request", session_id="s1") as root:
+            with trace_span("react.cycle", kind="cycle"):
+                await asyncio.gather(tool("a"), tool("b"))
+            assert get_current_trace_id() == root.trace_id
+
+        assert get_current_trace_id() is None
+        waterfall = recorder.get_waterfall(root.trace_id)
+
+    spans = {(s["name"], s["depth"]) for s in waterfall["spans"]}
+    assert ("request", 0) in spans
+    assert ("react.cycle", 1) in spans
+    assert ("tool.a", 2) in spans and ("tool.b", 2) in spans
+    assert ("ToyFlow", 3) in spans
+    assert ("ToyFlow.SecondNode", 4) in spans
+    assert len(waterfall["spans"]) == 1 + 1 + 2 * (1 + 1 + 2)
+    assert all(s["offset_ms"] >= 0 for s in waterfall["spans"])
+    assert _ToyFlow._orch_async is AsyncFlow._orch_async  # 不替换 pocketflow 的编排逻辑
+
+    assert recorder.list_traces(session_id="s1")[0]["trace_id"] == root.trace_id
+    assert recorder.list_traces(session_id="other") == []
+
+    recorder.flush()
+    lines = jsonl_path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == len(waterfall["spans"])
+    assert json.loads(lines[-1])["name"] == "request"
+
+
+def test_error_status_and_ring_buffer():
+    """测试异常记录和 trace 数量上限"""
+    recorder = SpanRecorder(max_traces=2)
+
+    with patch.object(request_tracing, "_span_recorder_instance", recorder):
+        with pytest.raises(ValueError):
+            with trace_span("failing") as failing:
+                raise ValueError("boom")
+        for _ in range(2):
+            with trace_span("ok"):
+                pass
+
+    assert recorder.get_waterfall(failing.trace_id) is None
+    assert failing.status == "error"
+    assert failing.error == "ValueError: boom"
+    assert len(recorder.list_traces()) == 2
+
+
+def test_jsonl_export_failure_is_logged(tmp_path, caplog):
+    """测试 JSONL 导出在后台线程进行，写入失败时记录警告而不影响请求"""
+    recorder = SpanRecorder(jsonl_path=str(tmp_path / "missing" / "spans.jsonl"))
+
+    with patch.object(request_tracing, "_span_recorder_instance", recorder):
+        with trace_span("request"):
+            pass
+    recorder.flush()
+
+    assert len(recorder.list_traces()) == 1
+    assert any("导出 span" in record.getMessage() for record in caplog.records)
@@ -0,0 +1,123 @@
+"""
+调研数据源测试
+
+测试本地语料数据源的搜索排序、页面获取与延迟注入，以及在本地语料上离线运行完整的 ResearchFlow。
+并提供端到端基准（模拟 LLM 分析延迟，搜索/解析延迟按配置注入）：
+
+    python tests/test_research_providers.py
+"""
+
+import sys
+import os
+import asyncio
+import json
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.agent.utils.research_providers import (
+    LocalCorpusProvider,
+    get_fetch_provider,
+    get_research_unavailable_reason,
+    get_search_provider
+)
+
+CORPUS_PATH = Path(__file__).parent / "fixtures" / "research_corpus.json"
+
+
+def _use_local_corpus(monkeypatch, search_ms=0, fetch_ms=0):
+    monkeypatch.setenv("GTPLANNER_RESEARCH_PROVIDER", "local")
+    monkeypatch.setenv("GTPLANNER_RESEARCH_CORPUS_PATH", str(CORPUS_PATH))
+    monkeypatch.setenv("GTPLANNER_RESEARCH_SEARCH_LATENCY_MS", str(search_ms))
+    monkeypatch.setenv("GTPLANNER_RESEARCH_FETCH_LATENCY_MS", str(fetch_ms))
+
+
+def _fake_llm(latency):
+    """模拟 LLM 分析：固定延迟后返回 JSON 分析结果"""
+    async def chat_completion(messages, **kwargs):
+        await asyncio.sleep(latency)
+        content = json.dumps({"summary": "离线分析", "key_points": ["要点"], "relevance": "相关",
+                              "recommendations": ["建议"]}, ensure_ascii=False)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+    return SimpleNamespace(chat_completion=chat_completion)
+
+
+async def _run_research(keywords):
+    from gtplanner.agent.subflows.research.flows.research_flow import ResearchFlow
+
+    shared = {"research_keywords": keywords, "focus_areas": ["技术选型"], "project_context": "文档问答系统"}
+    start = time.perf_counter()
+    success = await ResearchFlow().run_async(shared)
+    return success, shared, time.perf_counter() - start
+
+
+@pytest.mark.asyncio
+async def test_local_corpus_search_fetch_and_latency():
+    """测试本地语料按相关度搜索、按 url 获取页面（不存在时抛出异常），以及延迟注入"""
+    provider = LocalCorpusProvider(CORPUS_PATH)
+    results = await provider.search_simple("向量数据库", count=3)
+    assert results[0]["url"] == "https://docs.example.com/vector-db/comparison"
+    assert len(results) <= 3 and all(r["content"] == "" for r in results)
+    assert await provider.search_simple("kubernetes operator") == []
+
+    page = await provider.get_page_info(results[0]["url"] + "/")
+    assert page["title"] == "向量数据库选型对比" and "HNSW" in page["content"]
+    with pytest.raises(Exception, match="404"):
+        await provider.get_page_info("https://docs.example.com/missing")
+
+    slow = LocalCorpusProvider(CORPUS_PATH, search_latency_ms=50, fetch_latency_ms=80,
+                               latency_sigma=0.3, seed=1)
+    start = time.perf_counter()
+    await asyncio.gather(*(slow.search_simple("RAG") for _ in range(10)))
+    assert 0.02 < time.perf_counter() - start < 0.5  # 并发调用的延迟互不叠加
+
+    failing = LocalCorpusProvider(CORPUS_PATH, failure_rate=1.0)
+    with pytest.raises(Exception, match="模拟"):
+        await failing.search_simple("RAG")
+
+
+@pytest.mark.asyncio
+async def test_research_flow_runs_offline_on_local_corpus(monkeypatch):
+    """测试切换到本地语料后无需 JINA_API_KEY 即可启用调研工具，并发执行完整调研流程"""
+    from gtplanner.agent.function_calling.agent_tools import get_agent_function_definitions
+    from gtplanner.agent.subflows.research.nodes import llm_analysis_node
+
+    monkeypatch.setenv("GTPLANNER_RESEARCH_CORPUS_PATH", "")
+    monkeypatch.setenv("GTPLANNER_RESEARCH_PROVIDER", "local")
+    assert get_research_unavailable_reason() == "missing_local_corpus"
+
+    _use_local_corpus(monkeypatch, search_ms=100, fetch_ms=100)
+    monkeypatch.setattr(llm_analysis_node, "get_openai_client", lambda: _fake_llm(0.1))
+    assert get_research_unavailable_reason() is None
+    assert isinstance(get_search_provider(), LocalCorpusProvider) and get_fetch_provider() is get_search_provider()
+    assert "research" in [tool["function"]["name"] for tool in get_agent_function_definitions()]
+
+    keywords = ["RAG", "向量数据库", "FastAPI 流式响应"]
+    success, shared, elapsed = await _run_research(keywords)
+
+    findings = shared["research_findings"]
+    assert success and findings["successful_keywords"] == len(keywords)
+    assert elapsed < 2 * 0.3  # 每个关键词约 0.3 秒（搜索 + 解析 + 分析），关键词之间并发执行
+
+
+async def _benchmark(keyword_counts=(1, 3, 5, 10), llm_latency=2.0):
+    from gtplanner.agent.subflows.research.nodes import llm_analysis_node
+
+    llm_analysis_node.get_openai_client = lambda: _fake_llm(llm_latency)
+    for count in keyword_counts:
+        keywords = [f"RAG 向量数据库 {i}" for i in range(count)]
+        success, shared, elapsed = await _run_research(keywords)
+        findings = shared.get("research_findings", {})
+        print(f"{count:3d} 个关键词: {elapsed:6.2f}s  成功 {findings.get('successful_keywords', 0)}/{count}"
+              f"  {'OK' if success else 'FAILED'}")
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("GTPLANNER_RESEARCH_PROVIDER", "local")
+    os.environ.setdefault("GTPLANNER_RESEARCH_CORPUS_PATH", str(CORPUS_PATH))
+    asyncio.run(_benchmark())
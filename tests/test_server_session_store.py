@@ -0,0 +1,159 @@
+"""
+服务端会话存储测试
+
+测试客户端只发送会话ID和新消息时，服务端从缓存或数据库重建上下文，并在处理成功后保存；
+未创建的会话返回不存在，同一会话的并发请求依次处理。
+"""
+
+import sys
+import os
+import asyncio
+import pytest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.agent.api.agent_api import SSEGTPlanner
+from gtplanner.agent.context_types import AgentResult, Message, MessageRole
+from gtplanner.agent.persistence.async_session_manager import get_async_session_manager
+from gtplanner.agent.persistence.connection_pool import close_connection_pools
+from gtplanner.agent.persistence.server_session_store import ServerSessionStore, SessionNotFoundError
+from gtplanner.agent.persistence.sqlite_session_manager import SQLiteSessionManager
+
+
+def _store(db_path):
+    return ServerSessionStore(backend=get_async_session_manager(SQLiteSessionManager(db_path)))
+
+
+def _turn_result(turn):
+    """模拟一轮处理结果：一次工具调用加最终回复"""
+    return AgentResult.create_success(
+        new_messages=[
+            Message(MessageRole.ASSISTANT, "", "2025-01-01T00:00:00", tool_calls=[{"id": f"call_{turn}"}]),
+            Message(MessageRole.TOOL, '{"ok": true}', "2025-01-01T00:00:01", tool_call_id=f"call_{turn}"),
+            Message(MessageRole.ASSISTANT, f"第{turn}轮完成", "2025-01-01T00:00:02"),
+        ],
+        tool_execution_results_updates={"short_planning": f"规划 v{turn}"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_context_cached_between_turns_and_rebuilt_from_storage(tmp_path):
+    """测试新会话按客户端ID创建、后续轮次命中缓存，且缓存丢失后从数据库重建出相同的上下文"""
+    db_path = str(tmp_path / "server.db")
+    store = _store(db_path)
+    try:
+        assert await store.create_session("client-session") == "client-session"
+        image = [{"type": "text", "text": "看图"}, {"type": "image_url", "image_url": {"url": "https://example.com/a.png"}}]
+        for turn, content in enumerate(["设计一个待办应用", image]):
+            context = await store.load_context("client-session")
+            user_message = store.parse_message({"content": content})
+            assert await store.save_result("client-session", user_message, _turn_result(turn))
+
+        stats = store.get_stats()
+        assert (stats["created"], stats["misses"], stats["hits"]) == (1, 2, 1)  # 创建前检查一次，首轮从数据库读取一次
+        assert len(context.dialogue_history) == 4  # 第二轮看到的是第一轮保存后的历史
+
+        cached = await store.load_context("client-session")
+        await store.backend.close()
+
+        rebuilt = await _store(db_path).load_context("client-session")
+        assert [m.role for m in rebuilt.dialogue_history] == [m.role for m in cached.dialogue_history]
+        assert [m.content for m in rebuilt.dialogue_history] == [m.content for m in cached.dialogue_history]
+        assert rebuilt.dialogue_history[4].content == image
+        assert rebuilt.tool_execution_results == cached.tool_execution_results == {"short_planning": "规划 v1"}
+    finally:
+        close_connection_pools()
+
+
+@pytest.mark.asyncio
+async def test_session_request_stream_sends_only_new_message(tmp_path):
+    """测试服务端会话模式下规划器拿到重建的历史，失败的轮次不写入会话"""
+    store = _store(str(tmp_path / "api.db"))
+    api = SSEGTPlanner()
+    calls = []
+
+    async def fake_process(user_input, context, streaming_session, language=None):
+        calls.append((user_input, len(context.dialogue_history)))
+        if user_input == "失败":
+            return AgentResult.create_error("boom")
+        return _turn_result(len(calls))
+
+    async def writer(data):
+        pass
+
+    api.planner.process = fake_process
+    try:
+        await store.create_session("s1")
+        for text in ["第一轮", "失败", "第三轮"]:
+            summary = await api.process_session_request_stream(
+                "s1", {"content": text}, writer, session_store=store
+            )
+            assert summary["session_saved"] == (text != "失败")
+
+        assert calls == [("第一轮", 0), ("失败", 4), ("第三轮", 4)]
+
+        invalid = await api.process_session_request_stream("s1", {"role": "assistant", "content": "x"}, writer,
+                                                           session_store=store)
+        assert invalid["error_type"] == "ValidationError"
+    finally:
+        await store.backend.close()
+        close_connection_pools()
+
+
+@pytest.mark.asyncio
+async def test_unknown_session_not_created_implicitly(tmp_path):
+    """测试未通过创建接口创建的会话ID不会被隐式创建，重复创建同一ID报错"""
+    store = _store(str(tmp_path / "unknown.db"))
+    api = SSEGTPlanner()
+
+    async def writer(data):
+        pass
+
+    try:
+        with pytest.raises(SessionNotFoundError):
+            await store.load_context("missing")
+        summary = await api.process_session_request_stream("missing", {"content": "你好"}, writer,
+                                                           session_store=store)
+        assert summary["error_type"] == "SessionNotFoundError"
+        assert not await store.session_exists("missing")
+
+        await store.create_session("exists")
+        with pytest.raises(ValueError):
+            await store.create_session("exists")
+        assert store.get_stats()["created"] == 1
+    finally:
+        await store.backend.close()
+        close_connection_pools()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_for_same_session_are_serialized(tmp_path):
+    """测试同一会话的并发请求依次处理，后一个请求看到前一轮保存后的历史"""
+    store = _store(str(tmp_path / "serial.db"))
+    api = SSEGTPlanner()
+    seen = []
+
+    async def fake_process(user_input, context, streaming_session, language=None):
+        seen.append((user_input, len(context.dialogue_history)))
+        await asyncio.sleep(0.05)
+        return _turn_result(len(seen))
+
+    async def writer(data):
+        pass
+
+    api.planner.process = fake_process
+    try:
+        await store.create_session("s1")
+        summaries = await asyncio.gather(*(
+            api.process_session_request_stream("s1", {"content": text}, writer, session_store=store)
+            for text in ["第一条", "第二条"]
+        ))
+        assert all(summary["session_saved"] for summary in summaries)
+        assert [count for _, count in seen] == [0, 4]
+
+        context = await store.load_context("s1")
+        assert len(context.dialogue_history) == 8
+    finally:
+        await store.backend.close()
+        close_connection_pools()
@@ -0,0 +1,139 @@
+"""
+会话与消息分页测试
+
+测试会话列表和消息列表的keyset分页（翻页期间有写入时无重复、无遗漏），
+以及列表查询的执行计划：必须走覆盖排序的索引，不能出现全表扫描或临时B树排序。
+"""
+
+import sys
+import os
+import sqlite3
+from contextlib import contextmanager
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.agent.persistence.connection_pool import close_connection_pools
+from gtplanner.agent.persistence.database_schema import DatabaseSchema, migrate_database
+from gtplanner.agent.persistence.sqlite_session_manager import SQLiteSessionManager
+
+
+def _page_through(fetch, page_size):
+    """按游标逐页读取直到末尾"""
+    results, after = [], None
+    while True:
+        page = fetch(page_size, after)
+        results.extend(page)
+        if len(page) < page_size:
+            return results
+        after = page[-1]["cursor"]
+
+
+def test_keyset_pagination_is_stable(tmp_path):
+    """测试会话和消息分页：含归档会话的单次查询，翻页期间新增数据不会造成重复或遗漏"""
+    manager = SQLiteSessionManager(str(tmp_path / "pages.db"))
+    try:
+        session_ids = []
+        for i in range(7):
+            session_ids.append(manager.create_new_session(f"会话{i}"))
+        manager.archive_session(session_ids[2])
+        manager.archive_session(session_ids[5])
+
+        first_page = manager.list_sessions(limit=3, include_archived=True)
+        new_session_id = manager.create_new_session("翻页期间新建")  # 排在游标之前或与其同一秒，都不应打乱后续页
+        rest = _page_through(
+            lambda limit, after: manager.list_sessions(limit=limit, include_archived=True,
+                                                       after=after or first_page[-1]["cursor"]),
+            3
+        )
+        listed = [s["session_id"] for s in first_page + rest]
+        assert len(listed) == len(set(listed))
+        assert set(listed) - {new_session_id} == set(session_ids)
+        keys = [tuple(s["cursor"]) for s in first_page + rest]
+        assert keys == sorted(keys, reverse=True)
+
+        active = _page_through(lambda limit, after: manager.list_sessions(limit=limit, after=after), 2)
+        assert {s["session_id"] for s in active} == set(session_ids + [new_session_id]) - {
+            session_ids[2], session_ids[5]}
+
+        # 同一时间戳的消息按插入顺序翻页
+        session_id = session_ids[0]
+        manager.add_messages([{"role": "user", "content": f"消息{i}", "timestamp": "2025-01-01T00:00:00"}
+                              for i in range(10)], session_id=session_id)
+        messages = _page_through(
+            lambda limit, after: manager.get_messages(limit=limit, session_id=session_id, after=after), 4
+        )
+        assert [m["content"] for m in messages] == [f"消息{i}" for i in range(10)]
+    finally:
+        close_connection_pools()
+
+
+def test_listing_queries_use_covering_indexes(tmp_path):
+    """测试列表和统计查询的执行计划（捕获DAO实际执行的SQL，避免与实现脱节）"""
+    db_path = str(tmp_path / "plans.db")
+    manager = SQLiteSessionManager(db_path)
+    try:
+        session_id = manager.create_new_session("计划")
+        manager.add_messages([{"role": "user", "content": f"消息{i}"} for i in range(3)])
+
+        executed = []
+        original_get_connection = manager.dao.get_connection
+
+        @contextmanager
+        def tracing_get_connection():
+            with original_get_connection() as conn:
+                conn.set_trace_callback(executed.append)
+                try:
+                    yield conn
+                finally:
+                    conn.set_trace_callback(None)
+
+        manager.dao.get_connection = tracing_get_connection
+        page = manager.list_sessions(limit=1)
+        manager.list_sessions(limit=1, after=page[-1]["cursor"])
+        manager.list_sessions(limit=1, include_archived=True, after=page[-1]["cursor"])
+        messages = manager.get_messages(limit=2, session_id=session_id)
+        manager.get_messages(limit=2, session_id=session_id, after=messages[-1]["cursor"])
+        manager.get_recent_messages(2, session_id=session_id)
+        manager.get_session_statistics(session_id)
+        manager.dao.get_connection = original_get_connection
+        assert len(executed) == 7
+
+        conn = sqlite3.connect(db_path)
+        expected_indexes = [
+            "idx_sessions_status_updated", "idx_sessions_status_updated", "idx_sessions_updated",
+            "idx_messages_session_order", "idx_messages_session_order", "idx_messages_session_order",
+            "COVERING INDEX idx_messages_session_stats",
+        ]
+        for sql, index_name in zip(executed, expected_indexes):
+            plan = " | ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+            assert index_name in plan, (sql, plan)
+            assert "TEMP B-TREE" not in plan and "SCAN" not in plan, (sql, plan)
+        conn.close()
+    finally:
+        close_connection_pools()
+
+
+def test_migration_to_v5_replaces_indexes(tmp_path):
+    """测试从v4升级时删除被替换的索引并创建新索引"""
+    db_path = str(tmp_path / "v4.db")
+    SQLiteSessionManager(db_path)
+    close_connection_pools()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP INDEX idx_sessions_status_updated")
+    conn.execute("CREATE INDEX idx_sessions_status ON sessions (status)")
+    conn.execute("CREATE INDEX idx_messages_session_id ON messages (session_id)")
+    conn.execute("UPDATE database_metadata SET value = '4' WHERE key = 'schema_version'")
+    conn.commit()
+    conn.close()
+
+    assert migrate_database(db_path) == DatabaseSchema.CURRENT_VERSION
+
+    conn = sqlite3.connect(db_path)
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    version = conn.execute("SELECT value FROM database_metadata WHERE key = 'schema_version'").fetchone()[0]
+    conn.close()
+    assert set(DatabaseSchema.get_create_indexes_sql()) <= indexes
+    assert not {"idx_sessions_status", "idx_messages_session_id"} & indexes
+    assert int(version) == DatabaseSchema.CURRENT_VERSION
@@ -0,0 +1,94 @@
+"""
+会话全文搜索测试
+
+测试FTS5索引的触发器同步、bm25排序与命中片段、keyset分页，以及短关键词回退。
+"""
+
+import sys
+import os
+import sqlite3
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.agent.persistence.connection_pool import close_connection_pools
+from gtplanner.agent.persistence.database_schema import initialize_database
+from gtplanner.agent.persistence.sqlite_session_manager import SQLiteSessionManager
+
+
+def _seed(manager):
+    """创建若干会话：标题命中、内容命中和不相关会话"""
+    ids = {}
+    ids["title"] = manager.create_new_session("用户登录系统设计")
+    manager.add_user_message("需要支持手机号验证码")
+
+    for i in range(5):
+        ids[f"content_{i}"] = manager.create_new_session(f"会话 {i}")
+        manager.add_user_message(f"第{i}个需求：做一个用户登录系统")
+
+    ids["other"] = manager.create_new_session("天气查询")
+    manager.add_user_message("weather app with city search")
+    return ids
+
+
+def test_fts_ranking_snippet_and_keyset_pagination(tmp_path):
+    """测试标题命中排在前面、返回片段，且分页结果不重复不遗漏"""
+    manager = SQLiteSessionManager(str(tmp_path / "search.db"))
+    try:
+        ids = _seed(manager)
+
+        first_page = manager.search_sessions("登录系统", limit=2)
+        assert first_page[0]["session_id"] == ids["title"]
+        assert "[登录系统]" in first_page[0]["snippet"]
+
+        seen = [s["session_id"] for s in first_page]
+        cursor = first_page[-1]["cursor"]
+        while True:
+            page = manager.search_sessions("登录系统", limit=2, after=cursor)
+            if not page:
+                break
+            seen.extend(s["session_id"] for s in page)
+            cursor = page[-1]["cursor"]
+
+        assert len(seen) == len(set(seen)) == 6
+        assert ids["other"] not in seen
+
+        # 触发器同步：更新标题后索引随之更新
+        manager.update_session_title("城市天气 weather", session_id=ids["other"])
+        assert [s["session_id"] for s in manager.search_sessions("城市天气")] == [ids["other"]]
+
+        hits = manager.dao.search_messages("weather", session_id=ids["other"])
+        assert len(hits) == 1 and hits[0]["snippet"].startswith("[weather] app")
+    finally:
+        close_connection_pools()
+
+
+def test_short_keyword_and_v2_migration(tmp_path):
+    """测试短关键词回退为LIKE扫描，以及旧数据库迁移时重建索引"""
+    db_path = str(tmp_path / "legacy.db")
+    initialize_database(db_path)
+
+    # 构造v2格式：没有全文索引，已有数据
+    with sqlite3.connect(db_path) as conn:
+        for table in ("messages", "sessions"):
+            for op in ("insert", "delete", "update"):
+                conn.execute(f"DROP TRIGGER {table}_fts_{op}")
+            conn.execute(f"DROP TABLE {table}_fts")
+        conn.execute("INSERT INTO sessions (session_id, title) VALUES ('s1', '旧会话')")
+        conn.execute("""
+            INSERT INTO messages (message_id, session_id, role, content)
+            VALUES ('m1', 's1', 'user', '历史消息里的支付网关')
+        """)
+        conn.execute("UPDATE database_metadata SET value = '2' WHERE key = 'schema_version'")
+
+    manager = SQLiteSessionManager(db_path)
+    try:
+        results = manager.search_sessions("支付网关")
+        assert [s["session_id"] for s in results] == ["s1"]
+        assert results[0]["snippet"] is not None
+
+        short = manager.search_sessions("支付")
+        assert [s["session_id"] for s in short] == ["s1"]
+        assert short[0]["rank"] is None
+    finally:
+        close_connection_pools()
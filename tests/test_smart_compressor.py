@@ -0,0 +1,104 @@
+"""
+增量压缩测试
+
+测试每次压缩只把检查点之后的新消息并入摘要、压缩期间追加的消息不丢失，
+以及工作协程池并行压缩多个会话且不修改前台会话状态。
+"""
+
+import sys
+import os
+import json
+import asyncio
+from types import SimpleNamespace
+import pytest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.agent.persistence.connection_pool import close_connection_pools
+from gtplanner.agent.persistence.smart_compressor import SmartCompressor, CompressionConfig
+from gtplanner.agent.persistence.sqlite_session_manager import SQLiteSessionManager
+
+
+class _FakeLLM:
+    """记录压缩提示词并返回固定格式结果的LLM"""
+
+    def __init__(self, on_call=None):
+        self.prompts = []
+        self.on_call = on_call
+
+    async def chat_completion(self, messages, **kwargs):
+        self.prompts.append(messages[0]["content"])
+        if self.on_call:
+            self.on_call()
+        await asyncio.sleep(0)
+        content = json.dumps({
+            "compressed_messages": [{"role": "assistant", "content": f"摘要{len(self.prompts)}"}],
+            "summary": f"摘要{len(self.prompts)}",
+            "key_decisions": [f"决策{len(self.prompts)}"]
+        }, ensure_ascii=False)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _compressor(manager, monkeypatch, **config):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    compressor = SmartCompressor(manager, CompressionConfig(preserve_recent_count=2, **config))
+    compressor.openai_client = _FakeLLM()
+    return compressor
+
+
+@pytest.mark.asyncio
+async def test_rolling_compression_folds_only_new_messages(tmp_path, monkeypatch):
+    """测试第二次压缩只发送上次的摘要和新增消息，压缩期间追加的消息保留在新版本中"""
+    manager = SQLiteSessionManager(str(tmp_path / "rolling.db"))
+    compressor = _compressor(manager, monkeypatch)
+    try:
+        session_id = manager.create_new_session("rolling")
+        manager.add_messages([{"role": "user", "content": f"第一批{i}"} for i in range(6)])
+        await compressor._execute_compression({"session_id": session_id})
+
+        compressor.openai_client.on_call = lambda: manager.add_user_message("压缩期间的新消息", session_id=session_id)
+        manager.add_messages([{"role": "user", "content": f"第二批{i}"} for i in range(4)])
+        await compressor._execute_compression({"session_id": session_id})
+
+        first_prompt, second_prompt = compressor.openai_client.prompts
+        assert "第一批0" in first_prompt and "第一批3" in first_prompt and "第一批4" not in first_prompt
+        assert "摘要1" in second_prompt and "第一批4" in second_prompt and "第二批1" in second_prompt
+        assert "第一批0" not in second_prompt and "第二批2" not in second_prompt
+
+        context = manager.dao.get_active_compressed_context(session_id)
+        contents = [m["content"] for m in context["compressed_messages"]]
+        assert contents == ["摘要2", "第二批2", "第二批3", "压缩期间的新消息"]
+        assert context["compression_version"] == 3
+        assert context["compressed_message_count"] == 4
+        assert context["key_decisions"] == ["决策2"]
+        assert len(manager.get_messages(session_id=session_id)) == 11  # 完整历史不受影响
+    finally:
+        close_connection_pools()
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_compresses_sessions_without_touching_foreground(tmp_path, monkeypatch):
+    """测试多个工作协程并行压缩不同会话，重复调度被忽略，前台当前会话不变"""
+    manager = SQLiteSessionManager(str(tmp_path / "pool.db"))
+    compressor = _compressor(manager, monkeypatch, max_messages=3, worker_count=2)
+    try:
+        sessions = []
+        for name in ("a", "b"):
+            sessions.append(manager.create_new_session(name))
+            manager.add_messages([{"role": "user", "content": f"{name}{i}"} for i in range(5)])
+        foreground = manager.create_new_session("前台")
+
+        await compressor.start()
+        for session_id in sessions + sessions:
+            await compressor.compress_if_needed(session_id)
+        await compressor.compress_if_needed(foreground)
+        await asyncio.wait_for(compressor.compression_queue.join(), timeout=5)
+        await compressor.stop()
+
+        assert len(compressor.openai_client.prompts) == 2
+        assert manager.current_session_id == foreground
+        for session_id in sessions:
+            assert manager.dao.get_active_compressed_context(session_id)["compression_version"] == 2
+    finally:
+        close_connection_pools()
@@ -0,0 +1,258 @@
+"""
+SQLite连接池测试
+
+测试连接复用、PRAGMA设置、并发写入和批量写入，并提供吞吐对比基准
+（逐次连接 / 连接池 / 批量写入）：
+
+    python tests/test_sqlite_pool.py
+"""
+
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.agent.persistence.connection_pool import SQLiteConnectionPool, close_connection_pools
+from gtplanner.agent.persistence.database_dao import DatabaseDAO
+from gtplanner.agent.persistence.database_schema import DatabaseSchema, migrate_database
+from gtplanner.agent.persistence.sqlite_session_manager import SQLiteSessionManager
+
+
+def test_pool_reuses_connections_with_tuned_pragmas(tmp_path):
+    """测试多次操作复用同一组连接，且连接上已设置WAL等PRAGMA"""
+    manager = SQLiteSessionManager(str(tmp_path / "pool.db"))
+    try:
+        session_id = manager.create_new_session("pool")
+        for i in range(20):
+            manager.add_user_message(f"消息 {i}")
+        assert len(manager.get_messages()) == 20
+
+        stats = manager.dao.pool.get_stats()
+        assert stats["connections_opened"] <= 1 + stats["max_readers"]
+
+        with manager.dao.transaction() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+        with manager.dao.get_connection() as conn:
+            assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+
+        context = manager.dao.get_active_compressed_context(session_id)
+        assert context["compressed_message_count"] == 20
+    finally:
+        close_connection_pools()
+
+
+def test_concurrent_writers_do_not_lose_updates(tmp_path):
+    """测试多线程同时写入同一会话时，消息和压缩上下文计数一致"""
+    manager = SQLiteSessionManager(str(tmp_path / "concurrent.db"))
+    try:
+        session_id = manager.create_new_session("concurrent")
+
+        def write(worker):
+            for i in range(10):
+                manager.add_user_message(f"{worker}-{i}", session_id=session_id)
+
+        threads = [threading.Thread(target=write, args=(w,)) for w in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert manager.dao.get_session(session_id)["total_messages"] == 40
+        context = manager.dao.get_active_compressed_context(session_id)
+        assert len(context["compressed_messages"]) == 40
+    finally:
+        close_connection_pools()
+
+
+def test_writer_rolls_back_on_error(tmp_path):
+    """测试写事务异常时回滚"""
+    db_path = str(tmp_path / "rollback.db")
+    DatabaseDAO(db_path)
+    pool = SQLiteConnectionPool(db_path)
+    try:
+        try:
+            with pool.writer() as conn:
+                conn.execute("INSERT INTO database_metadata (key, value) VALUES ('k', 'v')")
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+
+        with pool.reader() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM database_metadata WHERE key = 'k'").fetchone()[0] == 0
+    finally:
+        pool.close()
+        close_connection_pools()
+
+
+def test_add_messages_batch(tmp_path):
+    """测试批量写入保持顺序，消息表和压缩上下文计数一致"""
+    manager = SQLiteSessionManager(str(tmp_path / "batch.db"))
+    try:
+        session_id = manager.create_new_session("batch")
+        message_ids = manager.add_messages([
+            {"role": "user", "content": "设计一个待办应用"},
+            {"role": "assistant", "content": "", "tool_calls": [{"id": "call_1"}]},
+            {"role": "tool", "content": '{"result": "ok"}', "tool_call_id": "call_1"},
+            {"role": "assistant", "content": "完成"},
+        ])
+
+        assert len(message_ids) == 4
+        assert [m["message_id"] for m in manager.get_messages()] == message_ids
+
+        context = manager.dao.get_active_compressed_context(session_id)
+        assert [m["role"] for m in context["compressed_messages"]] == ["user", "assistant", "tool", "assistant"]
+        assert context["compressed_messages"][2]["tool_call_id"] == "call_1"
+        assert context["compressed_message_count"] == 4
+
+        session = manager.dao.get_session(session_id)
+        assert session["total_messages"] == 4
+        assert session["total_tokens"] == context["compressed_token_count"]
+    finally:
+        close_connection_pools()
+
+
+def test_add_messages_updates_session_once(tmp_path):
+    """测试批量写入只更新一次会话计数（不再由逐行触发器累加）"""
+    manager = SQLiteSessionManager(str(tmp_path / "batch_count.db"))
+    try:
+        session_id = manager.create_new_session("batch")
+        manager.add_messages([{"role": "user", "content": f"消息{i}"} for i in range(20)])
+
+        with manager.dao.get_connection() as conn:
+            triggers = {row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'messages'"
+            )}
+        assert "sessions_message_count_insert" not in triggers
+        session = manager.dao.get_session(session_id)
+        assert session["total_messages"] == 20
+        assert session["total_tokens"] == sum(
+            m["token_count"] for m in manager.dao.get_active_compressed_context(session_id)["compressed_messages"]
+        )
+    finally:
+        close_connection_pools()
+
+
+def test_migration_to_v6_drops_insert_count_trigger(tmp_path):
+    """测试从v5升级时删除逐行计数触发器，并按消息表校正计数"""
+    db_path = str(tmp_path / "v5.db")
+    manager = SQLiteSessionManager(db_path)
+    session_id = manager.create_new_session("v5")
+    manager.add_user_message("你好")
+    close_connection_pools()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE sessions SET total_messages = 7 WHERE session_id = ?", (session_id,))
+    conn.execute("""
+        CREATE TRIGGER sessions_message_count_insert AFTER INSERT ON messages FOR EACH ROW
+        BEGIN
+            UPDATE sessions SET total_messages = total_messages + 1 WHERE session_id = NEW.session_id;
+        END
+    """)
+    conn.execute("UPDATE database_metadata SET value = '5' WHERE key = 'schema_version'")
+    conn.commit()
+    conn.close()
+
+    assert migrate_database(db_path) == DatabaseSchema.CURRENT_VERSION
+    conn = sqlite3.connect(db_path)
+    triggers = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    total = conn.execute("SELECT total_messages FROM sessions WHERE session_id = ?", (session_id,)).fetchone()[0]
+    conn.close()
+    assert "sessions_message_count_insert" not in triggers
+    assert total == 1
+
+
+class _UnpooledDAO(DatabaseDAO):
+    """连接池引入前的行为：每次操作都重新打开连接"""
+
+    @contextmanager
+    def get_connection(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA foreign_keys = ON;")
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def transaction(self):
+        with self.get_connection() as conn:
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+
+def _benchmark(label, manager, messages=300):
+    """测量通过SQLiteSessionManager写入消息的吞吐"""
+    manager.create_new_session(label)
+    start = time.perf_counter()
+    for i in range(messages):
+        manager.add_user_message(f"benchmark message {i}")
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {messages / elapsed:>10.1f} 条消息/秒")
+
+
+def _turn_messages(turn):
+    """模拟一轮对话的结果：用户输入 + 5次工具调用 + 最终回复"""
+    messages = [{"role": "user", "content": f"第{turn}轮需求"}]
+    for i in range(5):
+        messages.append({"role": "assistant", "content": "", "tool_calls": [{"id": f"call_{turn}_{i}"}]})
+        messages.append({"role": "tool", "content": '{"result": "ok"}', "tool_call_id": f"call_{turn}_{i}"})
+    messages.append({"role": "assistant", "content": "本轮完成"})
+    return messages
+
+
+def _benchmark_turns(label, manager, save_turn, turns=50):
+    """测量按轮保存对话结果的吞吐"""
+    manager.create_new_session(label)
+    start = time.perf_counter()
+    for turn in range(turns):
+        save_turn(manager, _turn_messages(turn))
+    elapsed = time.perf_counter() - start
+    total = turns * len(_turn_messages(0))
+    print(f"{label:<12} {total / elapsed:>10.1f} 条消息/秒  {turns / elapsed:>8.1f} 轮/秒")
+
+
+def _save_one_by_one(manager, messages):
+    """每条消息单独提交"""
+    for msg in messages:
+        manager.add_messages([msg])
+
+
+def _save_batched(manager, messages):
+    """整轮消息一次提交"""
+    manager.add_messages(messages)
+
+
+def main():
+    """对比逐次连接、连接池和批量写入的消息写入吞吐"""
+    with tempfile.TemporaryDirectory() as tmp:
+        unpooled = SQLiteSessionManager(os.path.join(tmp, "unpooled.db"))
+        unpooled.dao = _UnpooledDAO(unpooled.dao.db_path)
+        _benchmark("逐次连接", unpooled)
+
+        pooled = SQLiteSessionManager(os.path.join(tmp, "pooled.db"))
+        _benchmark("连接池", pooled)
+        print(f"连接池统计: {pooled.dao.pool.get_stats()}")
+
+        print("== 每轮 12 条消息（5 次工具调用） ==")
+        _benchmark_turns("逐条提交", pooled, _save_one_by_one)
+        _benchmark_turns("批量提交", pooled, _save_batched)
+
+        close_connection_pools()
+
+
+if __name__ == "__main__":
+    main()
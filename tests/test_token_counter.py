@@ -0,0 +1,131 @@
+"""
+Token计数测试
+
+测试启发式估算、多模态与工具调用计数，以及写入时保存的token计数；
+并提供估算精度与速度的对比基准（安装tiktoken时以其为准计算误差）：
+
+    python tests/test_token_counter.py
+"""
+
+import sys
+import os
+import json
+import time
+import pytest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.agent.persistence.connection_pool import close_connection_pools
+from gtplanner.agent.persistence.sqlite_session_manager import SQLiteSessionManager
+from gtplanner.utils.token_counter import (
+    TokenCounter, estimate_tokens, count_message_tokens, TOKENS_PER_MESSAGE, IMAGE_TOKENS_LOW
+)
+
+SAMPLES = {
+    "中文": "我需要设计一个支持多用户协作的在线文档编辑系统，要求实时同步、版本历史和权限管理。",
+    "英文": "Design a collaborative document editor with real-time sync, version history and access control.",
+    "JSON": json.dumps({"prefabs": [{"id": f"prefab-{i}", "name": "文档解析", "score": 0.87} for i in range(5)]},
+                       ensure_ascii=False),
+    "混合": "使用 FastAPI + SQLite 实现 REST API，返回 JSON 格式的 session_id 和 token_count 字段。",
+}
+
+
+def test_heuristic_counts_and_message_overhead():
+    """测试启发式估算的量级，以及多模态内容和工具调用参数的计数"""
+    counter = TokenCounter(backend="heuristic")
+    assert counter.backend == "heuristic"
+
+    chinese = SAMPLES["中文"]
+    assert len(chinese) * 0.8 <= estimate_tokens(chinese) <= len(chinese) * 1.1
+    english_words = len(SAMPLES["英文"].split())
+    assert english_words <= estimate_tokens(SAMPLES["英文"]) <= english_words * 2
+    assert estimate_tokens("") == 0
+
+    multimodal = [
+        {"type": "text", "text": "分析这个架构图"},
+        {"type": "image_url", "image_url": {"url": "https://example.com/a.png", "detail": "low"}},
+    ]
+    assert counter.count(multimodal) == estimate_tokens("分析这个架构图") + IMAGE_TOKENS_LOW
+
+    arguments = json.dumps({"query": "文档解析", "limit": 5}, ensure_ascii=False)
+    message = {"role": "assistant", "content": "", "tool_calls": [
+        {"id": "call_1", "type": "function", "function": {"name": "search_prefabs", "arguments": arguments}}
+    ]}
+    assert counter.count_message(message) == (
+        TOKENS_PER_MESSAGE + estimate_tokens("search_prefabs") + estimate_tokens(arguments)
+    )
+
+
+def test_tiktoken_backend_accuracy():
+    """测试启发式估算与tiktoken精确计数的误差（未安装tiktoken时跳过）"""
+    pytest.importorskip("tiktoken")
+    try:
+        exact = TokenCounter(backend="tiktoken")
+    except Exception as e:
+        pytest.skip(f"tiktoken编码不可用: {e}")
+
+    for name, text in SAMPLES.items():
+        expected = exact.count(text)
+        assert abs(estimate_tokens(text) - expected) <= max(3, expected * 0.35), name
+
+
+def test_token_counts_stored_at_write_time(tmp_path):
+    """测试写入消息时保存token计数，会话统计和压缩上下文直接使用存储的计数"""
+    manager = SQLiteSessionManager(str(tmp_path / "tokens.db"))
+    try:
+        session_id = manager.create_new_session("tokens")
+        messages = [{"role": "user", "content": text} for text in SAMPLES.values()]
+        manager.add_messages(messages)
+
+        expected = [count_message_tokens(msg) for msg in messages]
+        assert [m["token_count"] for m in manager.get_messages()] == expected
+        assert manager.dao.get_session(session_id)["total_tokens"] == sum(expected)
+
+        context = manager.dao.get_active_compressed_context(session_id, include_messages=False)
+        assert context["compressed_token_count"] == sum(expected)
+    finally:
+        close_connection_pools()
+
+
+def _legacy_estimate(content):
+    """引入共享计数器之前的估算方式"""
+    chinese_chars = len([c for c in content if '一' <= c <= '鿿'])
+    english_words = len(content.replace('，', ' ').replace('。', ' ').split())
+    other_chars = len(content) - chinese_chars - sum(len(word) for word in content.split())
+    return int(chinese_chars + english_words + max(1, other_chars // 2))
+
+
+def _benchmark(label, func, texts, rounds=200):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            func(text)
+    elapsed = time.perf_counter() - start
+    total_chars = sum(len(t) for t in texts) * rounds
+    print(f"{label:<10} {total_chars / elapsed / 1e6:>8.2f} M字符/秒")
+
+
+def main():
+    """对比旧估算、启发式估算和tiktoken的速度与精度"""
+    texts = [text * 20 for text in SAMPLES.values()]
+    exact = None
+    try:
+        exact = TokenCounter(backend="tiktoken")
+    except Exception as e:
+        print(f"tiktoken不可用，跳过精度对比: {e}")
+
+    print("== 速度 ==")
+    _benchmark("旧估算", _legacy_estimate, texts)
+    _benchmark("启发式", estimate_tokens, texts)
+    if exact:
+        _benchmark("tiktoken", exact.count, texts)
+
+        print("== 相对tiktoken的误差 ==")
+        for name, text in SAMPLES.items():
+            expected = exact.count(text)
+            print(f"{name:<6} tiktoken={expected:>4}  启发式={estimate_tokens(text):>4}  旧估算={_legacy_estimate(text):>4}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+工具调用参数增量事件测试
+
+测试 orchestrator 在累积工具参数时实时推送 tool_call_arguments_delta 事件，
+以及 SSE 处理器对该事件的转发。
+"""
+
+import sys
+import os
+from types import SimpleNamespace
+import pytest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.agent.streaming.stream_types import (
+    StreamEventBuilder,
+    StreamEventType,
+    StreamCallbackType,
+    ToolCallArgumentsDelta
+)
+from gtplanner.agent.streaming.sse_handler import SSEStreamHandler
+from gtplanner.agent.flows.react_orchestrator_refactored.react_orchestrator_node import ReActOrchestratorNode
+
+
+def _tool_call_chunk(index, arguments, call_id=None, name=None):
+    """构造只包含工具调用增量的流式数据块"""
+    tool_call = SimpleNamespace(
+        index=index,
+        id=call_id,
+        function=SimpleNamespace(name=name, arguments=arguments)
+    )
+    delta = SimpleNamespace(content=None, tool_calls=[tool_call])
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+class _FakeOpenAIClient:
+    """返回预设数据块的假客户端"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def chat_completion_stream(self, **kwargs):
+        for chunk in self.chunks:
+            yield chunk
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_emits_arguments_delta():
+    """测试参数片段在流式累积时逐个推送"""
+    node = ReActOrchestratorNode.__new__(ReActOrchestratorNode)
+    node.available_tools = []
+    node.openai_client = _FakeOpenAIClient([
+        _tool_call_chunk(0, "", call_id="call_1", name="design"),
+        _tool_call_chunk(0, '{"user_requirements": '),
+        _tool_call_chunk(0, '"todo app"}'),
+    ])
+
+    deltas = []
+
+    async def on_delta(session, **kwargs):
+        deltas.append(kwargs)
+
+    content, tool_calls = await node._call_llm_with_streaming(
+        [], {"language": "en"}, None,
+        {StreamCallbackType.ON_TOOL_ARGUMENTS_DELTA: on_delta}
+    )
+
+    assert tool_calls[0]["function"]["arguments"] == '{"user_requirements": "todo app"}'
+    assert [d["delta"] for d in deltas] == ['{"user_requirements": ', '"todo app"}']
+    assert all(d["tool_name"] == "design" and d["call_id"] == "call_1" for d in deltas)
+    assert deltas[-1]["arguments_length"] == len(tool_calls[0]["function"]["arguments"])
+
+
+@pytest.mark.asyncio
+async def test_sse_handler_forwards_arguments_delta():
+    """测试 SSE 处理器转发参数增量事件"""
+    written = []
+
+    async def writer(data):
+        written.append(data)
+
+    handler = SSEStreamHandler(response_writer=writer, heartbeat_interval=0)
+    event = StreamEventBuilder.tool_call_arguments_delta(
+        "session-1",
+        ToolCallArgumentsDelta(tool_name="design", delta='{"a": 1', call_id="call_1", arguments_length=7)
+    )
+    await handler.handle_event(event)
+
+    assert event.event_type == StreamEventType.TOOL_CALL_ARGUMENTS_DELTA
+    assert len(written) == 1
+    assert written[0].startswith("event: tool_call_arguments_delta\n")
@@ -0,0 +1,174 @@
+"""
+工具结果缓存测试
+
+测试幂等工具结果的跨请求缓存、TTL 过期和命中率统计，以及按目录版本失效的预制件推荐缓存。
+"""
+
+import sys
+import os
+import dataclasses
+import json
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+import pytest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.agent.function_calling import agent_tools
+from gtplanner.agent.function_calling.tool_cache import (
+    DEFAULT_TOOL_CACHE_POLICIES, ToolCachePolicy, ToolResultCache
+)
+
+
+def test_cache_key_normalization():
+    """测试缓存键规范化：大小写和首尾空白不影响命中"""
+    cache = ToolResultCache()
+
+    key1 = cache.make_key("search_prefabs", {"query": " Redis ", "limit": 5})
+    key2 = cache.make_key("search_prefabs", {"query": "redis", "limit": 5})
+    key3 = cache.make_key("search_prefabs", {"query": "redis", "limit": 10})
+
+    assert key1 == key2
+    assert key1 != key3
+
+    # 非幂等工具不可缓存
+    assert cache.make_key("design", {"user_requirements": "x"}) is None
+
+
+def test_cache_ttl_and_stats():
+    """测试 TTL 过期和命中率统计"""
+    cache = ToolResultCache(policies={"search_prefabs": ToolCachePolicy(idempotent=True, ttl=0.0, key_fields=("query",))})
+    key = cache.make_key("search_prefabs", {"query": "redis"})
+
+    cache.put("search_prefabs", key, {"success": True, "result": {}})
+    assert cache.get("search_prefabs", key) is None  # ttl=0 立即过期
+
+    cache.set_policy("search_prefabs", ToolCachePolicy(idempotent=True, ttl=60.0, key_fields=("query",)))
+    cache.put("search_prefabs", key, {"success": True, "result": {"prefabs": []}})
+    assert cache.get("search_prefabs", key) == {"success": True, "result": {"prefabs": []}}
+
+    # 失败结果不缓存
+    failed_key = cache.make_key("search_prefabs", {"query": "missing"})
+    cache.put("search_prefabs", failed_key, {"success": False, "error": "boom"})
+    assert cache.get("search_prefabs", failed_key) is None
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["tools"]["search_prefabs"]["hit_rate"] == pytest.approx(1 / 3)
+
+
+@pytest.mark.asyncio
+async def test_execute_agent_tool_uses_cache():
+    """测试 execute_agent_tool 对幂等工具的缓存命中"""
+    cache = ToolResultCache()
+    mock_search = AsyncMock(return_value={"success": True, "result": {"prefabs": []}, "tool_name": "search_prefabs"})
+
+    with patch.object(agent_tools, "get_tool_result_cache", return_value=cache), \
+         patch.object(agent_tools, "_execute_search_prefabs", mock_search):
+        first = await agent_tools.execute_agent_tool("search_prefabs", {"query": "redis"}, {})
+        second = await agent_tools.execute_agent_tool("search_prefabs", {"query": "Redis"}, {})
+
+    assert mock_search.await_count == 1
+    assert "cache_hit" not in first
+    assert second["cache_hit"] is True
+    assert cache.get_stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_gateway_metadata_cached_only_for_pinned_versions():
+    """测试网关元数据只缓存指定版本，未指定版本或 latest 每次交给网关客户端重新验证"""
+    cache = ToolResultCache()
+    mock_list = AsyncMock(return_value={"success": True, "result": {"functions": []}})
+
+    for version in (None, "", "latest", " Latest "):
+        arguments = {"prefab_id": "llm-client", "function_name": "chat"}
+        if version is not None:
+            arguments["version"] = version
+        assert cache.make_key("list_prefab_functions", arguments) is None
+        assert cache.make_key("get_function_details", arguments) is None
+
+    with patch.object(agent_tools, "get_tool_result_cache", return_value=cache), \
+         patch.object(agent_tools, "_execute_list_prefab_functions", mock_list):
+        for _ in range(2):
+            await agent_tools.execute_agent_tool("list_prefab_functions", {"prefab_id": "llm-client"}, {})
+        assert mock_list.await_count == 2
+
+        await agent_tools.execute_agent_tool("list_prefab_functions", {"prefab_id": "llm-client", "version": "1.2.0"}, {})
+        hit = await agent_tools.execute_agent_tool("list_prefab_functions", {"prefab_id": "llm-client", "version": "1.2.0"}, {})
+        assert hit["cache_hit"] is True and mock_list.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_prefab_recommend_cache_scoped_to_catalog_version():
+    """测试推荐缓存：规范化查询和缺省参数命中同一条目，目录版本变化后失效，空推荐不缓存"""
+    version = {"value": "v1"}
+    cache = ToolResultCache(policies={"prefab_recommend": dataclasses.replace(
+        DEFAULT_TOOL_CACHE_POLICIES["prefab_recommend"], scope=lambda: version["value"])})
+    recommended = {"success": True, "result": {"recommended_prefabs": [{"id": "llm-client"}]},
+                   "tool_name": "prefab_recommend"}
+    mock_recommend = AsyncMock(return_value=recommended)
+
+    assert cache.make_key("prefab_recommend", {"query": "Redis  缓存"}) == cache.make_key(
+        "prefab_recommend", {"query": " redis 缓存", "top_k": 5, "use_llm_filter": True})
+    assert cache.make_key("prefab_recommend", {"query": "redis"}) != cache.make_key(
+        "prefab_recommend", {"query": "redis", "use_llm_filter": False})
+    assert cache.make_key("prefab_recommend", {"query": "redis"}) != cache.make_key(
+        "prefab_recommend", {"query": "redis", "min_score": 0.05})
+
+    with patch.object(agent_tools, "get_tool_result_cache", return_value=cache), \
+         patch.object(agent_tools, "_execute_prefab_recommend", mock_recommend):
+        await agent_tools.execute_agent_tool("prefab_recommend", {"query": "大模型 客户端"}, {})
+        hit = await agent_tools.execute_agent_tool("prefab_recommend", {"query": "大模型  客户端", "top_k": 5}, {})
+        assert hit["cache_hit"] is True and mock_recommend.await_count == 1
+
+        version["value"] = "v2"  # 目录更新
+        assert "cache_hit" not in await agent_tools.execute_agent_tool("prefab_recommend", {"query": "大模型 客户端"}, {})
+        assert mock_recommend.await_count == 2
+
+        mock_recommend.return_value = {"success": True, "result": {"recommended_prefabs": []}}
+        for _ in range(2):
+            await agent_tools.execute_agent_tool("prefab_recommend", {"query": "没有结果"}, {})
+        assert mock_recommend.await_count == 4
+
+
+def test_recommend_node_catalog_version_tracks_catalog_file(tmp_path, monkeypatch):
+    """测试推荐节点的目录版本随目录文件修改而变化"""
+    from gtplanner.agent.nodes import node_prefab_recommend
+    from gtplanner.agent.utils.prefab_vector_index import LocalVectorIndexLoader
+
+    # 只测试目录版本，不创建全局 OpenAI 客户端
+    monkeypatch.setattr(node_prefab_recommend, "get_openai_client", lambda: SimpleNamespace())
+    catalog = tmp_path / "community-prefabs.json"
+    catalog.write_text(json.dumps([]), encoding="utf-8")
+    node = node_prefab_recommend.NodePrefabRecommend()
+    node.vector_service_url = None
+    node.local_index = LocalVectorIndexLoader(catalog)
+
+    first = node.catalog_version()
+    assert first.startswith("auto-local:") and node.catalog_version() == first
+    os.utime(catalog, (time.time() + 10, time.time() + 10))
+    assert node.catalog_version() != first
+
+
+def test_recommend_node_catalog_version_does_not_probe_vector_service(tmp_path, monkeypatch):
+    """测试计算目录版本时不请求向量服务，只使用最近一次健康检查的结果"""
+    from gtplanner.agent.nodes import node_prefab_recommend
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("catalog_version 不应请求向量服务")
+
+    monkeypatch.setattr(node_prefab_recommend.requests, "get", no_network)
+    monkeypatch.setattr(node_prefab_recommend, "_vector_service_health_cache", {})
+    monkeypatch.setattr(node_prefab_recommend, "get_openai_client", lambda: SimpleNamespace())
+    node = node_prefab_recommend.NodePrefabRecommend()
+    node.backend = "auto"
+    node.vector_service_url = "http://vector.invalid"
+
+    assert node.catalog_version().startswith("auto-unknown:")
+    node_prefab_recommend._vector_service_health_cache["http://vector.invalid"] = (time.monotonic(), True)
+    assert node.catalog_version().startswith("auto-remote:")
+    node.backend = "remote"
+    assert node.catalog_version().startswith("remote:")
@@ -0,0 +1,119 @@
+"""
+网页结果磁盘缓存测试
+
+测试 JinaSearchClient.search_simple / JinaWebClient.get_page_info 的重复请求由磁盘缓存返回
+（查询词和 URL 规范化、页面压缩存储、并发请求合并、另一个 worker 打开同一数据库即可命中），
+以及过期、失败和空结果不缓存，查询状态不创建缓存数据库。
+"""
+
+import sys
+import os
+import asyncio
+import sqlite3
+from unittest.mock import AsyncMock
+
+import pytest
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gtplanner.agent.utils.search import JinaSearchClient
+from gtplanner.agent.utils.URL_to_Markdown import JinaWebClient
+from gtplanner.agent.utils import web_cache
+from gtplanner.agent.utils.web_cache import WebResultCache, get_web_cache_status, get_web_result_cache
+
+
+def _search_response(query):
+    return {"code": 200, "data": [
+        {"title": f"{query} 文档", "url": f"https://example.com/{query}", "description": "官方文档"}
+    ]}
+
+
+@pytest.fixture
+def cache_db(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "web_cache.db")
+    monkeypatch.setenv("GTPLANNER_WEB_CACHE_ENABLED", "true")
+    monkeypatch.setenv("GTPLANNER_WEB_CACHE_DB_PATH", db_path)
+    return db_path
+
+
+@pytest.mark.asyncio
+async def test_repeat_research_served_from_disk_cache(cache_db):
+    """测试重复搜索和页面获取不再调用外部服务，页面压缩存储，并可被其他 worker 共享"""
+    search_client = JinaSearchClient(api_key="test-key")
+
+    async def search(query, count=10, **kwargs):
+        await asyncio.sleep(0.02)
+        return _search_response(query.strip().lower())
+
+    search_client.search = AsyncMock(side_effect=search)
+    first = await search_client.search_simple("  FastAPI ", count=3)
+    assert await search_client.search_simple("fastapi", count=3) == first
+    results = await asyncio.gather(*(search_client.search_simple("Redis", count=3) for _ in range(5)))
+    assert all(r == results[0] for r in results)
+    assert search_client.search.await_count == 2  # FastAPI 一次，Redis 的并发请求合并为一次
+
+    web_client = JinaWebClient(api_key="test-key")
+    content = "# RAG\n\n" + "检索增强生成把检索结果放入提示词。\n" * 200
+    web_client.url_to_markdown = AsyncMock(return_value={"code": 200, "data": {
+        "title": "RAG", "description": "", "url": "https://example.com/rag", "content": content}})
+    page = await web_client.get_page_info("https://Example.com/rag/#intro")
+    assert (await web_client.get_page_info("https://example.com/rag"))["content"] == page["content"] == content
+    assert web_client.url_to_markdown.await_count == 1
+
+    with sqlite3.connect(cache_db) as conn:
+        codec, size = conn.execute(
+            "SELECT codec, length(value) FROM web_cache WHERE namespace = 'jina_page'").fetchone()
+    assert codec == "zlib" and size < len(content.encode("utf-8")) / 5
+
+    other_worker = WebResultCache(cache_db)
+    try:
+        key = other_worker.make_key("fastapi", 3)
+        assert other_worker.get("jina_search", key) == first
+    finally:
+        other_worker.close()
+
+    stats = get_web_result_cache().get_stats()
+    assert stats["namespaces"]["jina_search"]["hits"] == 1
+    assert stats["namespaces"]["jina_search"]["coalesced"] == 4
+    assert stats["namespaces"]["jina_page"]["hits"] == 1
+    assert stats["entries"] == 3
+
+
+@pytest.mark.asyncio
+async def test_expired_failed_and_empty_results_not_reused(tmp_path):
+    """测试过期条目视为未命中，异常和空结果不写入缓存"""
+    cache = WebResultCache(str(tmp_path / "web_cache.db"), ttls={"jina_search": 0})
+    fetch = AsyncMock(return_value=[{"title": "t", "url": "https://example.com"}])
+    try:
+        await cache.get_or_fetch("jina_search", "k", fetch)
+        await cache.get_or_fetch("jina_search", "k", fetch)
+        assert fetch.await_count == 2  # TTL 为 0，每次都重新请求
+
+        failing = AsyncMock(side_effect=Exception("Jina搜索API超时"))
+        with pytest.raises(Exception, match="超时"):
+            await cache.get_or_fetch("jina_page", "k", failing)
+        empty = AsyncMock(return_value=[])
+        await cache.get_or_fetch("jina_page", "e", empty, should_cache=bool)
+        await cache.get_or_fetch("jina_page", "e", empty, should_cache=bool)
+        assert empty.await_count == 2
+        assert cache.get_stats()["namespaces"]["jina_page"]["writes"] == 0
+    finally:
+        cache.close()
+
+
+def test_status_does_not_create_cache_database(cache_db, monkeypatch):
+    """测试缓存尚未使用时查询状态返回零统计，不创建数据库文件"""
+    monkeypatch.setattr(web_cache, "_web_result_cache", None)
+    status = get_web_cache_status()
+    assert status["enabled"] is True and status["initialized"] is False and status["hits"] == 0
+    assert not os.path.exists(cache_db)
+
+    cache = get_web_result_cache()
+    try:
+        assert os.path.exists(cache_db) and get_web_cache_status()["db_path"] == cache_db
+    finally:
+        cache.close()
+
+    monkeypatch.setenv("GTPLANNER_WEB_CACHE_ENABLED", "false")
+    assert get_web_cache_status() == {"enabled": False}